@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark del despacho de comandos MQTT con básculas simuladas.
+
+Ejecuta el servicio completo (ScaleTelemetryService.start) con miles de
+dispositivos "fake" y, en lugar del loop de red de paho, inyecta mensajes
+get_weight en ScaleMQTTClient._on_message y captura las publicaciones. Sin
+puertos seriales ni broker, el resultado mide solo el costo del despacho:
+parseo del comando, limitador, pool de lectura, armado y serialización de
+la respuesta.
+"""
+
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from argparse import ArgumentParser, Namespace
+from collections import defaultdict, deque
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from scale_telemetry.config import DeviceConfig, ServiceConfig  # noqa: E402
+from scale_telemetry.main import ScaleTelemetryService  # noqa: E402
+from scale_telemetry.mqtt_client import ScaleMQTTClient  # noqa: E402
+
+PUBLISHED = SimpleNamespace(rc=0)
+COMMAND = b'{"command": "get_weight"}'
+
+
+def measure_dispatch(
+    n_devices: int, messages: int, latency: float, error_rate: float
+) -> dict:
+    """Retorna throughput y latencias (mensaje -> publicación) del despacho."""
+    devices = [
+        DeviceConfig(
+            device_id=f"scale-{i}",
+            serial_port="",
+            source="fake",
+            fake={
+                "frames": [10.0, 10.5, 11.0],
+                "latency": latency,
+                "error_rate": error_rate,
+                "seed": i,
+            },
+        )
+        for i in range(n_devices)
+    ]
+    result = {}
+
+    def run(client: ScaleMQTTClient):
+        sent: dict[str, deque] = defaultdict(deque)
+        latencies: list[float] = []
+        lock = threading.Lock()
+        done = threading.Event()
+
+        def publish(topic, payload, qos=0, retain=False):
+            now = time.perf_counter()
+            device_id = topic.split("/")[2]
+            with lock:
+                latencies.append(now - sent[device_id].popleft())
+                if len(latencies) == messages:
+                    done.set()
+            return PUBLISHED
+
+        client.client.publish = publish
+        inbound = [
+            SimpleNamespace(topic=d.command_topic, payload=COMMAND) for d in devices
+        ]
+
+        t0 = time.perf_counter()
+        for k in range(messages):
+            msg = inbound[k % n_devices]
+            with lock:
+                sent[msg.topic.split("/")[2]].append(time.perf_counter())
+            client._on_message(None, None, msg)
+        done.wait(timeout=120)
+        elapsed = time.perf_counter() - t0
+
+        latencies.sort()
+        result.update(
+            throughput=len(latencies) / elapsed,
+            mean=statistics.fmean(latencies),
+            p50=latencies[len(latencies) // 2],
+            p99=latencies[int(len(latencies) * 0.99)],
+            threads=threading.active_count(),
+        )
+
+    with patch("scale_telemetry.main.load_devices", return_value=devices), \
+            patch.object(ScaleMQTTClient, "connect", lambda c: None), \
+            patch.object(ScaleMQTTClient, "start", run), \
+            patch("scale_telemetry.main.signal.signal"):
+        service = ScaleTelemetryService()
+        service.service_config = ServiceConfig()
+        service.start()
+    return result
+
+
+def build_parser() -> ArgumentParser:
+    parser = ArgumentParser(description="Benchmark del despacho de comandos.")
+    parser.add_argument(
+        "--devices", type=int, nargs="+", default=[100, 1000, 5000],
+        help="Cantidades de dispositivos simulados. Por defecto 100 1000 5000.",
+    )
+    parser.add_argument(
+        "--messages", type=int, default=20000,
+        help="Mensajes get_weight inyectados por medición. Por defecto 20000.",
+    )
+    parser.add_argument(
+        "--latency", type=float, nargs="+", default=[0.0, 0.005],
+        help="Latencia de lectura simulada (seg). Por defecto 0 0.005.",
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0,
+        help="Fracción de lecturas con trama inválida. Por defecto 0.",
+    )
+    return parser
+
+
+def parse_args(argv: list[str]) -> Namespace:
+    return build_parser().parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    """Función principal."""
+    args = parse_args(argv if argv is not None else sys.argv[1:])
+    logging.disable(logging.CRITICAL)
+
+    print("=== Benchmark de despacho ===\n")
+    print(
+        f"{'dispositivos':>12} {'latencia (ms)':>14} {'msg/s':>10} "
+        f"{'media (µs)':>11} {'p50 (µs)':>10} {'p99 (µs)':>10} {'hilos':>7}"
+    )
+    for n in args.devices:
+        for latency in args.latency:
+            r = measure_dispatch(n, args.messages, latency, args.error_rate)
+            print(
+                f"{n:>12} {latency * 1000:>14.1f} {r['throughput']:>10.0f} "
+                f"{r['mean'] * 1e6:>11.0f} {r['p50'] * 1e6:>10.0f} "
+                f"{r['p99'] * 1e6:>10.0f} {r['threads']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
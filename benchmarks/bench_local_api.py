@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latencia: API local (socket Unix) vs. MQTT.
+
+Ambos caminos usan el mismo ScaleMQTTClient real y su despacho por
+dispositivo (ScaleMQTTClient.dispatch) con lecturas simuladas. El camino MQTT
+publica el comando en un broker en proceso (tests/fake_broker.FakeBroker,
+WebSocket) y espera la respuesta; el local envía la petición por el socket
+Unix (LocalAPIServer) y lee la respuesta del mismo socket. Las peticiones se
+hacen de a una, de modo que se mide la latencia de ida y vuelta.
+"""
+
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from argparse import ArgumentParser, Namespace
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, ROOT)
+
+from scale_telemetry.config import DeviceConfig, MQTTConfig  # noqa: E402
+from scale_telemetry.local_api import LocalAPIClient, LocalAPIServer  # noqa: E402
+from scale_telemetry.mqtt_client import (  # noqa: E402
+    WILDCARD_COMMAND_TOPIC,
+    ScaleMQTTClient,
+)
+from tests.fake_broker import FakeBroker  # noqa: E402
+
+COMMAND = json.dumps({"command": "get_weight"}).encode()
+
+
+def percentiles(latencies: list[float]) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[int(len(latencies) * 0.99)],
+        "mean": sum(latencies) / len(latencies),
+    }
+
+
+def measure_mqtt(broker: FakeBroker, device: DeviceConfig, requests: int) -> dict:
+    response = threading.Event()
+    broker.subscribe(device.response_topic, lambda topic, payload, retain: response.set())
+    latencies = []
+    for _ in range(requests):
+        response.clear()
+        start = time.perf_counter()
+        broker.publish(device.command_topic, COMMAND, qos=1)
+        if not response.wait(timeout=5):
+            raise RuntimeError("Timeout esperando la respuesta MQTT")
+        latencies.append(time.perf_counter() - start)
+    return percentiles(latencies)
+
+
+def measure_local(path: str, device: DeviceConfig, requests: int) -> dict:
+    latencies = []
+    with LocalAPIClient(path) as client:
+        for _ in range(requests):
+            start = time.perf_counter()
+            client.request(device.device_id, "get_weight")
+            latencies.append(time.perf_counter() - start)
+    return percentiles(latencies)
+
+
+def build_parser() -> ArgumentParser:
+    parser = ArgumentParser(description="Benchmark API local vs. MQTT.")
+    parser.add_argument(
+        "--requests", type=int, default=2000,
+        help="Peticiones get_weight por camino. Por defecto 2000.",
+    )
+    parser.add_argument(
+        "--read-latency", type=float, default=0.0,
+        help="Latencia simulada de cada lectura (seg). Por defecto 0.",
+    )
+    return parser
+
+
+def parse_args(argv: list[str]) -> Namespace:
+    return build_parser().parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    """Función principal."""
+    args = parse_args(argv if argv is not None else sys.argv[1:])
+    logging.disable(logging.CRITICAL)
+    device = DeviceConfig(device_id="scale-1", serial_port="")
+
+    def read_weight():
+        if args.read_latency:
+            time.sleep(args.read_latency)
+        return 12.5
+
+    print("=== Benchmark API local (socket Unix) vs. MQTT ===\n")
+    with FakeBroker() as broker, tempfile.TemporaryDirectory() as tmp:
+        client = ScaleMQTTClient(
+            MQTTConfig(broker=broker.host, port=broker.port),
+            [device],
+            {device.device_id: read_weight},
+        )
+        client.connect()
+        client.client.loop_start()
+        if not broker.wait_for_subscription(WILDCARD_COMMAND_TOPIC):
+            raise RuntimeError("El cliente no se suscribió a los comandos")
+        path = os.path.join(tmp, "api.sock")
+        server = LocalAPIServer(path, client.dispatch)
+        server.start()
+        try:
+            results = {
+                "MQTT (WebSocket)": measure_mqtt(broker, device, args.requests),
+                "Socket Unix": measure_local(path, device, args.requests),
+            }
+        finally:
+            server.stop()
+            client.stop()
+
+    for name, r in results.items():
+        print(
+            f"{name:>17}: p50 {r['p50'] * 1e6:8.0f} µs, "
+            f"p99 {r['p99'] * 1e6:8.0f} µs, media {r['mean'] * 1e6:8.0f} µs"
+        )
+
+
+if __name__ == "__main__":
+    main()
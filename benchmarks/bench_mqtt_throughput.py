@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark end-to-end del cliente MQTT real contra un broker en proceso.
+
+Levanta tests/fake_broker.FakeBroker (MQTT 3.1.1 sobre WebSocket), conecta un
+ScaleMQTTClient real (paho, WebSocket, pool de lectura) y publica comandos
+get_weight desde el broker. Mide comandos/seg, el histograma de latencia
+comando -> respuesta y el CPU de proceso por mensaje (incluye el broker, que
+corre en el mismo proceso).
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from argparse import ArgumentParser, Namespace
+from bisect import bisect_left
+from collections import defaultdict, deque
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, ROOT)
+
+from scale_telemetry.config import DeviceConfig, MQTTConfig  # noqa: E402
+from scale_telemetry.mqtt_client import (  # noqa: E402
+    WILDCARD_COMMAND_TOPIC,
+    ScaleMQTTClient,
+)
+from tests.fake_broker import FakeBroker  # noqa: E402
+
+# Límites superiores de los buckets del histograma (seg)
+BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1]
+COMMAND = json.dumps({"command": "get_weight"}).encode()
+
+
+def measure(n_devices: int, commands: int, read_latency: float, rate: float) -> dict:
+    """Publica los comandos y retorna throughput, latencias y CPU por mensaje."""
+    devices = [
+        DeviceConfig(device_id=f"scale-{i}", serial_port="") for i in range(n_devices)
+    ]
+
+    def read_weight():
+        if read_latency:
+            time.sleep(read_latency)
+        return 12.5
+
+    with FakeBroker() as broker:
+        client = ScaleMQTTClient(
+            MQTTConfig(broker=broker.host, port=broker.port),
+            devices,
+            {d.device_id: read_weight for d in devices},
+        )
+        client.connect()
+        client.client.loop_start()
+        if not broker.wait_for_subscription(WILDCARD_COMMAND_TOPIC):
+            raise RuntimeError("El cliente no se suscribió a los comandos")
+
+        sent: dict[str, deque] = defaultdict(deque)
+        latencies: list[float] = []
+        lock = threading.Lock()
+        done = threading.Event()
+
+        def on_response(topic, payload, retain):
+            now = time.perf_counter()
+            with lock:
+                latencies.append(now - sent[topic.split("/")[2]].popleft())
+                if len(latencies) == commands:
+                    done.set()
+
+        broker.subscribe("pesanet/devices/+/response", on_response)
+        topics = [d.command_topic for d in devices]
+        interval = 1.0 / rate if rate else 0.0
+
+        cpu0 = time.process_time()
+        t0 = time.perf_counter()
+        for k in range(commands):
+            device_id = devices[k % n_devices].device_id
+            with lock:
+                sent[device_id].append(time.perf_counter())
+            broker.publish(topics[k % n_devices], COMMAND, qos=1)
+            if interval:
+                delay = t0 + (k + 1) * interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        completed = done.wait(timeout=60)
+        elapsed = time.perf_counter() - t0
+        cpu = time.process_time() - cpu0
+        client.stop()
+
+    latencies.sort()
+    histogram = [0] * (len(BUCKETS) + 1)
+    for latency in latencies:
+        histogram[bisect_left(BUCKETS, latency)] += 1
+    return {
+        "completed": completed,
+        "throughput": len(latencies) / elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[int(len(latencies) * 0.99)],
+        "cpu_per_msg": cpu / max(1, len(latencies)),
+        "histogram": histogram,
+    }
+
+
+def print_histogram(histogram: list[int]) -> None:
+    total = sum(histogram) or 1
+    labels = [f"<{b * 1000:g} ms" for b in BUCKETS] + [f">={BUCKETS[-1] * 1000:g} ms"]
+    for label, count in zip(labels, histogram):
+        bar = "#" * round(40 * count / total)
+        print(f"    {label:>12} {count:>7} {bar}")
+
+
+def build_parser() -> ArgumentParser:
+    parser = ArgumentParser(description="Benchmark MQTT end-to-end.")
+    parser.add_argument(
+        "--devices", type=int, nargs="+", default=[10, 500],
+        help="Cantidades de dispositivos. Por defecto 10 500.",
+    )
+    parser.add_argument(
+        "--commands", type=int, default=5000,
+        help="Comandos get_weight por medición. Por defecto 5000.",
+    )
+    parser.add_argument(
+        "--read-latency", type=float, default=0.0,
+        help="Latencia simulada de cada lectura (seg). Por defecto 0.",
+    )
+    parser.add_argument(
+        "--rate", type=float, default=0.0,
+        help="Comandos/seg a publicar (0 = tan rápido como sea posible).",
+    )
+    return parser
+
+
+def parse_args(argv: list[str]) -> Namespace:
+    return build_parser().parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    """Función principal."""
+    args = parse_args(argv if argv is not None else sys.argv[1:])
+    logging.disable(logging.CRITICAL)
+
+    print("=== Benchmark MQTT end-to-end (broker en proceso) ===\n")
+    for n in args.devices:
+        r = measure(n, args.commands, args.read_latency, args.rate)
+        status = "" if r["completed"] else "  (incompleto: timeout)"
+        print(
+            f"{n} dispositivos: {r['throughput']:.0f} comandos/s, "
+            f"p50 {r['p50'] * 1000:.2f} ms, p99 {r['p99'] * 1000:.2f} ms, "
+            f"CPU {r['cpu_per_msg'] * 1e6:.0f} µs/msg{status}"
+        )
+        print_histogram(r["histogram"])
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark del camino de lectura serial: pyserial vs lectura directa.
+
+Crea un PTY, escribe tramas de forma continua (como una báscula en modo
+streaming) y las decodifica con:
+
+- buffered: readline()/read_until() de pyserial + decode/strip/regex
+- direct: FrameDecoder (os.readv sobre un bytearray preasignado)
+
+Para cada modo reporta tramas/seg y memoria asignada transitoriamente por
+trama (pico de tracemalloc sobre la línea base, medido trama a trama).
+"""
+
+import os
+import pty
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import tty
+from argparse import ArgumentParser, Namespace
+
+import serial
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from scale_telemetry.frames import FrameDecoder  # noqa: E402
+from scale_telemetry.serial_reader import parse_standard  # noqa: E402
+
+FRAMES = {
+    "standard": b"  45.3 kg\n",
+    "padded": b'\x80\x02"0 000060000000\r',
+}
+
+
+def start_writer(master_fd: int, frame: bytes, stop: threading.Event):
+    """Escribe tramas al PTY hasta que se detiene el benchmark."""
+    chunk = frame * 64
+
+    def run():
+        while not stop.is_set():
+            try:
+                os.write(master_fd, chunk)
+            except OSError:
+                return
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def buffered_reader(port: str, weight_format: str):
+    """Camino actual: pyserial + decode + regex."""
+    conn = serial.Serial(port=port, baudrate=115200, timeout=1.0)
+    padded = re.compile(rb'"0 (\d{12})')
+
+    if weight_format == "padded":
+        def read_one() -> float:
+            raw = conn.read_until(b"\r")
+            match = padded.search(raw)
+            return float(int(match.group(1).decode("ascii")[:6])) if match else None
+    else:
+        def read_one() -> float:
+            line = conn.readline().decode("utf-8", errors="ignore").strip()
+            return parse_standard(line)
+
+    return read_one, conn.close
+
+
+def direct_reader(port: str, weight_format: str):
+    """Camino directo: FrameDecoder sobre el fd del puerto."""
+    conn = serial.Serial(port=port, baudrate=115200, timeout=1.0)
+    decoder = FrameDecoder(weight_format)
+    fd = conn.fileno()
+
+    def read_one() -> float:
+        weight = decoder.next_weight()
+        while weight is None:
+            decoder.fill_from_fd(fd)
+            weight = decoder.next_weight()
+        return weight
+
+    return read_one, conn.close
+
+
+def run_mode(mode: str, weight_format: str, frames: int) -> dict:
+    """Ejecuta un modo y retorna sus métricas."""
+    master_fd, slave_fd = pty.openpty()
+    tty.setraw(slave_fd)
+    port = os.ttyname(slave_fd)
+    stop = threading.Event()
+    start_writer(master_fd, FRAMES[weight_format], stop)
+
+    factory = buffered_reader if mode == "buffered" else direct_reader
+    read_one, close = factory(port, weight_format)
+    try:
+        # Calentamiento
+        for _ in range(100):
+            read_one()
+
+        start = time.perf_counter()
+        for _ in range(frames):
+            read_one()
+        elapsed = time.perf_counter() - start
+
+        # Memoria transitoria por trama (sobre una muestra)
+        sample = min(frames, 2000)
+        tracemalloc.start()
+        transient = 0
+        for _ in range(sample):
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            read_one()
+            _, peak = tracemalloc.get_traced_memory()
+            transient += peak - base
+        tracemalloc.stop()
+    finally:
+        stop.set()
+        close()
+        os.close(master_fd)
+        os.close(slave_fd)
+
+    return {
+        "mode": mode,
+        "fps": frames / elapsed,
+        "bytes_per_frame": transient / sample,
+    }
+
+
+def build_parser() -> ArgumentParser:
+    parser = ArgumentParser(description="Benchmark del camino de lectura serial.")
+    parser.add_argument(
+        "--format",
+        choices=sorted(FRAMES),
+        default="padded",
+        help="Formato de trama a simular. Por defecto padded.",
+    )
+    parser.add_argument(
+        "--frames",
+        type=int,
+        default=20000,
+        help="Tramas a decodificar por modo. Por defecto 20000.",
+    )
+    return parser
+
+
+def parse_args(argv: list[str]) -> Namespace:
+    return build_parser().parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    """Función principal."""
+    args = parse_args(argv if argv is not None else sys.argv[1:])
+    print(f"=== Benchmark lectura serial ({args.format}, {args.frames} tramas) ===\n")
+    print(f"{'modo':<10} {'tramas/s':>12} {'bytes/trama':>14}")
+    for mode in ("buffered", "direct"):
+        result = run_mode(mode, args.format, args.frames)
+        print(
+            f"{result['mode']:<10} {result['fps']:>12.0f} "
+            f"{result['bytes_per_frame']:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark del tiempo de inicio del servicio.
+
+Mide el tiempo desde ScaleTelemetryService.start() hasta que el loop MQTT
+arranca (momento en que se suscribe a los comandos) y hasta que terminan
+las aperturas de los puertos, con 1, 50 y 500 dispositivos. La apertura de puertos y la conexión al broker se simulan con
+latencias fijas; una fracción de los puertos simula adaptadores USB muertos
+que bloquean la apertura y luego fallan.
+
+Compara la apertura secuencial (CONNECT_WORKERS=1) con la paralela.
+También mide el costo de importar scale_telemetry.config.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from argparse import ArgumentParser, Namespace
+from unittest.mock import patch
+
+import serial
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, SRC)
+
+from scale_telemetry.config import DeviceConfig, ServiceConfig  # noqa: E402
+from scale_telemetry.main import ScaleTelemetryService  # noqa: E402
+from scale_telemetry.mqtt_client import ScaleMQTTClient  # noqa: E402
+from scale_telemetry.serial_reader import ScaleReader  # noqa: E402
+
+
+def measure_startup(
+    n_devices: int,
+    workers: int,
+    open_latency: float,
+    dead_ratio: float,
+    dead_latency: float,
+    mqtt_latency: float,
+) -> tuple[float, float]:
+    """Retorna los segundos hasta que arranca el loop MQTT y hasta que el servicio queda iniciado."""
+    devices = [
+        DeviceConfig(device_id=f"scale-{i}", serial_port=f"/dev/ttyBENCH{i}")
+        for i in range(n_devices)
+    ]
+    dead_every = int(1 / dead_ratio) if dead_ratio > 0 else 0
+
+    def fake_connect(reader):
+        index = int(reader.config.port.removeprefix("/dev/ttyBENCH"))
+        if dead_every and index % dead_every == 0:
+            time.sleep(dead_latency)
+            raise serial.SerialException("Adaptador no responde")
+        time.sleep(open_latency)
+
+    started = {}
+
+    def fake_loop(client):
+        started["at"] = time.perf_counter()
+
+    with patch("scale_telemetry.main.load_devices", return_value=devices), \
+            patch.object(ScaleReader, "connect", fake_connect), \
+            patch.object(
+                ScaleMQTTClient, "connect", lambda c: time.sleep(mqtt_latency)
+            ), \
+            patch.object(ScaleMQTTClient, "start", fake_loop), \
+            patch("scale_telemetry.main.signal.signal"):
+        service = ScaleTelemetryService()
+        service.service_config = ServiceConfig(
+            connect_timeout=3600, connect_workers=workers
+        )
+        t0 = time.perf_counter()
+        # start() bloquea hasta el cierre: se detiene apenas queda iniciado
+        thread = threading.Thread(target=service.start, daemon=True)
+        thread.start()
+        while not service.running:
+            time.sleep(0.001)
+        ready = time.perf_counter() - t0
+        service.stop()
+        thread.join()
+    return started["at"] - t0, ready
+
+
+def measure_import(module: str) -> float:
+    """Retorna los segundos que tarda importar un módulo en un proceso nuevo."""
+    code = (
+        "import time; t = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - t)"
+    )
+    env = dict(os.environ, PYTHONPATH=SRC)
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env,
+        check=True,
+    )
+    return float(out.stdout)
+
+
+def build_parser() -> ArgumentParser:
+    parser = ArgumentParser(description="Benchmark del tiempo de inicio.")
+    parser.add_argument(
+        "--devices", type=int, nargs="+", default=[1, 50, 500],
+        help="Cantidades de dispositivos a medir. Por defecto 1 50 500.",
+    )
+    parser.add_argument(
+        "--open-latency", type=float, default=0.02,
+        help="Segundos que tarda en abrir un puerto sano. Por defecto 0.02.",
+    )
+    parser.add_argument(
+        "--dead-ratio", type=float, default=0.1,
+        help="Fracción de adaptadores muertos. Por defecto 0.1.",
+    )
+    parser.add_argument(
+        "--dead-latency", type=float, default=0.5,
+        help="Segundos que bloquea un adaptador muerto. Por defecto 0.5.",
+    )
+    parser.add_argument(
+        "--mqtt-latency", type=float, default=0.2,
+        help="Segundos que tarda la conexión al broker. Por defecto 0.2.",
+    )
+    return parser
+
+
+def parse_args(argv: list[str]) -> Namespace:
+    return build_parser().parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    """Función principal."""
+    args = parse_args(argv if argv is not None else sys.argv[1:])
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    print("=== Benchmark de inicio ===\n")
+    print(f"import scale_telemetry.config: {measure_import('scale_telemetry.config') * 1000:.1f} ms")
+    print(f"import scale_telemetry.main:   {measure_import('scale_telemetry.main') * 1000:.1f} ms\n")
+
+    print(
+        f"{'dispositivos':>12} {'suscripción (s)':>16} "
+        f"{'secuencial (s)':>16} {'paralelo (s)':>14}"
+    )
+    for n in args.devices:
+        timings = [
+            measure_startup(
+                n, workers, args.open_latency, args.dead_ratio,
+                args.dead_latency, args.mqtt_latency,
+            )
+            for workers in (1, ServiceConfig().connect_workers)
+        ]
+        subscribed = max(loop for loop, _ in timings)
+        print(
+            f"{n:>12} {subscribed:>16.2f} "
+            f"{timings[0][1]:>16.2f} {timings[1][1]:>14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
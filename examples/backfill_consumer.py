@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Consumidor de backfill: recibe los chunks comprimidos que el gateway publica
+al reconectar, los decodifica, los agrega a un CSV y confirma cada chunk.
+
+Es también el decodificador de referencia del formato (ver
+src/scale_telemetry/backfill.py); solo usa la biblioteca estándar y
+paho-mqtt, para poder copiarlo al lado de la nube.
+"""
+
+import csv
+import json
+import sys
+import zlib
+
+import paho.mqtt.client as mqtt
+
+BACKFILL_TOPIC = "pesanet/devices/+/backfill"
+ENCODING = "delta-varint-zlib"
+
+
+def _get_varint(data: bytes, pos: int):
+    """Entero zigzag varint (LEB128) en data[pos:]; retorna (valor, nueva posición)."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+    return (value >> 1) ^ -(value & 1), pos
+
+
+def decode_chunk(payload: bytes):
+    """
+    Decodifica un chunk de backfill.
+
+    Returns:
+        (encabezado, [(timestamp ms, peso kg), ...])
+    """
+    raw_header, compressed = payload.split(b"\n", 1)
+    header = json.loads(raw_header)
+    if header["encoding"] != ENCODING:
+        raise ValueError(f"Codificación no soportada: {header['encoding']}")
+    body = zlib.decompress(compressed)
+
+    records = []
+    pos = ts = weight = 0
+    for _ in range(header["count"]):
+        delta_ts, pos = _get_varint(body, pos)
+        delta_weight, pos = _get_varint(body, pos)
+        ts += delta_ts
+        weight += delta_weight
+        records.append((ts, weight / header["scale"]))
+    return header, records
+
+
+class BackfillConsumer:
+    """Cliente MQTT que guarda los chunks de backfill en un CSV."""
+
+    def __init__(self, broker="localhost", port=1883, output="backfill.csv"):
+        """
+        Inicializa el consumidor.
+
+        Args:
+            broker: Dirección del broker MQTT
+            port: Puerto del broker
+            output: CSV donde se agregan las lecturas recibidas
+        """
+        self.broker = broker
+        self.port = port
+        self.output = output
+        self.client = mqtt.Client(client_id="backfill-consumer")
+        self.client.on_connect = self._on_connect
+        self.client.on_message = self._on_message
+
+    def _on_connect(self, client, userdata, flags, rc):
+        """Callback de conexión."""
+        if rc == 0:
+            print(f"✅ Conectado al broker MQTT en {self.broker}:{self.port}")
+            client.subscribe(BACKFILL_TOPIC, qos=1)
+            print(f"✅ Suscrito a: {BACKFILL_TOPIC}\n")
+        else:
+            print(f"❌ Error al conectar, código: {rc}")
+            sys.exit(1)
+
+    def _on_message(self, client, userdata, msg):
+        """Decodifica un chunk, lo guarda y lo confirma."""
+        try:
+            header, records = decode_chunk(msg.payload)
+        except (ValueError, KeyError, zlib.error) as e:
+            print(f"❌ Chunk inválido en {msg.topic}: {e}")
+            return
+
+        # Las reentregas de un chunk ya guardado se confirman de nuevo; un
+        # consumidor real deduplicaría por (deviceId, chunk)
+        with open(self.output, "a", newline="") as f:
+            writer = csv.writer(f)
+            for ts, weight in records:
+                writer.writerow((ts, header["deviceId"], weight))
+
+        client.publish(f"{msg.topic}/ack", json.dumps({"chunk": header["chunk"]}), qos=1)
+        print(
+            f"📦 {header['deviceId']}: chunk {header['chunk']} con {header['count']} "
+            f"lecturas ({len(msg.payload)} bytes), confirmado"
+        )
+
+    def run(self):
+        """Atiende chunks hasta Ctrl+C."""
+        self.client.connect(self.broker, self.port, keepalive=60)
+        try:
+            self.client.loop_forever()
+        except KeyboardInterrupt:
+            self.client.disconnect()
+
+
+def main():
+    """Función principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Consumidor de backfill")
+    parser.add_argument("--broker", default="localhost", help="Broker MQTT")
+    parser.add_argument("--port", type=int, default=1883, help="Puerto del broker")
+    parser.add_argument("--output", default="backfill.csv", help="CSV de salida")
+    args = parser.parse_args()
+
+    BackfillConsumer(args.broker, args.port, args.output).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,27 @@
 """Sistema de telemetría para básculas con MQTT."""
 
-from .config import MQTTConfig, SerialConfig
-from .main import ScaleTelemetryService, main
-from .mqtt_client import ScaleMQTTClient
-from .serial_reader import ScaleReader
+import importlib
 
 __version__ = "0.1.0"
 
-__all__ = [
-    "MQTTConfig",
-    "SerialConfig",
-    "ScaleTelemetryService",
-    "ScaleMQTTClient",
-    "ScaleReader",
-    "main",
-]
+# Las exportaciones se importan al primer acceso para que importar un
+# submódulo (p. ej. scale_telemetry.config) no cargue paho ni pyserial.
+_EXPORTS = {
+    "MQTTConfig": ".config",
+    "SerialConfig": ".config",
+    "ScaleTelemetryService": ".main",
+    "ScaleMQTTClient": ".mqtt_client",
+    "ScaleReader": ".serial_reader",
+    "main": ".main",
+}
 
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,107 @@
+"""
+Timeouts de lectura aprendidos de la cadencia de cada báscula.
+
+Con un timeout fijo, una báscula sana a 10 Hz nunca necesita más de ~150 ms,
+pero una báscula muda bloquea un hilo de lectura hasta timeout × intentos.
+AdaptiveTimeout estima en línea cuánto tarda en llegar una trama válida
+(media y desvío suavizados, como el RTO de TCP en RFC 6298) y deriva:
+
+    timeout por intento = media + 4 × desvío, acotado a [mínimo, máximo]
+    presupuesto de timeouts = 1 intento una vez aprendido (las tramas
+        inválidas siguen contando hasta el máximo de intentos del formato)
+
+Cada lectura fallida por timeout duplica el timeout (hasta el máximo) y la
+siguiente lectura exitosa vuelve al valor aprendido, de modo que una
+báscula que se volvió más lenta no queda fallando indefinidamente.
+"""
+
+from typing import Optional
+
+# Ganancias de la media y del desvío (RFC 6298)
+ALPHA = 0.125
+BETA = 0.25
+# Desvíos sobre la media que se toleran antes de declarar timeout
+K = 4.0
+# Lecturas exitosas antes de usar el timeout aprendido
+WARMUP_SAMPLES = 5
+MAX_BACKOFF = 64
+
+
+class AdaptiveTimeout:
+    """Estimador del timeout de lectura de un dispositivo."""
+
+    def __init__(
+        self,
+        min_timeout: float,
+        max_timeout: float,
+        warmup: int = WARMUP_SAMPLES,
+    ):
+        """
+        Inicializa el estimador.
+
+        Args:
+            min_timeout: Cota inferior del timeout aprendido (seg)
+            max_timeout: Cota superior; es el timeout mientras no hay
+                suficientes muestras (seg)
+            warmup: Lecturas exitosas antes de usar el timeout aprendido
+
+        Raises:
+            ValueError: Si las cotas son inválidas
+        """
+        if not 0 < min_timeout <= max_timeout:
+            raise ValueError(
+                f"Cotas de timeout inválidas: mínimo {min_timeout}, máximo {max_timeout}"
+            )
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.warmup = warmup
+        self.interval: Optional[float] = None
+        self.jitter = 0.0
+        self.samples = 0
+        self.failures = 0
+        self._backoff = 1
+
+    @property
+    def learned(self) -> bool:
+        return self.samples >= self.warmup
+
+    @property
+    def timeout(self) -> float:
+        """Timeout por intento de lectura (seg)."""
+        # Sin muestras (warmup 0) todavía no hay intervalo aprendido
+        if not self.learned or self.interval is None:
+            return self.max_timeout
+        learned = max(self.min_timeout, self.interval + K * self.jitter)
+        return min(self.max_timeout, learned * self._backoff)
+
+    def timeout_budget(self, max_attempts: int) -> int:
+        """Intentos que pueden terminar en timeout antes de fallar la lectura."""
+        return 1 if self.learned else max_attempts
+
+    def observe(self, wait: float) -> None:
+        """Registra la espera (seg) hasta una trama válida."""
+        if self.interval is None:
+            self.interval = wait
+            self.jitter = wait / 2
+        else:
+            self.jitter += BETA * (abs(self.interval - wait) - self.jitter)
+            self.interval += ALPHA * (wait - self.interval)
+        self.samples += 1
+        self._backoff = 1
+
+    def failure(self) -> None:
+        """Registra una lectura sin trama dentro del timeout."""
+        self.failures += 1
+        if self.learned:
+            self._backoff = min(self._backoff * 2, MAX_BACKOFF)
+
+    def snapshot(self) -> dict:
+        """Valores aprendidos, para inspección (/readyz)."""
+        return {
+            "learned": self.learned,
+            "interval": None if self.interval is None else round(self.interval, 4),
+            "jitter": round(self.jitter, 4),
+            "timeout": round(self.timeout, 4),
+            "samples": self.samples,
+            "failures": self.failures,
+        }
@@ -0,0 +1,217 @@
+"""
+Alarmas de umbral y duración evaluadas en el gateway sobre el flujo de muestras.
+
+Cada regla de devices.json se compila a un predicado sobre el peso y se
+evalúa incrementalmente en cada lectura válida (costo O(1) por regla). Solo
+se publican las transiciones: "active" cuando la condición se cumplió
+durante duration segundos seguidos y "cleared" cuando deja de cumplirse
+(con histéresis, para que el ruido en el umbral no genere ráfagas).
+
+    [{"name": "overload", "above": 30000},
+     {"name": "underfill", "above": 10, "below": 950, "duration": 30},
+     {"name": "left_on_platform", "above": 10, "duration": 600}]
+"""
+
+import math
+import threading
+import time
+from typing import Any, Callable, Optional
+
+ACTIVE = "active"
+CLEARED = "cleared"
+
+
+def _compile(above: Optional[float], below: Optional[float]) -> Callable[[float], bool]:
+    """Predicado weight → bool sin comprobaciones de None por muestra."""
+    if above is not None and below is not None:
+        low, high = above, below
+        return lambda weight: low <= weight < high
+    if above is not None:
+        low = above
+        return lambda weight: weight >= low
+    if below is not None:
+        high = below
+        return lambda weight: weight < high
+    raise ValueError("Se necesita 'above' o 'below'")
+
+
+def _number(name: str, field: str, value: Any) -> float:
+    """Convierte un parámetro de la regla a float."""
+    if isinstance(value, bool):
+        raise ValueError(f"'{field}' de la alarma '{name}' debe ser numérico: {value!r}")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(
+            f"'{field}' de la alarma '{name}' debe ser numérico: {value!r}"
+        ) from None
+    if math.isnan(number):
+        raise ValueError(f"'{field}' de la alarma '{name}' no puede ser NaN")
+    return number
+
+
+class AlarmRule:
+    """
+    Una regla de alarma: la condición es above <= peso < below (cualquiera
+    de las dos cotas puede omitirse). Se activa cuando la condición se
+    cumple durante duration segundos y se despeja cuando el peso sale del
+    rango ampliado en hysteresis kg.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        above: Optional[float] = None,
+        below: Optional[float] = None,
+        duration: float = 0.0,
+        hysteresis: float = 0.0,
+    ):
+        """
+        Inicializa y compila la regla.
+
+        Args:
+            name: Nombre de la alarma (se incluye en cada transición)
+            above: Peso (kg) a partir del cual se cumple la condición
+            below: Peso (kg) por debajo del cual se cumple la condición
+            duration: Segundos seguidos que debe cumplirse para activarse
+            hysteresis: Margen (kg) que el peso debe salir del rango para
+                despejar una alarma activa
+
+        Raises:
+            ValueError: Si los parámetros son inválidos
+        """
+        # Se validan aquí, al iniciar: un valor no numérico evaluado en cada
+        # muestra haría fallar todas las lecturas del dispositivo
+        above = None if above is None else _number(name, "above", above)
+        below = None if below is None else _number(name, "below", below)
+        duration = _number(name, "duration", duration)
+        hysteresis = _number(name, "hysteresis", hysteresis)
+        if above is None and below is None:
+            raise ValueError(f"La alarma '{name}' necesita 'above' o 'below'")
+        if above is not None and below is not None and above >= below:
+            raise ValueError(
+                f"La alarma '{name}' tiene un rango vacío: above {above} >= below {below}"
+            )
+        if duration < 0 or hysteresis < 0:
+            raise ValueError(
+                f"duration e hysteresis de la alarma '{name}' no pueden ser negativos"
+            )
+        self.name = name
+        self.above = above
+        self.below = below
+        self.duration = duration
+        self.hysteresis = hysteresis
+        self._raise = _compile(above, below)
+        self._hold = _compile(
+            None if above is None else above - hysteresis,
+            None if below is None else below + hysteresis,
+        )
+        self.active = False
+        self._since: Optional[float] = None
+
+    def update(self, weight: float, now: float) -> Optional[dict]:
+        """
+        Evalúa una muestra.
+
+        Returns:
+            La transición (sin deviceId) si la muestra activó o despejó la
+            alarma, o None
+        """
+        if self.active:
+            if self._hold(weight):
+                return None
+            since, self._since = self._since, None
+            self.active = False
+            return self._transition(CLEARED, weight, now, now if since is None else since)
+
+        if not self._raise(weight):
+            self._since = None
+            return None
+        if self._since is None:
+            self._since = now
+        if now - self._since < self.duration:
+            return None
+        self.active = True
+        return self._transition(ACTIVE, weight, now, self._since)
+
+    def _transition(self, state: str, weight: float, now: float, since: float) -> dict:
+        return {
+            "alarm": self.name,
+            "state": state,
+            "weight": round(weight, 3),
+            "since": int(since * 1000),
+            "duration": round(now - since, 3),
+            "timestamp": int(now * 1000),
+        }
+
+
+class AlarmEngine:
+    """
+    Reglas de alarma de un dispositivo. Es seguro alimentarlo desde varios
+    hilos (lecturas periódicas y comandos).
+    """
+
+    def __init__(self, device_id: str, rules: list[AlarmRule]):
+        """
+        Inicializa el motor.
+
+        Args:
+            device_id: ID del dispositivo (se incluye en cada transición)
+            rules: Reglas compiladas
+
+        Raises:
+            ValueError: Si hay nombres de alarma repetidos
+        """
+        names = [rule.name for rule in rules]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Nombres de alarma repetidos en {device_id}: {names}")
+        self.device_id = device_id
+        self.rules = rules
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, device_id: str, specs: list[dict[str, Any]]) -> "AlarmEngine":
+        """
+        Construye el motor desde devices.json.
+
+        Raises:
+            ValueError: Si una regla o sus parámetros no son válidos
+        """
+        rules = []
+        for spec in specs:
+            params = dict(spec)
+            name = params.pop("name", None)
+            if not name:
+                raise ValueError(f"Alarma sin 'name' en {device_id}: {spec}")
+            try:
+                rules.append(AlarmRule(name, **params))
+            except TypeError as e:
+                raise ValueError(
+                    f"Parámetros inválidos para la alarma '{name}' de {device_id}: {e}"
+                ) from e
+        return cls(device_id, rules)
+
+    @property
+    def active(self) -> list[str]:
+        """Nombres de las alarmas activas."""
+        return [rule.name for rule in self.rules if rule.active]
+
+    def update(self, weight: float, timestamp: Optional[float] = None) -> list[dict]:
+        """
+        Evalúa todas las reglas con una muestra.
+
+        Args:
+            weight: Peso en kilogramos
+            timestamp: Instante de la muestra (time.time(); por defecto, ahora)
+
+        Returns:
+            Las transiciones producidas por la muestra (normalmente ninguna)
+        """
+        now = time.time() if timestamp is None else timestamp
+        transitions = []
+        with self._lock:
+            for rule in self.rules:
+                transition = rule.update(weight, now)
+                if transition is not None:
+                    transitions.append({"deviceId": self.device_id, **transition})
+        return transitions
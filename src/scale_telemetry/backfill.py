@@ -0,0 +1,405 @@
+"""
+Backfill comprimido de las lecturas tomadas sin conexión al broker.
+
+Mientras MQTT está caído, cada lectura procesada se guarda en un archivo
+por dispositivo en BACKFILL_DIR (16 bytes por lectura). Al reconectar, el
+historial se publica en pocos mensajes grandes en lugar de miles de
+mensajes QoS 1: chunks de hasta BACKFILL_CHUNK_SIZE lecturas en
+pesanet/devices/<id>/backfill, cada uno confirmado por el consumidor en
+pesanet/devices/<id>/backfill/ack con {"chunk": <id>}. El avance
+confirmado se persiste, de modo que un corte durante el backfill (o un
+reinicio) retoma desde el último chunk confirmado.
+
+El id de un chunk es la posición absoluta de su primera lectura en el
+historial del dispositivo; la numeración continúa entre desconexiones, de
+modo que (deviceId, chunk) identifica un chunk de forma única.
+
+Formato de un chunk (payload binario):
+
+    <encabezado JSON>\\n<cuerpo zlib>
+
+    encabezado: {"deviceId", "chunk", "count", "start", "end", "scale",
+                 "encoding": "delta-varint-zlib"}
+    cuerpo:     por lectura, la diferencia con la anterior del timestamp
+                (ms) y del peso (en 1/scale kg), cada una como entero
+                zigzag varint (LEB128); la primera diferencia es contra 0
+
+El decodificador de referencia está en examples/backfill_consumer.py.
+"""
+
+import json
+import logging
+import os
+import struct
+import threading
+import urllib.parse
+import zlib
+from collections import defaultdict
+from typing import Callable, Optional
+
+from .sinks import DROP_NEWEST, Reading, Sink
+
+logger = logging.getLogger(__name__)
+
+# Lectura en el archivo de historial: timestamp (ms) y peso (kg)
+RECORD = struct.Struct("<qd")
+ENCODING = "delta-varint-zlib"
+# Resolución del peso en los chunks: 1/SCALE kg (gramos)
+SCALE = 1000
+
+
+def _put_varint(out: bytearray, value: int) -> None:
+    # Zigzag: los enteros con signo pequeños ocupan pocos bytes
+    value = value << 1 if value >= 0 else (-value << 1) - 1
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(data: bytes, pos: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+    return (value >> 1) ^ -(value & 1), pos
+
+
+def encode_chunk(
+    device_id: str,
+    chunk: int,
+    records: list[tuple[int, float]],
+    scale: int = SCALE,
+) -> bytes:
+    """
+    Empaqueta lecturas consecutivas de un dispositivo.
+
+    Args:
+        device_id: ID del dispositivo
+        chunk: Identificador del chunk (posición de la primera lectura)
+        records: (timestamp ms, peso kg) en orden de llegada
+        scale: Resolución del peso (1/scale kg)
+
+    Returns:
+        Payload del chunk
+    """
+    body = bytearray()
+    last_ts = last_weight = 0
+    for ts, weight in records:
+        quantized = round(weight * scale)
+        _put_varint(body, ts - last_ts)
+        _put_varint(body, quantized - last_weight)
+        last_ts, last_weight = ts, quantized
+    header = {
+        "deviceId": device_id,
+        "chunk": chunk,
+        "count": len(records),
+        "start": records[0][0] if records else None,
+        "end": records[-1][0] if records else None,
+        "scale": scale,
+        "encoding": ENCODING,
+    }
+    return json.dumps(header).encode("utf-8") + b"\n" + zlib.compress(bytes(body), 9)
+
+
+def decode_chunk(payload: bytes) -> tuple[dict, list[tuple[int, float]]]:
+    """
+    Decodifica un chunk.
+
+    Returns:
+        (encabezado, [(timestamp ms, peso kg), ...])
+
+    Raises:
+        ValueError: Si el payload no es un chunk válido
+    """
+    try:
+        raw_header, compressed = payload.split(b"\n", 1)
+        header = json.loads(raw_header)
+        body = zlib.decompress(compressed)
+    except (ValueError, zlib.error) as e:
+        raise ValueError(f"Chunk de backfill inválido: {e}") from e
+    if header.get("encoding") != ENCODING:
+        raise ValueError(f"Codificación de backfill no soportada: {header.get('encoding')}")
+
+    scale = header["scale"]
+    records = []
+    pos = ts = weight = 0
+    try:
+        for _ in range(header["count"]):
+            delta_ts, pos = _get_varint(body, pos)
+            delta_weight, pos = _get_varint(body, pos)
+            ts += delta_ts
+            weight += delta_weight
+            records.append((ts, weight / scale))
+    except IndexError as e:
+        raise ValueError("Chunk de backfill truncado") from e
+    return header, records
+
+
+class HistoryStore(Sink):
+    """
+    Historial local de lecturas por dispositivo, con el avance confirmado
+    del backfill. Es una salida más (ver sinks.py): las lecturas se encolan
+    sin bloquear y un hilo propio las agrega a disco por lotes.
+
+        <directorio>/<device_id>.bin   lecturas (RECORD), solo agregado
+        <directorio>/<device_id>.ack   "<confirmadas> <base>": posiciones
+                                       absolutas; base es la posición de la
+                                       primera lectura de .bin
+
+    Las posiciones de read() y ack() son absolutas: al confirmarse todo, el
+    .bin se borra pero el .ack se conserva para que la numeración continúe.
+    """
+
+    type = "history"
+
+    def __init__(self, directory: str, max_records: int = 1_000_000, **kwargs):
+        """
+        Args:
+            directory: Directorio del historial
+            max_records: Lecturas sin confirmar por dispositivo como máximo;
+                las que llegan con el historial lleno se descartan
+            **kwargs: Parámetros de buffer, ver Sink
+        """
+        kwargs.setdefault("overflow", DROP_NEWEST)
+        super().__init__(**kwargs)
+        self.directory = directory
+        self.max_records = max_records
+        # Protege los archivos entre el hilo de escritura y el backfill
+        self._files_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, device_id: str, suffix: str) -> str:
+        name = urllib.parse.quote(device_id, safe="")
+        return os.path.join(self.directory, f"{name}{suffix}")
+
+    def write_batch(self, readings: list[Reading]) -> None:
+        by_device: dict[str, list[Reading]] = defaultdict(list)
+        for r in readings:
+            by_device[r.device_id].append(r)
+        with self._files_lock:
+            for device_id, device_readings in by_device.items():
+                path = self._path(device_id, ".bin")
+                base, acked = self._position(device_id)
+                room = self.max_records - (self._stored(path) - (acked - base))
+                if room < len(device_readings):
+                    self.dropped += len(device_readings) - max(room, 0)
+                    logger.warning(
+                        f"Historial de {device_id} lleno ({self.max_records} lecturas): "
+                        f"se descartan las nuevas"
+                    )
+                    device_readings = device_readings[:max(room, 0)]
+                with open(path, "ab") as f:
+                    f.write(b"".join(
+                        RECORD.pack(r.timestamp_ms, r.weight) for r in device_readings
+                    ))
+
+    def devices(self) -> list[str]:
+        """Dispositivos con lecturas guardadas."""
+        with self._files_lock:
+            names = os.listdir(self.directory)
+        return sorted(
+            urllib.parse.unquote(name[:-4]) for name in names if name.endswith(".bin")
+        )
+
+    @staticmethod
+    def _stored(path: str) -> int:
+        return os.path.getsize(path) // RECORD.size if os.path.exists(path) else 0
+
+    def _position(self, device_id: str) -> tuple[int, int]:
+        """(base, confirmadas) del dispositivo."""
+        try:
+            with open(self._path(device_id, ".ack")) as f:
+                values = [int(v) for v in f.read().split()]
+        except (FileNotFoundError, ValueError):
+            return 0, 0
+        if not values:
+            return 0, 0
+        return (values[1] if len(values) > 1 else 0), values[0]
+
+    def _write_position(self, device_id: str, base: int, acked: int) -> None:
+        ack_path = self._path(device_id, ".ack")
+        tmp = ack_path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(f"{acked} {base}")
+        os.replace(tmp, ack_path)
+
+    def acked(self, device_id: str) -> int:
+        """Posición absoluta hasta la que el consumidor confirmó lecturas."""
+        with self._files_lock:
+            return self._position(device_id)[1]
+
+    def read(self, device_id: str, offset: int, limit: int) -> list[tuple[int, float]]:
+        """Hasta limit lecturas (timestamp ms, peso kg) desde la posición absoluta offset."""
+        with self._files_lock:
+            base, _ = self._position(device_id)
+            try:
+                with open(self._path(device_id, ".bin"), "rb") as f:
+                    f.seek(max(offset - base, 0) * RECORD.size)
+                    data = f.read(limit * RECORD.size)
+            except FileNotFoundError:
+                return []
+        usable = len(data) - len(data) % RECORD.size
+        return list(RECORD.iter_unpack(data[:usable]))
+
+    def ack(self, device_id: str, offset: int) -> None:
+        """
+        Registra que el consumidor confirmó las lecturas hasta la posición
+        absoluta offset. Si no quedan lecturas sin confirmar, las lecturas
+        del dispositivo se borran y la próxima empieza en offset.
+        """
+        with self._files_lock:
+            path = self._path(device_id, ".bin")
+            base, _ = self._position(device_id)
+            if offset - base >= self._stored(path):
+                # Se escribe el .ack antes de borrar: un corte entre ambos
+                # deja como mucho un .bin ya confirmado, nunca ids repetidos
+                self._write_position(device_id, offset, offset)
+                if os.path.exists(path):
+                    os.remove(path)
+                return
+            self._write_position(device_id, base, offset)
+
+
+class Backfiller:
+    """
+    Publica el historial pendiente chunk por chunk, esperando la
+    confirmación de cada uno antes de enviar el siguiente. Se despierta al
+    reconectar (trigger()) y reintenta cada ack_timeout segundos mientras
+    quede historial y haya conexión.
+    """
+
+    def __init__(
+        self,
+        store: HistoryStore,
+        publish: Callable[[str, bytes], None],
+        online: Callable[[], bool],
+        chunk_size: int = 5000,
+        ack_timeout: float = 30.0,
+    ):
+        """
+        Args:
+            store: Historial local
+            publish: Función (device_id, payload) que publica un chunk
+            online: Función que indica si hay conexión al broker
+            chunk_size: Lecturas por chunk como máximo
+            ack_timeout: Segundos de espera de cada confirmación
+        """
+        self.store = store
+        self._publish = publish
+        self._online = online
+        self.chunk_size = chunk_size
+        self.ack_timeout = ack_timeout
+        self._wake = threading.Event()
+        # _acked despierta la espera (confirmación o stop); _confirmed indica
+        # si hubo confirmación, para no dar por confirmado un chunk al detener
+        self._acked = threading.Event()
+        self._confirmed = False
+        self._waiting: Optional[tuple[str, int]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.chunks_sent = 0
+        self.records_sent = 0
+
+    def trigger(self) -> None:
+        """Inicia un backfill (p. ej. al reconectar al broker)."""
+        self._wake.set()
+
+    def on_ack(self, device_id: str, payload: dict) -> None:
+        """Procesa una confirmación del consumidor: {"chunk": <id>}."""
+        with self._lock:
+            if self._waiting == (device_id, payload.get("chunk")):
+                self._confirmed = True
+                self._acked.set()
+            else:
+                logger.debug(f"Confirmación de backfill inesperada [{device_id}]: {payload}")
+
+    def run_once(self) -> bool:
+        """
+        Publica todo el historial pendiente.
+
+        Returns:
+            True si no quedó historial sin confirmar
+        """
+        complete = True
+        for device_id in self.store.devices():
+            if self._stop.is_set() or not self._online():
+                return False
+            try:
+                if not self._backfill(device_id):
+                    return False
+            except Exception as e:
+                # P. ej. historial de un dispositivo que ya no está configurado:
+                # no debe impedir el backfill de los demás
+                logger.warning(f"Backfill de {device_id} omitido: {e}")
+                complete = False
+        return complete
+
+    def _backfill(self, device_id: str) -> bool:
+        while not self._stop.is_set():
+            offset = self.store.acked(device_id)
+            records = self.store.read(device_id, offset, self.chunk_size)
+            if not records:
+                # Todo confirmado: se borra el historial
+                self.store.ack(device_id, offset)
+                return True
+            payload = encode_chunk(device_id, offset, records)
+            with self._lock:
+                self._waiting = (device_id, offset)
+                self._confirmed = False
+                self._acked.clear()
+            try:
+                self._publish(device_id, payload)
+                self._acked.wait(self.ack_timeout)
+            finally:
+                with self._lock:
+                    self._waiting = None
+                    acked = self._confirmed
+            if not acked:
+                if self._stop.is_set():
+                    # Detenido durante la espera: el chunk se reenviará al reiniciar
+                    return False
+                logger.warning(
+                    f"Backfill de {device_id} sin confirmación del chunk {offset}; "
+                    f"se reintentará"
+                )
+                return False
+            self.store.ack(device_id, offset + len(records))
+            self.chunks_sent += 1
+            self.records_sent += len(records)
+            logger.info(
+                f"Backfill de {device_id}: chunk {offset} confirmado "
+                f"({len(records)} lecturas, {len(payload)} bytes)"
+            )
+        return False
+
+    def start(self) -> None:
+        """Lanza el hilo de backfill."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name="backfill")
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el backfill (el avance confirmado queda persistido)."""
+        self._stop.set()
+        self._wake.set()
+        self._acked.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.ack_timeout)
+            self._wake.clear()
+            if self._stop.is_set() or not self._online():
+                continue
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Error en el backfill: {e}", exc_info=True)
@@ -0,0 +1,123 @@
+"""Capturas de bytes seriales crudos por dispositivo (para replay)."""
+
+import ast
+import re
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import BinaryIO, Iterable, Iterator, NamedTuple, Optional
+
+# Encabezado del archivo y de cada registro:
+# timestamp (float64), largo del device_id (uint16), largo de los datos (uint32)
+MAGIC = b"SCAP\x01"
+_RECORD = struct.Struct("<dHI")
+
+# Líneas de log de ScaleReader con los bytes crudos leídos (a nivel INFO)
+_LOG_RAW = re.compile(
+    r"^(?P<asctime>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}) .*?"
+    r"(?:Datos crudos \(bytes\)|Padded intento \d+/\d+ - \(\d+ bytes\)): "
+    r"(?P<data>b(?P<q>['\"]).*(?P=q))\s*$"
+)
+_LOG_TIME_FORMAT = "%Y-%m-%d %H:%M:%S,%f"
+
+
+class CaptureRecord(NamedTuple):
+    """Bytes leídos de un dispositivo en un instante."""
+    timestamp: float
+    device_id: str
+    data: bytes
+
+
+class CaptureWriter:
+    """
+    Escribe una captura: registros binarios (timestamp, dispositivo, bytes)
+    en el orden en que se leyeron. Es seguro usarlo desde varios hilos.
+    """
+
+    def __init__(self, path: str):
+        """
+        Abre (o crea) el archivo de captura. Si ya existe, agrega registros.
+
+        Args:
+            path: Ruta del archivo
+        """
+        self.path = path
+        self._file: BinaryIO = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        self._lock = threading.Lock()
+        self.records = 0
+
+    def write(self, device_id: str, data: bytes, timestamp: Optional[float] = None) -> None:
+        """Agrega un registro con los bytes leídos de un dispositivo."""
+        device = device_id.encode("utf-8")
+        header = _RECORD.pack(
+            time.time() if timestamp is None else timestamp, len(device), len(data)
+        )
+        with self._lock:
+            self._file.write(header + device + data)
+            self.records += 1
+
+    def flush(self) -> None:
+        with self._lock:
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def read_capture(path: str) -> Iterator[CaptureRecord]:
+    """
+    Lee los registros de una captura.
+
+    Raises:
+        ValueError: Si el archivo no es una captura o está truncado
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"El archivo no es una captura serial: {path}")
+        while True:
+            header = f.read(_RECORD.size)
+            if not header:
+                return
+            if len(header) < _RECORD.size:
+                raise ValueError(f"Captura truncada: {path}")
+            timestamp, device_len, data_len = _RECORD.unpack(header)
+            body = f.read(device_len + data_len)
+            if len(body) < device_len + data_len:
+                raise ValueError(f"Captura truncada: {path}")
+            yield CaptureRecord(
+                timestamp, body[:device_len].decode("utf-8"), body[device_len:]
+            )
+
+
+def records_from_log(lines: Iterable[str], device_id: str) -> Iterator[CaptureRecord]:
+    """
+    Extrae los bytes crudos que ScaleReader registra a nivel INFO
+    ("Datos crudos (bytes): b'...'") de un log del servicio. El log no
+    indica el dispositivo, por lo que se asigna device_id a todos.
+
+    Args:
+        lines: Líneas del log (p. ej. un archivo abierto)
+        device_id: ID del dispositivo al que corresponde el log
+    """
+    for line in lines:
+        match = _LOG_RAW.match(line)
+        if not match:
+            continue
+        try:
+            data = ast.literal_eval(match.group("data"))
+        except (ValueError, SyntaxError):
+            continue
+        timestamp = datetime.strptime(
+            match.group("asctime"), _LOG_TIME_FORMAT
+        ).timestamp()
+        yield CaptureRecord(timestamp, device_id, data)
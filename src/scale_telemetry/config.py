@@ -1,24 +1,100 @@
 """Configuración del sistema de telemetría."""
 
 import json
+import math
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any
 
-from dotenv import load_dotenv
 
-# Cargar variables de entorno desde .env antes de leer os.getenv()
-load_dotenv()
+# Los valores por defecto se leen del entorno al instanciar la configuración
+# (no al importar el módulo), de modo que main() puede cargar .env antes.
+def _env_str(name: str, default: str | None = None):
+    return field(default_factory=lambda: os.getenv(name, default))
+
+
+def _env_int(name: str, default: int):
+    return field(default_factory=lambda: int(os.getenv(name, str(default))))
+
+
+def _env_float(name: str, default: float):
+    return field(default_factory=lambda: float(os.getenv(name, str(default))))
+
+
+def _env_bool(name: str, default: bool = False):
+    return field(
+        default_factory=lambda: os.getenv(name, str(default)).lower() == "true"
+    )
 
 
 @dataclass
 class MQTTConfig:
     """Configuración del broker MQTT (compartida entre dispositivos)."""
-    broker: str = os.getenv("MQTT_BROKER", "localhost")
-    port: int = int(os.getenv("MQTT_PORT", "1883"))
-    username: str | None = os.getenv("MQTT_USERNAME")
-    password: str | None = os.getenv("MQTT_PASSWORD")
-    use_ssl: bool = os.getenv("MQTT_USE_SSL", "false").lower() == "true"
+    broker: str = _env_str("MQTT_BROKER", "localhost")
+    port: int = _env_int("MQTT_PORT", 1883)
+    username: str | None = _env_str("MQTT_USERNAME")
+    password: str | None = _env_str("MQTT_PASSWORD")
+    use_ssl: bool = _env_bool("MQTT_USE_SSL")
+    # Client id del gateway; identifica también su tópico de estado (last-will)
+    client_id: str = _env_str("MQTT_CLIENT_ID", "scale-telemetry-service")
+    # Límite global de comandos/seg para todo el gateway (0 = sin límite)
+    rate_limit: float = _env_float("MQTT_RATE_LIMIT", 0.0)
+    rate_burst: int = _env_int("MQTT_RATE_BURST", 0)
+    # Control de flujo de publicaciones: mensajes QoS > 0 sin PUBACK y en cola
+    max_inflight: int = _env_int("MQTT_MAX_INFLIGHT", 20)
+    max_queued: int = _env_int("MQTT_MAX_QUEUED", 1000)
+    # QoS por clase de mensaje: respuestas a comandos, telemetría periódica y
+    # eventos de pesaje
+    qos_response: int = _env_int("MQTT_QOS_RESPONSE", 1)
+    qos_telemetry: int = _env_int("MQTT_QOS_TELEMETRY", 0)
+    qos_event: int = _env_int("MQTT_QOS_EVENT", 1)
+    # Comandos con requestId recordados por dispositivo para descartar
+    # reentregas (0 = deshabilitado) y segundos que se recuerda cada uno
+    dedupe_size: int = _env_int("MQTT_DEDUPE_SIZE", 256)
+    dedupe_ttl: float = _env_float("MQTT_DEDUPE_TTL", 300.0)
+    # Tópico de administración del gateway (perfilado bajo demanda). Escribe
+    # archivos en LOG_DIR: se habilita explícitamente
+    admin: bool = _env_bool("MQTT_ADMIN", False)
+
+
+@dataclass
+class ServiceConfig:
+    """Configuración general del servicio (gateway)."""
+    # Atender todos los puertos seriales desde un único hilo (SerialHub)
+    serial_hub: bool = _env_bool("SERIAL_HUB")
+    # Plazo total (seg) para abrir los puertos al iniciar; los que no abren
+    # a tiempo pasan a reintentos en background
+    connect_timeout: float = _env_float("CONNECT_TIMEOUT", 10.0)
+    # Puertos que se abren en paralelo al iniciar
+    connect_workers: int = _env_int("CONNECT_WORKERS", 64)
+    # Endpoints HTTP /healthz y /readyz (puerto 0 = deshabilitado)
+    health_host: str = _env_str("HEALTH_HOST", "0.0.0.0")
+    health_port: int = _env_int("HEALTH_PORT", 0)
+    # Captura de los bytes seriales crudos para replay ("" = deshabilitada)
+    capture_path: str = _env_str("CAPTURE_PATH", "")
+    # Tabla del último peso en memoria compartida para procesos locales
+    # ("" = deshabilitada), ver shm_table.py
+    shm_table: str = _env_str("SHM_TABLE", "")
+    # Socket Unix de la API local de comandos ("" = deshabilitada)
+    local_socket: str = _env_str("LOCAL_SOCKET", "")
+    # Fracción de comandos trazados (0 = trazas deshabilitadas), ver tracing.py
+    trace_sample_rate: float = _env_float("TRACE_SAMPLE_RATE", 0.0)
+    # Archivo de las trazas ("" = LOG_DIR/traces.jsonl)
+    trace_path: str = _env_str("TRACE_PATH", "")
+    # Perfil bajo demanda (SIGUSR1 o tópico admin): duración (seg) y
+    # muestras por segundo por defecto, ver profiling.py
+    profile_duration: float = _env_float("PROFILE_DURATION", 10.0)
+    profile_rate: float = _env_float("PROFILE_RATE", 100.0)
+    # Salidas adicionales de las lecturas (InfluxDB, CSV, lotes MQTT);
+    # "" = solo MQTT, ver sinks.py
+    sinks_config_path: str = _env_str("SINKS_CONFIG_PATH", "")
+    # Historial local de las lecturas tomadas sin conexión al broker, que se
+    # publica comprimido al reconectar ("" = deshabilitado), ver backfill.py
+    backfill_dir: str = _env_str("BACKFILL_DIR", "")
+    backfill_chunk_size: int = _env_int("BACKFILL_CHUNK_SIZE", 5000)
+    backfill_ack_timeout: float = _env_float("BACKFILL_ACK_TIMEOUT", 30.0)
+    backfill_max_records: int = _env_int("BACKFILL_MAX_RECORDS", 1_000_000)
 
 
 @dataclass
@@ -28,6 +104,104 @@ class SerialConfig:
     baudrate: int = 9600
     timeout: float = 1.0
     weight_format: str = "standard"
+    # "buffered" (pyserial readline) o "direct" (lectura sin copias sobre el fd)
+    read_mode: str = "buffered"
+    # Comandos ASCII del indicador: {"tare": "T\r", "zero": "Z\r"}
+    commands: dict[str, str] = field(default_factory=dict)
+    # Confirmación que envía el indicador tras un comando ("" = no confirma)
+    command_ack: str = ""
+    # Modo poll: petición que se escribe antes de cada lectura ("" = la báscula
+    # transmite de forma continua). Puede incluir {address} para buses RS-485.
+    poll_request: str = ""
+    # Timeout de la respuesta a un poll (0 = usar timeout)
+    poll_timeout: float = 0.0
+    # Dirección de la báscula en un bus multidrop ("" = puerto dedicado)
+    address: str = ""
+    # Cota inferior del timeout aprendido de la cadencia de la báscula; el
+    # timeout (o poll_timeout) es la superior (0 = timeout fijo)
+    min_timeout: float = 0.0
+
+    def render(self, template: str) -> bytes:
+        """Sustituye {address} en una petición/comando y la codifica."""
+        return template.replace("{address}", self.address).encode("latin-1")
+
+
+@dataclass
+class ModbusConfig:
+    """Configuración de una báscula Modbus (RTU o TCP)."""
+    # Puerto serial (RTU) o "tcp://host:puerto" (TCP)
+    port: str = "/dev/ttyUSB0"
+    baudrate: int = 9600
+    timeout: float = 1.0
+    unit_id: int = 1
+    # Registro (dirección base 0) donde el indicador publica el peso
+    register: int = 0
+    # "holding" (función 3) o "input" (función 4)
+    register_type: str = "holding"
+    # int16, uint16, int32, uint32 o float32
+    data_type: str = "int32"
+    # Orden de palabras de los tipos de 32 bits: "big" (alta primero) o "little"
+    word_order: str = "big"
+    # Decimales implícitos: peso = valor / 10**decimals
+    decimals: int = 0
+    # Comandos como escritura de un registro: {"tare": "40=1"}
+    commands: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class FakeConfig:
+    """Configuración de una báscula simulada en memoria (tests y benchmarks)."""
+    # Pesos que retornan las lecturas, en orden y de forma cíclica
+    frames: list[float] = field(default_factory=lambda: [0.0])
+    # Latencia de cada lectura/comando (seg) y variación aleatoria máxima
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Latencia de connect() (seg)
+    connect_latency: float = 0.0
+    # Probabilidad de trama inválida (ValueError) por lectura
+    error_rate: float = 0.0
+    # Probabilidad de perder la conexión (SerialException) por lectura
+    disconnect_rate: float = 0.0
+    # Semilla del generador aleatorio (None = no determinista)
+    seed: int | None = None
+    commands: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class WeighmentConfig:
+    """Detección de pesajes (carga → estable → descarga) de una báscula."""
+    # Peso (kg) a partir del cual se considera que hay carga
+    threshold: float = 10.0
+    # Variación máxima (kg) dentro de la ventana para considerar el peso estable
+    stable_range: float = 0.5
+    # Muestras consecutivas dentro de stable_range para considerar el peso estable
+    stable_samples: int = 5
+
+    def __post_init__(self):
+        """
+        Convierte los parámetros (pueden venir como texto en devices.json).
+
+        Raises:
+            ValueError: Si un parámetro no es numérico o está fuera de rango
+        """
+        for name in ("threshold", "stable_range", "stable_samples"):
+            value = getattr(self, name)
+            try:
+                if isinstance(value, bool):
+                    raise TypeError
+                number = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"'{name}' debe ser numérico: {value!r}") from None
+            if not math.isfinite(number):
+                raise ValueError(f"'{name}' debe ser finito: {value!r}")
+            setattr(self, name, number)
+        if self.stable_range < 0:
+            raise ValueError(f"'stable_range' no puede ser negativo: {self.stable_range}")
+        if self.stable_samples != int(self.stable_samples) or self.stable_samples < 2:
+            raise ValueError(
+                f"'stable_samples' debe ser un entero de al menos 2: {self.stable_samples}"
+            )
+        self.stable_samples = int(self.stable_samples)
 
 
 @dataclass
@@ -38,6 +212,35 @@ class DeviceConfig:
     baudrate: int = 9600
     timeout: float = 1.0
     weight_format: str = "standard"
+    read_mode: str = "buffered"
+    commands: dict[str, str] = field(default_factory=dict)
+    command_ack: str = ""
+    poll_request: str = ""
+    poll_timeout: float = 0.0
+    address: str = ""
+    # Timeout adaptativo: cota inferior (0 = timeout fijo), ver SerialConfig
+    min_timeout: float = 0.0
+    # Origen del peso: "serial" (tramas ASCII), "modbus" o "fake"
+    source: str = "serial"
+    # Parámetros Modbus (unit_id, register, data_type...), ver ModbusConfig
+    modbus: dict[str, Any] = field(default_factory=dict)
+    # Parámetros de la báscula simulada (frames, latency...), ver FakeConfig
+    fake: dict[str, Any] = field(default_factory=dict)
+    # Límite de comandos/seg para este dispositivo (0 = sin límite)
+    rate_limit: float = 0.0
+    rate_burst: int = 0
+    # Variación mínima del peso (kg) que se publica en el tópico de estado
+    state_deadband: float = 0.0
+    # Cadena de filtros del peso, en orden: [{"type": "median", "window": 5}]
+    filters: list[dict[str, Any]] = field(default_factory=list)
+    # Intervalo (seg) de lectura periódica en segundo plano (0 = solo bajo demanda)
+    sample_interval: float = 0.0
+    # Detección de pesajes (threshold, stable_range...), ver WeighmentConfig;
+    # vacío = deshabilitada
+    weighment: dict[str, Any] = field(default_factory=dict)
+    # Reglas de alarma: [{"name": "overload", "above": 30000, "duration": 2}],
+    # ver alarms.AlarmRule
+    alarms: list[dict[str, Any]] = field(default_factory=list)
 
     @property
     def command_topic(self) -> str:
@@ -49,6 +252,26 @@ class DeviceConfig:
         """Tópico para enviar respuestas."""
         return f"pesanet/devices/{self.device_id}/response"
 
+    @property
+    def state_topic(self) -> str:
+        """Tópico retenido con el último peso y el estado de conexión."""
+        return f"pesanet/devices/{self.device_id}/state"
+
+    @property
+    def events_topic(self) -> str:
+        """Tópico de eventos de pesaje."""
+        return f"pesanet/devices/{self.device_id}/events"
+
+    @property
+    def backfill_topic(self) -> str:
+        """Tópico de los chunks de backfill (las confirmaciones, en .../ack)."""
+        return f"pesanet/devices/{self.device_id}/backfill"
+
+    @property
+    def alarms_topic(self) -> str:
+        """Tópico de transiciones de alarmas."""
+        return f"pesanet/devices/{self.device_id}/alarms"
+
     def to_serial_config(self) -> SerialConfig:
         """Convierte a SerialConfig para el ScaleReader."""
         return SerialConfig(
@@ -56,8 +279,50 @@ class DeviceConfig:
             baudrate=self.baudrate,
             timeout=self.timeout,
             weight_format=self.weight_format,
+            read_mode=self.read_mode,
+            commands=self.commands,
+            command_ack=self.command_ack,
+            poll_request=self.poll_request,
+            poll_timeout=self.poll_timeout,
+            address=self.address,
+            min_timeout=self.min_timeout,
         )
 
+    def to_modbus_config(self) -> ModbusConfig:
+        """Convierte a ModbusConfig para el ModbusReader."""
+        try:
+            return ModbusConfig(
+                port=self.serial_port,
+                baudrate=self.baudrate,
+                timeout=self.timeout,
+                commands=self.commands,
+                **self.modbus,
+            )
+        except TypeError as e:
+            raise ValueError(
+                f"Parámetros Modbus inválidos para {self.device_id}: {e}"
+            ) from e
+
+    def to_fake_config(self) -> FakeConfig:
+        """Convierte a FakeConfig para el FakeSource."""
+        try:
+            return FakeConfig(commands=self.commands, **self.fake)
+        except TypeError as e:
+            raise ValueError(
+                f"Parámetros de simulación inválidos para {self.device_id}: {e}"
+            ) from e
+
+    def to_weighment_config(self) -> WeighmentConfig | None:
+        """Convierte a WeighmentConfig, o None si la detección está deshabilitada."""
+        if not self.weighment:
+            return None
+        try:
+            return WeighmentConfig(**self.weighment)
+        except (TypeError, ValueError) as e:
+            raise ValueError(
+                f"Parámetros de pesaje inválidos para {self.device_id}: {e}"
+            ) from e
+
 
 def load_devices(config_path: str | None = None) -> list[DeviceConfig]:
     """
@@ -87,6 +352,45 @@ def load_devices(config_path: str | None = None) -> list[DeviceConfig]:
             baudrate=d.get("baudrate", 9600),
             timeout=d.get("timeout", 1.0),
             weight_format=d.get("weight_format", "standard"),
+            read_mode=d.get("read_mode", "buffered"),
+            commands=d.get("commands", {}),
+            command_ack=d.get("command_ack", ""),
+            poll_request=d.get("poll_request", ""),
+            poll_timeout=d.get("poll_timeout", 0.0),
+            address=str(d.get("address", "")),
+            min_timeout=d.get("min_timeout", 0.0),
+            source=d.get("source", "serial"),
+            modbus=d.get("modbus", {}),
+            fake=d.get("fake", {}),
+            rate_limit=d.get("rate_limit", 0.0),
+            rate_burst=d.get("rate_burst", 0),
+            state_deadband=d.get("state_deadband", 0.0),
+            filters=d.get("filters", []),
+            sample_interval=d.get("sample_interval", 0.0),
+            weighment=d.get("weighment", {}),
+            alarms=d.get("alarms", []),
         )
         for d in data
     ]
+
+
+def load_sinks(config_path: str) -> list[dict[str, Any]]:
+    """
+    Carga la configuración de las salidas adicionales desde archivo JSON:
+    [{"type": "csv", "path": "logs/readings.csv"}, ...]
+
+    Raises:
+        FileNotFoundError: Si no se encuentra el archivo de configuración
+        ValueError: Si el archivo no contiene una lista de salidas
+    """
+    if not Path(config_path).exists():
+        raise FileNotFoundError(
+            f"Archivo de configuración de salidas no encontrado: {config_path}"
+        )
+
+    with open(config_path, "r") as f:
+        data = json.load(f)
+
+    if not isinstance(data, list) or not all(isinstance(s, dict) for s in data):
+        raise ValueError(f"El archivo {config_path} debe contener una lista de salidas")
+    return data
@@ -0,0 +1,121 @@
+"""Supresión de comandos duplicados por requestId (reentregas QoS 1)."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+# Marca de un comando recibido cuya respuesta todavía no se envió
+PENDING = object()
+
+Reply = Callable[[dict], None]
+
+
+class _Pending:
+    """Comando en curso, con los duplicados que esperan su respuesta."""
+
+    __slots__ = ("waiters",)
+
+    def __init__(self):
+        self.waiters: list[Reply] = []
+
+
+class RequestCache:
+    """
+    Últimos requestId de cada dispositivo con su respuesta.
+
+    Cada dispositivo recuerda como máximo size requestId (se descartan los
+    más antiguos) y cada uno vence ttl segundos después de recibido. Los
+    requestId de cada transporte ("mqtt", "local") son independientes. Un
+    duplicado de un comando en curso no se ejecuta: se descarta (por MQTT la
+    respuesta original va al tópico compartido) o, si trae waiter, recibe la
+    respuesta del original cuando llega. Un duplicado de un comando
+    respondido se contesta con la respuesta guardada, sin volver a leer.
+    """
+
+    def __init__(
+        self,
+        size: int = 256,
+        ttl: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Inicializa la caché.
+
+        Args:
+            size: requestId recordados por dispositivo
+            ttl: Segundos que se recuerda cada requestId
+            clock: Reloj monotónico (inyectable en tests)
+        """
+        self.size = size
+        self.ttl = ttl
+        self._clock = clock
+        self._devices: dict[str, OrderedDict[tuple[str, str], tuple[float, object]]] = {}
+        self._lock = threading.Lock()
+        self.duplicates = 0
+
+    def lookup(
+        self,
+        device_id: str,
+        request_id: str,
+        transport: str = "mqtt",
+        waiter: Optional[Reply] = None,
+    ) -> Optional[object]:
+        """
+        Busca un requestId y, si es nuevo, lo registra como en curso.
+
+        Args:
+            device_id: ID del dispositivo
+            request_id: requestId del comando
+            transport: Transporte por el que llegó el comando
+            waiter: Si el original está en curso, función que recibirá su
+                respuesta (ver store())
+
+        Returns:
+            None si el comando es nuevo, PENDING si el original está en
+            curso, o la respuesta enviada al original
+        """
+        key = (transport, request_id)
+        now = self._clock()
+        with self._lock:
+            entries = self._devices.setdefault(device_id, OrderedDict())
+            # Las entradas están en orden de llegada: las vencidas, al frente
+            while entries:
+                first = next(iter(entries.values()))
+                if now - first[0] < self.ttl:
+                    break
+                entries.popitem(last=False)
+
+            entry = entries.get(key)
+            if entry is not None:
+                self.duplicates += 1
+                value = entry[1]
+                if isinstance(value, _Pending):
+                    if waiter is not None:
+                        value.waiters.append(waiter)
+                    return PENDING
+                return value
+
+            entries[key] = (now, _Pending())
+            if len(entries) > self.size:
+                entries.popitem(last=False)
+            return None
+
+    def store(
+        self, device_id: str, request_id: str, response: dict, transport: str = "mqtt"
+    ) -> list[Reply]:
+        """
+        Guarda la respuesta de un comando registrado con lookup().
+
+        Returns:
+            Los waiters de los duplicados que esperaban la respuesta
+        """
+        key = (transport, request_id)
+        with self._lock:
+            entries = self._devices.get(device_id)
+            if entries is None or key not in entries:
+                # Vencido o desplazado mientras se ejecutaba
+                return []
+            received, pending = entries[key]
+            entries[key] = (received, response)
+        return pending.waiters if isinstance(pending, _Pending) else []
@@ -0,0 +1,95 @@
+"""Báscula simulada en memoria para tests y benchmarks sin puertos reales."""
+
+import random
+import threading
+import time
+from typing import Optional
+
+import serial
+
+from .config import FakeConfig
+
+
+class FakeSource:
+    """
+    Origen de peso con guion: retorna los pesos de config.frames en orden,
+    con la latencia y las tasas de error configuradas.
+
+    Implementa WeightSource, por lo que el servicio completo (MQTT, pool de
+    lectura, reconexión, salud) puede ejecutarse con miles de dispositivos
+    sin puertos seriales ni PTYs.
+    """
+
+    def __init__(self, config: FakeConfig):
+        """
+        Inicializa la báscula simulada.
+
+        Args:
+            config: Guion de pesos, latencias y tasas de error
+        """
+        if not config.frames:
+            raise ValueError("La báscula simulada requiere al menos un peso en frames")
+        self.config = config
+        self.connected = False
+        self.reads = 0
+        self.commands_executed: list[str] = []
+        self._index = 0
+        self._random = random.Random(config.seed)
+        self._lock = threading.Lock()
+
+    def connect(self) -> None:
+        """Simula la apertura del enlace."""
+        if self.config.connect_latency:
+            time.sleep(self.config.connect_latency)
+        self.connected = True
+
+    def disconnect(self) -> None:
+        """Simula el cierre del enlace."""
+        self.connected = False
+
+    def read_weight(self) -> float:
+        """
+        Retorna el siguiente peso del guion.
+
+        Raises:
+            serial.SerialException: Si no está conectada o simula una desconexión
+            ValueError: Si simula una trama inválida
+        """
+        self._delay()
+        with self._lock:
+            if not self.connected:
+                raise serial.SerialException("No hay conexión con la báscula")
+            roll = self._random.random() if self._uses_random() else 1.0
+            if roll < self.config.disconnect_rate:
+                self.connected = False
+                raise serial.SerialException("Desconexión simulada")
+            if roll < self.config.disconnect_rate + self.config.error_rate:
+                raise ValueError("Trama inválida simulada")
+            weight = self.config.frames[self._index]
+            self._index = (self._index + 1) % len(self.config.frames)
+            self.reads += 1
+            return weight
+
+    def execute_command(self, command: str, read_weight: bool = False) -> Optional[float]:
+        """Registra el comando y opcionalmente lee el siguiente peso."""
+        if command not in self.config.commands:
+            raise ValueError(
+                f"Comando no soportado por la báscula: '{command}'. "
+                f"Comandos disponibles: {sorted(self.config.commands)}"
+            )
+        if not self.connected:
+            raise serial.SerialException("No hay conexión con la báscula")
+        self._delay()
+        self.commands_executed.append(command)
+        return self.read_weight() if read_weight else None
+
+    def _uses_random(self) -> bool:
+        return self.config.error_rate > 0 or self.config.disconnect_rate > 0
+
+    def _delay(self) -> None:
+        latency = self.config.latency
+        if self.config.jitter:
+            with self._lock:
+                latency += self._random.uniform(0, self.config.jitter)
+        if latency > 0:
+            time.sleep(latency)
@@ -0,0 +1,173 @@
+"""Filtros incrementales del peso (mediana, EMA, rechazo de outliers)."""
+
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Any, Optional
+
+
+class MedianFilter:
+    """
+    Mediana móvil de las últimas window muestras. Elimina picos aislados
+    (vibración, golpes de montacargas) sin desplazar los escalones reales.
+
+    Mantiene la ventana circular y una copia ordenada: cada muestra busca
+    con bisect (O(log window)) e inserta y quita en la lista ordenada
+    (O(window)). Una mediana exacta no tiene costo O(1); con las ventanas
+    chicas de una báscula (5-15 muestras) el desplazamiento es despreciable.
+    """
+
+    def __init__(self, window: int = 5):
+        window = int(window)
+        if window < 1:
+            raise ValueError(f"window debe ser al menos 1: {window}")
+        self.window = window
+        self._ring = [0.0] * window
+        self._sorted: list[float] = []
+        self._pos = 0
+
+    def apply(self, value: float, timestamp: float) -> float:
+        if len(self._sorted) == self.window:
+            del self._sorted[bisect_left(self._sorted, self._ring[self._pos])]
+        self._ring[self._pos] = value
+        self._pos = (self._pos + 1) % self.window
+        insort(self._sorted, value)
+        n = len(self._sorted)
+        if n % 2:
+            return self._sorted[n // 2]
+        return (self._sorted[n // 2 - 1] + self._sorted[n // 2]) / 2
+
+    def reset(self) -> None:
+        self._sorted.clear()
+        self._pos = 0
+
+
+class EMAFilter:
+    """Media móvil exponencial: suaviza el ruido con costo O(1)."""
+
+    def __init__(self, alpha: float = 0.3):
+        alpha = float(alpha)
+        if not 0 < alpha <= 1:
+            raise ValueError(f"alpha debe estar en (0, 1]: {alpha}")
+        self.alpha = alpha
+        self._value: Optional[float] = None
+
+    def apply(self, value: float, timestamp: float) -> float:
+        if self._value is None:
+            self._value = value
+        else:
+            self._value += self.alpha * (value - self._value)
+        return self._value
+
+    def reset(self) -> None:
+        self._value = None
+
+
+class OutlierFilter:
+    """
+    Rechazo por pendiente máxima: una muestra que se aleja del último valor
+    aceptado más de max_slope kg/s se reemplaza por ese valor. Tras
+    max_rejects rechazos consecutivos el nuevo nivel se acepta (es una carga
+    real, no un pico).
+    """
+
+    def __init__(self, max_slope: float, max_rejects: int = 3):
+        max_slope, max_rejects = float(max_slope), int(max_rejects)
+        if max_slope <= 0:
+            raise ValueError(f"max_slope debe ser positivo: {max_slope}")
+        if max_rejects < 0:
+            raise ValueError(f"max_rejects no puede ser negativo: {max_rejects}")
+        self.max_slope = max_slope
+        self.max_rejects = max_rejects
+        self._value: Optional[float] = None
+        self._timestamp = 0.0
+        self._rejects = 0
+
+    def apply(self, value: float, timestamp: float) -> float:
+        if self._value is not None:
+            allowed = self.max_slope * max(timestamp - self._timestamp, 0.0)
+            if abs(value - self._value) > allowed and self._rejects < self.max_rejects:
+                self._rejects += 1
+                return self._value
+        self._value = value
+        self._timestamp = timestamp
+        self._rejects = 0
+        return value
+
+    def reset(self) -> None:
+        self._value = None
+        self._rejects = 0
+
+
+FILTER_TYPES = {
+    "median": MedianFilter,
+    "ema": EMAFilter,
+    "outlier": OutlierFilter,
+}
+
+
+class FilterChain:
+    """
+    Cadena de filtros de un dispositivo, aplicada en orden a cada muestra.
+    Es seguro usarla desde varios hilos (lecturas periódicas y comandos).
+    """
+
+    def __init__(self, filters: list):
+        """
+        Inicializa la cadena.
+
+        Args:
+            filters: Filtros con apply(valor, timestamp) y reset()
+        """
+        self.filters = filters
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, specs: list[dict[str, Any]]) -> "FilterChain":
+        """
+        Construye la cadena desde devices.json:
+        [{"type": "outlier", "max_slope": 500}, {"type": "median", "window": 5}]
+
+        Raises:
+            ValueError: Si un filtro o sus parámetros no son válidos
+        """
+        filters = []
+        for spec in specs:
+            params = dict(spec)
+            filter_type = params.pop("type", None)
+            filter_class = FILTER_TYPES.get(filter_type)
+            if filter_class is None:
+                raise ValueError(
+                    f"Filtro no soportado: '{filter_type}'. "
+                    f"Filtros disponibles: {list(FILTER_TYPES.keys())}"
+                )
+            try:
+                filters.append(filter_class(**params))
+            except (TypeError, ValueError) as e:
+                raise ValueError(
+                    f"Parámetros inválidos para el filtro '{filter_type}': {e}"
+                ) from e
+        return cls(filters)
+
+    def apply(self, value: float, timestamp: Optional[float] = None) -> float:
+        """
+        Filtra una muestra.
+
+        Args:
+            value: Peso en kilogramos
+            timestamp: Instante de la muestra (time.monotonic(); por defecto, ahora)
+
+        Returns:
+            Peso filtrado
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+        with self._lock:
+            for f in self.filters:
+                value = f.apply(value, now)
+        return value
+
+    def reset(self) -> None:
+        """Descarta la historia (p. ej. tras una tara o un cero)."""
+        with self._lock:
+            for f in self.filters:
+                f.reset()
@@ -0,0 +1,234 @@
+"""Decodificación de tramas de peso sobre buffers reutilizables."""
+
+import os
+from typing import Optional
+
+# Terminador de trama de cada formato de peso
+FRAME_TERMINATORS = {
+    "standard": b"\n",
+    "padded": b"\r",
+}
+
+_PADDED_MARKER = b'"0 '
+_PADDED_DIGITS = 12
+_PADDED_WEIGHT_DIGITS = 6
+
+_ZERO = 0x30
+_NINE = 0x39
+_DOT = 0x2E
+_MINUS = 0x2D
+
+
+def parse_standard_frame(buf, start: int, end: int) -> float | None:
+    """
+    Equivalente a parse_standard sobre buf[start:end] sin crear copias.
+    Extrae el primer número (con signo y decimales opcionales) de la trama.
+
+    Returns:
+        El peso, o None si la trama no contiene un número
+    """
+    i = start
+    while i < end:
+        c = buf[i]
+        if _ZERO <= c <= _NINE:
+            break
+        if c == _DOT and i + 1 < end and _ZERO <= buf[i + 1] <= _NINE:
+            break
+        i += 1
+    else:
+        return None
+
+    negative = i > start and buf[i - 1] == _MINUS
+    mantissa = 0
+    scale = 1
+    while i < end and _ZERO <= buf[i] <= _NINE:
+        mantissa = mantissa * 10 + (buf[i] - _ZERO)
+        i += 1
+    if i + 1 < end and buf[i] == _DOT and _ZERO <= buf[i + 1] <= _NINE:
+        i += 1
+        while i < end and _ZERO <= buf[i] <= _NINE:
+            mantissa = mantissa * 10 + (buf[i] - _ZERO)
+            scale *= 10
+            i += 1
+
+    # La división de dos enteros exactos está correctamente redondeada,
+    # igual que float() sobre el texto equivalente.
+    weight = mantissa / scale
+    return -weight if negative else weight
+
+
+def parse_padded_frame(buf, start: int, end: int) -> float | None:
+    """
+    Equivalente a parse_padded sobre buf[start:end] sin crear copias.
+    Busca la última ocurrencia de "0 DDDDDDDDDDDD y toma los 6 primeros dígitos.
+
+    Returns:
+        El peso, o None si la trama no contiene el patrón
+    """
+    pos = buf.rfind(_PADDED_MARKER, start, end)
+    while pos >= 0:
+        digits = pos + len(_PADDED_MARKER)
+        if digits + _PADDED_DIGITS <= end:
+            for k in range(digits, digits + _PADDED_DIGITS):
+                if not _ZERO <= buf[k] <= _NINE:
+                    break
+            else:
+                weight = 0
+                for k in range(digits, digits + _PADDED_WEIGHT_DIGITS):
+                    weight = weight * 10 + (buf[k] - _ZERO)
+                return float(weight)
+        pos = buf.rfind(_PADDED_MARKER, start, pos)
+    return None
+
+
+FRAME_PARSERS = {
+    "standard": parse_standard_frame,
+    "padded": parse_padded_frame,
+}
+
+
+class FrameDecoder:
+    """
+    Decodificador incremental de tramas sobre un bytearray preasignado.
+
+    Los bytes se leen directamente dentro del buffer (os.readv sobre un
+    memoryview), los terminadores se buscan con bytearray.find y los dígitos
+    se parsean sobre el buffer, de modo que una trama no genera copias de
+    bytes ni cadenas intermedias.
+    """
+
+    def __init__(self, weight_format: str = "standard", buffer_size: int = 4096):
+        """
+        Inicializa el decodificador.
+
+        Args:
+            weight_format: Formato de trama ("standard" o "padded")
+            buffer_size: Tamaño del buffer en bytes (mayor que la trama más larga)
+        """
+        parser = FRAME_PARSERS.get(weight_format)
+        if not parser:
+            raise ValueError(
+                f"Formato de peso no soportado: '{weight_format}'. "
+                f"Formatos disponibles: {list(FRAME_PARSERS)}"
+            )
+        self.weight_format = weight_format
+        self._parse = parser
+        self._terminator = FRAME_TERMINATORS[weight_format]
+        self._buf = bytearray(buffer_size)
+        self._view = memoryview(self._buf)
+        self._start = 0
+        self._end = 0
+        self.frames_decoded = 0
+        self.frames_rejected = 0
+
+    def clear(self) -> None:
+        """Descarta los datos pendientes y reinicia los contadores."""
+        self._start = 0
+        self._end = 0
+        self.frames_decoded = 0
+        self.frames_rejected = 0
+
+    @property
+    def pending(self) -> int:
+        """Bytes recibidos que aún no forman una trama completa."""
+        return self._end - self._start
+
+    def _make_room(self) -> None:
+        """Compacta el buffer cuando la escritura alcanza el final."""
+        if self._start == self._end:
+            self._start = self._end = 0
+            return
+        if self._end < len(self._buf):
+            return
+        pending = self._end - self._start
+        if pending == len(self._buf):
+            # Trama más larga que el buffer: se descarta como basura
+            self.frames_rejected += 1
+            self._start = self._end = 0
+            return
+        # memoryview usa memmove, seguro con regiones solapadas
+        self._view[:pending] = self._view[self._start:self._end]
+        self._start = 0
+        self._end = pending
+
+    def fill_from_fd(self, fd: int) -> Optional[int]:
+        """
+        Lee del descriptor directamente dentro del buffer.
+
+        Returns:
+            Bytes leídos (0 = fin de archivo, p. ej. dispositivo desconectado),
+            o None si el descriptor no bloqueante no tenía datos (EAGAIN)
+
+        Raises:
+            OSError: Si falla la lectura del descriptor
+        """
+        self._make_room()
+        try:
+            n = os.readv(fd, (self._view[self._end:],))
+        except BlockingIOError:
+            return None
+        self._end += n
+        return n
+
+    def tail(self, n: int) -> bytes:
+        """Copia de los últimos n bytes recibidos (p. ej. para una captura)."""
+        return bytes(self._view[self._end - n:self._end])
+
+    def feed(self, data) -> None:
+        """Copia bytes ya leídos (p. ej. de una captura) al buffer."""
+        data = memoryview(data)
+        while data:
+            self._make_room()
+            n = min(len(data), len(self._buf) - self._end)
+            self._view[self._end:self._end + n] = data[:n]
+            self._end += n
+            data = data[n:]
+
+    def consume_through(self, token: bytes) -> bool:
+        """
+        Descarta los datos pendientes hasta el token inclusive (p. ej. una
+        confirmación de comando), conservando lo que sigue.
+
+        Returns:
+            True si el token estaba en el buffer
+        """
+        pos = self._buf.find(token, self._start, self._end)
+        if pos < 0:
+            return False
+        self._start = pos + len(token)
+        return True
+
+    def next_weight(self) -> float | None:
+        """
+        Decodifica la siguiente trama válida completa.
+        Las tramas sin peso se descartan y se cuentan en frames_rejected.
+
+        Returns:
+            El peso de la trama, o None si no hay una trama completa
+        """
+        buf = self._buf
+        while True:
+            terminator = buf.find(self._terminator, self._start, self._end)
+            if terminator < 0:
+                return None
+            start = self._start
+            self._start = terminator + 1
+            weight = self._parse(buf, start, terminator)
+            if weight is not None:
+                self.frames_decoded += 1
+                return weight
+            self.frames_rejected += 1
+
+    def latest_weight(self) -> float | None:
+        """
+        Decodifica todas las tramas completas y retorna la más reciente.
+
+        Returns:
+            El peso de la última trama válida, o None si no hay ninguna
+        """
+        latest = None
+        while True:
+            weight = self.next_weight()
+            if weight is None:
+                return latest
+            latest = weight
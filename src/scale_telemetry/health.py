@@ -0,0 +1,126 @@
+"""
+Estado de salud (/healthz) y disponibilidad (/readyz) del servicio. El
+servidor HTTP que lo expone está en health_server.py.
+"""
+
+import time
+from typing import Callable, Optional
+
+
+class DeviceHealth:
+    """Estado en memoria de un dispositivo para los probes de salud."""
+
+    __slots__ = (
+        "connected", "reconnecting", "reconnect_attempts",
+        "last_read", "last_error", "read_timeout",
+    )
+
+    def __init__(self):
+        self.connected = False
+        self.reconnecting = False
+        self.reconnect_attempts = 0
+        self.last_read: Optional[float] = None  # time.monotonic()
+        self.last_error: Optional[str] = None
+        # Timeout adaptativo del lector (AdaptiveTimeout), si está habilitado
+        self.read_timeout = None
+
+
+class HealthState:
+    """
+    Estado de salud del servicio, mantenido en memoria.
+
+    Se actualiza desde los caminos de lectura y reconexión con asignaciones
+    simples de atributos; los probes solo leen este estado, nunca tocan los
+    puertos seriales ni el broker.
+    """
+
+    def __init__(self, mqtt_connected: Callable[[], bool]):
+        """
+        Inicializa el estado.
+
+        Args:
+            mqtt_connected: Función que indica si el cliente MQTT está conectado
+        """
+        self._mqtt_connected = mqtt_connected
+        self.devices: dict[str, DeviceHealth] = {}
+        self.started = time.monotonic()
+
+    def device(self, device_id: str) -> DeviceHealth:
+        """Retorna (creando si hace falta) el estado de un dispositivo."""
+        health = self.devices.get(device_id)
+        if health is None:
+            health = self.devices.setdefault(device_id, DeviceHealth())
+        return health
+
+    def set_connected(self, device_id: str, connected: bool) -> None:
+        """Registra el estado de conexión serial de un dispositivo."""
+        health = self.device(device_id)
+        health.connected = connected
+        if connected:
+            health.reconnecting = False
+            health.reconnect_attempts = 0
+
+    def set_reconnecting(self, device_id: str) -> None:
+        """Registra un intento de reconexión en curso."""
+        health = self.device(device_id)
+        health.reconnecting = True
+        health.reconnect_attempts += 1
+
+    def record_read(self, device_id: str) -> None:
+        """Registra una lectura exitosa."""
+        health = self.device(device_id)
+        health.last_read = time.monotonic()
+        health.last_error = None
+
+    def record_error(self, device_id: str, error: str) -> None:
+        """Registra un error de lectura."""
+        self.device(device_id).last_error = error
+
+    def is_ready(self) -> bool:
+        """Listo si MQTT está conectado y al menos una báscula está conectada."""
+        return self._mqtt_connected() and any(
+            h.connected for h in list(self.devices.values())
+        )
+
+    def summary(self) -> dict:
+        """Resumen para /healthz."""
+        devices = list(self.devices.values())
+        return {
+            "status": "ok",
+            "uptime": round(time.monotonic() - self.started, 1),
+            "mqttConnected": self._mqtt_connected(),
+            "devicesConnected": sum(1 for h in devices if h.connected),
+            "devicesTotal": len(devices),
+        }
+
+    def details(self) -> dict:
+        """Estado completo por dispositivo para /readyz."""
+        now = time.monotonic()
+        devices = {}
+        for device_id, h in list(self.devices.items()):
+            devices[device_id] = {
+                "connected": h.connected,
+                "reconnecting": h.reconnecting,
+                "reconnectAttempts": h.reconnect_attempts,
+                "lastReadAge": (
+                    round(now - h.last_read, 3) if h.last_read is not None else None
+                ),
+                "lastError": h.last_error,
+            }
+            if h.read_timeout is not None:
+                devices[device_id]["readTimeout"] = h.read_timeout.snapshot()
+        return {
+            "ready": self.is_ready(),
+            "mqttConnected": self._mqtt_connected(),
+            "devices": devices,
+        }
+
+
+def __getattr__(name: str):
+    # HealthServer vive en health_server.py para no importar http.server
+    # cuando los endpoints no están habilitados
+    if name == "HealthServer":
+        from .health_server import HealthServer
+
+        return HealthServer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
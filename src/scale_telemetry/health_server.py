@@ -0,0 +1,76 @@
+"""Servidor HTTP de los endpoints de salud (/healthz) y disponibilidad (/readyz)."""
+
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from .health import HealthState
+
+logger = logging.getLogger(__name__)
+
+
+class _HealthHandler(BaseHTTPRequestHandler):
+    """Handler HTTP de los probes."""
+
+    server: "HealthServer"
+
+    def do_GET(self):
+        state = self.server.state
+        if self.path == "/healthz":
+            self._send(200, state.summary())
+        elif self.path == "/readyz":
+            body = state.details()
+            self._send(200 if body["ready"] else 503, body)
+        else:
+            self._send(404, {"error": "not found"})
+
+    def _send(self, code: int, body: dict):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        # Los probes son frecuentes: no llenar el log
+        pass
+
+
+class HealthServer(ThreadingHTTPServer):
+    """Servidor HTTP embebido (stdlib) que atiende los probes en su propio hilo."""
+
+    daemon_threads = True
+
+    def __init__(self, state: HealthState, host: str = "0.0.0.0", port: int = 8080):
+        """
+        Inicializa el servidor (no acepta conexiones hasta start()).
+
+        Args:
+            state: Estado de salud a reportar
+            host: Dirección de escucha
+            port: Puerto de escucha (0 = puerto libre asignado por el sistema)
+        """
+        super().__init__((host, port), _HealthHandler)
+        self.state = state
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Lanza el hilo del servidor."""
+        self._thread = threading.Thread(
+            target=self.serve_forever, daemon=True, name="health-server"
+        )
+        self._thread.start()
+        host = self.server_address[0]
+        if isinstance(host, bytes):
+            host = host.decode()
+        logger.info(
+            f"Endpoints de salud en http://{host}:{self.server_port}/healthz y /readyz"
+        )
+
+    def stop(self) -> None:
+        """Detiene el servidor."""
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,317 @@
+"""
+API local de comandos sobre un socket Unix.
+
+Los procesos del mismo gateway envían comandos sin pasar por el broker. Cada
+mensaje es binario con prefijo de longitud:
+
+    petición:  request_id (uint32) | largo device_id (uint16) | largo payload (uint16)
+               | device_id (UTF-8) | payload (JSON, igual que en MQTT)
+    respuesta: request_id (uint32) | largo (uint32) | respuesta (JSON, igual que en MQTT)
+
+Enteros big-endian. Una conexión puede enviar varias peticiones sin esperar
+las respuestas; éstas llegan en orden de finalización con el request_id de
+la petición.
+"""
+
+import json
+import logging
+import os
+import selectors
+import socket
+import struct
+import threading
+import time
+from itertools import count
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_REQUEST = struct.Struct(">IHH")
+_RESPONSE = struct.Struct(">II")
+
+# Tamaño máximo de un mensaje pendiente por conexión (petición incompleta)
+MAX_PENDING = 64 * 1024
+SELECT_TIMEOUT = 1.0
+
+Dispatch = Callable[[str, dict, Callable[[dict], None]], None]
+
+
+class _Connection:
+    __slots__ = ("sock", "inbuf", "outbuf")
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.inbuf = bytearray()
+        self.outbuf = bytearray()
+
+
+class LocalAPIServer:
+    """
+    Servidor del socket Unix atendido por un único hilo (selectors).
+
+    Las peticiones se despachan con la misma función que los mensajes MQTT
+    (ScaleMQTTClient.dispatch): las lecturas corren en el pool del cliente y
+    sus respuestas vuelven al hilo del servidor, que las escribe en el socket.
+    """
+
+    def __init__(self, path: str, dispatch: Dispatch):
+        """
+        Inicializa el servidor (se abre con start()).
+
+        Args:
+            path: Ruta del socket Unix
+            dispatch: Función (device_id, payload, reply) que ejecuta el comando
+        """
+        self.path = path
+        self._dispatch = dispatch
+        self._selector = selectors.DefaultSelector()
+        self._listener: Optional[socket.socket] = None
+        self._connections: dict[int, _Connection] = {}
+        # Respuestas listas para escribir, producidas por otros hilos
+        self._ready: list[tuple[_Connection, bytes]] = []
+        self._lock = threading.Lock()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.requests = 0
+
+    def start(self) -> None:
+        """Abre el socket y lanza el hilo del servidor."""
+        if os.path.exists(self.path):
+            # Socket de una ejecución anterior
+            os.unlink(self.path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.path)
+        listener.listen(128)
+        listener.setblocking(False)
+        self._listener = listener
+        self._selector.register(listener, selectors.EVENT_READ, None)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, daemon=True, name="local-api"
+        )
+        self._thread.start()
+        logger.info(f"API local escuchando en {self.path}")
+
+    def stop(self) -> None:
+        """Cierra las conexiones y elimina el socket."""
+        if not self._running:
+            return
+        self._running = False
+        self._wakeup()
+        if self._thread:
+            self._thread.join(timeout=SELECT_TIMEOUT * 2)
+        for conn in list(self._connections.values()):
+            conn.sock.close()
+        self._connections.clear()
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        self._selector.close()
+        os.close(self._wakeup_r)
+        os.close(self._wakeup_w)
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        logger.info("API local detenida")
+
+    def _wakeup(self) -> None:
+        try:
+            os.write(self._wakeup_w, b"\0")
+        except BlockingIOError:
+            pass
+
+    def _run(self) -> None:
+        while self._running:
+            for key, events in self._selector.select(SELECT_TIMEOUT):
+                if key.fileobj is self._listener:
+                    self._accept()
+                elif key.fileobj == self._wakeup_r:
+                    self._drain_wakeup()
+                else:
+                    conn = key.data
+                    if events & selectors.EVENT_READ:
+                        self._on_readable(conn)
+                    if events & selectors.EVENT_WRITE and conn.sock.fileno() >= 0:
+                        self._flush(conn)
+            self._write_ready()
+
+    def _accept(self) -> None:
+        if self._listener is None:
+            return
+        try:
+            sock, _ = self._listener.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        sock.setblocking(False)
+        conn = _Connection(sock)
+        self._connections[sock.fileno()] = conn
+        self._selector.register(sock, selectors.EVENT_READ, conn)
+
+    def _drain_wakeup(self) -> None:
+        try:
+            while os.read(self._wakeup_r, 512):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _close(self, conn: _Connection) -> None:
+        fd = conn.sock.fileno()
+        if fd < 0:
+            return
+        self._selector.unregister(conn.sock)
+        self._connections.pop(fd, None)
+        conn.sock.close()
+
+    def _on_readable(self, conn: _Connection) -> None:
+        try:
+            data = conn.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._close(conn)
+            return
+        conn.inbuf += data
+        self._parse_requests(conn)
+
+    def _parse_requests(self, conn: _Connection) -> None:
+        buf = conn.inbuf
+        pos = 0
+        while len(buf) - pos >= _REQUEST.size:
+            request_id, device_len, payload_len = _REQUEST.unpack_from(buf, pos)
+            end = pos + _REQUEST.size + device_len + payload_len
+            if len(buf) < end:
+                break
+            start = pos + _REQUEST.size
+            device_id = bytes(buf[start:start + device_len]).decode("utf-8", "replace")
+            payload = bytes(buf[start + device_len:end])
+            pos = end
+            self._handle(conn, request_id, device_id, payload)
+        del buf[:pos]
+        if len(buf) > MAX_PENDING:
+            logger.warning("API local: petición demasiado grande, conexión cerrada")
+            self._close(conn)
+
+    def _handle(
+        self, conn: _Connection, request_id: int, device_id: str, raw: bytes
+    ) -> None:
+        self.requests += 1
+
+        def reply(response: dict) -> None:
+            body = json.dumps(response).encode("utf-8")
+            message = _RESPONSE.pack(request_id, len(body)) + body
+            if threading.current_thread() is self._thread:
+                self._send(conn, message)
+                return
+            with self._lock:
+                self._ready.append((conn, message))
+            self._wakeup()
+
+        try:
+            payload = json.loads(raw)
+            if not isinstance(payload, dict):
+                raise ValueError
+        except ValueError:
+            reply({
+                "deviceId": device_id,
+                "weight": None,
+                "status": "error",
+                "message": "Formato de comando inválido",
+                "timestamp": int(time.time() * 1000),
+            })
+            return
+        try:
+            self._dispatch(device_id, payload, reply)
+        except Exception as e:
+            logger.error(f"API local: error al despachar {device_id}: {e}")
+
+    def _write_ready(self) -> None:
+        with self._lock:
+            ready, self._ready = self._ready, []
+        for conn, message in ready:
+            self._send(conn, message)
+
+    def _send(self, conn: _Connection, message: bytes) -> None:
+        """Escribe una respuesta (hilo del servidor); lo que no entra queda pendiente."""
+        if conn.sock.fileno() < 0:
+            return
+        conn.outbuf += message
+        self._flush(conn)
+
+    def _flush(self, conn: _Connection) -> None:
+        try:
+            sent = conn.sock.send(conn.outbuf)
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            self._close(conn)
+            return
+        del conn.outbuf[:sent]
+        events = selectors.EVENT_READ
+        if conn.outbuf:
+            events |= selectors.EVENT_WRITE
+        self._selector.modify(conn.sock, events, conn)
+
+
+class LocalAPIClient:
+    """
+    Cliente bloqueante de la API local (una petición en vuelo a la vez):
+
+        with LocalAPIClient("/run/scale-telemetry.sock") as client:
+            response = client.request("scale-1", {"command": "get_weight"})
+    """
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(path)
+        self._ids = count(1)
+
+    def request(self, device_id: str, payload: dict | str) -> dict:
+        """
+        Envía un comando y espera su respuesta.
+
+        Args:
+            device_id: ID del dispositivo
+            payload: Comando como en MQTT, o solo su nombre ("get_weight")
+
+        Raises:
+            TimeoutError: Si la respuesta no llega a tiempo
+            ConnectionError: Si el servicio cerró la conexión
+        """
+        if isinstance(payload, str):
+            payload = {"command": payload}
+        request_id = next(self._ids) & 0xFFFFFFFF
+        device = device_id.encode("utf-8")
+        body = json.dumps(payload).encode("utf-8")
+        header = _REQUEST.pack(request_id, len(device), len(body))
+        self._sock.sendall(header + device + body)
+        while True:
+            response_id, length = _RESPONSE.unpack(self._recv_exact(_RESPONSE.size))
+            response = json.loads(self._recv_exact(length))
+            if response_id == request_id:
+                return response
+
+    def _recv_exact(self, n: int) -> bytes:
+        data = bytearray()
+        while len(data) < n:
+            chunk = self._sock.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("La API local cerró la conexión")
+            data += chunk
+        return bytes(data)
+
+    def close(self) -> None:
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -6,27 +6,45 @@ import signal
 import sys
 import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Mapping, Optional
 
 import serial
 
-from .config import DeviceConfig, MQTTConfig, load_devices
+from .alarms import ACTIVE, AlarmEngine
+from .config import (
+    DeviceConfig,
+    MQTTConfig,
+    ServiceConfig,
+    load_devices,
+    load_sinks,
+)
+from .health import HealthState
 from .mqtt_client import ScaleMQTTClient
+from .registry import DeviceRegistry
 from .serial_reader import ScaleReader
-
-# Configurar logging
-LOG_DIR = os.getenv("LOG_DIR", "logs")
-Path(LOG_DIR).mkdir(parents=True, exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler(os.path.join(LOG_DIR, 'scale_telemetry.log'))
-    ]
-)
+from .sinks import OutputSinks, Reading
+from .sources import WeightSource
+from .state import DeviceStateTracker
+
+# Los módulos de funciones opcionales se importan en start() (o al crear el
+# lector que los usa) solo si están habilitados, para no pagar su costo de
+# importación en cada inicio
+if TYPE_CHECKING:
+    from .backfill import Backfiller, HistoryStore
+    from .capture import CaptureWriter
+    from .filters import FilterChain
+    from .health_server import HealthServer
+    from .local_api import LocalAPIServer
+    from .modbus import ModbusGateway
+    from .poll_bus import PollBus
+    from .profiling import Profiler
+    from .serial_hub import SerialHub
+    from .shm_table import WeightTable
+    from .tracing import Tracer
+    from .weighment import WeighmentDetector
 
 logger = logging.getLogger(__name__)
 
@@ -39,14 +57,105 @@ class ScaleTelemetryService:
     def __init__(self):
         """Inicializa el servicio."""
         self.mqtt_config = MQTTConfig()
+        self.service_config = ServiceConfig()
         self.devices = load_devices()
         self.device_configs: dict[str, DeviceConfig] = {
             d.device_id: d for d in self.devices
         }
-        self.scale_readers: dict[str, ScaleReader] = {}
+        # Configuración, lector y callback de los dispositivos conectados,
+        # compartido con el cliente MQTT
+        self.registry = DeviceRegistry()
+        # Serializa las reconexiones de cada dispositivo
+        self._reconnect_locks: dict[str, threading.Lock] = {
+            d.device_id: threading.Lock() for d in self.devices
+        }
+        # Creación de buses y gateways compartidos (aperturas en paralelo)
+        self._shared_lock = threading.Lock()
+        self.serial_hub: Optional["SerialHub"] = None
+        self.poll_buses: dict[str, "PollBus"] = {}
+        self.modbus_gateways: dict[str, "ModbusGateway"] = {}
         self.mqtt_client: Optional[ScaleMQTTClient] = None
+        self.health = HealthState(
+            lambda: self.mqtt_client is not None and self.mqtt_client.connected
+        )
+        self.health_server: Optional["HealthServer"] = None
+        self.capture: Optional["CaptureWriter"] = None
+        self.shm_table: Optional["WeightTable"] = None
+        self.local_api: Optional["LocalAPIServer"] = None
+        self.tracer: Optional["Tracer"] = None
+        self.sinks: Optional[OutputSinks] = None
+        self.history: Optional["HistoryStore"] = None
+        self.backfiller: Optional["Backfiller"] = None
+        self.profiler: Optional["Profiler"] = None
+        self.device_state = DeviceStateTracker(self._publish_state)
+        self.filters: dict[str, "FilterChain"] = {}
+        self.weighments: dict[str, "WeighmentDetector"] = {}
+        self.alarms: dict[str, AlarmEngine] = {}
         self.running = False
 
+    @property
+    def scale_readers(self) -> Mapping[str, WeightSource]:
+        """Lectores vigentes (vista de solo lectura del registro)."""
+        return self.registry.snapshot.readers
+
+    def _register(self, device: DeviceConfig, reader: WeightSource) -> None:
+        """Registra un dispositivo conectado con su lector en el cliente MQTT."""
+        if self.mqtt_client is None:
+            raise RuntimeError("El cliente MQTT no está iniciado")
+        self.mqtt_client.register_device(
+            device, partial(self._get_weight, device.device_id), reader
+        )
+
+    def _create_reader(self, device: DeviceConfig) -> WeightSource:
+        """
+        Crea el lector de un dispositivo.
+        Las básculas Modbus comparten un ModbusGateway por puerto o host TCP;
+        las "fake" son simuladas en memoria (tests y benchmarks).
+        Las básculas con address comparten un PollBus por puerto (RS-485).
+        Con SERIAL_HUB habilitado el puerto lo atiende el hilo del SerialHub;
+        si no, se usa un ScaleReader bloqueante. Con CAPTURE_PATH, ambos
+        registran los bytes crudos que leen.
+
+        Args:
+            device: Configuración del dispositivo
+        """
+        if device.source == "modbus":
+            from .modbus import ModbusGateway
+
+            modbus_config = device.to_modbus_config()
+            with self._shared_lock:
+                gateway = self.modbus_gateways.get(device.serial_port)
+                if gateway is None:
+                    gateway = ModbusGateway(modbus_config)
+                    self.modbus_gateways[device.serial_port] = gateway
+            return gateway.reader(modbus_config)
+        if device.source == "fake":
+            from .fake_source import FakeSource
+
+            return FakeSource(device.to_fake_config())
+        if device.source != "serial":
+            raise ValueError(
+                f"Origen de peso no soportado: '{device.source}'. "
+                f"Orígenes disponibles: ['serial', 'modbus', 'fake']"
+            )
+
+        serial_config = device.to_serial_config()
+        if device.address:
+            from .poll_bus import PollBus
+
+            with self._shared_lock:
+                bus = self.poll_buses.get(device.serial_port)
+                if bus is None:
+                    bus = self.poll_buses[device.serial_port] = PollBus(serial_config)
+            return bus.reader(serial_config)
+        capture = None
+        if self.capture is not None:
+            writer, did = self.capture, device.device_id
+            capture = lambda data: writer.write(did, data)
+        if self.serial_hub is not None:
+            return self.serial_hub.reader(serial_config, capture)
+        return ScaleReader(serial_config, capture=capture)
+
     def _get_weight(self, device_id: str) -> float:
         """
         Obtiene el peso actual de una báscula específica.
@@ -56,27 +165,219 @@ class ScaleTelemetryService:
             device_id: ID del dispositivo
 
         Returns:
-            Peso en kilogramos
+            Peso en kilogramos (filtrado si el dispositivo tiene filtros)
         """
-        reader = self.scale_readers.get(device_id)
-        if not reader:
-            raise RuntimeError(f"Lector de báscula no encontrado: {device_id}")
-
         try:
-            return reader.read_weight()
+            # El lector no se cierra durante la lectura aunque otro hilo lo reemplace
+            with self.registry.lease(device_id) as reader:
+                weight = reader.read_weight()
         except serial.SerialException as e:
             logger.warning(
                 f"⚠️ Error serial en {device_id}: {e}. "
                 f"Intentando reconectar..."
             )
-            return self._reconnect_and_read(device_id)
+            self.health.record_error(device_id, str(e))
+            weight = self._reconnect_and_read(device_id, reader)
+        except Exception as e:
+            self.health.record_error(device_id, str(e))
+            raise
+        return self._process_sample(device_id, weight)
+
+    def _execute_command(
+        self, device_id: str, command: str, read_weight: bool = False
+    ) -> Optional[float]:
+        """
+        Envía un comando (tara, cero...) a una báscula específica.
+        A diferencia de _get_weight, no reintenta tras un error serial: el
+        comando podría haberse aplicado y no es idempotente.
+
+        Args:
+            device_id: ID del dispositivo
+            command: Nombre del comando configurado en devices.json
+            read_weight: Si se lee el peso después del comando
+
+        Returns:
+            Peso en kilogramos leído tras el comando, o None
+        """
+        try:
+            with self.registry.lease(device_id) as reader:
+                weight = reader.execute_command(command, read_weight)
+        except Exception as e:
+            self.health.record_error(device_id, str(e))
+            raise
+        # Tara y cero cambian el nivel a propósito: la historia ya no aplica
+        chain = self.filters.get(device_id)
+        if chain is not None:
+            chain.reset()
+        if weight is not None:
+            weight = self._process_sample(device_id, weight)
+        return weight
+
+    def _process_sample(self, device_id: str, weight: float) -> float:
+        """
+        Procesa una lectura válida de una báscula: la filtra y actualiza la
+        salud, el estado retenido, la tabla compartida, las salidas
+        adicionales (y el historial si no hay conexión al broker), la
+        detección de pesajes y las alarmas del dispositivo.
+
+        Args:
+            device_id: ID del dispositivo
+            weight: Peso en kilogramos
+
+        Returns:
+            Peso filtrado
+        """
+        self.health.record_read(device_id)
+        chain = self.filters.get(device_id)
+        if chain is not None:
+            weight = chain.apply(weight)
+        # La lectura ya es válida: un error en una salida o un detector se
+        # registra, pero no convierte la respuesta del comando en un error
+        self._side_effect(device_id, "estado", self.device_state.update_weight, device_id, weight)
+        if self.shm_table is not None:
+            self._side_effect(
+                device_id, "tabla compartida", self.shm_table.update, device_id, weight
+            )
+        if self.sinks is not None:
+            self._side_effect(device_id, "salidas", self.sinks.write, device_id, weight)
+        if self.history is not None and not self._mqtt_connected():
+            self._side_effect(
+                device_id, "historial", self.history.write,
+                Reading(device_id, weight, time.time()),
+            )
+        if device_id in self.weighments:
+            self._side_effect(device_id, "pesajes", self._update_weighment, device_id, weight)
+        if device_id in self.alarms:
+            self._side_effect(device_id, "alarmas", self._update_alarms, device_id, weight)
+        return weight
+
+    def _side_effect(self, device_id: str, stage: str, fn, *args) -> None:
+        """Ejecuta una etapa de _process_sample; sus errores se registran y no se propagan."""
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.error(f"Error en {stage} de {device_id}: {e}", exc_info=True)
+
+    def _update_weighment(self, device_id: str, weight: float) -> None:
+        """Alimenta el detector de pesajes y publica el evento si cerró uno."""
+        event = self.weighments[device_id].update(weight)
+        if event is not None:
+            logger.info(
+                f"⚖️ Pesaje en {device_id}: {event['weight']} kg "
+                f"({event['duration']}s, {event['samples']} muestras)"
+            )
+            self._publish_event(device_id, event)
+
+    def _update_alarms(self, device_id: str, weight: float) -> None:
+        """Evalúa las alarmas del dispositivo y publica sus transiciones."""
+        for transition in self.alarms[device_id].update(weight):
+            if transition["state"] == ACTIVE:
+                logger.warning(
+                    f"🚨 Alarma {transition['alarm']} en {device_id}: "
+                    f"{transition['weight']} kg"
+                )
+            else:
+                logger.info(
+                    f"Alarma {transition['alarm']} despejada en {device_id} "
+                    f"({transition['duration']}s)"
+                )
+            self._publish_alarm(device_id, transition)
+
+    def _set_connected(self, device_id: str, connected: bool) -> None:
+        """Registra el estado de conexión serial en la salud y el estado retenido."""
+        self.health.set_connected(device_id, connected)
+        if connected:
+            # Timeout adaptativo del lector actual, para /readyz
+            reader = self.scale_readers.get(device_id)
+            self.health.device(device_id).read_timeout = getattr(
+                reader, "read_timeout", None
+            )
+        self.device_state.update_connection(device_id, connected)
+        if self.shm_table is not None:
+            self.shm_table.set_connected(device_id, connected)
+
+    def _publish_state(self, device_id: str, state: dict) -> None:
+        """Publica el estado retenido de un dispositivo si MQTT está disponible."""
+        if self.mqtt_client is not None:
+            self.mqtt_client.publish_state(
+                self.device_configs[device_id].state_topic, state
+            )
+
+    def _publish_event(self, device_id: str, event: dict) -> None:
+        """Publica un evento de pesaje si MQTT está disponible."""
+        if self.mqtt_client is not None:
+            self.mqtt_client.publish_event(
+                self.device_configs[device_id].events_topic, event
+            )
 
-    def _reconnect_and_read(self, device_id: str) -> float:
+    def _publish_alarm(self, device_id: str, transition: dict) -> None:
+        """Publica una transición de alarma si MQTT está disponible."""
+        if self.mqtt_client is not None:
+            self.mqtt_client.publish_event(
+                self.device_configs[device_id].alarms_topic, transition
+            )
+
+    def _mqtt_connected(self) -> bool:
+        return self.mqtt_client is not None and self.mqtt_client.connected
+
+    def _on_mqtt_connected(self) -> None:
+        """Al (re)conectar: republica el estado retenido y lanza el backfill."""
+        self.device_state.republish()
+        if self.backfiller is not None:
+            self.backfiller.trigger()
+
+    def _publish_backfill(self, device_id: str, payload: bytes) -> None:
+        """Publica un chunk de backfill si MQTT está disponible."""
+        device = self.device_configs.get(device_id)
+        if device is None:
+            raise ValueError(f"Dispositivo no configurado: {device_id}")
+        if self.mqtt_client is not None:
+            self.mqtt_client.publish_backfill(device.backfill_topic, payload)
+
+    def _publish_readings(self, topic: str, payload: str) -> bool:
+        """
+        Publica un lote de la salida mqtt si MQTT está disponible.
+
+        Returns:
+            False si el lote no se pudo encolar (sin cliente o cola llena)
+        """
+        if self.mqtt_client is None:
+            return False
+        return self.mqtt_client.publish_readings(topic, payload)
+
+    def _sample_loop(self, device: DeviceConfig):
+        """
+        Lee el peso de un dispositivo cada sample_interval segundos para
+        alimentar el estado y la detección de pesajes sin esperar comandos.
+        Las lecturas pasan por _get_weight (reconexión y salud incluidas).
+
+        Args:
+            device: Configuración del dispositivo
+        """
+        device_id = device.device_id
+        while self.running:
+            time.sleep(device.sample_interval)
+            if not self.running:
+                break
+            if device_id not in self.scale_readers:
+                continue
+            if self.mqtt_client is not None and self.mqtt_client.publisher.saturated:
+                continue
+            try:
+                self._get_weight(device_id)
+            except Exception as e:
+                logger.debug(f"Lectura periódica fallida en {device_id}: {e}")
+
+    def _reconnect_and_read(self, device_id: str, failed: WeightSource) -> float:
         """
         Reconecta un dispositivo serial y reintenta la lectura.
 
+        Las reconexiones de un mismo dispositivo se serializan: si otro hilo
+        ya reemplazó el lector que falló, se lee con el nuevo sin reconectar.
+
         Args:
             device_id: ID del dispositivo
+            failed: Lector que produjo el error serial
 
         Returns:
             Peso en kilogramos
@@ -85,29 +386,38 @@ class ScaleTelemetryService:
             RuntimeError: Si no se puede reconectar
         """
         device = self.device_configs[device_id]
-        old_reader = self.scale_readers.get(device_id)
 
-        # Cerrar conexión anterior
-        if old_reader:
-            try:
-                old_reader.disconnect()
-            except Exception:
-                pass
+        with self._reconnect_locks[device_id]:
+            current = self.scale_readers.get(device_id)
+            if current is None or current is failed:
+                # Retirar el lector anterior: se cierra cuando terminan las
+                # lecturas que otros hilos tengan en curso
+                self.registry.swap_reader(device_id, None)
 
-        # Intentar reconectar
-        serial_config = device.to_serial_config()
-        new_reader = ScaleReader(serial_config)
-        try:
-            new_reader.connect()
-        except Exception as e:
-            raise RuntimeError(
-                f"No se pudo reconectar {device_id} en "
-                f"{device.serial_port}: {e}"
-            )
+                # Intentar reconectar
+                self.health.set_reconnecting(device_id)
+                new_reader = self._create_reader(device)
+                try:
+                    new_reader.connect()
+                except Exception as e:
+                    self._set_connected(device_id, False)
+                    # Se vuelve a registrar el lector fallido (ya cerrado): la
+                    # próxima lectura falla con un error serial y reintenta
+                    # la reconexión, y las lecturas periódicas lo siguen viendo
+                    if failed is not None:
+                        self.registry.swap_reader(device_id, failed)
+                    raise RuntimeError(
+                        f"No se pudo reconectar {device_id} en "
+                        f"{device.serial_port}: {e}"
+                    )
 
-        self.scale_readers[device_id] = new_reader
-        logger.info(f"✅ Dispositivo {device_id} reconectado exitosamente")
-        return new_reader.read_weight()
+                self.registry.swap_reader(device_id, new_reader)
+                self._set_connected(device_id, True)
+                logger.info(f"✅ Dispositivo {device_id} reconectado exitosamente")
+
+        # La lectura también va con lease: otra reconexión puede reemplazarlo
+        with self.registry.lease(device_id) as reader:
+            return reader.read_weight()
 
     def _retry_connect(self, device: DeviceConfig):
         """
@@ -126,26 +436,91 @@ class ScaleTelemetryService:
                 f"🔄 Reintentando conexión de {device.device_id} "
                 f"en {device.serial_port}..."
             )
-            serial_config = device.to_serial_config()
-            reader = ScaleReader(serial_config)
+            self.health.set_reconnecting(device.device_id)
+            reader = self._create_reader(device)
             try:
                 reader.connect()
             except Exception as e:
                 logger.warning(
                     f"❌ Reintento fallido para {device.device_id}: {e}"
                 )
+                self.health.record_error(device.device_id, str(e))
                 continue
 
             # Conexión exitosa: registrar el dispositivo
-            self.scale_readers[device.device_id] = reader
-            did = device.device_id
-            callback = lambda d=did: self._get_weight(d)
-            self.mqtt_client.register_device(device, callback)
+            self._register(device, reader)
+            self._set_connected(device.device_id, True)
             logger.info(
                 f"✅ Dispositivo {device.device_id} conectado después de reintento"
             )
             break
 
+    def _check_shared_links(self) -> None:
+        """
+        Crea (sin abrir) los lectores de los dispositivos que comparten un
+        bus RS-485 o un enlace Modbus, para que una configuración
+        incompatible detenga el inicio en lugar de quedar en reintentos.
+
+        Raises:
+            ValueError: Si un dispositivo no coincide con su bus o enlace
+        """
+        for device in self.devices:
+            if device.source == "modbus" or device.address:
+                self._create_reader(device)
+
+    def _open_reader(self, device: DeviceConfig) -> WeightSource:
+        """Crea y conecta el lector de un dispositivo."""
+        logger.info(f"  Dispositivo: {device.device_id} -> {device.serial_port}")
+        reader = self._create_reader(device)
+        reader.connect()
+        return reader
+
+    def _connect_devices(
+        self,
+        pool: ThreadPoolExecutor,
+    ) -> tuple[list[tuple[DeviceConfig, WeightSource]], list[DeviceConfig]]:
+        """
+        Abre todos los puertos en paralelo con un plazo total acotado.
+
+        Un adaptador USB muerto puede bloquear serial.Serial() varios segundos;
+        abriendo en paralelo el tiempo de inicio no crece con la cantidad de
+        puertos. Los dispositivos que no abren dentro de CONNECT_TIMEOUT pasan
+        a reintentos en background (si su apertura termina tarde, se cierra).
+
+        Args:
+            pool: Pool de hilos para las aperturas
+
+        Returns:
+            (conectados, fallidos): pares (dispositivo, lector) y dispositivos
+        """
+        futures: dict[Future, DeviceConfig] = {
+            pool.submit(self._open_reader, device): device
+            for device in self.devices
+        }
+        done, not_done = wait(futures, timeout=self.service_config.connect_timeout)
+
+        connected = []
+        failed = []
+        for future, device in futures.items():
+            if future in not_done:
+                logger.error(
+                    f"❌ Timeout al conectar {device.device_id} "
+                    f"en {device.serial_port} "
+                    f"({self.service_config.connect_timeout}s)"
+                )
+                future.add_done_callback(_close_late_reader)
+                failed.append(device)
+                continue
+            try:
+                connected.append((device, future.result()))
+            except Exception as e:
+                logger.error(
+                    f"❌ No se pudo conectar {device.device_id} "
+                    f"en {device.serial_port}: {e}"
+                )
+                failed.append(device)
+        return connected, failed
+
     def start(self):
         """Inicia el servicio de telemetría."""
         logger.info("=== Iniciando Scale Telemetry Service ===")
@@ -153,47 +528,167 @@ class ScaleTelemetryService:
         logger.info(f"Dispositivos configurados: {len(self.devices)}")
 
         try:
-            # Inicializar lectores de báscula
-            weight_callbacks: dict[str, callable] = {}
-            connected_devices = []
-            failed_devices = []
+            from .profiling import Profiler
+
+            self.profiler = Profiler(
+                os.getenv("LOG_DIR", "logs"),
+                self.service_config.profile_duration,
+                self.service_config.profile_rate,
+                stats=self._load,
+            )
+
+            if self.service_config.capture_path:
+                from .capture import CaptureWriter
+
+                self.capture = CaptureWriter(self.service_config.capture_path)
+                logger.info(
+                    f"Capturando bytes seriales en {self.service_config.capture_path}"
+                )
+
+            if self.service_config.serial_hub:
+                from .serial_hub import SerialHub
+
+                self.serial_hub = SerialHub()
+                self.serial_hub.start()
+                logger.info("Modo SerialHub: todos los puertos en un único hilo")
 
             for device in self.devices:
-                logger.info(f"  Dispositivo: {device.device_id} -> {device.serial_port}")
-                serial_config = device.to_serial_config()
-                reader = ScaleReader(serial_config)
-                try:
-                    reader.connect()
-                except Exception as e:
-                    logger.error(
-                        f"❌ No se pudo conectar {device.device_id} "
-                        f"en {device.serial_port}: {e}"
+                self.health.device(device.device_id)
+                self.device_state.configure_device(
+                    device.device_id, device.state_deadband
+                )
+                if device.filters:
+                    from .filters import FilterChain
+
+                    self.filters[device.device_id] = FilterChain.from_config(
+                        device.filters
+                    )
+                weighment_config = device.to_weighment_config()
+                if weighment_config is not None:
+                    from .weighment import WeighmentDetector
+
+                    self.weighments[device.device_id] = WeighmentDetector(
+                        device.device_id, weighment_config
                     )
-                    failed_devices.append(device)
-                    continue
-                self.scale_readers[device.device_id] = reader
-                connected_devices.append(device)
-                did = device.device_id
-                weight_callbacks[did] = lambda d=did: self._get_weight(d)
+                if device.alarms:
+                    self.alarms[device.device_id] = AlarmEngine.from_config(
+                        device.device_id, device.alarms
+                    )
+
+            if self.service_config.shm_table:
+                from .shm_table import WeightTable
+
+                self.shm_table = WeightTable(
+                    self.service_config.shm_table,
+                    [d.device_id for d in self.devices],
+                )
+                logger.info(
+                    f"Tabla de pesos en memoria compartida: {self.service_config.shm_table}"
+                )
+
+            if self.service_config.health_port:
+                from .health_server import HealthServer
+
+                self.health_server = HealthServer(
+                    self.health,
+                    self.service_config.health_host,
+                    self.service_config.health_port,
+                )
+                self.health_server.start()
+
+            # Cliente MQTT sin dispositivos: se registran a medida que conectan
+            self.mqtt_client = ScaleMQTTClient(
+                self.mqtt_config, [], {},
+                max_workers=len(self.devices),
+                command_callback=self._execute_command,
+                registry=self.registry,
+            )
+            self.mqtt_client.on_connected = self._on_mqtt_connected
+            self.mqtt_client.admin_callback = self._handle_admin
+
+            if self.service_config.backfill_dir:
+                from .backfill import Backfiller, HistoryStore
+
+                self.history = HistoryStore(
+                    self.service_config.backfill_dir,
+                    self.service_config.backfill_max_records,
+                )
+                self.history.start()
+                self.backfiller = Backfiller(
+                    self.history,
+                    self._publish_backfill,
+                    self._mqtt_connected,
+                    self.service_config.backfill_chunk_size,
+                    self.service_config.backfill_ack_timeout,
+                )
+                self.backfiller.start()
+                self.mqtt_client.backfill_callback = self.backfiller.on_ack
+                logger.info(
+                    f"Historial sin conexión en {self.service_config.backfill_dir}"
+                )
+
+            if self.service_config.trace_sample_rate > 0:
+                from .tracing import Tracer
+
+                self.tracer = Tracer(
+                    self.service_config.trace_path
+                    or os.path.join(os.getenv("LOG_DIR", "logs"), "traces.jsonl"),
+                    self.service_config.trace_sample_rate,
+                )
+                self.tracer.start()
+                self.mqtt_client.tracer = self.tracer
+
+            if self.service_config.sinks_config_path:
+                self.sinks = OutputSinks.from_config(
+                    load_sinks(self.service_config.sinks_config_path),
+                    self._publish_readings,
+                )
+                self.sinks.start()
+
+            # API local: mismo despacho que los comandos MQTT, sin broker
+            if self.service_config.local_socket:
+                from .local_api import LocalAPIServer
+
+                self.local_api = LocalAPIServer(
+                    self.service_config.local_socket, self.mqtt_client.dispatch
+                )
+                self.local_api.start()
+
+            self._check_shared_links()
+
+            # Conectar MQTT y abrir los puertos seriales en paralelo. El loop
+            # de red arranca apenas conecta el broker, de modo que la
+            # suscripción a comandos no espera la apertura de los puertos
+            workers = max(1, min(len(self.devices), self.service_config.connect_workers))
+            pool = ThreadPoolExecutor(
+                max_workers=workers + 1, thread_name_prefix="startup"
+            )
+            mqtt_future = pool.submit(self._start_mqtt, self.mqtt_client)
+            connected_devices, failed_devices = self._connect_devices(pool)
+            pool.shutdown(wait=False, cancel_futures=True)
+
+            for device, reader in connected_devices:
+                self._register(device, reader)
+                self._set_connected(device.device_id, True)
 
             logger.info(
                 f"Básculas conectadas: {len(connected_devices)}/{len(self.devices)}"
             )
 
-            # Inicializar cliente MQTT con dispositivos conectados
-            self.mqtt_client = ScaleMQTTClient(
-                self.mqtt_config, connected_devices, weight_callbacks
-            )
-            self.mqtt_client.connect()
+            # Propaga el error si la conexión MQTT falló
+            mqtt_future.result()
 
             # Configurar manejador de señales para cierre graceful
             signal.signal(signal.SIGINT, self._signal_handler)
             signal.signal(signal.SIGTERM, self._signal_handler)
+            if hasattr(signal, "SIGUSR1"):
+                signal.signal(signal.SIGUSR1, self._profile_signal_handler)
 
             self.running = True
 
             # Lanzar hilos de reconexión para dispositivos fallidos
             for device in failed_devices:
+                self._set_connected(device.device_id, False)
                 thread = threading.Thread(
                     target=self._retry_connect,
                     args=(device,),
@@ -206,10 +701,21 @@ class ScaleTelemetryService:
                     f"(cada {RECONNECT_INTERVAL}s)"
                 )
 
+            # Lecturas periódicas de los dispositivos con sample_interval
+            for device in self.devices:
+                if device.sample_interval > 0:
+                    threading.Thread(
+                        target=self._sample_loop,
+                        args=(device,),
+                        daemon=True,
+                        name=f"sample-{device.device_id}",
+                    ).start()
+
             logger.info("Servicio iniciado correctamente. Esperando comandos...")
 
-            # Iniciar loop MQTT (bloqueante)
-            self.mqtt_client.start()
+            # El loop MQTT corre en su propio hilo: esperar hasta el cierre
+            while self.running:
+                time.sleep(0.5)
 
         except KeyboardInterrupt:
             logger.info("Interrupción de teclado recibida")
@@ -219,6 +725,12 @@ class ScaleTelemetryService:
         finally:
             self.stop()
 
+    @staticmethod
+    def _start_mqtt(client: ScaleMQTTClient) -> None:
+        """Conecta al broker e inicia el loop de red en su propio hilo."""
+        client.connect()
+        client.start()
+
     def stop(self):
         """Detiene el servicio de telemetría."""
         if not self.running:
@@ -234,16 +746,110 @@ class ScaleTelemetryService:
             except Exception as e:
                 logger.error(f"Error al detener cliente MQTT: {e}")
 
-        # Desconectar todas las básculas
-        for device_id, reader in self.scale_readers.items():
-            try:
-                reader.disconnect()
-                logger.info(f"Báscula desconectada: {device_id}")
-            except Exception as e:
-                logger.error(f"Error al desconectar báscula {device_id}: {e}")
+        if self.local_api:
+            self.local_api.stop()
+
+        # Desconectar todas las básculas (las lecturas en curso terminan antes)
+        for device_id in self.registry.retire_all():
+            logger.info(f"Báscula desconectada: {device_id}")
+
+        if self.serial_hub:
+            self.serial_hub.stop()
+
+        if self.health_server:
+            self.health_server.stop()
+
+        if self.profiler:
+            self.profiler.stop()
+
+        if self.tracer:
+            self.tracer.stop()
+
+        if self.sinks:
+            self.sinks.stop()
+
+        if self.backfiller:
+            self.backfiller.stop()
+
+        if self.history:
+            self.history.stop()
+
+        if self.capture:
+            self.capture.close()
+
+        if self.shm_table:
+            self.shm_table.close()
 
         logger.info("Servicio detenido")
 
+    def _load(self) -> dict:
+        """Carga del servicio para los reportes de perfil."""
+        load = {} if self.mqtt_client is None else self.mqtt_client.load()
+        if self.sinks is not None:
+            load["sinks"] = self.sinks.stats()
+        if self.history is not None:
+            load["history"] = self.history.stats()
+        return load
+
+    def _handle_admin(self, payload: dict, reply) -> None:
+        """
+        Ejecuta un comando del tópico de administración:
+            {"command": "profile", "duration": 10, "rate": 100}
+            {"command": "stacks"}
+            {"command": "load"}
+        """
+        command = payload.get("command")
+        timestamp = int(time.time() * 1000)
+        if command in ("profile", "stacks"):
+            profiler = self.profiler
+            if profiler is None:
+                reply({
+                    "status": "error",
+                    "message": "Perfilador no iniciado",
+                    "timestamp": timestamp,
+                })
+            elif command == "stacks":
+                # El dump escribe a disco: no se hace en el hilo de red de MQTT
+                profiler.trigger_dump(reply)
+            else:
+                self._admin_profile(profiler, payload, reply, timestamp)
+        elif command == "load":
+            reply({"status": "ok", "load": self._load(), "timestamp": timestamp})
+        else:
+            reply({
+                "status": "error",
+                "message": f"Comando de administración desconocido: {command}",
+                "timestamp": timestamp,
+            })
+
+    def _admin_profile(self, profiler: "Profiler", payload: dict, reply, timestamp: int) -> None:
+        """Comando "profile": responde al iniciar y, desde el perfilador, al terminar."""
+        try:
+            started = profiler.trigger(payload.get("duration"), payload.get("rate"), done=reply)
+        except (TypeError, ValueError) as e:
+            reply({"status": "error", "message": str(e), "timestamp": timestamp})
+            return
+        if not started:
+            reply({
+                "status": "error",
+                "message": "Ya hay un perfil en curso",
+                "timestamp": timestamp,
+            })
+            return
+        reply({"status": "started", "message": "Perfil iniciado", "timestamp": timestamp})
+
+    def _profile_signal_handler(self, signum, frame):
+        """SIGUSR1: lanza un perfil con la duración configurada."""
+        logger.info(f"Señal {signum} recibida, iniciando perfil...")
+        try:
+            started = self.profiler.trigger()
+        except (TypeError, ValueError) as e:
+            # Una excepción en el manejador interrumpiría el hilo principal
+            logger.error(f"No se pudo iniciar el perfil: {e}")
+            return
+        if not started:
+            logger.warning("Ya hay un perfil en curso")
+
     def _signal_handler(self, signum, frame):
         """Maneja señales del sistema para cierre graceful."""
         logger.info(f"Señal {signum} recibida, iniciando cierre...")
@@ -251,8 +857,39 @@ class ScaleTelemetryService:
         sys.exit(0)
 
 
+def _close_late_reader(future: Future):
+    """Cierra un lector cuya apertura terminó después del plazo de inicio."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    try:
+        future.result().disconnect()
+    except Exception:
+        pass
+
+
+def _configure_logging():
+    """Configura logging a consola y a LOG_DIR/scale_telemetry.log."""
+    log_dir = os.getenv("LOG_DIR", "logs")
+    Path(log_dir).mkdir(parents=True, exist_ok=True)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout),
+            logging.FileHandler(os.path.join(log_dir, 'scale_telemetry.log'))
+        ]
+    )
+
+
 def main():
     """Función principal."""
+    # .env se carga aquí (no al importar config) para que importar el
+    # paquete no tenga efectos secundarios
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    _configure_logging()
     service = ScaleTelemetryService()
     service.start()
 
@@ -0,0 +1,571 @@
+"""Origen de peso Modbus RTU/TCP con lecturas agrupadas por gateway."""
+
+import logging
+import socket
+import struct
+import threading
+from typing import Optional
+
+import serial
+
+from .config import ModbusConfig
+
+logger = logging.getLogger(__name__)
+
+# Tipo de registro -> código de función de lectura
+READ_FUNCTIONS = {
+    "holding": 0x03,
+    "input": 0x04,
+}
+WRITE_REGISTER = 0x06
+
+# Tipo de dato -> (cantidad de registros, formato struct)
+DATA_TYPES = {
+    "int16": (1, ">h"),
+    "uint16": (1, ">H"),
+    "int32": (2, ">i"),
+    "uint32": (2, ">I"),
+    "float32": (2, ">f"),
+}
+WORD_ORDERS = ("big", "little")
+
+# Máximo de registros por lectura permitido por el protocolo
+MAX_READ_REGISTERS = 125
+# Registros intermedios que se leen de más para unir dos lecturas en una
+MERGE_GAP = 8
+# Peticiones en vuelo por conexión TCP (los gateways suelen aceptar 8-16)
+TCP_MAX_INFLIGHT = 8
+TCP_PREFIX = "tcp://"
+TCP_DEFAULT_PORT = 502
+
+EXCEPTION_CODES = {
+    1: "función ilegal",
+    2: "dirección ilegal",
+    3: "valor ilegal",
+    4: "falla del dispositivo",
+    6: "dispositivo ocupado",
+    10: "gateway sin ruta",
+    11: "el dispositivo no respondió al gateway",
+}
+
+
+def _crc_table() -> list[int]:
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC_TABLE = _crc_table()
+
+
+def crc16(data: bytes) -> int:
+    """CRC-16/Modbus de una trama RTU."""
+    crc = 0xFFFF
+    for byte in data:
+        crc = (crc >> 8) ^ _CRC_TABLE[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def decode_registers(registers: list[int], data_type: str, word_order: str = "big") -> float:
+    """
+    Convierte registros de 16 bits al valor numérico del tipo indicado.
+
+    Args:
+        registers: Registros leídos (big-endian dentro de cada registro)
+        data_type: Clave de DATA_TYPES
+        word_order: "big" si la palabra alta va primero, "little" si no
+    """
+    count, fmt = DATA_TYPES[data_type]
+    if word_order == "little":
+        registers = registers[::-1]
+    return struct.unpack(fmt, struct.pack(f">{count}H", *registers))[0]
+
+
+class _Request:
+    """Petición Modbus de una unidad (lectura de un rango o escritura)."""
+
+    __slots__ = ("unit", "function", "address", "value", "registers", "error")
+
+    def __init__(self, unit: int, function: int, address: int, value: int):
+        self.unit = unit
+        self.function = function
+        self.address = address
+        # Cantidad de registros en lecturas, valor escrito en escrituras
+        self.value = value
+        self.registers: list[int] = []
+        self.error: Optional[Exception] = None
+
+    def pdu(self) -> bytes:
+        return struct.pack(">BHH", self.function, self.address, self.value)
+
+    def parse(self, pdu: bytes) -> list[int]:
+        """
+        Valida la respuesta y retorna los registros leídos.
+
+        Raises:
+            ValueError: Si la respuesta es una excepción Modbus o es inválida
+        """
+        if len(pdu) >= 2 and pdu[0] == self.function | 0x80:
+            code = pdu[1]
+            raise ValueError(
+                f"Excepción Modbus {code} "
+                f"({EXCEPTION_CODES.get(code, 'desconocida')}) "
+                f"en la unidad {self.unit}"
+            )
+        if not pdu or pdu[0] != self.function:
+            raise ValueError(f"Respuesta Modbus inesperada de la unidad {self.unit}")
+        if self.function == WRITE_REGISTER:
+            if pdu != self.pdu():
+                raise ValueError(f"La unidad {self.unit} no confirmó la escritura")
+            return []
+        if len(pdu) < 2 or pdu[1] != 2 * self.value or len(pdu) != 2 + pdu[1]:
+            raise ValueError(f"Respuesta Modbus incompleta de la unidad {self.unit}")
+        return list(struct.unpack(f">{self.value}H", pdu[2:]))
+
+
+class _RTUTransport:
+    """Enlace Modbus RTU sobre un puerto serial (una petición a la vez)."""
+
+    def __init__(self, config: ModbusConfig):
+        self.connection = serial.Serial(
+            port=config.port,
+            baudrate=config.baudrate,
+            timeout=config.timeout,
+        )
+
+    def execute(self, requests: list[_Request]) -> None:
+        for request in requests:
+            try:
+                request.registers = self._transact(request)
+            except ValueError as e:
+                request.error = e
+
+    def _transact(self, request: _Request) -> list[int]:
+        frame = bytes([request.unit]) + request.pdu()
+        frame += struct.pack("<H", crc16(frame))
+        # Descarta respuestas tardías de una unidad que superó el timeout
+        self.connection.reset_input_buffer()
+        self.connection.write(frame)
+
+        header = self.connection.read(2)
+        if len(header) < 2:
+            raise ValueError(f"La unidad {request.unit} no respondió")
+        if header[1] & 0x80:
+            rest = self.connection.read(3)
+        elif header[1] == WRITE_REGISTER:
+            rest = self.connection.read(6)
+        else:
+            count = self.connection.read(1)
+            rest = count + self.connection.read(count[0] + 2) if count else b""
+        response = header + rest
+        if (
+            len(response) < 5
+            or crc16(response[:-2]) != struct.unpack("<H", response[-2:])[0]
+        ):
+            raise ValueError(f"Trama RTU inválida de la unidad {request.unit}")
+        if response[0] != request.unit:
+            raise ValueError(
+                f"Respuesta de la unidad {response[0]} "
+                f"(se esperaba {request.unit})"
+            )
+        return request.parse(response[1:-2])
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class _TCPTransport:
+    """
+    Enlace Modbus TCP. Las peticiones de un ciclo se envían juntas (hasta
+    TCP_MAX_INFLIGHT en vuelo) y las respuestas se asocian por transaction id.
+    """
+
+    def __init__(self, config: ModbusConfig):
+        host, _, port = config.port[len(TCP_PREFIX):].partition(":")
+        self._sock = socket.create_connection(
+            (host, int(port or TCP_DEFAULT_PORT)), timeout=config.timeout
+        )
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._tid = 0
+
+    def execute(self, requests: list[_Request]) -> None:
+        for i in range(0, len(requests), TCP_MAX_INFLIGHT):
+            inflight: dict[int, _Request] = {}
+            frames = []
+            for request in requests[i:i + TCP_MAX_INFLIGHT]:
+                self._tid = (self._tid + 1) & 0xFFFF
+                inflight[self._tid] = request
+                pdu = request.pdu()
+                frames.append(
+                    struct.pack(">HHHB", self._tid, 0, len(pdu) + 1, request.unit)
+                    + pdu
+                )
+            self._sock.sendall(b"".join(frames))
+
+            while inflight:
+                try:
+                    header = self._recv(7)
+                except socket.timeout:
+                    # Las unidades que no respondieron fallan solas: el enlace
+                    # sigue sano y sus respuestas tardías se descartan por tid
+                    for request in inflight.values():
+                        request.error = ValueError(
+                            f"La unidad {request.unit} no respondió"
+                        )
+                    break
+                tid, _, length, _ = struct.unpack(">HHHB", header)
+                pdu = self._recv(length - 1)
+                if tid not in inflight:
+                    continue  # Respuesta tardía de un ciclo anterior
+                request = inflight.pop(tid)
+                try:
+                    request.registers = request.parse(pdu)
+                except ValueError as e:
+                    request.error = e
+
+    def _recv(self, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            try:
+                chunk = self._sock.recv(size - len(data))
+            except socket.timeout:
+                if data:
+                    # A mitad de una trama el flujo queda desalineado
+                    raise ConnectionError("Trama Modbus TCP incompleta") from None
+                raise
+            if not chunk:
+                raise ConnectionError("El gateway cerró la conexión")
+            data += chunk
+        return bytes(data)
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+class _Job:
+    """Lectura o escritura pendiente de un lector."""
+
+    __slots__ = ("config", "register", "value", "request", "offset",
+                 "result", "error", "done")
+
+    def __init__(self, config: ModbusConfig, register: int = -1, value: int = 0):
+        self.config = config
+        # register >= 0 indica una escritura
+        self.register = register
+        self.value = value
+        self.request: _Request  # La asigna _build_requests al armar el ciclo
+        self.offset = 0
+        self.result = 0.0  # Solo en lecturas
+        self.error: Optional[Exception] = None
+        self.done = threading.Event()
+
+    def wait(self) -> float:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def _build_requests(jobs: list[_Job]) -> list[_Request]:
+    """
+    Arma las peticiones de un ciclo: las escrituras en orden de llegada y
+    luego las lecturas de cada unidad, uniendo rangos cercanos en una sola
+    petición (varias básculas o canales de un mismo indicador).
+    """
+    requests = []
+    reads: dict[tuple[int, int], list[_Job]] = {}
+    for job in jobs:
+        config = job.config
+        if job.register >= 0:
+            job.request = _Request(
+                config.unit_id, WRITE_REGISTER, job.register, job.value
+            )
+            requests.append(job.request)
+        else:
+            key = (config.unit_id, READ_FUNCTIONS[config.register_type])
+            reads.setdefault(key, []).append(job)
+
+    for (unit, function), unit_jobs in reads.items():
+        unit_jobs.sort(key=lambda j: j.config.register)
+        current: Optional[_Request] = None
+        for job in unit_jobs:
+            start = job.config.register
+            end = start + DATA_TYPES[job.config.data_type][0]
+            if current is not None:
+                current_end = current.address + current.value
+                if (
+                    start - current_end <= MERGE_GAP
+                    and max(end, current_end) - current.address <= MAX_READ_REGISTERS
+                ):
+                    current.value = max(end, current_end) - current.address
+                else:
+                    current = None
+            if current is None:
+                current = _Request(unit, function, start, end - start)
+                requests.append(current)
+            job.request = current
+            job.offset = start - current.address
+    return requests
+
+
+class ModbusReader:
+    """
+    Lector de una báscula Modbus atendida por un ModbusGateway.
+
+    Expone la misma interfaz que ScaleReader; las lecturas se encolan en el
+    gateway, que las agrupa con las de las demás básculas del mismo enlace.
+    """
+
+    def __init__(self, gateway: "ModbusGateway", config: ModbusConfig):
+        """
+        Inicializa el lector.
+
+        Args:
+            gateway: Gateway que comparte el enlace
+            config: Configuración Modbus del dispositivo
+        """
+        if config.register_type not in READ_FUNCTIONS:
+            raise ValueError(
+                f"Tipo de registro no soportado: '{config.register_type}'. "
+                f"Tipos disponibles: {list(READ_FUNCTIONS)}"
+            )
+        if config.data_type not in DATA_TYPES:
+            raise ValueError(
+                f"Tipo de dato no soportado: '{config.data_type}'. "
+                f"Tipos disponibles: {list(DATA_TYPES)}"
+            )
+        if config.word_order not in WORD_ORDERS:
+            raise ValueError(
+                f"Orden de palabras no soportado: '{config.word_order}'. "
+                f"Órdenes disponibles: {list(WORD_ORDERS)}"
+            )
+        if not 0 <= config.unit_id <= 247:
+            raise ValueError(f"unit_id fuera de rango (0-247): {config.unit_id}")
+        gateway.check_compatible(config)
+        self.config = config
+        self._gateway = gateway
+
+    def connect(self) -> None:
+        """Abre el enlace del gateway si aún no está abierto (o quedó en error)."""
+        self._gateway.attach(self)
+
+    def disconnect(self) -> None:
+        """Se desvincula del gateway; el enlace se cierra con el último lector."""
+        self._gateway.detach(self)
+
+    def read_weight(self) -> float:
+        """
+        Lee el registro de peso en el próximo ciclo del gateway.
+
+        Returns:
+            El peso en kilogramos
+
+        Raises:
+            serial.SerialException: Si falla el enlace con el gateway
+            ValueError: Si la unidad no responde o responde una excepción
+        """
+        return self._gateway.submit(_Job(self.config)).wait()
+
+    def execute_command(self, command: str, read_weight: bool = False) -> Optional[float]:
+        """
+        Ejecuta un comando como escritura de un registro ("registro=valor").
+
+        Args:
+            command: Nombre del comando (clave de ModbusConfig.commands)
+            read_weight: Si se lee el peso después del comando
+
+        Returns:
+            El peso leído después del comando, o None si read_weight es False
+        """
+        payload = self.config.commands.get(command)
+        if payload is None:
+            raise ValueError(
+                f"Comando no soportado por la báscula: '{command}'. "
+                f"Comandos disponibles: {sorted(self.config.commands)}"
+            )
+        try:
+            register, value = (int(part, 0) for part in payload.split("="))
+        except ValueError:
+            raise ValueError(
+                f"Comando Modbus inválido '{command}': '{payload}' "
+                f"(formato esperado: registro=valor)"
+            )
+        self._gateway.submit(_Job(self.config, register, value)).wait()
+        logger.info(
+            f"Comando '{command}' enviado a la unidad {self.config.unit_id} "
+            f"en {self.config.port}"
+        )
+        return self.read_weight() if read_weight else None
+
+
+class ModbusGateway:
+    """
+    Conexión compartida con un enlace Modbus (puerto RTU o gateway TCP).
+
+    Un hilo por gateway toma todas las operaciones pendientes y las resuelve
+    en un ciclo: une las lecturas de registros cercanos de cada unidad y, en
+    TCP, envía las peticiones de todas las unidades sin esperar cada
+    respuesta. Todas las básculas del mismo enlace comparten la conexión.
+    """
+
+    def __init__(self, config: ModbusConfig):
+        """
+        Inicializa el gateway (la conexión se abre con el primer lector).
+
+        Args:
+            config: Configuración del enlace (port, baudrate, timeout)
+        """
+        self.config = config
+        self.tcp = config.port.startswith(TCP_PREFIX)
+        self._transport: Optional[_RTUTransport | _TCPTransport] = None
+        self._readers: set[ModbusReader] = set()
+        self._pending: list[_Job] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._broken = False
+        self.cycles = 0
+        self.requests_sent = 0
+
+    def reader(self, config: ModbusConfig) -> ModbusReader:
+        """Crea el lector de una báscula de este enlace."""
+        return ModbusReader(self, config)
+
+    def check_compatible(self, config: ModbusConfig) -> None:
+        """
+        Verifica que una báscula use los parámetros del enlace: la conexión
+        se abre una vez con la configuración del primer dispositivo.
+
+        Raises:
+            ValueError: Si la báscula difiere en baudrate (RTU) o timeout
+        """
+        keys = ("timeout",) if self.tcp else ("baudrate", "timeout")
+        differences = [
+            f"{key}={getattr(config, key)!r} (enlace: {getattr(self.config, key)!r})"
+            for key in keys if getattr(config, key) != getattr(self.config, key)
+        ]
+        if differences:
+            raise ValueError(
+                f"La unidad {config.unit_id} en {self.config.port} no coincide "
+                f"con el enlace: {', '.join(differences)}"
+            )
+
+    def attach(self, reader: ModbusReader) -> None:
+        """Vincula un lector y abre el enlace si hace falta."""
+        with self._cond:
+            if self._broken or self._transport is None:
+                self._close_transport()
+                try:
+                    self._transport = (
+                        _TCPTransport(self.config) if self.tcp
+                        else _RTUTransport(self.config)
+                    )
+                except OSError as e:
+                    logger.error(f"Error al conectar con {self.config.port}: {e}")
+                    raise serial.SerialException(
+                        f"No se pudo conectar con {self.config.port}: {e}"
+                    ) from e
+                self._broken = False
+                logger.info(f"Conectado a enlace Modbus {self.config.port}")
+            self._readers.add(reader)
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(
+                    target=self._run, daemon=True,
+                    name=f"modbus-{self.config.port}",
+                )
+                self._thread.start()
+
+    def detach(self, reader: ModbusReader) -> None:
+        """Desvincula un lector; con el último, detiene el hilo y cierra el enlace."""
+        with self._cond:
+            self._readers.discard(reader)
+            if self._readers:
+                return
+            self._running = False
+            self._cond.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        with self._cond:
+            self._close_transport()
+
+    def submit(self, job: _Job) -> _Job:
+        """Encola una operación para el próximo ciclo."""
+        with self._cond:
+            if not self._running:
+                job.error = serial.SerialException(
+                    f"El enlace {self.config.port} no está conectado"
+                )
+                job.done.set()
+                return job
+            self._pending.append(job)
+            self._cond.notify()
+        return job
+
+    def _close_transport(self) -> None:
+        if self._transport is not None:
+            try:
+                self._transport.close()
+            except OSError:
+                pass
+            self._transport = None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and self._running:
+                    self._cond.wait()
+                jobs, self._pending = self._pending, []
+                transport = None if self._broken else self._transport
+                running = self._running
+            if not running:
+                error = serial.SerialException("Enlace Modbus detenido")
+                self._finish(jobs, error)
+                return
+            if transport is None:
+                self._finish(jobs, serial.SerialException(
+                    f"El enlace {self.config.port} está en error"
+                ))
+                continue
+            self._cycle(transport, jobs)
+
+    def _cycle(self, transport, jobs: list[_Job]) -> None:
+        """Resuelve en un ciclo todas las operaciones pendientes."""
+        requests = _build_requests(jobs)
+        try:
+            transport.execute(requests)
+        except (serial.SerialException, OSError) as e:
+            logger.error(f"Error en el enlace Modbus {self.config.port}: {e}")
+            self._broken = True
+            self._finish(jobs, serial.SerialException(
+                f"Error en el enlace {self.config.port}: {e}"
+            ))
+            return
+        self.cycles += 1
+        self.requests_sent += len(requests)
+
+        for job in jobs:
+            request = job.request
+            if request.error is not None:
+                job.error = request.error
+            elif job.register < 0:
+                config = job.config
+                count = DATA_TYPES[config.data_type][0]
+                raw = decode_registers(
+                    request.registers[job.offset:job.offset + count],
+                    config.data_type,
+                    config.word_order,
+                )
+                # La división de enteros está correctamente redondeada
+                job.result = raw / 10 ** config.decimals
+            job.done.set()
+
+    @staticmethod
+    def _finish(jobs: list[_Job], error: Exception) -> None:
+        for job in jobs:
+            job.error = error
+            job.done.set()
@@ -3,17 +3,43 @@
 import json
 import logging
 import ssl
+import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
-from typing import Callable
+from typing import Any, Callable, Mapping, Optional
 
 import paho.mqtt.client as mqtt
 
+from . import tracing
 from .config import DeviceConfig, MQTTConfig
+from .dedupe import PENDING, RequestCache
+from .publisher import Publisher
+from .rate_limit import CommandRateLimiter
+from .registry import DeviceRegistry
+from .sources import WeightSource
+from .tracing import Span, Tracer
 
 logger = logging.getLogger(__name__)
 
 WILDCARD_COMMAND_TOPIC = "pesanet/devices/+/command"
+WILDCARD_BACKFILL_ACK_TOPIC = "pesanet/devices/+/backfill/ack"
+GATEWAY_STATUS_TOPIC = "pesanet/gateways/{client_id}/status"
+GATEWAY_ADMIN_TOPIC = "pesanet/gateways/{client_id}/admin"
+GATEWAY_READINGS_TOPIC = "pesanet/gateways/{client_id}/readings"
+
+# Espera máxima (seg) de la confirmación del estado offline al detener
+STOP_PUBLISH_TIMEOUT = 2.0
+
+# Destino de una respuesta a un comando (tópico MQTT, socket local...)
+Reply = Callable[[dict], None]
+
+# Factores de conversión desde kilogramos para el campo "unit" de los comandos
+UNIT_FACTORS = {
+    "kg": 1.0,
+    "g": 1000.0,
+    "t": 0.001,
+    "lb": 2.2046226218,
+}
 
 
 class ScaleMQTTClient:
@@ -24,6 +50,9 @@ class ScaleMQTTClient:
         config: MQTTConfig,
         devices: list[DeviceConfig],
         weight_callbacks: dict[str, Callable[[], float]],
+        max_workers: int | None = None,
+        command_callback: Callable[[str, str, bool], Optional[float]] | None = None,
+        registry: DeviceRegistry | None = None,
     ):
         """
         Inicializa el cliente MQTT.
@@ -32,14 +61,53 @@ class ScaleMQTTClient:
             config: Configuración del broker MQTT
             devices: Lista de dispositivos configurados
             weight_callbacks: Diccionario {device_id: callback} que retorna el peso
+            max_workers: Hilos de lectura (por defecto, uno por dispositivo);
+                útil cuando los dispositivos se registran después
+            command_callback: Función (device_id, comando, leer_peso) que envía
+                un comando de la báscula (tara, cero...) y retorna el peso
+                leído a continuación, o None
+            registry: Registro de dispositivos compartido con el servicio;
+                por defecto, uno propio con devices y weight_callbacks
         """
         self.config = config
-        self.devices: dict[str, DeviceConfig] = {d.device_id: d for d in devices}
-        self.weight_callbacks = weight_callbacks
+        self.registry = registry or DeviceRegistry(devices, weight_callbacks)
+        self.command_callback = command_callback
+        # Estado de la conexión al broker (actualizado en on_connect/on_disconnect)
+        self.connected = False
+        # Última lectura válida por dispositivo: {device_id: (peso, timestamp_ms)}
+        self._last_weights: dict[str, tuple[float, int]] = {}
+        self._rate_limiter = CommandRateLimiter(config.rate_limit, config.rate_burst)
+        for device in devices:
+            self._rate_limiter.configure_device(
+                device.device_id, device.rate_limit, device.rate_burst
+            )
+        # Se invoca tras cada conexión exitosa (p. ej. para republicar estados)
+        self.on_connected: Optional[Callable[[], None]] = None
+        # Trazas de los comandos muestreados (None = deshabilitadas)
+        self.tracer: Optional[Tracer] = None
+        # Comandos del tópico de administración: función (payload, reply)
+        self.admin_callback: Optional[Callable[[dict, Reply], None]] = None
+        # Confirmaciones de backfill: función (device_id, payload)
+        self.backfill_callback: Optional[Callable[[str, dict], None]] = None
+        # Respuestas recientes por requestId, para las reentregas QoS 1
+        self._requests: Optional[RequestCache] = None
+        if config.dedupe_size > 0:
+            self._requests = RequestCache(config.dedupe_size, config.dedupe_ttl)
+        # Lecturas y comandos encolados o en curso por dispositivo
+        self._in_flight: dict[str, int] = {}
+        self._in_flight_lock = threading.Lock()
         self.client = mqtt.Client(
-            client_id="scale-telemetry-service",
+            client_id=config.client_id,
             transport="websockets"
         )
+        self.status_topic = GATEWAY_STATUS_TOPIC.format(client_id=config.client_id)
+        self.admin_topic = GATEWAY_ADMIN_TOPIC.format(client_id=config.client_id)
+        self.admin_response_topic = f"{self.admin_topic}/response"
+        self.readings_topic = GATEWAY_READINGS_TOPIC.format(client_id=config.client_id)
+        # Si el gateway se cae sin desconectarse, el broker publica "offline"
+        self.client.will_set(
+            self.status_topic, self._status_payload("offline"), qos=1, retain=True
+        )
 
         # Configurar WebSocket path
         self.client.ws_set_options(path="/mqtt")
@@ -49,13 +117,25 @@ class ScaleMQTTClient:
         self.client.on_message = self._on_message
         self.client.on_disconnect = self._on_disconnect
 
+        # Etapa de publicación con límite de mensajes en vuelo y en cola
+        self.publisher = Publisher(
+            self.client,
+            max_inflight=config.max_inflight,
+            max_queued=config.max_queued,
+            qos={
+                "response": config.qos_response,
+                "telemetry": config.qos_telemetry,
+                "event": config.qos_event,
+            },
+        )
+
         # Configurar SSL/TLS si está habilitado (wss://)
         if config.use_ssl:
             self.client.tls_set(tls_version=ssl.PROTOCOL_TLS_CLIENT)
 
         # Pool de hilos para lecturas de peso en paralelo
         self._executor = ThreadPoolExecutor(
-            max_workers=len(devices) or 1,
+            max_workers=max_workers or len(devices) or 1,
             thread_name_prefix="weight-reader",
         )
 
@@ -63,10 +143,21 @@ class ScaleMQTTClient:
         if config.username and config.password:
             self.client.username_pw_set(config.username, config.password)
 
+    @property
+    def devices(self) -> Mapping[str, DeviceConfig]:
+        """Dispositivos registrados (vista de solo lectura de la instantánea)."""
+        return self.registry.snapshot.devices
+
+    @property
+    def weight_callbacks(self) -> Mapping[str, Callable[[], float]]:
+        """Callbacks de peso registrados (vista de solo lectura)."""
+        return self.registry.snapshot.weight_callbacks
+
     def register_device(
         self,
         device: DeviceConfig,
         weight_callback: Callable[[], float],
+        reader: Optional[WeightSource] = None,
     ):
         """
         Registra un dispositivo nuevo en el cliente MQTT.
@@ -75,20 +166,35 @@ class ScaleMQTTClient:
         Args:
             device: Configuración del dispositivo
             weight_callback: Función que retorna el peso
+            reader: Lector conectado del dispositivo, para el registro
+                compartido con el servicio
         """
-        self.devices[device.device_id] = device
-        self.weight_callbacks[device.device_id] = weight_callback
+        self._rate_limiter.configure_device(
+            device.device_id, device.rate_limit, device.rate_burst
+        )
+        self.registry.register(device, weight_callback, reader)
         logger.info(f"✅ Dispositivo registrado en MQTT: {device.device_id}")
 
     def _on_connect(self, client, userdata, flags, rc):
         """Callback cuando se conecta al broker MQTT."""
         if rc == 0:
+            self.connected = True
+            self.publisher.reset()
+            client.publish(self.status_topic, self._status_payload("online"), qos=1, retain=True)
             logger.info("✅ CONECTADO exitosamente al broker MQTT")
             logger.info(f"   Broker: {self.config.broker}:{self.config.port}")
             # Suscribirse al tópico wildcard para todos los dispositivos
             client.subscribe(WILDCARD_COMMAND_TOPIC)
             logger.info(f"✅ Suscrito a: {WILDCARD_COMMAND_TOPIC}")
+            if self.config.admin and self.admin_callback is not None:
+                client.subscribe(self.admin_topic, qos=1)
+                logger.info(f"✅ Suscrito a: {self.admin_topic}")
             logger.info(f"   Dispositivos registrados: {list(self.devices.keys())}")
+            if self.backfill_callback is not None:
+                client.subscribe(WILDCARD_BACKFILL_ACK_TOPIC, qos=1)
+                logger.info(f"✅ Suscrito a: {WILDCARD_BACKFILL_ACK_TOPIC}")
+            if self.on_connected is not None:
+                self.on_connected()
         else:
             error_messages = {
                 1: "Versión de protocolo incorrecta",
@@ -104,6 +210,7 @@ class ScaleMQTTClient:
 
     def _on_disconnect(self, client, userdata, rc):
         """Callback cuando se desconecta del broker MQTT."""
+        self.connected = False
         if rc != 0:
             logger.warning(f"Desconexión inesperada del broker MQTT, código: {rc}")
         else:
@@ -114,16 +221,23 @@ class ScaleMQTTClient:
         Callback cuando se recibe un mensaje MQTT.
         Extrae el device_id del tópico y rutea al callback correspondiente.
         """
+        received_ns = time.monotonic_ns()
+        if msg.topic == self.admin_topic:
+            self._on_admin_message(msg)
+            return
         try:
             # Extraer device_id del tópico: pesanet/devices/{device_id}/command
             topic_parts = msg.topic.split("/")
+            if topic_parts[3:] == ["backfill", "ack"] and len(topic_parts) == 5:
+                self._on_backfill_ack(topic_parts[2], msg)
+                return
             if len(topic_parts) != 4:
                 logger.warning(f"Tópico con formato inesperado: {msg.topic}")
                 return
             device_id = topic_parts[2]
 
             # Verificar que el dispositivo está registrado
-            if device_id not in self.devices:
+            if self.registry.get(device_id) is None:
                 logger.warning(f"Comando para dispositivo no registrado: {device_id}")
                 return
 
@@ -137,49 +251,340 @@ class ScaleMQTTClient:
                 self._send_error_response(device_id, "Formato de comando inválido")
                 return
 
-            # Verificar el comando
-            command = payload.get('command')
-            logger.info(f"Comando recibido: {command}")
-
-            if command == 'get_weight':
-                self._executor.submit(self._handle_get_weight, device_id)
-            else:
-                logger.warning(f"Comando desconocido: {command}")
-                self._send_error_response(device_id, f"Comando desconocido: {command}")
+            self.dispatch(device_id, payload, received_ns=received_ns)
 
         except Exception as e:
             logger.error(f"Error al procesar mensaje: {e}", exc_info=True)
 
-    def _handle_get_weight(self, device_id: str):
+    def _on_admin_message(self, msg) -> None:
+        """Entrega un comando de administración a admin_callback."""
+        if not self.config.admin or self.admin_callback is None:
+            return
+
+        def reply(response: dict) -> None:
+            self.publisher.publish(
+                self.admin_response_topic, json.dumps(response), "response"
+            )
+        try:
+            payload = json.loads(msg.payload.decode("utf-8"))
+            if not isinstance(payload, dict):
+                raise ValueError
+        except ValueError:
+            logger.error(f"Comando de administración inválido: {msg.payload}")
+            reply({
+                "status": "error",
+                "message": "Formato de comando inválido",
+                "timestamp": int(time.time() * 1000),
+            })
+            return
+        logger.info(f"Comando de administración recibido: {payload.get('command')}")
+        try:
+            self.admin_callback(payload, reply)
+        except Exception as e:
+            logger.error(f"Error al ejecutar comando de administración: {e}", exc_info=True)
+
+    def _on_backfill_ack(self, device_id: str, msg) -> None:
+        """Entrega una confirmación de backfill a backfill_callback."""
+        if self.backfill_callback is None:
+            return
+        try:
+            payload = json.loads(msg.payload.decode("utf-8"))
+            if not isinstance(payload, dict):
+                raise ValueError
+        except ValueError:
+            logger.error(f"Confirmación de backfill inválida [{device_id}]: {msg.payload}")
+            return
+        self.backfill_callback(device_id, payload)
+
+    def dispatch(
+        self,
+        device_id: str,
+        payload: dict,
+        reply: Optional[Reply] = None,
+        received_ns: Optional[int] = None,
+    ) -> None:
+        """
+        Despacha un comando ya parseado: valida la unidad, aplica los límites
+        de tasa y encola la lectura o el comando en el pool de lectura.
+        Lo usan los mensajes MQTT y la API local (local_api.py).
+
+        Args:
+            device_id: ID del dispositivo
+            payload: Comando ({"command": "get_weight", "unit": "kg"}); con
+                "requestId", las reentregas del mismo comando no se ejecutan
+                de nuevo
+            reply: Función que recibe la respuesta (por defecto, se publica
+                en el tópico de respuestas del dispositivo)
+            received_ns: Recepción del comando (time.monotonic_ns()), inicio
+                de su traza; por defecto, ahora
+        """
+        if received_ns is None:
+            received_ns = time.monotonic_ns()
+        transport = "mqtt" if reply is None else "local"
+        if reply is None:
+            reply = lambda response: self._publish_response(device_id, response)
+        # Una sola instantánea del registro para todo el despacho
+        entry = self.registry.get(device_id)
+        if entry is None:
+            self._send_error_response(
+                device_id, f"Dispositivo no registrado: {device_id}", reply
+            )
+            return
+
+        request_id = payload.get('requestId')
+        requests = self._requests
+        if requests is not None and isinstance(request_id, (str, int)):
+            # Por MQTT el original responde en el tópico compartido; por la
+            # API local, solo a su conexión: el duplicado espera esa respuesta
+            waiter = reply if transport == "local" else None
+            cached = requests.lookup(
+                device_id, str(request_id), transport, waiter
+            )
+            if cached is PENDING:
+                logger.info(
+                    f"Comando duplicado en curso [{device_id}]: {request_id}"
+                )
+                return
+            if isinstance(cached, dict):
+                logger.info(
+                    f"Comando duplicado respondido desde caché [{device_id}]: {request_id}"
+                )
+                reply(cached)
+                return
+            reply = self._remember(requests, device_id, request_id, transport, reply)
+
+        command = payload.get('command')
+        logger.info(f"Comando recibido: {command}")
+
+        unit = payload.get('unit', 'kg')
+        if unit not in UNIT_FACTORS:
+            self._send_error_response(device_id, f"Unidad no soportada: {unit}", reply)
+            return
+
+        if command == 'get_weight':
+            # Con la cola de publicación saturada no se generan lecturas
+            # nuevas: se responde desde caché como con el límite de tasa
+            if self.publisher.saturated or not self._rate_limiter.allow(device_id):
+                self._handle_rate_limited(device_id, unit, reply)
+                return
+            trace = self._start_trace(command, device_id, transport, received_ns)
+            self._submit(trace, device_id, self._handle_get_weight, device_id, unit, reply)
+        elif (
+            self.command_callback is not None
+            and command in entry.device.commands
+        ):
+            if not self._rate_limiter.allow(device_id):
+                # Los comandos de la báscula no se responden desde caché
+                self._send_error_response(
+                    device_id, "Límite de comandos excedido", reply
+                )
+                return
+            read_after = bool(payload.get('read', False))
+            trace = self._start_trace(command, device_id, transport, received_ns)
+            self._submit(
+                trace, device_id, self._handle_device_command,
+                device_id, command, read_after, unit, reply,
+            )
+        else:
+            logger.warning(f"Comando desconocido: {command}")
+            self._send_error_response(device_id, f"Comando desconocido: {command}", reply)
+
+    def _remember(
+        self,
+        requests: RequestCache,
+        device_id: str,
+        request_id: str | int,
+        transport: str,
+        reply: Reply,
+    ) -> Reply:
+        """
+        Envuelve reply para incluir el requestId, guardar la respuesta y
+        enviarla también a los duplicados que la esperaban.
+        """
+        def remember(response: dict) -> None:
+            response["requestId"] = request_id
+            waiters = requests.store(
+                device_id, str(request_id), response, transport
+            )
+            reply(response)
+            for waiter in waiters:
+                waiter(response)
+        return remember
+
+    def _start_trace(
+        self, command: str, device_id: str, transport: str, received_ns: int
+    ) -> Optional[Span]:
+        """Span raíz del comando si el tracer lo muestrea."""
+        if self.tracer is None:
+            return None
+        return self.tracer.start_trace(
+            command, received_ns,
+            **{"device.id": device_id, "command": command, "transport": transport},
+        )
+
+    def _submit(
+        self, trace: Optional[Span], device_id: str, handler: Callable, *args
+    ) -> None:
+        """Encola un handler en el pool; con traza, mide además la espera."""
+        queued = trace.child("queue") if trace is not None else None
+        with self._in_flight_lock:
+            self._in_flight[device_id] = self._in_flight.get(device_id, 0) + 1
+        self._executor.submit(self._run, device_id, trace, queued, handler, *args)
+
+    def _run(
+        self,
+        device_id: str,
+        trace: Optional[Span],
+        queued: Optional[Span],
+        handler: Callable,
+        *args,
+    ) -> None:
+        """Ejecuta un handler en el pool, con su traza activa si la tiene."""
+        try:
+            if trace is None:
+                handler(*args)
+                return
+            if queued is not None:
+                queued.end()
+            with tracing.activate(trace):
+                try:
+                    handler(*args)
+                finally:
+                    trace.end()
+        finally:
+            with self._in_flight_lock:
+                self._in_flight[device_id] -= 1
+
+    def load(self) -> dict:
+        """
+        Carga actual del cliente: tareas esperando en el pool de lectura,
+        lecturas encoladas o en curso por dispositivo y mensajes en la
+        cola de publicación.
+        """
+        with self._in_flight_lock:
+            in_flight = {d: n for d, n in self._in_flight.items() if n}
+        return {
+            "executorQueue": self._executor._work_queue.qsize(),
+            "inFlight": in_flight,
+            "publishQueued": self.publisher.queued,
+            "publishInflight": self.publisher.inflight,
+        }
+
+    def _handle_get_weight(
+        self, device_id: str, unit: str = "kg", reply: Optional[Reply] = None
+    ):
         """Maneja el comando get_weight para un dispositivo específico."""
         try:
             # Obtener el peso de la báscula
-            weight = self.weight_callbacks[device_id]()
+            entry = self.registry.get(device_id)
+            if entry is None or entry.weight_callback is None:
+                raise ValueError(f"Dispositivo sin lector: {device_id}")
+            with tracing.span("read_weight"):
+                weight = entry.weight_callback()
 
             # Crear la respuesta
+            timestamp = int(time.time() * 1000)
+            self._last_weights[device_id] = (weight, timestamp)
             response = {
                 "deviceId": device_id,
-                "weight": round(weight, 1),
+                "weight": round(weight * UNIT_FACTORS[unit], 1),
                 "status": "ok",
                 "message": "Peso obtenido correctamente",
-                "timestamp": int(time.time() * 1000)
+                "timestamp": timestamp
             }
+            if unit != "kg":
+                response["unit"] = unit
 
             # Publicar la respuesta
-            self._publish_response(device_id, response)
+            self._reply(device_id, response, reply)
             logger.info(f"Respuesta enviada [{device_id}]: {response}")
 
         except Exception as e:
             logger.error(f"Error al obtener peso de {device_id}: {e}")
-            self._send_error_response(device_id, f"Error al leer peso: {str(e)}")
+            tracing.set_error(str(e))
+            self._send_error_response(
+                device_id, f"Error al leer peso: {str(e)}", reply
+            )
 
-    def _send_error_response(self, device_id: str, error_message: str):
+    def _handle_device_command(
+        self,
+        device_id: str,
+        command: str,
+        read_after: bool,
+        unit: str = "kg",
+        reply: Optional[Reply] = None,
+    ):
+        """
+        Maneja un comando de la báscula (tara, cero...).
+        Con read_after, el peso se lee en la misma secuencia de I/O serial.
+        """
+        try:
+            if self.command_callback is None:
+                raise ValueError("Comandos de báscula no configurados")
+            with tracing.span("execute_command", read=read_after):
+                weight = self.command_callback(device_id, command, read_after)
+
+            timestamp = int(time.time() * 1000)
+            response: dict[str, Any] = {
+                "deviceId": device_id,
+                "command": command,
+                "weight": None,
+                "status": "ok",
+                "message": f"Comando '{command}' ejecutado correctamente",
+                "timestamp": timestamp,
+            }
+            if weight is not None:
+                self._last_weights[device_id] = (weight, timestamp)
+                response["weight"] = round(weight * UNIT_FACTORS[unit], 1)
+                if unit != "kg":
+                    response["unit"] = unit
+
+            self._reply(device_id, response, reply)
+            logger.info(f"Respuesta enviada [{device_id}]: {response}")
+
+        except Exception as e:
+            logger.error(f"Error al ejecutar '{command}' en {device_id}: {e}")
+            tracing.set_error(str(e))
+            self._send_error_response(
+                device_id, f"Error al ejecutar comando {command}: {str(e)}", reply
+            )
+
+    def _handle_rate_limited(
+        self, device_id: str, unit: str = "kg", reply: Optional[Reply] = None
+    ):
+        """
+        Responde un comando que excede el límite de tasa sin tocar el puerto serial.
+        Usa la última lectura en caché si existe; si no, responde con error.
+        """
+        cached = self._last_weights.get(device_id)
+        if cached is None:
+            logger.debug(f"Límite de comandos excedido para {device_id}")
+            self._send_error_response(device_id, "Límite de comandos excedido", reply)
+            return
+
+        weight, timestamp = cached
+        response = {
+            "deviceId": device_id,
+            "weight": round(weight * UNIT_FACTORS[unit], 1),
+            "status": "ok",
+            "message": "Peso en caché (límite de comandos excedido)",
+            "timestamp": timestamp,
+            "cached": True,
+        }
+        if unit != "kg":
+            response["unit"] = unit
+        self._reply(device_id, response, reply)
+
+    def _send_error_response(
+        self, device_id: str, error_message: str, reply: Optional[Reply] = None
+    ):
         """
         Envía una respuesta de error para un dispositivo específico.
 
         Args:
             device_id: ID del dispositivo
             error_message: Mensaje de error
+            reply: Destino de la respuesta (por defecto, el tópico de respuestas)
         """
         response = {
             "deviceId": device_id,
@@ -188,7 +593,15 @@ class ScaleMQTTClient:
             "message": error_message,
             "timestamp": int(time.time() * 1000)
         }
-        self._publish_response(device_id, response)
+        self._reply(device_id, response, reply)
+
+    def _reply(self, device_id: str, response: dict, reply: Optional[Reply]):
+        """Entrega una respuesta a reply o, si no hay, la publica por MQTT."""
+        with tracing.span("publish"):
+            if reply is None:
+                self._publish_response(device_id, response)
+            else:
+                reply(response)
 
     def _publish_response(self, device_id: str, response: dict):
         """
@@ -198,14 +611,63 @@ class ScaleMQTTClient:
             device_id: ID del dispositivo
             response: Diccionario con la respuesta
         """
-        topic = self.devices[device_id].response_topic
-        payload = json.dumps(response)
-        result = self.client.publish(topic, payload, qos=1)
+        entry = self.registry.get(device_id)
+        if entry is None:
+            logger.warning(f"Respuesta descartada, dispositivo no registrado: {device_id}")
+            return
+        self.publisher.publish(entry.response_topic, json.dumps(response), "response")
 
-        if result.rc == mqtt.MQTT_ERR_SUCCESS:
-            logger.debug(f"Respuesta publicada en {topic}")
-        else:
-            logger.error(f"Error al publicar respuesta, código: {result.rc}")
+    def publish_state(self, topic: str, state: dict):
+        """
+        Publica un estado retenido. Es telemetría: si hay cola, solo
+        sobrevive el último estado de cada tópico.
+
+        Args:
+            topic: Tópico de estado del dispositivo
+            state: Diccionario con el estado
+        """
+        self.publisher.publish(
+            topic, json.dumps(state), "telemetry", retain=True, coalesce=True
+        )
+
+    def publish_event(self, topic: str, event: dict):
+        """
+        Publica un evento de pesaje o una transición de alarma. A diferencia
+        del estado, cada evento es un registro: no se retiene ni se reemplaza
+        en la cola.
+
+        Args:
+            topic: Tópico de eventos o de alarmas del dispositivo
+            event: Diccionario con el evento
+        """
+        self.publisher.publish(topic, json.dumps(event), "event")
+
+    def publish_readings(self, topic: str, payload: str) -> bool:
+        """
+        Publica un lote de lecturas de la salida mqtt (ver sinks.py). Como
+        los eventos, cada lote es un registro: no se reemplaza en la cola.
+
+        Args:
+            topic: Tópico del lote ("" = tópico de lecturas del gateway)
+            payload: Lote en JSON
+
+        Returns:
+            False si el lote se descartó por cola llena
+        """
+        return self.publisher.publish(topic or self.readings_topic, payload, "event")
+
+    def publish_backfill(self, topic: str, payload: bytes):
+        """
+        Publica un chunk de backfill (binario, ver backfill.py).
+
+        Args:
+            topic: Tópico de backfill del dispositivo
+            payload: Chunk comprimido
+        """
+        self.publisher.publish(topic, payload, "event")
+
+    def _status_payload(self, status: str) -> str:
+        return json.dumps({"gatewayId": self.config.client_id, "status": status})
 
     def connect(self):
         """Conecta al broker MQTT."""
@@ -229,13 +691,24 @@ class ScaleMQTTClient:
             raise
 
     def start(self):
-        """Inicia el loop del cliente MQTT (bloqueante)."""
+        """Inicia el loop del cliente MQTT en un hilo propio (no bloqueante)."""
         logger.info("Iniciando cliente MQTT...")
-        self.client.loop_forever()
+        self.client.loop_start()
 
     def stop(self):
         """Detiene el cliente MQTT."""
         logger.info("Deteniendo cliente MQTT...")
         self._executor.shutdown(wait=False)
-        self.client.loop_stop()
+        if self.connected:
+            # Una desconexión ordenada no dispara el last-will: el estado
+            # offline se publica y se espera su PUBACK antes de desconectar
+            info = self.client.publish(
+                self.status_topic, self._status_payload("offline"), qos=1, retain=True
+            )
+            try:
+                info.wait_for_publish(STOP_PUBLISH_TIMEOUT)
+            except (RuntimeError, ValueError) as e:
+                logger.warning(f"No se pudo publicar el estado offline: {e}")
+        # disconnect() antes de loop_stop(): el loop envía el DISCONNECT
         self.client.disconnect()
+        self.client.loop_stop()
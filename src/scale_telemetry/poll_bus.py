@@ -0,0 +1,288 @@
+"""Bus multidrop (RS-485): varias básculas direccionadas en un mismo puerto."""
+
+import logging
+import threading
+from collections import deque
+from dataclasses import replace
+from typing import Callable, Optional
+
+import serial
+
+from .config import SerialConfig
+from .serial_reader import ScaleReader
+
+logger = logging.getLogger(__name__)
+
+
+class _BusJob:
+    """Operación pendiente en el bus; los que esperan se bloquean en done."""
+
+    __slots__ = ("run", "done", "result", "error")
+
+    def __init__(self, run: Callable[[], Optional[float]]):
+        self.run = run
+        self.done = threading.Event()
+        self.result: Optional[float] = None
+        self.error: Optional[BaseException] = None
+
+    def wait(self) -> Optional[float]:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class BusReader:
+    """
+    Lector de una báscula direccionada en un PollBus.
+
+    Expone la misma interfaz que ScaleReader (connect, disconnect,
+    read_weight, execute_command); las operaciones se encolan en el bus y las
+    ejecuta su hilo, de modo que nunca se intercalan en la línea serial.
+    """
+
+    def __init__(self, bus: "PollBus", config: SerialConfig):
+        """
+        Inicializa el lector.
+
+        Args:
+            bus: Bus que comparte el puerto
+            config: Configuración serial del dispositivo (con address)
+        """
+        if not config.poll_request:
+            raise ValueError(
+                f"La báscula {config.address} en {config.port} requiere "
+                f"poll_request para operar en un bus multidrop"
+            )
+        bus.check_compatible(config)
+        self.config = config
+        self._bus = bus
+
+    @property
+    def connection(self) -> Optional[serial.Serial]:
+        """Conexión compartida del bus."""
+        return self._bus.connection
+
+    def connect(self) -> None:
+        """Abre el puerto del bus si aún no está abierto (o quedó en error)."""
+        self._bus.attach(self)
+
+    def disconnect(self) -> None:
+        """Se desvincula del bus; el puerto se cierra con el último lector."""
+        self._bus.detach(self)
+
+    def read_weight(self) -> float:
+        """
+        Envía el poll de esta dirección y retorna la respuesta.
+        Polls concurrentes para la misma dirección comparten una sola petición.
+        """
+        return self._bus.poll(self.config)
+
+    def execute_command(self, command: str, read_weight: bool = False) -> Optional[float]:
+        """Envía un comando (con {address} sustituido) a través del bus."""
+        return self._bus.submit(
+            self.config.address,
+            lambda: self._bus.port_reader_for(self.config).execute_command(
+                command, read_weight
+            ),
+        ).wait()
+
+
+class PollBus:
+    """
+    Atiende varias básculas en modo poll sobre un mismo puerto serial.
+
+    Un único hilo recorre en round-robin las direcciones con operaciones
+    pendientes y escribe el siguiente poll apenas llega la respuesta anterior,
+    manteniendo el enlace ocupado sin huecos. En RS-485 half-duplex no puede
+    haber dos peticiones en vuelo, así que esto es el máximo throughput del bus.
+    """
+
+    def __init__(self, config: SerialConfig):
+        """
+        Inicializa el bus.
+
+        Args:
+            config: Configuración del puerto (port, baudrate, formato, modo)
+        """
+        # El timeout del puerto es el de la respuesta al poll
+        self.config = replace(
+            config,
+            poll_request="",
+            address="",
+            commands={},
+            timeout=config.poll_timeout or config.timeout,
+            min_timeout=0.0,
+        )
+        self._port_reader = ScaleReader(self.config)
+        self._readers: set[BusReader] = set()
+        self._queues: dict[str, deque[_BusJob]] = {}
+        self._order: deque[str] = deque()
+        self._polls: dict[str, _BusJob] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._broken = False
+
+    @property
+    def connection(self) -> Optional[serial.Serial]:
+        """Conexión serial del bus."""
+        return self._port_reader.connection
+
+    def reader(self, config: SerialConfig) -> BusReader:
+        """Crea el lector de una dirección de este bus."""
+        return BusReader(self, config)
+
+    def check_compatible(self, config: SerialConfig) -> None:
+        """
+        Verifica que una dirección use los parámetros del bus: el puerto se
+        abre una vez y todas las respuestas se leen y parsean con la misma
+        configuración.
+
+        Raises:
+            ValueError: Si la dirección difiere en baudrate, formato, modo
+                de lectura o timeout del poll
+        """
+        expected = {
+            "baudrate": self.config.baudrate,
+            "weight_format": self.config.weight_format,
+            "read_mode": self.config.read_mode,
+            "poll_timeout": self.config.timeout,
+        }
+        actual = {
+            "baudrate": config.baudrate,
+            "weight_format": config.weight_format,
+            "read_mode": config.read_mode,
+            "poll_timeout": config.poll_timeout or config.timeout,
+        }
+        differences = [
+            f"{key}={actual[key]!r} (bus: {expected[key]!r})"
+            for key in expected if actual[key] != expected[key]
+        ]
+        if differences:
+            raise ValueError(
+                f"La báscula {config.address} en {self.config.port} no coincide "
+                f"con el bus: {', '.join(differences)}"
+            )
+
+    def port_reader_for(self, config: SerialConfig) -> ScaleReader:
+        """Lector del puerto con la configuración de comandos de una dirección."""
+        self._port_reader.config = replace(
+            self.config,
+            commands=config.commands,
+            command_ack=config.command_ack,
+            address=config.address,
+        )
+        return self._port_reader
+
+    def attach(self, reader: BusReader) -> None:
+        """Vincula un lector y abre el puerto si hace falta."""
+        with self._cond:
+            connection = self._port_reader.connection
+            if self._broken or not connection or not connection.is_open:
+                # El hilo del bus puede estar a mitad de un poll sobre el
+                # puerto roto: se reabre cuando termina
+                with self._port_reader._io_lock:
+                    self._port_reader.disconnect()
+                    self._port_reader.connect()
+                self._broken = False
+            self._readers.add(reader)
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(
+                    target=self._run, daemon=True,
+                    name=f"poll-bus-{self.config.port}",
+                )
+                self._thread.start()
+
+    def detach(self, reader: BusReader) -> None:
+        """Desvincula un lector; con el último, detiene el hilo y cierra el puerto."""
+        with self._cond:
+            self._readers.discard(reader)
+            if self._readers:
+                return
+            self._running = False
+            self._cond.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._port_reader.disconnect()
+
+    def poll(self, config: SerialConfig) -> float:
+        """Encola (o se une a) el poll de una dirección y espera la respuesta."""
+        address = config.address
+        with self._cond:
+            if not self._running:
+                raise serial.SerialException(
+                    f"El bus {self.config.port} no está conectado"
+                )
+            job = self._polls.get(address)
+            if job is None:
+                request = config.render(config.poll_request)
+                job = _BusJob(lambda: self._port_reader.poll(request))
+                self._polls[address] = job
+                self._enqueue(address, job)
+        weight = job.wait()
+        if weight is None:
+            raise ValueError(f"Sin respuesta de la dirección {address} ({self.config.port})")
+        return weight
+
+    def submit(self, address: str, run: Callable[[], Optional[float]]) -> _BusJob:
+        """Encola una operación arbitraria (p. ej. un comando) para una dirección."""
+        job = _BusJob(run)
+        with self._cond:
+            self._enqueue(address, job)
+        return job
+
+    def _enqueue(self, address: str, job: _BusJob) -> None:
+        if not self._running:
+            job.error = serial.SerialException(
+                f"El bus {self.config.port} no está conectado"
+            )
+            job.done.set()
+            return
+        queue = self._queues.get(address)
+        if queue is None:
+            queue = self._queues[address] = deque()
+            self._order.append(address)
+        queue.append(job)
+        self._cond.notify()
+
+    def _next_job(self) -> Optional[tuple[str, _BusJob]]:
+        """Siguiente operación en round-robin entre direcciones (bajo el lock)."""
+        for _ in range(len(self._order)):
+            address = self._order[0]
+            self._order.rotate(-1)
+            queue = self._queues[address]
+            if queue:
+                return address, queue.popleft()
+        return None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                item = self._next_job()
+                while item is None and self._running:
+                    self._cond.wait()
+                    item = self._next_job()
+                if item is None:
+                    break
+                address, job = item
+                if self._polls.get(address) is job:
+                    del self._polls[address]
+            try:
+                job.result = job.run()
+            except serial.SerialException as e:
+                self._broken = True
+                job.error = e
+            except Exception as e:
+                job.error = e
+            job.done.set()
+
+        # Al detenerse, liberar a los que aún esperan
+        with self._cond:
+            for queue in self._queues.values():
+                while queue:
+                    job = queue.popleft()
+                    job.error = serial.SerialException("Bus detenido")
+                    job.done.set()
+            self._polls.clear()
@@ -0,0 +1,275 @@
+"""
+Perfilado bajo demanda del servicio en producción.
+
+Se dispara con SIGUSR1 o con el comando "profile" en el tópico de
+administración del gateway. Cada perfil escribe en LOG_DIR:
+
+    stacks-<fecha>.txt       stack de todos los hilos al momento del pedido
+    profile-<fecha>.folded   perfil estadístico en formato "collapsed stacks"
+                             (una línea "hilo;frame;frame... muestras"),
+                             entrada de flamegraph.pl, speedscope o inferno
+
+El perfil muestrea sys._current_frames() a una frecuencia fija desde un
+hilo propio: no requiere dependencias ni reiniciar el servicio y su costo
+se limita a la duración pedida.
+"""
+
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from types import FrameType
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Límites de un perfil pedido por comando
+MAX_DURATION = 300.0
+MAX_RATE = 1000.0
+
+
+def _thread_names() -> dict[int, str]:
+    return {t.ident: t.name for t in threading.enumerate() if t.ident is not None}
+
+
+def dump_stacks() -> str:
+    """Stack actual de todos los hilos, en el formato de traceback."""
+    names = _thread_names()
+    lines = []
+    for ident, frame in sys._current_frames().items():
+        lines.append(f"--- Hilo {names.get(ident, '?')} ({ident}) ---\n")
+        lines.extend(traceback.format_stack(frame))
+        lines.append("\n")
+    return "".join(lines)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(
+    duration: float,
+    rate: float = 100.0,
+    stop: Optional[threading.Event] = None,
+) -> Counter:
+    """
+    Muestrea los stacks de todos los hilos (salvo el propio).
+
+    Args:
+        duration: Segundos de muestreo
+        rate: Muestras por segundo
+        stop: Evento para terminar antes de tiempo
+
+    Returns:
+        Muestras por stack colapsado ("hilo;raíz;...;hoja")
+    """
+    counts: Counter = Counter()
+    interval = 1.0 / rate
+    own = threading.get_ident()
+    names = _thread_names()
+    deadline = time.monotonic() + duration
+    next_sample = time.monotonic()
+    while True:
+        now = time.monotonic()
+        if now >= deadline or (stop is not None and stop.is_set()):
+            return counts
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            if ident not in names:
+                names = _thread_names()
+            labels = []
+            current: Optional[FrameType] = frame
+            while current is not None:
+                labels.append(_frame_label(current))
+                current = current.f_back
+            labels.append(names.get(ident, f"thread-{ident}"))
+            counts[";".join(reversed(labels))] += 1
+        next_sample += interval
+        delay = next_sample - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            # Muestreo atrasado: no se intenta recuperar las muestras perdidas
+            next_sample = time.monotonic()
+
+
+def write_collapsed(counts: Counter, path: str) -> None:
+    """Escribe el perfil en formato collapsed stacks."""
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, n in counts.most_common():
+            f.write(f"{stack} {n}\n")
+
+
+def _check(duration: Any, rate: Any) -> tuple[float, float]:
+    """Convierte y valida la duración (seg) y la frecuencia (Hz) de un perfil."""
+    duration, rate = float(duration), float(rate)
+    if not 0 < duration <= MAX_DURATION:
+        raise ValueError(f"Duración de perfil inválida (0-{MAX_DURATION:g} seg)")
+    if not 0 < rate <= MAX_RATE:
+        raise ValueError(f"Frecuencia de muestreo inválida (0-{MAX_RATE:g} Hz)")
+    return duration, rate
+
+
+class Profiler:
+    """
+    Ejecuta perfiles en un hilo propio, uno a la vez.
+    """
+
+    def __init__(
+        self,
+        log_dir: str,
+        duration: float = 10.0,
+        rate: float = 100.0,
+        stats: Optional[Callable[[], dict]] = None,
+    ):
+        """
+        Inicializa el perfilador.
+
+        Args:
+            log_dir: Directorio donde se escriben los resultados
+            duration: Duración por defecto de un perfil (seg)
+            rate: Muestras por segundo por defecto
+            stats: Función que retorna la carga del servicio (colas,
+                lecturas en curso) para incluirla en el reporte
+
+        Raises:
+            ValueError: Si la duración o la frecuencia están fuera de rango
+        """
+        self.log_dir = log_dir
+        self.duration, self.rate = _check(duration, rate)
+        self._stats = stats
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def trigger(
+        self,
+        duration: Optional[float] = None,
+        rate: Optional[float] = None,
+        done: Optional[Callable[[dict], None]] = None,
+    ) -> bool:
+        """
+        Lanza un perfil en background.
+
+        Args:
+            duration: Duración (seg); por defecto, la configurada
+            rate: Muestras por segundo; por defecto, la configurada
+            done: Función que recibe el reporte al terminar
+
+        Returns:
+            False si ya hay un perfil en curso
+
+        Raises:
+            ValueError: Si la duración o la frecuencia están fuera de rango
+        """
+        duration, rate = _check(
+            self.duration if duration is None else duration,
+            self.rate if rate is None else rate,
+        )
+        with self._lock:
+            if self.running:
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._deliver, args=(done, self.run, duration, rate),
+                daemon=True, name="profiler",
+            )
+            self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        """Interrumpe el perfil en curso (se escribe lo muestreado)."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def trigger_dump(self, done: Callable[[dict], None]) -> None:
+        """
+        Escribe el stack de todos los hilos en background.
+
+        No espera a un perfil en curso: el dump es breve y debe reflejar
+        el momento del pedido.
+
+        Args:
+            done: Función que recibe el reporte al terminar
+        """
+        threading.Thread(
+            target=self._deliver, args=(done, self.dump),
+            daemon=True, name="profiler-stacks",
+        ).start()
+
+    def _deliver(self, done, task: Callable[..., dict], *args) -> None:
+        try:
+            report = task(*args)
+        except Exception as e:
+            logger.error(f"Error del perfilador: {e}", exc_info=True)
+            report = {"status": "error", "message": str(e)}
+        if done is not None:
+            done(report)
+
+    def dump(self) -> dict:
+        """
+        Escribe el stack de todos los hilos.
+
+        Returns:
+            Reporte con la ruta generada y la carga del servicio
+        """
+        os.makedirs(self.log_dir, exist_ok=True)
+        path = os.path.join(self.log_dir, f"stacks-{_stamp()}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(dump_stacks())
+        load = self._stats() if self._stats is not None else {}
+        logger.info(f"Stacks escritos en {path}, carga: {load}")
+        return {
+            "status": "ok",
+            "stacks": path,
+            "load": load,
+            "timestamp": int(time.time() * 1000),
+        }
+
+    def run(self, duration: float, rate: float) -> dict:
+        """
+        Ejecuta un perfil completo en el hilo actual: stacks, muestreo y
+        carga del servicio al inicio.
+
+        Returns:
+            Reporte con las rutas generadas y la carga del servicio
+        """
+        report = self.dump()
+        profile_path = os.path.join(self.log_dir, f"profile-{_stamp()}.folded")
+        logger.info(f"Perfil iniciado ({duration:g}s a {rate:g} Hz)")
+
+        started = time.monotonic()
+        counts = sample_stacks(duration, rate, self._stop)
+        elapsed = time.monotonic() - started
+        write_collapsed(counts, profile_path)
+        samples = sum(counts.values())
+        logger.info(f"Perfil escrito en {profile_path} ({samples} muestras)")
+
+        report.update(
+            profile=profile_path,
+            duration=round(elapsed, 3),
+            samples=samples,
+            timestamp=int(time.time() * 1000),
+        )
+        return report
+
+
+_sequence = itertools.count()
+
+
+def _stamp() -> str:
+    """Marca para nombres de archivo, única aunque se pidan dos en el mismo segundo."""
+    now = time.time()
+    millis = int(now * 1000) % 1000
+    return f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{millis:03d}-{next(_sequence)}"
@@ -0,0 +1,195 @@
+"""Etapa de publicación MQTT con control de flujo y coalescencia por tópico."""
+
+import logging
+import threading
+from collections import OrderedDict
+from itertools import count
+from typing import Hashable
+
+import paho.mqtt.client as mqtt
+
+logger = logging.getLogger(__name__)
+
+# Fracción de max_queued a partir de la cual se señala backpressure
+HIGH_WATERMARK = 0.8
+
+
+class _Message:
+    __slots__ = ("topic", "payload", "qos", "retain")
+
+    def __init__(self, topic: str, payload: str | bytes, qos: int, retain: bool):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+
+
+class Publisher:
+    """
+    Publica mensajes respetando un máximo de mensajes en vuelo (QoS > 0 sin
+    PUBACK) y un máximo de mensajes en cola.
+
+    Mientras haya lugar en vuelo, publish() publica directamente en el hilo
+    que llama. Si no, el mensaje se encola; los mensajes con coalesce=True
+    reemplazan al pendiente del mismo tópico (solo sobrevive el último valor)
+    y la cola se vacía a medida que llegan los PUBACK (on_publish).
+    """
+
+    def __init__(
+        self,
+        client: mqtt.Client,
+        max_inflight: int = 20,
+        max_queued: int = 1000,
+        qos: dict[str, int] | None = None,
+    ):
+        """
+        Inicializa el publicador.
+
+        Args:
+            client: Cliente paho (se usa su on_publish)
+            max_inflight: Mensajes QoS > 0 en vuelo como máximo
+            max_queued: Mensajes en cola como máximo (los demás se descartan)
+            qos: QoS por clase de mensaje ({"response": 1, "telemetry": 0})
+        """
+        self._client = client
+        self.max_inflight = max(1, max_inflight)
+        self.max_queued = max_queued
+        self.qos = qos or {}
+        # paho no debe encolar por su cuenta: el límite lo aplica esta etapa
+        client.max_inflight_messages_set(self.max_inflight)
+        client.on_publish = self._on_publish
+        self._inflight: set[int] = set()
+        # Publicaciones en curso (slot reservado, mid aún desconocido)
+        self._reserved = 0
+        self._acked_early: set[int] = set()
+        self._queue: OrderedDict[Hashable, _Message] = OrderedDict()
+        self._seq = count()
+        self._draining = False
+        self._lock = threading.Lock()
+        self.published = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    @property
+    def inflight(self) -> int:
+        """Mensajes QoS > 0 publicados sin PUBACK."""
+        return len(self._inflight)
+
+    @property
+    def queued(self) -> int:
+        """Mensajes esperando lugar en vuelo."""
+        return len(self._queue)
+
+    @property
+    def saturated(self) -> bool:
+        """
+        Señal de backpressure: la cola superó HIGH_WATERMARK. Los productores
+        deberían evitar generar mensajes nuevos (p. ej. lecturas seriales).
+        """
+        return len(self._queue) >= self.max_queued * HIGH_WATERMARK
+
+    def publish(
+        self,
+        topic: str,
+        payload: str | bytes,
+        message_class: str = "response",
+        retain: bool = False,
+        coalesce: bool = False,
+    ) -> bool:
+        """
+        Publica o encola un mensaje.
+
+        Args:
+            topic: Tópico MQTT
+            payload: Contenido del mensaje
+            message_class: Clase del mensaje (define el QoS)
+            retain: Si el broker debe retener el mensaje
+            coalesce: Si un mensaje posterior del mismo tópico lo reemplaza
+
+        Returns:
+            False si el mensaje se descartó por cola llena
+        """
+        message = _Message(topic, payload, self.qos.get(message_class, 1), retain)
+        with self._lock:
+            if self._queue or self._busy():
+                return self._enqueue(message, coalesce)
+            self._reserved += 1
+        self._send(message)
+        return True
+
+    def reset(self) -> None:
+        """Olvida los mensajes en vuelo (al reconectar paho los reenvía por su cuenta)."""
+        with self._lock:
+            self._inflight.clear()
+            self._acked_early.clear()
+        self._drain()
+
+    def _busy(self) -> bool:
+        return len(self._inflight) + self._reserved >= self.max_inflight
+
+    def _enqueue(self, message: _Message, coalesce: bool) -> bool:
+        """Encola un mensaje (bajo el lock)."""
+        key = message.topic if coalesce else next(self._seq)
+        if coalesce and key in self._queue:
+            # Se conserva la posición del pendiente, con el valor nuevo
+            self._queue[key] = message
+            self.coalesced += 1
+            return True
+        if len(self._queue) >= self.max_queued:
+            self.dropped += 1
+            logger.warning(f"Cola de publicación llena, mensaje descartado: {message.topic}")
+            return False
+        self._queue[key] = message
+        return True
+
+    def _send(self, message: _Message) -> None:
+        """
+        Publica en paho con un slot ya reservado. Se llama sin el lock:
+        paho invoca on_publish con sus propios locks tomados.
+        """
+        try:
+            result = self._client.publish(
+                message.topic, message.payload, qos=message.qos, retain=message.retain
+            )
+        except Exception as e:
+            with self._lock:
+                self._reserved -= 1
+            logger.error(f"Error al publicar en {message.topic}: {e}")
+            return
+        ok = result.rc in (mqtt.MQTT_ERR_SUCCESS, mqtt.MQTT_ERR_NO_CONN)
+        with self._lock:
+            self._reserved -= 1
+            self.published += 1
+            if ok and message.qos > 0:
+                # El PUBACK puede haber llegado antes de que publish() retorne
+                if result.mid in self._acked_early:
+                    self._acked_early.discard(result.mid)
+                else:
+                    self._inflight.add(result.mid)
+            if not self._reserved:
+                self._acked_early.clear()
+        if not ok:
+            logger.error(f"Error al publicar en {message.topic}, código: {result.rc}")
+
+    def _drain(self) -> None:
+        """Publica mensajes de la cola mientras haya lugar en vuelo (un hilo a la vez)."""
+        with self._lock:
+            if self._draining:
+                return
+            self._draining = True
+        while True:
+            with self._lock:
+                if not self._queue or self._busy():
+                    self._draining = False
+                    return
+                _, message = self._queue.popitem(last=False)
+                self._reserved += 1
+            self._send(message)
+
+    def _on_publish(self, client, userdata, mid) -> None:
+        with self._lock:
+            if mid in self._inflight:
+                self._inflight.discard(mid)
+            elif self._reserved:
+                self._acked_early.add(mid)
+        self._drain()
@@ -0,0 +1,113 @@
+"""Limitación de tasa de comandos entrantes (token bucket)."""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket simple para limitar la tasa de comandos.
+
+    Se recarga a ``rate`` tokens por segundo hasta un máximo de ``burst``.
+    Cada comando consume un token; si no hay tokens disponibles, el comando
+    se considera excedente. El costo por llamada es un par de operaciones
+    aritméticas, por lo que puede usarse en el hilo de red de paho.
+    """
+
+    __slots__ = ("rate", "burst", "_tokens", "_updated", "_lock")
+
+    def __init__(self, rate: float, burst: int = 0):
+        """
+        Inicializa el bucket.
+
+        Args:
+            rate: Tokens por segundo (comandos/seg permitidos)
+            burst: Capacidad máxima del bucket (0 = redondeo de rate, mínimo 1)
+        """
+        if rate <= 0:
+            raise ValueError(f"La tasa debe ser positiva: {rate}")
+        self.rate = float(rate)
+        self.burst = float(burst or max(1, round(rate)))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """
+        Intenta consumir un token.
+
+        Returns:
+            True si el comando está permitido, False si excede el límite
+        """
+        with self._lock:
+            if self._refill(time.monotonic()) < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def _refill(self, now: float) -> float:
+        """Recarga los tokens hasta now; se llama con _lock tomado."""
+        tokens = self._tokens + (now - self._updated) * self.rate
+        self._updated = now
+        self._tokens = tokens if tokens < self.burst else self.burst
+        return self._tokens
+
+
+class CommandRateLimiter:
+    """Combina límites por dispositivo y un límite global del gateway."""
+
+    def __init__(self, global_rate: float = 0.0, global_burst: int = 0):
+        """
+        Inicializa el limitador.
+
+        Args:
+            global_rate: Comandos/seg para todo el gateway (0 = sin límite)
+            global_burst: Ráfaga máxima global (0 = redondeo de global_rate)
+        """
+        self._global = (
+            TokenBucket(global_rate, global_burst) if global_rate > 0 else None
+        )
+        self._devices: dict[str, TokenBucket] = {}
+
+    def configure_device(self, device_id: str, rate: float, burst: int = 0):
+        """
+        Configura el límite de un dispositivo (rate <= 0 lo deshabilita).
+
+        Args:
+            device_id: ID del dispositivo
+            rate: Comandos/seg permitidos para el dispositivo
+            burst: Ráfaga máxima (0 = redondeo de rate)
+        """
+        if rate <= 0:
+            self._devices.pop(device_id, None)
+            return
+        bucket = TokenBucket(rate, burst)
+        current = self._devices.get(device_id)
+        # Al reconectar con los mismos límites se conserva el bucket: uno
+        # nuevo arrancaría lleno y regalaría una ráfaga completa
+        if current is None or (current.rate, current.burst) != (bucket.rate, bucket.burst):
+            self._devices[device_id] = bucket
+
+    def allow(self, device_id: str) -> bool:
+        """
+        Indica si se permite un comando para el dispositivo.
+
+        Los tokens se consumen solo si ambos límites lo permiten: un comando
+        rechazado no gasta tokens del dispositivo ni del límite global.
+        """
+        buckets = [
+            b for b in (self._devices.get(device_id), self._global) if b is not None
+        ]
+        # Siempre en el mismo orden (dispositivo, global): sin deadlocks
+        for bucket in buckets:
+            bucket._lock.acquire()
+        try:
+            now = time.monotonic()
+            if any(bucket._refill(now) < 1.0 for bucket in buckets):
+                return False
+            for bucket in buckets:
+                bucket._tokens -= 1.0
+            return True
+        finally:
+            for bucket in reversed(buckets):
+                bucket._lock.release()
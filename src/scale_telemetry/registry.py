@@ -0,0 +1,244 @@
+"""
+Registro de dispositivos copy-on-write, compartido por el cliente MQTT y el
+servicio.
+
+Los dispositivos se registran desde los hilos de conexión y reconexión,
+mientras el hilo de red de paho y los hilos de lectura los consultan en
+cada comando. En lugar de mutar diccionarios compartidos, cada cambio arma
+una instantánea nueva e inmutable (configuración, callback de peso, lector
+y tópicos precalculados) y la publica reemplazando un único atributo: una
+consulta es una lectura de atributo y un get, sin locks.
+
+Los lectores se envuelven en ReaderHandle con conteo de referencias: al
+reemplazar o quitar un lector, su disconnect() se difiere hasta que
+termina la última lectura en curso, de modo que nunca se cierra un puerto
+bajo una lectura.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from types import MappingProxyType
+from typing import Callable, Iterable, Iterator, Mapping, NamedTuple, Optional
+
+from .config import DeviceConfig
+from .sources import WeightSource
+
+logger = logging.getLogger(__name__)
+
+
+class ReaderHandle:
+    """Lector con conteo de las lecturas en curso."""
+
+    __slots__ = ("reader", "_refs", "_retired", "_closed", "_lock")
+
+    def __init__(self, reader: WeightSource):
+        self.reader = reader
+        self._refs = 0
+        self._retired = False
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @property
+    def retired(self) -> bool:
+        return self._retired
+
+    def acquire(self) -> bool:
+        """Registra una lectura en curso. Retorna False si el lector fue retirado."""
+        with self._lock:
+            if self._retired:
+                return False
+            self._refs += 1
+            return True
+
+    def release(self) -> None:
+        """Termina una lectura; si era la última de un lector retirado, lo cierra."""
+        with self._lock:
+            self._refs -= 1
+            close = self._retired and self._refs == 0 and not self._closed
+            self._closed = self._closed or close
+        if close:
+            self._close()
+
+    def retire(self) -> None:
+        """Retira el lector: se cierra ahora o al terminar la última lectura en curso."""
+        with self._lock:
+            self._retired = True
+            close = self._refs == 0 and not self._closed
+            self._closed = self._closed or close
+        if close:
+            self._close()
+
+    def _close(self) -> None:
+        try:
+            self.reader.disconnect()
+        except Exception as e:
+            logger.error(f"Error al desconectar lector retirado: {e}")
+
+
+class DeviceEntry(NamedTuple):
+    """Un dispositivo registrado, tal como lo ve una instantánea."""
+    device: DeviceConfig
+    weight_callback: Optional[Callable[[], float]]
+    reader: Optional[ReaderHandle]
+    command_topic: str
+    response_topic: str
+
+
+class Snapshot:
+    """Instantánea inmutable del registro."""
+
+    __slots__ = ("version", "entries", "devices", "weight_callbacks", "readers")
+
+    def __init__(self, version: int, entries: dict[str, DeviceEntry]):
+        self.version = version
+        self.entries: Mapping[str, DeviceEntry] = MappingProxyType(entries)
+        # Vistas derivadas, precalculadas para no recorrer las entradas
+        self.devices: Mapping[str, DeviceConfig] = MappingProxyType(
+            {d: e.device for d, e in entries.items()}
+        )
+        self.weight_callbacks: Mapping[str, Callable[[], float]] = MappingProxyType(
+            {d: e.weight_callback for d, e in entries.items() if e.weight_callback}
+        )
+        self.readers: Mapping[str, WeightSource] = MappingProxyType(
+            {d: e.reader.reader for d, e in entries.items() if e.reader}
+        )
+
+
+class DeviceRegistry:
+    """
+    Registro de dispositivos. Las escrituras (register, swap_reader) se
+    serializan entre sí y publican una instantánea nueva; las lecturas usan
+    la instantánea vigente en self.snapshot.
+    """
+
+    def __init__(
+        self,
+        devices: Iterable[DeviceConfig] = (),
+        weight_callbacks: Optional[dict[str, Callable[[], float]]] = None,
+    ):
+        """
+        Inicializa el registro.
+
+        Args:
+            devices: Dispositivos registrados desde el inicio
+            weight_callbacks: {device_id: callback} de esos dispositivos
+        """
+        callbacks = weight_callbacks or {}
+        self._write_lock = threading.Lock()
+        self.snapshot = Snapshot(0, {
+            d.device_id: _entry(d, callbacks.get(d.device_id), None) for d in devices
+        })
+
+    def get(self, device_id: str) -> Optional[DeviceEntry]:
+        """Entrada vigente de un dispositivo, o None si no está registrado."""
+        return self.snapshot.entries.get(device_id)
+
+    def register(
+        self,
+        device: DeviceConfig,
+        weight_callback: Optional[Callable[[], float]] = None,
+        reader: Optional[WeightSource] = None,
+    ) -> None:
+        """
+        Registra (o reemplaza) un dispositivo. Sin reader se conserva el
+        lector actual; si ya tenía un lector distinto, este se retira.
+        """
+        with self._write_lock:
+            entries = dict(self.snapshot.entries)
+            previous = entries.get(device.device_id)
+            if reader is None and previous is not None:
+                handle = previous.reader
+            else:
+                handle = _handle(previous, reader)
+            entries[device.device_id] = _entry(device, weight_callback, handle)
+            self._publish(entries)
+        _retire(previous, handle)
+
+    def swap_reader(self, device_id: str, reader: Optional[WeightSource]) -> None:
+        """
+        Reemplaza el lector de un dispositivo registrado (None = sin lector,
+        p. ej. durante una reconexión) y retira el anterior.
+
+        Raises:
+            KeyError: Si el dispositivo no está registrado
+        """
+        with self._write_lock:
+            entries = dict(self.snapshot.entries)
+            previous = entries[device_id]
+            handle = _handle(previous, reader)
+            entries[device_id] = previous._replace(reader=handle)
+            self._publish(entries)
+        _retire(previous, handle)
+
+    def retire_all(self) -> list[str]:
+        """
+        Quita y retira todos los lectores (al detener el servicio).
+
+        Returns:
+            IDs de los dispositivos que tenían lector
+        """
+        with self._write_lock:
+            entries = dict(self.snapshot.entries)
+            retired = [
+                (e.device.device_id, e.reader)
+                for e in entries.values() if e.reader is not None
+            ]
+            for device_id, _ in retired:
+                entries[device_id] = entries[device_id]._replace(reader=None)
+            self._publish(entries)
+        for _, handle in retired:
+            handle.retire()
+        return [device_id for device_id, _ in retired]
+
+    @contextmanager
+    def lease(self, device_id: str) -> Iterator[WeightSource]:
+        """
+        Usa el lector vigente de un dispositivo; mientras dure el bloque, el
+        lector no se cierra aunque sea reemplazado.
+
+        Raises:
+            RuntimeError: Si el dispositivo no tiene lector
+        """
+        while True:
+            entry = self.snapshot.entries.get(device_id)
+            if entry is None or entry.reader is None:
+                raise RuntimeError(f"Lector de báscula no encontrado: {device_id}")
+            handle = entry.reader
+            if handle.acquire():
+                break
+            # Retirado entre la lectura de la instantánea y el acquire: la
+            # instantánea nueva ya está publicada
+        try:
+            yield handle.reader
+        finally:
+            handle.release()
+
+    def _publish(self, entries: dict[str, DeviceEntry]) -> None:
+        self.snapshot = Snapshot(self.snapshot.version + 1, entries)
+
+
+def _entry(
+    device: DeviceConfig,
+    weight_callback: Optional[Callable[[], float]],
+    reader: Optional[ReaderHandle],
+) -> DeviceEntry:
+    return DeviceEntry(
+        device, weight_callback, reader, device.command_topic, device.response_topic
+    )
+
+
+def _handle(
+    previous: Optional[DeviceEntry], reader: Optional[WeightSource]
+) -> Optional[ReaderHandle]:
+    """Handle del nuevo lector (el mismo si el lector no cambia)."""
+    if reader is None:
+        return None
+    if previous is not None and previous.reader is not None and previous.reader.reader is reader:
+        return previous.reader
+    return ReaderHandle(reader)
+
+
+def _retire(previous: Optional[DeviceEntry], handle: Optional[ReaderHandle]) -> None:
+    if previous is not None and previous.reader is not None and previous.reader is not handle:
+        previous.reader.retire()
@@ -0,0 +1,316 @@
+"""
+Replay de capturas seriales a través de los parsers de tramas.
+
+Decodifica a máxima velocidad los bytes de una captura (capture.CaptureWriter)
+o de un log del servicio y reporta, por dispositivo, tramas/seg, tasa de
+tramas inválidas y la serie de pesos decodificada. Sirve como test de
+regresión sobre datos reales y como benchmark de la capa de parseo.
+
+Uso:
+    python -m scale_telemetry.replay captura.scap --format padded
+    python -m scale_telemetry.replay scale_telemetry.log --from-log --device scale-1
+"""
+
+import csv
+import math
+import sys
+import time
+from argparse import ArgumentParser, Namespace
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from .capture import CaptureRecord, CaptureWriter, read_capture, records_from_log
+from .frames import (
+    _PADDED_DIGITS,
+    _PADDED_MARKER,
+    _PADDED_WEIGHT_DIGITS,
+    FRAME_PARSERS,
+    FRAME_TERMINATORS,
+)
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: sin él se usa el parser Python
+    np = None
+
+ENGINES = ["auto", "python", "numpy"]
+
+# Formatos con decodificación vectorizada (tramas de ancho fijo)
+NUMPY_FORMATS = {"padded"}
+
+
+@dataclass
+class DeviceReplay:
+    """Resultado del replay de un dispositivo."""
+    device_id: str
+    engine: str
+    size: int = 0
+    elapsed: float = 0.0
+    # Timestamp y peso de cada trama (None si la trama es inválida)
+    timestamps: list[float] = field(default_factory=list)
+    weights: list[float | None] = field(default_factory=list)
+
+    @property
+    def frames(self) -> int:
+        return len(self.weights)
+
+    @property
+    def failures(self) -> int:
+        return sum(1 for w in self.weights if w is None)
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.frames if self.frames else 0.0
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.elapsed if self.elapsed else 0.0
+
+
+def decode_python(data: bytes, weight_format: str) -> tuple[list[int], list[float | None]]:
+    """
+    Decodifica todas las tramas completas con los parsers de frames.py.
+
+    Returns:
+        (posición del terminador de cada trama, peso o None)
+    """
+    parse = FRAME_PARSERS[weight_format]
+    terminator = FRAME_TERMINATORS[weight_format]
+    ends: list[int] = []
+    weights: list[float | None] = []
+    start = 0
+    while True:
+        end = data.find(terminator, start)
+        if end < 0:
+            return ends, weights
+        ends.append(end)
+        weights.append(parse(data, start, end))
+        start = end + 1
+
+
+def decode_padded_numpy(data: bytes):
+    """
+    Equivalente vectorizado de decode_python para el formato padded.
+
+    Busca el marcador "0 en todo el buffer a la vez, valida los 12 dígitos de
+    cada candidato con un índice 2D (sobre una copia con relleno, para no
+    salir del buffer) y se queda con el último candidato válido de cada
+    trama, igual que parse_padded_frame.
+
+    Returns:
+        (posiciones de los terminadores, pesos con NaN en las tramas inválidas)
+    """
+    size = len(data)
+    width = len(_PADDED_MARKER) + _PADDED_DIGITS
+    buf = np.zeros(size + width, dtype=np.uint8)
+    buf[:size] = np.frombuffer(data, dtype=np.uint8)
+
+    ends = np.flatnonzero(buf[:size] == FRAME_TERMINATORS["padded"][0])
+    weights = np.full(len(ends), np.nan)
+    if not len(ends):
+        return ends, weights
+
+    marker = np.ones(size, dtype=bool)
+    for k, byte in enumerate(_PADDED_MARKER):
+        marker &= buf[k:size + k] == byte
+    candidates = np.flatnonzero(marker)
+
+    # Trama de cada candidato: el primer terminador posterior
+    frame = np.searchsorted(ends, candidates)
+    inside = frame < len(ends)
+    candidates, frame = candidates[inside], frame[inside]
+    digits_start = candidates + len(_PADDED_MARKER)
+    inside = digits_start + _PADDED_DIGITS <= ends[frame]
+    frame, digits_start = frame[inside], digits_start[inside]
+
+    digits = buf[digits_start[:, None] + np.arange(_PADDED_DIGITS)]
+    valid = ((digits >= 0x30) & (digits <= 0x39)).all(axis=1)
+    frame, digits = frame[valid], digits[valid]
+    if not len(frame):
+        return ends, weights
+
+    # Último candidato válido de cada trama (los candidatos están ordenados)
+    last = np.ones(len(frame), dtype=bool)
+    last[:-1] = frame[1:] != frame[:-1]
+    powers = 10 ** np.arange(_PADDED_WEIGHT_DIGITS - 1, -1, -1)
+    values = (digits[last, :_PADDED_WEIGHT_DIGITS].astype(np.int64) - 0x30) @ powers
+    weights[frame[last]] = values
+    return ends, weights
+
+
+def resolve_engine(engine: str, weight_format: str) -> str:
+    """
+    Resuelve el motor de decodificación ("auto" usa numpy si está instalado
+    y el formato es de ancho fijo).
+
+    Raises:
+        ValueError: Si se pide numpy y no está disponible para el formato
+    """
+    if engine not in ENGINES:
+        raise ValueError(
+            f"Motor no soportado: '{engine}'. Motores disponibles: {ENGINES}"
+        )
+    if engine == "auto":
+        return "numpy" if np is not None and weight_format in NUMPY_FORMATS else "python"
+    if engine == "numpy":
+        if np is None:
+            raise ValueError("El motor 'numpy' requiere instalar numpy")
+        if weight_format not in NUMPY_FORMATS:
+            raise ValueError(
+                f"El motor 'numpy' no soporta el formato '{weight_format}'. "
+                f"Formatos vectorizados: {sorted(NUMPY_FORMATS)}"
+            )
+    return engine
+
+
+def replay(
+    records: Iterable[CaptureRecord],
+    weight_format: str = "standard",
+    engine: str = "auto",
+    repeat: int = 1,
+) -> dict[str, DeviceReplay]:
+    """
+    Decodifica los bytes capturados de cada dispositivo.
+
+    Los registros de un dispositivo se concatenan en orden (una trama puede
+    estar partida entre lecturas); cada trama toma el timestamp del registro
+    que contiene su terminador.
+
+    Args:
+        records: Registros de la captura
+        weight_format: Formato de trama ("standard" o "padded")
+        engine: "auto", "python" o "numpy"
+        repeat: Veces que se decodifica cada dispositivo (se reporta el promedio)
+
+    Returns:
+        Resultado por dispositivo, en orden de aparición
+    """
+    if weight_format not in FRAME_PARSERS:
+        raise ValueError(
+            f"Formato de peso no soportado: '{weight_format}'. "
+            f"Formatos disponibles: {list(FRAME_PARSERS)}"
+        )
+    engine = resolve_engine(engine, weight_format)
+
+    chunks: dict[str, list[CaptureRecord]] = {}
+    for record in records:
+        chunks.setdefault(record.device_id, []).append(record)
+
+    results = {}
+    for device_id, device_records in chunks.items():
+        data = b"".join(r.data for r in device_records)
+        result = DeviceReplay(device_id, engine, size=len(data))
+
+        start = time.perf_counter()
+        for _ in range(max(1, repeat)):
+            if engine == "numpy":
+                ends, weights = decode_padded_numpy(data)
+            else:
+                ends, weights = decode_python(data, weight_format)
+        result.elapsed = time.perf_counter() - start
+        if repeat > 1:
+            result.elapsed /= repeat
+
+        offsets = []
+        offset = 0
+        for r in device_records:
+            offsets.append(offset)
+            offset += len(r.data)
+        if engine == "numpy":
+            ends = ends.tolist()
+            weights = [None if math.isnan(w) else w for w in weights.tolist()]
+        result.timestamps = [
+            device_records[bisect_right(offsets, end) - 1].timestamp for end in ends
+        ]
+        result.weights = weights
+        results[device_id] = result
+    return results
+
+
+def write_series(results: dict[str, DeviceReplay], path: str) -> None:
+    """Escribe la serie de pesos en CSV (device_id, timestamp, weight)."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["device_id", "timestamp", "weight"])
+        for result in results.values():
+            for timestamp, weight in zip(result.timestamps, result.weights):
+                writer.writerow([
+                    result.device_id,
+                    f"{timestamp:.3f}",
+                    "" if weight is None else weight,
+                ])
+
+
+def print_report(results: dict[str, DeviceReplay]) -> None:
+    for r in results.values():
+        valid = [w for w in r.weights if w is not None]
+        print(
+            f"{r.device_id}: {r.frames} tramas ({r.size} bytes), "
+            f"{r.failures} inválidas ({r.failure_rate:.2%}), "
+            f"{r.frames_per_second:,.0f} tramas/s [{r.engine}]"
+        )
+        if valid:
+            print(
+                f"    peso: mín {min(valid)}, máx {max(valid)}, "
+                f"primero {valid[0]}, último {valid[-1]}"
+            )
+
+
+def build_parser() -> ArgumentParser:
+    parser = ArgumentParser(description="Replay de capturas seriales.")
+    parser.add_argument("path", help="Archivo de captura (o log con --from-log).")
+    parser.add_argument(
+        "--format", default="standard", choices=list(FRAME_PARSERS),
+        help="Formato de trama. Por defecto standard.",
+    )
+    parser.add_argument(
+        "--engine", default="auto", choices=ENGINES,
+        help="Motor de decodificación. Por defecto auto (numpy si está disponible).",
+    )
+    parser.add_argument(
+        "--from-log", action="store_true",
+        help="Leer los bytes crudos de un log del servicio (nivel INFO).",
+    )
+    parser.add_argument(
+        "--device", default="scale-1",
+        help="ID del dispositivo del log (con --from-log). Por defecto scale-1.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1,
+        help="Decodificaciones por dispositivo para medir throughput. Por defecto 1.",
+    )
+    parser.add_argument("--series", help="Escribir la serie de pesos en un CSV.")
+    parser.add_argument("--save", help="Guardar los registros leídos como captura.")
+    return parser
+
+
+def parse_args(argv: list[str]) -> Namespace:
+    return build_parser().parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    """Función principal."""
+    args = parse_args(argv if argv is not None else sys.argv[1:])
+    if args.from_log:
+        with open(args.path, encoding="utf-8", errors="replace") as f:
+            records = list(records_from_log(f, args.device))
+    else:
+        records = list(read_capture(args.path))
+
+    if args.save:
+        with CaptureWriter(args.save) as writer:
+            for record in records:
+                writer.write(record.device_id, record.data, record.timestamp)
+
+    try:
+        results = replay(records, args.format, args.engine, args.repeat)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+    print_report(results)
+    if args.series:
+        write_series(results, args.series)
+
+
+if __name__ == "__main__":
+    main()
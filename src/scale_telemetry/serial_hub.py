@@ -0,0 +1,330 @@
+"""Multiplexor de puertos seriales en un único hilo (selectors)."""
+
+import logging
+import os
+import selectors
+import threading
+import time
+from typing import Callable, Optional
+
+import serial
+
+from . import tracing
+from .adaptive_timeout import AdaptiveTimeout
+from .config import SerialConfig
+from .frames import FrameDecoder
+from .serial_reader import PADDED_MAX_ATTEMPTS, READ_MODES, WEIGHT_FORMATS
+
+logger = logging.getLogger(__name__)
+
+# Timeout del select: solo acota cuánto tarda el loop en notar stop()
+SELECT_TIMEOUT = 1.0
+
+
+class HubReader:
+    """
+    Lector de báscula cuyo puerto es atendido por un SerialHub.
+
+    Expone la misma interfaz que ScaleReader (connect, disconnect,
+    read_weight), pero no lee del puerto: el hilo del hub decodifica las
+    tramas de forma continua y read_weight espera la siguiente trama.
+    """
+
+    def __init__(
+        self,
+        hub: "SerialHub",
+        config: SerialConfig,
+        capture: Optional[Callable[[bytes], None]] = None,
+    ):
+        """
+        Inicializa el lector.
+
+        Args:
+            hub: Hub que atiende el puerto
+            config: Configuración del puerto serial
+            capture: Función que recibe los bytes crudos leídos (ver capture.py)
+        """
+        if config.weight_format not in WEIGHT_FORMATS:
+            raise ValueError(
+                f"Formato de peso no soportado: '{config.weight_format}'. "
+                f"Formatos disponibles: {WEIGHT_FORMATS}"
+            )
+        if config.read_mode not in READ_MODES:
+            raise ValueError(
+                f"Modo de lectura no soportado: '{config.read_mode}'. "
+                f"Modos disponibles: {READ_MODES}"
+            )
+        self.config = config
+        self.connection: Optional[serial.Serial] = None
+        self._hub = hub
+        self._capture = capture
+        self._decoder = FrameDecoder(config.weight_format)
+        self._cond = threading.Condition()
+        self._weight: Optional[float] = None
+        self._timestamp = 0.0
+        self._seq = 0
+        self._error: Optional[str] = None
+        # Timeout aprendido de la cadencia de la báscula (con min_timeout)
+        self.read_timeout: Optional[AdaptiveTimeout] = None
+        if config.min_timeout > 0:
+            self.read_timeout = AdaptiveTimeout(
+                config.min_timeout, config.poll_timeout or config.timeout
+            )
+
+    @property
+    def last_weight(self) -> Optional[float]:
+        """Último peso decodificado (None si aún no hay tramas)."""
+        return self._weight
+
+    @property
+    def last_timestamp(self) -> float:
+        """Instante (time.monotonic) de la última trama decodificada."""
+        return self._timestamp
+
+    def connect(self) -> None:
+        """Abre el puerto en modo no bloqueante y lo registra en el hub."""
+        try:
+            connection = serial.Serial(
+                port=self.config.port,
+                baudrate=self.config.baudrate,
+                timeout=0,
+            )
+        except serial.SerialException as e:
+            logger.error(f"Error al conectar con la báscula: {e}")
+            raise
+        self.connection = connection
+        self._error = None
+        self._decoder.clear()
+        self._hub.register(self, connection.fileno())
+        logger.info(
+            f"Conectado a báscula en {self.config.port} vía hub "
+            f"(formato: {self.config.weight_format})"
+        )
+
+    def disconnect(self) -> None:
+        """Quita el puerto del hub y cierra la conexión."""
+        if self.connection and self.connection.is_open:
+            self._hub.unregister(self, self.connection.fileno())
+            self.connection.close()
+            logger.info("Desconectado de la báscula")
+        self._fail("Conexión cerrada")
+
+    def read_weight(self) -> float:
+        """
+        Espera la siguiente trama decodificada por el hub.
+        En modo poll escribe la petición antes de esperar la respuesta.
+
+        Returns:
+            El peso en kilogramos
+
+        Raises:
+            serial.SerialException: Si el puerto no está conectado o falló
+            ValueError: Si no llega una trama válida dentro del timeout
+        """
+        if not self.connection or not self.connection.is_open:
+            raise serial.SerialException("No hay conexión con la báscula")
+
+        adaptive = self.read_timeout
+        if adaptive is not None and adaptive.learned:
+            timeout = adaptive.timeout
+        elif self.config.poll_request:
+            timeout = self.config.poll_timeout or self.config.timeout
+        else:
+            attempts = (
+                PADDED_MAX_ATTEMPTS if self.config.weight_format == "padded" else 1
+            )
+            timeout = self.config.timeout * attempts
+        started = time.monotonic()
+        with self._cond:
+            if self._error is not None:
+                raise serial.SerialException(self._error)
+            seq = self._seq
+            if self.config.poll_request:
+                self.connection.write(self.config.render(self.config.poll_request))
+            with tracing.span("wait_frame"):
+                fresh = self._cond.wait_for(
+                    lambda: self._seq != seq or self._error is not None, timeout
+                )
+            if self._error is not None:
+                raise serial.SerialException(self._error)
+            if adaptive is not None:
+                if fresh:
+                    adaptive.observe(time.monotonic() - started)
+                else:
+                    adaptive.failure()
+            weight = self._weight
+            if not fresh or weight is None:
+                raise ValueError(
+                    f"No se recibió trama válida en {timeout:.1f}s "
+                    f"({self.config.port})"
+                )
+            return weight
+
+    def execute_command(self, command: str, read_weight: bool = False) -> Optional[float]:
+        """
+        Envía un comando ASCII a la báscula.
+
+        En modo hub las lecturas las hace el hilo del hub, por lo que la
+        confirmación (command_ack) no se verifica: con read_weight=True se
+        espera la siguiente trama decodificada después de escribir el comando.
+
+        Args:
+            command: Nombre del comando (clave de SerialConfig.commands)
+            read_weight: Si se lee el peso después del comando
+
+        Returns:
+            El peso leído después del comando, o None si read_weight es False
+        """
+        payload = self.config.commands.get(command)
+        if payload is None:
+            raise ValueError(
+                f"Comando no soportado por la báscula: '{command}'. "
+                f"Comandos disponibles: {sorted(self.config.commands)}"
+            )
+        if not self.connection or not self.connection.is_open:
+            raise serial.SerialException("No hay conexión con la báscula")
+        self.connection.write(self.config.render(payload))
+        logger.info(f"Comando '{command}' enviado a {self.config.port}")
+        return self.read_weight() if read_weight else None
+
+    def _on_readable(self) -> None:
+        """Lee los bytes disponibles y publica la última trama (hilo del hub)."""
+        if self.connection is None:
+            return  # Aviso tardío de un puerto ya cerrado
+        fd = self.connection.fileno()
+        try:
+            n = self._decoder.fill_from_fd(fd)
+        except OSError as e:
+            self._hub.unregister(self, fd)
+            self._fail(f"Error de lectura en {self.config.port}: {e}")
+            return
+        if n is None:
+            # Aviso de lectura espurio: no hay datos todavía
+            return
+        if n == 0:
+            self._hub.unregister(self, fd)
+            self._fail(f"El dispositivo {self.config.port} no retornó datos")
+            return
+        if self._capture is not None:
+            self._capture(self._decoder.tail(n))
+
+        weight = self._decoder.latest_weight()
+        if weight is None:
+            return
+        with self._cond:
+            self._weight = weight
+            self._timestamp = time.monotonic()
+            self._seq += 1
+            self._cond.notify_all()
+
+    def _fail(self, error: str) -> None:
+        """Marca el lector como fallido y despierta a los que esperan."""
+        with self._cond:
+            if self._error is None:
+                self._error = error
+            self._cond.notify_all()
+
+
+class SerialHub:
+    """
+    Atiende muchos puertos seriales desde un único hilo.
+
+    Los puertos se abren no bloqueantes y sus descriptores se registran en un
+    selector (epoll/kqueue). Cuando un puerto tiene datos, el hilo del hub los
+    lee dentro del FrameDecoder del dispositivo y actualiza su último peso.
+    """
+
+    def __init__(self):
+        """Inicializa el hub (el hilo se lanza con start())."""
+        self._selector = selectors.DefaultSelector()
+        self._pending: list[tuple[str, int, HubReader]] = []
+        self._lock = threading.Lock()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def reader(
+        self,
+        config: SerialConfig,
+        capture: Optional[Callable[[bytes], None]] = None,
+    ) -> HubReader:
+        """Crea un lector atendido por este hub."""
+        return HubReader(self, config, capture)
+
+    def register(self, reader: HubReader, fd: int) -> None:
+        """Agrega el puerto (fd) de un lector al selector (thread-safe)."""
+        self._enqueue("register", fd, reader)
+
+    def unregister(self, reader: HubReader, fd: int) -> None:
+        """Quita el puerto (fd) de un lector del selector (thread-safe)."""
+        self._enqueue("unregister", fd, reader)
+
+    def _enqueue(self, action: str, fd: int, reader: HubReader) -> None:
+        # Los cambios se aplican en orden en el hilo del hub para no modificar
+        # el selector mientras select() está en curso. El fd se captura aquí
+        # porque el puerto puede cerrarse antes de que el hub lo procese.
+        with self._lock:
+            self._pending.append((action, fd, reader))
+        self._wakeup()
+
+    def _wakeup(self) -> None:
+        try:
+            os.write(self._wakeup_w, b"\0")
+        except BlockingIOError:
+            pass
+
+    def _apply_pending(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for action, fd, reader in pending:
+            key = self._selector.get_map().get(fd)
+            if action == "register":
+                if key is not None:
+                    self._selector.unregister(fd)
+                self._selector.register(fd, selectors.EVENT_READ, reader)
+            elif key is not None and key.data is reader:
+                self._selector.unregister(fd)
+
+    def start(self) -> None:
+        """Lanza el hilo del hub."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, daemon=True, name="serial-hub"
+        )
+        self._thread.start()
+        logger.info("SerialHub iniciado")
+
+    def stop(self) -> None:
+        """Detiene el hilo del hub y libera el selector."""
+        if not self._running:
+            return
+        self._running = False
+        self._wakeup()
+        if self._thread:
+            self._thread.join(timeout=SELECT_TIMEOUT * 2)
+        self._selector.close()
+        os.close(self._wakeup_r)
+        os.close(self._wakeup_w)
+        logger.info("SerialHub detenido")
+
+    def _run(self) -> None:
+        while self._running:
+            self._apply_pending()
+            for key, _ in self._selector.select(SELECT_TIMEOUT):
+                reader = key.data
+                if reader is None:
+                    try:
+                        while os.read(self._wakeup_r, 512):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                try:
+                    reader._on_readable()
+                except Exception as e:
+                    logger.error(f"Error en SerialHub ({reader.config.port}): {e}")
@@ -1,18 +1,37 @@
 """Lector de peso desde puerto serial."""
 
 import logging
+import math
+import os
 import re
-from typing import Optional
+import select
+import threading
+import time
+from typing import Callable, Optional
 
 import serial
 
+from . import tracing
+from .adaptive_timeout import AdaptiveTimeout
 from .config import SerialConfig
+from .frames import FrameDecoder
 
 logger = logging.getLogger(__name__)
 
 # Formatos de parseo disponibles
 WEIGHT_FORMATS = ["standard", "padded"]
 
+# Modos de lectura: "buffered" usa readline/read_until de pyserial,
+# "direct" lee el fd en un buffer preasignado (ver frames.FrameDecoder)
+READ_MODES = ["buffered", "direct"]
+
+# Tramas que se intentan leer en formato padded antes de fallar
+PADDED_MAX_ATTEMPTS = 5
+
+
+class FrameTimeout(ValueError):
+    """No llegó una trama válida porque vencieron los timeouts de lectura."""
+
 
 def parse_standard(line: str) -> float:
     """
@@ -62,14 +81,20 @@ PARSERS = {
 class ScaleReader:
     """Lee el peso desde una báscula conectada por puerto serial."""
 
-    def __init__(self, config: SerialConfig):
+    def __init__(
+        self,
+        config: SerialConfig,
+        capture: Optional[Callable[[bytes], None]] = None,
+    ):
         """
         Inicializa el lector de báscula.
 
         Args:
             config: Configuración del puerto serial
+            capture: Función que recibe los bytes crudos leídos (ver capture.py)
         """
         self.config = config
+        self._capture = capture
         self.connection: Optional[serial.Serial] = None
         self._parser = PARSERS.get(config.weight_format)
         if not self._parser:
@@ -77,6 +102,23 @@ class ScaleReader:
                 f"Formato de peso no soportado: '{config.weight_format}'. "
                 f"Formatos disponibles: {WEIGHT_FORMATS}"
             )
+        if config.read_mode not in READ_MODES:
+            raise ValueError(
+                f"Modo de lectura no soportado: '{config.read_mode}'. "
+                f"Modos disponibles: {READ_MODES}"
+            )
+        if config.read_mode == "direct" and not hasattr(os, "readv"):
+            raise ValueError("El modo de lectura 'direct' requiere un sistema POSIX")
+        self._decoder: Optional[FrameDecoder] = None
+        self._poller: Optional["select.poll"] = None
+        # Dueño de la I/O del puerto: serializa lecturas y comandos para que
+        # no se intercalen en la línea serial
+        self._io_lock = threading.Lock()
+        # Timeout aprendido de la cadencia de la báscula (con min_timeout)
+        self.read_timeout: Optional[AdaptiveTimeout] = None
+        if config.min_timeout > 0:
+            self.read_timeout = AdaptiveTimeout(config.min_timeout, self._timeout)
+        self._applied_timeout = self._timeout
 
     def connect(self) -> None:
         """Establece la conexión con la báscula."""
@@ -84,8 +126,12 @@ class ScaleReader:
             self.connection = serial.Serial(
                 port=self.config.port,
                 baudrate=self.config.baudrate,
-                timeout=self.config.timeout,
+                timeout=self._timeout,
             )
+            if self.config.read_mode == "direct":
+                self._decoder = FrameDecoder(self.config.weight_format)
+                self._poller = select.poll()
+                self._poller.register(self.connection.fileno(), select.POLLIN)
             logger.info(
                 f"Conectado a báscula en {self.config.port} "
                 f"(formato: {self.config.weight_format})"
@@ -100,9 +146,17 @@ class ScaleReader:
             self.connection.close()
             logger.info("Desconectado de la báscula")
 
+    @property
+    def _timeout(self) -> float:
+        """Timeout de lectura: en modo poll, el timeout (más corto) del poll."""
+        if self.config.poll_request and self.config.poll_timeout:
+            return self.config.poll_timeout
+        return self.config.timeout
+
     def read_weight(self) -> float:
         """
         Lee el peso actual de la báscula.
+        En modo poll escribe la petición configurada y lee la respuesta.
 
         Returns:
             El peso en kilogramos
@@ -111,50 +165,289 @@ class ScaleReader:
             serial.SerialException: Si hay un error de comunicación
             ValueError: Si no se puede parsear el peso
         """
+        request = (
+            self.config.render(self.config.poll_request)
+            if self.config.poll_request else None
+        )
+        return self.poll(request)
+
+    def poll(self, request: Optional[bytes] = None) -> float:
+        """
+        Limpia el buffer de entrada, escribe la petición (si hay) y lee la
+        siguiente trama. Permite que un bus multidrop (PollBus) envíe la
+        petición de cada dirección por el mismo puerto.
+
+        Args:
+            request: Bytes de la petición de poll (None = báscula continua)
+
+        Returns:
+            El peso en kilogramos
+        """
+        connection = self._ensure_connected()
+        with self._io_lock:
+            try:
+                # Limpia el buffer de entrada
+                with tracing.span("reset_input"):
+                    connection.reset_input_buffer()
+                if request:
+                    connection.write(request)
+                return self._read_next_weight(clear=True)
+            except serial.SerialException as e:
+                logger.error(f"Error al leer de la báscula: {e}")
+                raise
+            except Exception as e:
+                logger.error(f"Error inesperado al leer peso: {e}")
+                raise
+
+    def execute_command(self, command: str, read_weight: bool = False) -> Optional[float]:
+        """
+        Envía un comando ASCII a la báscula (p. ej. tara o cero).
+
+        El buffer de entrada se limpia antes de escribir el comando, para que
+        las tramas que la báscula envió antes no se tomen como respuesta; si
+        la báscula confirma (command_ack), se espera la confirmación. Con
+        read_weight=True la trama siguiente se lee en la misma secuencia de
+        I/O, de modo que "tarar y leer" es un solo ida y vuelta serial.
+
+        Args:
+            command: Nombre del comando (clave de SerialConfig.commands)
+            read_weight: Si se lee el peso después del comando
+
+        Returns:
+            El peso leído después del comando, o None si read_weight es False
+
+        Raises:
+            serial.SerialException: Si hay un error de comunicación
+            ValueError: Si el comando no está configurado, no se confirma
+                o no se puede parsear el peso
+        """
+        payload = self.config.commands.get(command)
+        if payload is None:
+            raise ValueError(
+                f"Comando no soportado por la báscula: '{command}'. "
+                f"Comandos disponibles: {sorted(self.config.commands)}"
+            )
+        connection = self._ensure_connected()
+        with self._io_lock:
+            try:
+                # Descarta las tramas anteriores al comando (el kernel y, en
+                # modo directo, el decodificador)
+                with tracing.span("reset_input"):
+                    connection.reset_input_buffer()
+                if self._decoder is not None:
+                    self._decoder.clear()
+                connection.write(self.config.render(payload))
+                if self.config.command_ack:
+                    self._wait_ack(self.config.command_ack.encode("latin-1"))
+                logger.info(f"Comando '{command}' enviado a {self.config.port}")
+                if not read_weight:
+                    return None
+                return self._read_next_weight(clear=False)
+            except serial.SerialException as e:
+                logger.error(f"Error al enviar comando a la báscula: {e}")
+                raise
+
+    def _ensure_connected(self) -> serial.Serial:
+        """Retorna la conexión abierta con la báscula."""
         if not self.connection or not self.connection.is_open:
             raise serial.SerialException("No hay conexión con la báscula")
+        return self.connection
 
+    def _direct_io(self) -> tuple[FrameDecoder, "select.poll", int]:
+        """Decodificador, poller y descriptor del puerto en modo directo."""
+        connection = self._ensure_connected()
+        if self._decoder is None or self._poller is None:
+            raise serial.SerialException("El puerto no está en modo directo")
+        return self._decoder, self._poller, connection.fileno()
+
+    def _wait_ack(self, ack: bytes) -> None:
+        """Consume la entrada hasta la confirmación del comando."""
+        with tracing.span("wait_ack"):
+            if self._decoder is not None:
+                if not self._wait_ack_direct(ack):
+                    raise ValueError("La báscula no confirmó el comando")
+                return
+            data = self._ensure_connected().read_until(ack)
+        if not data.endswith(ack):
+            raise ValueError("La báscula no confirmó el comando")
+
+    def _read_next_weight(self, clear: bool) -> float:
+        """
+        Lee la siguiente trama válida del puerto (sin limpiar el buffer).
+        Con timeout adaptativo, registra la espera o el timeout.
+        """
+        adaptive = self.read_timeout
+        if adaptive is None:
+            return self._read_frame(clear)
+        started = time.monotonic()
         try:
-            # Limpia el buffer de entrada
-            self.connection.reset_input_buffer()
-
-            if self.config.weight_format == "padded":
-                # Formato padded: leer tramas hasta encontrar una válida.
-                # La báscula puede enviar datos parciales (ej: b'000\r')
-                # antes de una trama completa con el patrón "0 DDDDDDDDDDDD\r.
-                max_intentos = 5
-                for intento in range(1, max_intentos + 1):
-                    raw_bytes = self.connection.read_until(b'\r')
-                    logger.info(
-                        f"Padded intento {intento}/{max_intentos} - "
-                        f"({len(raw_bytes)} bytes): {raw_bytes!r}"
-                    )
-                    if re.search(rb'"0 \d{12}', raw_bytes):
-                        break
-                    logger.info("Trama sin patrón válido, reintentando...")
-                else:
-                    raise ValueError(
-                        f"No se encontró trama válida después de "
-                        f"{max_intentos} intentos"
-                    )
-                weight = parse_padded(raw_bytes)
+            weight = self._read_frame(clear)
+        except FrameTimeout:
+            adaptive.failure()
+            raise
+        adaptive.observe(time.monotonic() - started)
+        return weight
+
+    def _attempt_timeout(self) -> float:
+        """
+        Timeout de un intento de lectura. En modo buffered, el timeout
+        aprendido se aplica al puerto (redondeado a 10 ms para no
+        reconfigurarlo en cada lectura).
+        """
+        if self.read_timeout is None:
+            return self._timeout
+        timeout = math.ceil(self.read_timeout.timeout * 100) / 100
+        if self._decoder is None and timeout != self._applied_timeout:
+            self._ensure_connected().timeout = timeout
+            self._applied_timeout = timeout
+        return timeout
+
+    def _timeout_budget(self, max_attempts: int) -> int:
+        if self.read_timeout is None:
+            return max_attempts
+        return self.read_timeout.timeout_budget(max_attempts)
+
+    def _read_frame(self, clear: bool) -> float:
+        timeout = self._attempt_timeout()
+        connection = self._ensure_connected()
+        if self._decoder is not None:
+            weight = self._read_weight_direct(clear, timeout)
+        elif self.config.weight_format == "padded":
+            # Formato padded: leer tramas hasta encontrar una válida.
+            # La báscula puede enviar datos parciales (ej: b'000\r')
+            # antes de una trama completa con el patrón "0 DDDDDDDDDDDD\r.
+            # Una lectura sin terminador venció el timeout.
+            max_intentos = PADDED_MAX_ATTEMPTS
+            budget = self._timeout_budget(max_intentos)
+            timeouts = 0
+            for intento in range(1, max_intentos + 1):
+                with tracing.span("read_attempt", attempt=intento):
+                    raw_bytes = connection.read_until(b'\r')
+                if self._capture is not None:
+                    self._capture(raw_bytes)
+                logger.info(
+                    f"Padded intento {intento}/{max_intentos} - "
+                    f"({len(raw_bytes)} bytes): {raw_bytes!r}"
+                )
+                if re.search(rb'"0 \d{12}', raw_bytes):
+                    break
+                if not raw_bytes.endswith(b'\r'):
+                    timeouts += 1
+                    if timeouts >= budget:
+                        raise FrameTimeout(
+                            f"No se encontró trama válida después de "
+                            f"{intento} intentos"
+                        )
+                logger.info("Trama sin patrón válido, reintentando...")
             else:
-                # Formato standard: leer una línea hasta \n
-                raw_bytes = self.connection.readline()
-                logger.info(f"Datos crudos (bytes): {raw_bytes!r}")
-                line = raw_bytes.decode('utf-8', errors='ignore').strip()
-                logger.info(f"Datos decodificados: '{line}'")
+                error = FrameTimeout if timeouts else ValueError
+                raise error(
+                    f"No se encontró trama válida después de "
+                    f"{max_intentos} intentos"
+                )
+            weight = parse_padded(raw_bytes)
+        else:
+            # Formato standard: leer una línea hasta \n
+            with tracing.span("read_attempt", attempt=1):
+                raw_bytes = connection.readline()
+            if self._capture is not None:
+                self._capture(raw_bytes)
+            logger.info(f"Datos crudos (bytes): {raw_bytes!r}")
+            line = raw_bytes.decode('utf-8', errors='ignore').strip()
+            logger.info(f"Datos decodificados: '{line}'")
+            try:
                 weight = parse_standard(line)
+            except ValueError as e:
+                if not raw_bytes.endswith(b'\n'):
+                    raise FrameTimeout(str(e)) from None
+                raise
 
-            logger.info(f"Peso leído: {weight} kg")
-            return weight
+        logger.info(f"Peso leído: {weight} kg")
+        return weight
 
-        except serial.SerialException as e:
-            logger.error(f"Error al leer de la báscula: {e}")
-            raise
-        except Exception as e:
-            logger.error(f"Error inesperado al leer peso: {e}")
-            raise
+    def _fill_direct(
+        self, decoder: FrameDecoder, poller: "select.poll", fd: int, timeout_ms: int
+    ) -> bool:
+        """
+        Espera datos en el descriptor y los lee dentro del decodificador.
+
+        Returns:
+            False si venció el timeout sin datos
+        """
+        if not poller.poll(timeout_ms):
+            return False
+        try:
+            n = decoder.fill_from_fd(fd)
+        except OSError as e:
+            raise serial.SerialException(f"Error de lectura en el puerto: {e}")
+        if n is None:
+            # Aviso de poll espurio: se vuelve a esperar
+            return True
+        if n == 0:
+            # Fin de archivo: puerto desconectado
+            raise serial.SerialException(
+                "El dispositivo no retornó datos (¿desconectado?)"
+            )
+        if self._capture is not None:
+            self._capture(decoder.tail(n))
+        return True
+
+    def _wait_ack_direct(self, ack: bytes) -> bool:
+        """Espera la confirmación en modo directo (un timeout como máximo)."""
+        decoder, poller, fd = self._direct_io()
+        timeout_ms = int(self._timeout * 1000)
+        while not decoder.consume_through(ack):
+            if not self._fill_direct(decoder, poller, fd, timeout_ms):
+                return False
+        return True
+
+    def _read_weight_direct(
+        self, clear: bool = True, timeout: Optional[float] = None
+    ) -> float:
+        """
+        Lee la siguiente trama válida directamente del descriptor del puerto.
+
+        Los bytes se leen dentro del buffer del FrameDecoder y se parsean sin
+        decodificar a str. Cada trama inválida o timeout cuenta como un intento
+        (1 en formato standard, PADDED_MAX_ATTEMPTS en formato padded); con
+        timeout adaptativo, los timeouts tienen además su propio presupuesto.
+        """
+        decoder, poller, fd = self._direct_io()
+        if clear:
+            decoder.clear()
+        rejected_before = decoder.frames_rejected
+        timeout_ms = int((self._timeout if timeout is None else timeout) * 1000)
+        max_attempts = (
+            PADDED_MAX_ATTEMPTS if self.config.weight_format == "padded" else 1
+        )
+        budget = self._timeout_budget(max_attempts)
+        timeouts = 0
+
+        while True:
+            weight = decoder.next_weight()
+            if weight is not None:
+                return weight
+            rejected = decoder.frames_rejected - rejected_before
+            if rejected + timeouts >= max_attempts or timeouts >= budget:
+                break
+            attempt = rejected + timeouts + 1
+            with tracing.span("read_attempt", attempt=attempt) as span:
+                if not self._fill_direct(decoder, poller, fd, timeout_ms):
+                    timeouts += 1
+                    span.set_error("timeout")
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Lectura directa sin trama válida (%d rechazadas, %d timeouts)",
+                rejected, timeouts,
+            )
+        error = FrameTimeout if timeouts else ValueError
+        if self.config.weight_format == "padded":
+            raise error(
+                f"No se encontró trama válida después de "
+                f"{min(rejected + timeouts, max_attempts)} intentos"
+            )
+        raise error("No se pudo extraer el peso de la trama recibida")
 
     def __enter__(self):
         """Context manager entry."""
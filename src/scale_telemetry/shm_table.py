@@ -0,0 +1,250 @@
+"""
+Tabla del último peso por dispositivo en memoria compartida.
+
+El servicio escribe cada lectura válida en un slot de tamaño fijo por
+dispositivo; procesos locales (drivers de impresoras, puentes a PLC) leen el
+peso sin sockets ni serialización con WeightTableReader.
+
+Layout (little-endian):
+    encabezado (16 bytes): magic "SCWT", versión, cantidad de slots, tamaño de slot
+    slot (64 bytes, una línea de caché):
+        seq       uint64   contador seqlock (impar = escritura en curso)
+        weight    float64  último peso válido (kg)
+        timestamp float64  instante de la lectura (time.time())
+        flags     uint32   bit 0: conectado, bit 1: hay peso
+        (4 bytes de relleno)
+        device_id 32 bytes UTF-8 con relleno de ceros
+
+Cada slot tiene un único escritor (el servicio, bajo un lock) y un número
+arbitrario de lectores, que reintentan si el contador cambió o era impar
+durante la lectura.
+"""
+
+import os
+import struct
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import NamedTuple, Optional
+
+MAGIC = b"SCWT"
+LAYOUT_VERSION = 1
+DEVICE_ID_SIZE = 32
+
+_HEADER = struct.Struct("<4sIII")
+_SEQ = struct.Struct("<Q")
+_PAYLOAD = struct.Struct("<ddI4x")
+_SLOT = struct.Struct(f"<QddI4x{DEVICE_ID_SIZE}s")
+
+FLAG_CONNECTED = 0x1
+FLAG_HAS_WEIGHT = 0x2
+
+# Reintentos de un lector antes de ceder el procesador
+_SPIN_RETRIES = 100
+
+# Segmentos creados por este proceso (ya registrados en el resource_tracker)
+_OWNED: set[str] = set()
+
+
+class Sample(NamedTuple):
+    """Contenido de un slot leído de forma consistente."""
+    weight: Optional[float]
+    timestamp: Optional[float]
+    connected: bool
+    seq: int
+
+
+def _slot_offset(index: int) -> int:
+    return _HEADER.size + index * _SLOT.size
+
+
+class WeightTable:
+    """Escritor de la tabla (lado del servicio)."""
+
+    def __init__(self, name: str, device_ids: list[str]):
+        """
+        Crea el segmento de memoria compartida. Si quedó uno con el mismo
+        nombre (p. ej. tras una caída del servicio), se reemplaza.
+
+        Args:
+            name: Nombre del segmento (en Linux, /dev/shm/<name>)
+            device_ids: Dispositivos, un slot por cada uno
+
+        Raises:
+            ValueError: Si un device_id no entra en el slot
+        """
+        self._index: dict[str, int] = {}
+        for i, device_id in enumerate(device_ids):
+            if len(device_id.encode("utf-8")) > DEVICE_ID_SIZE:
+                raise ValueError(
+                    f"device_id demasiado largo para la tabla compartida "
+                    f"(máx. {DEVICE_ID_SIZE} bytes): {device_id}"
+                )
+            self._index[device_id] = i
+
+        size = _slot_offset(len(device_ids))
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = name
+        _OWNED.add(name)
+        buf = _buffer(self._shm)
+        self._buf: Optional[memoryview] = buf
+        self._lock = threading.Lock()
+
+        for device_id, i in self._index.items():
+            _SLOT.pack_into(
+                buf, _slot_offset(i), 0, 0.0, 0.0, 0, device_id.encode("utf-8")
+            )
+        # El encabezado se escribe al final: un lector que ve el magic ve los slots
+        _HEADER.pack_into(buf, 0, MAGIC, LAYOUT_VERSION, len(device_ids), _SLOT.size)
+        self._flags = dict.fromkeys(self._index, 0)
+        self._weights: dict[str, tuple[float, float]] = {}
+
+    def update(
+        self, device_id: str, weight: float, timestamp: Optional[float] = None
+    ) -> None:
+        """Publica una lectura válida (marca el dispositivo como conectado)."""
+        with self._lock:
+            if device_id not in self._index:
+                return
+            self._weights[device_id] = (
+                weight, time.time() if timestamp is None else timestamp
+            )
+            self._flags[device_id] = FLAG_CONNECTED | FLAG_HAS_WEIGHT
+            self._write(device_id)
+
+    def set_connected(self, device_id: str, connected: bool) -> None:
+        """Publica el estado de conexión conservando el último peso."""
+        with self._lock:
+            if device_id not in self._index:
+                return
+            flags = self._flags[device_id] & ~FLAG_CONNECTED
+            self._flags[device_id] = flags | (FLAG_CONNECTED if connected else 0)
+            self._write(device_id)
+
+    def _write(self, device_id: str) -> None:
+        """Escribe un slot con el protocolo seqlock (bajo el lock)."""
+        buf = self._buf
+        if buf is None:
+            return
+        offset = _slot_offset(self._index[device_id])
+        seq = _SEQ.unpack_from(buf, offset)[0]
+        weight, timestamp = self._weights.get(device_id, (0.0, 0.0))
+        _SEQ.pack_into(buf, offset, seq + 1)
+        _PAYLOAD.pack_into(
+            buf, offset + _SEQ.size, weight, timestamp, self._flags[device_id]
+        )
+        _SEQ.pack_into(buf, offset, seq + 2)
+
+    def close(self) -> None:
+        """Libera y elimina el segmento."""
+        with self._lock:
+            self._buf = None
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        _OWNED.discard(self.name)
+
+
+class WeightTableReader:
+    """
+    Lector de la tabla para procesos locales:
+
+        reader = WeightTableReader("scale-telemetry")
+        sample = reader.read("scale-1")
+        if sample.connected and sample.weight is not None:
+            ...
+    """
+
+    def __init__(self, name: str):
+        """
+        Abre el segmento publicado por el servicio.
+
+        Raises:
+            FileNotFoundError: Si el servicio no publicó la tabla
+            ValueError: Si el segmento no tiene el layout esperado
+        """
+        self._shm = _attach(name)
+        buf = _buffer(self._shm)
+        self._buf: Optional[memoryview] = buf
+        magic, version, slots, slot_size = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION or slot_size != _SLOT.size:
+            self.close()
+            raise ValueError(f"Layout de tabla no soportado en '{name}'")
+        self._index: dict[str, int] = {}
+        for i in range(slots):
+            raw = _SLOT.unpack_from(buf, _slot_offset(i))[4]
+            self._index[raw.rstrip(b"\0").decode("utf-8")] = i
+
+    def devices(self) -> list[str]:
+        """Dispositivos publicados en la tabla."""
+        return list(self._index)
+
+    def read(self, device_id: str) -> Sample:
+        """
+        Lee el slot de un dispositivo de forma consistente.
+
+        Raises:
+            KeyError: Si el dispositivo no está en la tabla
+            ValueError: Si el lector ya se cerró
+        """
+        offset = _slot_offset(self._index[device_id])
+        buf = self._buf
+        if buf is None:
+            raise ValueError("La tabla ya está cerrada")
+        retries = 0
+        while True:
+            seq = _SEQ.unpack_from(buf, offset)[0]
+            if not seq & 1:
+                weight, timestamp, flags = _PAYLOAD.unpack_from(buf, offset + _SEQ.size)
+                if _SEQ.unpack_from(buf, offset)[0] == seq:
+                    break
+            retries += 1
+            if retries % _SPIN_RETRIES == 0:
+                time.sleep(0)
+        if not flags & FLAG_HAS_WEIGHT:
+            return Sample(None, None, bool(flags & FLAG_CONNECTED), seq)
+        return Sample(weight, timestamp, bool(flags & FLAG_CONNECTED), seq)
+
+    def close(self) -> None:
+        self._buf = None
+        self._shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _buffer(shm: shared_memory.SharedMemory) -> memoryview:
+    """Buffer de un segmento abierto (buf es None solo tras close())."""
+    buf = shm.buf
+    if buf is None:
+        raise ValueError(f"Segmento '{shm.name}' cerrado")
+    return buf
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Abre un segmento existente sin registrarlo en el resource_tracker: el
+    lector no es dueño del segmento y no debe eliminarlo al terminar.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    # Solo en POSIX se registra el segmento, con la "/" inicial que shm.name
+    # omite. En el proceso del escritor el registro es suyo: no se quita
+    if os.name == "posix" and name not in _OWNED:
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(f"/{shm.name}", "shared_memory")
+    return shm
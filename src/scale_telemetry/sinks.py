@@ -0,0 +1,515 @@
+"""
+Salidas adicionales de las lecturas (InfluxDB, CSV, lotes MQTT).
+
+MQTT sigue siendo la salida por defecto (estado, respuestas, eventos y
+alarmas). Las salidas de este módulo reciben además cada lectura procesada
+y se declaran en el archivo SINKS_CONFIG_PATH:
+
+    [{"type": "influx", "url": "http://localhost:8086", "bucket": "pesanet",
+      "org": "planta", "token": "...", "batch_size": 500},
+     {"type": "csv", "path": "logs/readings.csv", "max_bytes": 10485760},
+     {"type": "mqtt", "flush_interval": 5}]
+
+Cada salida tiene su propio buffer acotado y su hilo de escritura por lotes:
+write() nunca bloquea ni hace I/O, de modo que una salida lenta o caída
+descarta lecturas según su política de desborde, pero no demora las
+lecturas ni las respuestas a comandos.
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Callable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Políticas de desborde del buffer
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST)
+
+
+class Reading(NamedTuple):
+    """Una lectura procesada (peso filtrado, en kg)."""
+    device_id: str
+    weight: float
+    # Instante de la lectura (time.time())
+    timestamp: float
+
+    @property
+    def timestamp_ms(self) -> int:
+        return int(self.timestamp * 1000)
+
+
+class Sink(ABC):
+    """
+    Salida por lotes con buffer propio. Las subclases implementan
+    write_batch(); si falla, el lote vuelve al frente del buffer y se
+    reintenta en el siguiente ciclo, salvo que el destino lo rechace de
+    forma definitiva (ver rejected()): ese lote se descarta para no
+    bloquear a los siguientes.
+    """
+
+    type = ""
+
+    def __init__(
+        self,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        buffer: int = 10000,
+        overflow: str = DROP_OLDEST,
+    ):
+        """
+        Inicializa la salida (el hilo de escritura se lanza con start()).
+
+        Args:
+            batch_size: Lecturas por escritura como máximo; un buffer con
+                batch_size lecturas se escribe sin esperar flush_interval
+            flush_interval: Segundos máximos que espera una lectura
+            buffer: Lecturas pendientes como máximo
+            overflow: Qué se descarta con el buffer lleno: la lectura más
+                vieja (drop_oldest) o la nueva (drop_newest)
+
+        Raises:
+            ValueError: Si los parámetros son inválidos
+        """
+        if batch_size < 1 or buffer < batch_size or flush_interval <= 0:
+            raise ValueError(
+                f"Parámetros de buffer inválidos: batch_size {batch_size}, "
+                f"buffer {buffer}, flush_interval {flush_interval}"
+            )
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Política de desborde no soportada: '{overflow}'. "
+                f"Políticas disponibles: {list(OVERFLOW_POLICIES)}"
+            )
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.capacity = buffer
+        self.overflow = overflow
+        self._buffer: deque[Reading] = deque()
+        self._lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.written = 0
+        self.dropped = 0
+        self.failures = 0
+
+    @property
+    def name(self) -> str:
+        return self.type
+
+    @property
+    def pending(self) -> int:
+        """Lecturas en el buffer."""
+        return len(self._buffer)
+
+    def write(self, reading: Reading) -> bool:
+        """
+        Encola una lectura sin bloquear.
+
+        Returns:
+            False si se descartó la lectura nueva por buffer lleno
+        """
+        with self._lock:
+            if len(self._buffer) >= self.capacity:
+                self.dropped += 1
+                if self.overflow == DROP_NEWEST:
+                    return False
+                self._buffer.popleft()
+            self._buffer.append(reading)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._flush_event.set()
+        return True
+
+    @abstractmethod
+    def write_batch(self, readings: list[Reading]) -> None:
+        """
+        Escribe un lote en el destino.
+
+        Raises:
+            OSError: Si el destino no está disponible (el lote se reintenta)
+        """
+
+    def rejected(self, error: Exception) -> bool:
+        """
+        Indica si un error de write_batch() es definitivo: reintentar el
+        mismo lote fallaría igual.
+        """
+        return False
+
+    def flush(self) -> int:
+        """
+        Escribe todo lo pendiente, en lotes de batch_size.
+
+        Returns:
+            Lecturas escritas
+
+        Raises:
+            OSError: Si el destino falla (el lote fallido queda pendiente);
+                un lote rechazado se descarta y se sigue con el resto
+        """
+        total = 0
+        while True:
+            with self._lock:
+                n = min(self.batch_size, len(self._buffer))
+                batch = [self._buffer.popleft() for _ in range(n)]
+            if not batch:
+                return total
+            try:
+                self.write_batch(batch)
+            except Exception as e:
+                if not self.rejected(e):
+                    self._requeue(batch)
+                    raise
+                self.failures += 1
+                self.dropped += len(batch)
+                logger.error(
+                    f"La salida {self.name} rechazó un lote de {len(batch)} "
+                    f"lecturas, se descarta: {e}"
+                )
+                continue
+            self.written += len(batch)
+            total += len(batch)
+
+    def _requeue(self, batch: list[Reading]) -> None:
+        """Devuelve un lote fallido al frente del buffer, sin exceder su capacidad."""
+        with self._lock:
+            room = self.capacity - len(self._buffer)
+            if room < len(batch):
+                # Las lecturas llegadas mientras tanto son más nuevas: se
+                # sacrifican las más viejas del lote
+                self.dropped += len(batch) - room
+                batch = batch[len(batch) - room:] if room > 0 else []
+            self._buffer.extendleft(reversed(batch))
+
+    def start(self) -> None:
+        """Lanza el hilo de escritura."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, daemon=True, name=f"sink-{self.name}"
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Detiene el hilo y escribe lo pendiente. Si el hilo sigue dentro de
+        write_batch() al vencer la espera, lo pendiente no se escribe: dos
+        escrituras a la vez sobre el mismo destino no son seguras.
+        """
+        self._running = False
+        self._flush_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval * 2)
+            if self._thread.is_alive():
+                logger.warning(
+                    f"La salida {self.name} no terminó de escribir; "
+                    f"{self.pending} lecturas pendientes sin escribir"
+                )
+                return
+        self._safe_flush()
+
+    def _run(self) -> None:
+        while self._running:
+            self._flush_event.wait(self.flush_interval)
+            self._flush_event.clear()
+            if not self._safe_flush() and self._running:
+                # Destino caído: se espera un intervalo completo antes de reintentar
+                time.sleep(self.flush_interval)
+
+    def _safe_flush(self) -> bool:
+        try:
+            self.flush()
+            return True
+        except Exception as e:
+            self.failures += 1
+            logger.error(
+                f"Error al escribir en la salida {self.name} "
+                f"({self.pending} lecturas pendientes): {e}"
+            )
+            return False
+
+    def stats(self) -> dict:
+        """Contadores de la salida, para inspección."""
+        return {
+            "pending": self.pending,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failures": self.failures,
+        }
+
+
+def _escape_tag(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(",", "\\,").replace(
+        "=", "\\="
+    ).replace(" ", "\\ ")
+
+
+class InfluxSink(Sink):
+    """
+    Line protocol de InfluxDB, con precisión de milisegundos:
+
+        weight,device=scale-1 value=45.3 1698765433000
+
+    Con url se escribe por HTTP en /api/v2/write (InfluxDB 2.x o 1.8+ con
+    la API de compatibilidad); con path, se agrega a un archivo local
+    (p. ej. para Telegraf con inputs.tail).
+    """
+
+    type = "influx"
+
+    def __init__(
+        self,
+        url: str = "",
+        path: str = "",
+        bucket: str = "",
+        org: str = "",
+        token: str = "",
+        measurement: str = "weight",
+        timeout: float = 5.0,
+        **kwargs,
+    ):
+        """
+        Args:
+            url: URL base del servidor InfluxDB
+            path: Archivo local (si no hay url)
+            bucket: Bucket (o "base/política" en InfluxDB 1.8)
+            org: Organización
+            token: Token de la API
+            measurement: Nombre de la medición
+            timeout: Timeout de cada petición HTTP (seg)
+            **kwargs: Parámetros de buffer, ver Sink
+        """
+        super().__init__(**kwargs)
+        if bool(url) == bool(path):
+            raise ValueError("La salida influx necesita 'url' o 'path' (uno de los dos)")
+        self.path = path
+        self.timeout = timeout
+        self.measurement = _escape_tag(measurement)
+        self._write_url = None
+        if url:
+            query = urllib.parse.urlencode(
+                {"bucket": bucket, "org": org, "precision": "ms"}
+            )
+            self._write_url = f"{url.rstrip('/')}/api/v2/write?{query}"
+        self._headers = {"Content-Type": "text/plain; charset=utf-8"}
+        if token:
+            self._headers["Authorization"] = f"Token {token}"
+
+    def format(self, readings: list[Reading]) -> str:
+        """Lote en line protocol (una línea por lectura)."""
+        return "".join(
+            f"{self.measurement},device={_escape_tag(r.device_id)} "
+            f"value={float(r.weight)!r} {r.timestamp_ms}\n"
+            for r in readings
+        )
+
+    def write_batch(self, readings: list[Reading]) -> None:
+        body = self.format(readings).encode("utf-8")
+        if self._write_url is None:
+            _append(self.path, body)
+            return
+        request = urllib.request.Request(
+            self._write_url, data=body, headers=self._headers, method="POST"
+        )
+        # Los errores HTTP y de red son OSError (HTTPError, URLError)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def rejected(self, error: Exception) -> bool:
+        # 4xx: datos o credenciales inválidos; 408 y 429 son transitorios
+        return (
+            isinstance(error, urllib.error.HTTPError)
+            and 400 <= error.code < 500
+            and error.code not in (408, 429)
+        )
+
+
+class CSVSink(Sink):
+    """
+    Archivo CSV de solo agregado (timestamp en ms, device_id, weight), con
+    rotación por tamaño como logging.RotatingFileHandler: readings.csv →
+    readings.csv.1 → ... → readings.csv.<backups>.
+    """
+
+    type = "csv"
+    HEADER = ("timestamp", "device_id", "weight")
+
+    def __init__(
+        self,
+        path: str = "readings.csv",
+        max_bytes: int = 10 * 1024 * 1024,
+        backups: int = 5,
+        **kwargs,
+    ):
+        """
+        Args:
+            path: Archivo CSV
+            max_bytes: Tamaño a partir del cual se rota (0 = sin rotación)
+            backups: Archivos rotados que se conservan
+            **kwargs: Parámetros de buffer, ver Sink
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def write_batch(self, readings: list[Reading]) -> None:
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        for r in readings:
+            writer.writerow((r.timestamp_ms, r.device_id, r.weight))
+        rows = out.getvalue().encode("utf-8")
+
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size and self.max_bytes and size + len(rows) > self.max_bytes:
+            self._rotate()
+            size = 0
+        if size == 0:
+            rows = (",".join(self.HEADER) + "\n").encode("utf-8") + rows
+        _append(self.path, rows)
+
+    def _rotate(self) -> None:
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+class MQTTSink(Sink):
+    """
+    Lotes de lecturas publicados como un único mensaje JSON:
+
+        {"readings": [{"deviceId": "scale-1", "weight": 45.3,
+                       "timestamp": 1698765433000}, ...]}
+    """
+
+    type = "mqtt"
+
+    def __init__(
+        self,
+        publish: Callable[[str, str], bool],
+        topic: str = "",
+        **kwargs,
+    ):
+        """
+        Args:
+            publish: Función (tópico, payload) que publica el lote; retorna
+                False si no pudo encolarlo
+            topic: Tópico de los lotes ("" = tópico de lecturas del gateway)
+            **kwargs: Parámetros de buffer, ver Sink
+        """
+        super().__init__(**kwargs)
+        if publish is None:
+            raise ValueError("La salida mqtt necesita el cliente MQTT")
+        self._publish = publish
+        self.topic = topic
+
+    def write_batch(self, readings: list[Reading]) -> None:
+        payload = json.dumps({
+            "readings": [
+                {"deviceId": r.device_id, "weight": r.weight, "timestamp": r.timestamp_ms}
+                for r in readings
+            ]
+        })
+        if not self._publish(self.topic, payload):
+            # Cola de publicación llena: el lote queda pendiente y se reintenta
+            raise OSError("La cola de publicación MQTT no aceptó el lote")
+
+
+def _append(path: str, data: bytes) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+SINK_TYPES = {
+    "influx": InfluxSink,
+    "csv": CSVSink,
+    "mqtt": MQTTSink,
+}
+
+
+class OutputSinks:
+    """Reparte cada lectura procesada entre las salidas configuradas."""
+
+    def __init__(self, sinks: list[Sink]):
+        self.sinks = sinks
+
+    @classmethod
+    def from_config(
+        cls,
+        specs: list[dict[str, Any]],
+        mqtt_publish: Optional[Callable[[str, str], None]] = None,
+    ) -> "OutputSinks":
+        """
+        Construye las salidas desde SINKS_CONFIG_PATH.
+
+        Args:
+            specs: [{"type": "csv", "path": "...", "batch_size": 100}, ...]
+            mqtt_publish: Función (tópico, payload) para las salidas mqtt
+
+        Raises:
+            ValueError: Si una salida o sus parámetros no son válidos
+        """
+        sinks = []
+        for spec in specs:
+            params = dict(spec)
+            sink_type = params.pop("type", None)
+            sink_class = SINK_TYPES.get(sink_type)
+            if sink_class is None:
+                raise ValueError(
+                    f"Salida no soportada: '{sink_type}'. "
+                    f"Salidas disponibles: {list(SINK_TYPES.keys())}"
+                )
+            if sink_class is MQTTSink:
+                params["publish"] = mqtt_publish
+            try:
+                sinks.append(sink_class(**params))
+            except TypeError as e:
+                raise ValueError(
+                    f"Parámetros inválidos para la salida '{sink_type}': {e}"
+                ) from e
+        return cls(sinks)
+
+    def write(self, device_id: str, weight: float, timestamp: Optional[float] = None) -> None:
+        """Encola una lectura en todas las salidas (nunca bloquea)."""
+        reading = Reading(device_id, weight, time.time() if timestamp is None else timestamp)
+        for sink in self.sinks:
+            sink.write(reading)
+
+    def start(self) -> None:
+        for sink in self.sinks:
+            sink.start()
+        logger.info(f"Salidas adicionales: {[s.name for s in self.sinks]}")
+
+    def stop(self) -> None:
+        for sink in self.sinks:
+            sink.stop()
+
+    def stats(self) -> dict:
+        """Contadores por salida (si hay dos del mismo tipo, se numeran)."""
+        stats = {}
+        for i, sink in enumerate(self.sinks):
+            key = sink.name if sink.name not in stats else f"{sink.name}-{i}"
+            stats[key] = sink.stats()
+        return stats
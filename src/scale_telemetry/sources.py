@@ -0,0 +1,31 @@
+"""Interfaz común de los orígenes de peso (serial ASCII, Modbus...)."""
+
+from typing import Optional, Protocol, runtime_checkable
+
+
+@runtime_checkable
+class WeightSource(Protocol):
+    """
+    Origen de peso de un dispositivo.
+
+    El servicio solo usa esta interfaz: ScaleReader, HubReader, BusReader,
+    ModbusReader y FakeSource la implementan. connect/read_weight lanzan
+    serial.SerialException cuando falla el enlace (el servicio reconecta) y
+    ValueError cuando el dispositivo responde algo inválido.
+    """
+
+    def connect(self) -> None:
+        """Abre el enlace con el dispositivo."""
+        ...
+
+    def disconnect(self) -> None:
+        """Cierra el enlace con el dispositivo."""
+        ...
+
+    def read_weight(self) -> float:
+        """Lee el peso actual en kilogramos."""
+        ...
+
+    def execute_command(self, command: str, read_weight: bool = False) -> Optional[float]:
+        """Ejecuta un comando configurado y opcionalmente lee el peso después."""
+        ...
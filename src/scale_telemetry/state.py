@@ -0,0 +1,113 @@
+"""Estado retenido por dispositivo (.../state) con report-by-exception."""
+
+import threading
+import time
+from typing import Callable, Optional
+
+
+class _DeviceState:
+    __slots__ = ("connected", "weight", "timestamp", "published")
+
+    def __init__(self):
+        self.connected = False
+        self.weight: Optional[float] = None
+        self.timestamp: Optional[int] = None
+        # Último (connected, peso) publicado; None si aún no se publicó
+        self.published: Optional[tuple[bool, Optional[float]]] = None
+
+
+class DeviceStateTracker:
+    """
+    Mantiene el último peso válido y el estado de conexión de cada báscula.
+
+    Solo publica cuando cambia la conexión o cuando el peso se mueve más que
+    el deadband del dispositivo respecto del último valor publicado, de modo
+    que una báscula estable no genera tráfico. Los mensajes se publican
+    retenidos, así un cliente nuevo recibe el estado al suscribirse sin
+    provocar lecturas seriales.
+    """
+
+    def __init__(self, publish: Callable[[str, dict], None]):
+        """
+        Inicializa el tracker.
+
+        Args:
+            publish: Función (device_id, estado) que publica el estado retenido
+        """
+        self._publish = publish
+        self._states: dict[str, _DeviceState] = {}
+        self._deadbands: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def configure_device(self, device_id: str, deadband: float = 0.0) -> None:
+        """
+        Configura el deadband de un dispositivo.
+
+        Args:
+            device_id: ID del dispositivo
+            deadband: Variación mínima del peso (kg) que se reporta
+        """
+        self._deadbands[device_id] = deadband
+
+    def update_weight(self, device_id: str, weight: float) -> None:
+        """Registra una lectura válida y la publica si supera el deadband."""
+        with self._lock:
+            state = self._state(device_id)
+            state.connected = True
+            state.weight = round(weight, 1)
+            state.timestamp = int(time.time() * 1000)
+            message = self._changed(device_id, state)
+        if message is not None:
+            self._publish(device_id, message)
+
+    def update_connection(self, device_id: str, connected: bool) -> None:
+        """Registra el estado de conexión y lo publica si cambió."""
+        with self._lock:
+            state = self._state(device_id)
+            state.connected = connected
+            message = self._changed(device_id, state)
+        if message is not None:
+            self._publish(device_id, message)
+
+    def republish(self) -> None:
+        """Publica el estado de todos los dispositivos (p. ej. al reconectar MQTT)."""
+        with self._lock:
+            messages = []
+            for device_id, state in self._states.items():
+                state.published = (state.connected, state.weight)
+                messages.append((device_id, self._message(device_id, state)))
+        for device_id, message in messages:
+            self._publish(device_id, message)
+
+    def _state(self, device_id: str) -> _DeviceState:
+        state = self._states.get(device_id)
+        if state is None:
+            state = self._states[device_id] = _DeviceState()
+        return state
+
+    def _changed(self, device_id: str, state: _DeviceState) -> Optional[dict]:
+        """Retorna el mensaje a publicar si hay un cambio reportable (bajo el lock)."""
+        published = state.published
+        if published is not None:
+            connected, weight = published
+            if connected == state.connected and (
+                weight == state.weight
+                or (
+                    weight is not None
+                    and state.weight is not None
+                    and abs(state.weight - weight) <= self._deadbands.get(device_id, 0.0)
+                )
+            ):
+                return None
+        state.published = (state.connected, state.weight)
+        return self._message(device_id, state)
+
+    @staticmethod
+    def _message(device_id: str, state: _DeviceState) -> dict:
+        return {
+            "deviceId": device_id,
+            "connected": state.connected,
+            "weight": state.weight,
+            "timestamp": state.timestamp,
+            "updated": int(time.time() * 1000),
+        }
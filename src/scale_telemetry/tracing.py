@@ -0,0 +1,340 @@
+"""
+Trazas del ciclo de vida de los comandos (spans con tiempos monotónicos).
+
+Un comando muestreado genera un span raíz (recepción → respuesta) con spans
+hijos para la espera en el pool, la lectura (y cada intento serial) y la
+publicación. Los spans terminados se guardan en un ring preasignado y un
+hilo los exporta por lotes a un archivo JSON lines con el formato OTLP/JSON
+de OpenTelemetry (un ExportTraceServiceRequest por línea), que el collector
+de OpenTelemetry puede leer con su receiver de archivos.
+
+El código instrumentado usa span(nombre): crea un hijo del span activo del
+hilo, o no hace nada si el comando no fue muestreado.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Tipos de span OTLP
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+
+_STATUS_OK = {"code": 1}
+
+_local = threading.local()
+
+
+class Span:
+    """Un tramo de tiempo de un comando."""
+
+    __slots__ = (
+        "tracer", "name", "trace_id", "span_id", "parent_id", "kind",
+        "start_ns", "end_ns", "attributes", "error",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: str,
+        parent_id: str = "",
+        kind: int = KIND_INTERNAL,
+        start_ns: Optional[int] = None,
+        attributes: Optional[dict[str, Any]] = None,
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _random_id(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.monotonic_ns() if start_ns is None else start_ns
+        self.end_ns = 0
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    def child(self, name: str, **attributes) -> "Span":
+        """Crea un span hijo que empieza ahora."""
+        return Span(self.tracer, name, self.trace_id, self.span_id, attributes=attributes)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.error = message
+
+    def end(self) -> None:
+        """Termina el span y lo entrega al ring del tracer (una sola vez)."""
+        if self.end_ns:
+            return
+        self.end_ns = time.monotonic_ns()
+        self.tracer._record(self)
+
+
+class _NoopSpan:
+    """Span de un comando no muestreado: todas las operaciones son no-op."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, message: str) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+def current_span() -> Optional[Span]:
+    """Span activo en el hilo actual, o None."""
+    return getattr(_local, "span", None)
+
+
+@contextmanager
+def activate(span: Optional[Span]):
+    """Hace de span el span activo del hilo mientras dura el bloque."""
+    previous = getattr(_local, "span", None)
+    _local.span = span
+    try:
+        yield span
+    finally:
+        _local.span = previous
+
+
+def span(name: str, **attributes):
+    """
+    Span hijo del span activo, como context manager que además lo activa:
+
+        with tracing.span("read_attempt", attempt=2):
+            ...
+
+    Sin span activo retorna un span no-op (costo de una consulta thread-local).
+    """
+    parent = getattr(_local, "span", None)
+    if parent is None:
+        return _NOOP
+    return _ActiveSpan(parent.child(name, **attributes))
+
+
+class _ActiveSpan:
+    """Context manager que activa un span en el hilo y lo termina al salir."""
+
+    __slots__ = ("span", "previous")
+
+    def __init__(self, span: Span):
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.previous = getattr(_local, "span", None)
+        _local.span = self.span
+        return self.span
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _local.span = self.previous
+        if exc_val is not None and self.span.error is None:
+            self.span.error = str(exc_val)
+        self.span.end()
+
+
+def set_error(message: str) -> None:
+    """Marca con error el span activo del hilo (si hay)."""
+    active = getattr(_local, "span", None)
+    if active is not None:
+        active.error = message
+
+
+class Tracer:
+    """
+    Muestrea comandos, acumula los spans terminados en un ring preasignado y
+    los exporta por lotes desde un hilo propio.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: float = 0.01,
+        capacity: int = 4096,
+        flush_interval: float = 1.0,
+        service_name: str = "scale-telemetry",
+    ):
+        """
+        Inicializa el tracer (el exportador se lanza con start()).
+
+        Args:
+            path: Archivo JSON lines donde se exportan los spans
+            sample_rate: Fracción de comandos trazados (0-1)
+            capacity: Spans que entran en el ring; si el exportador no da
+                abasto, se descartan los más viejos
+            flush_interval: Segundos entre exportaciones
+            service_name: service.name del recurso OTLP
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self.flush_interval = flush_interval
+        self.service_name = service_name
+        self._ring: list[Optional[Span]] = [None] * capacity
+        self._head = 0
+        self._count = 0
+        self._lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        # Conversión de time.monotonic_ns() a tiempo Unix para la exportación
+        self._epoch_offset = time.time_ns() - time.monotonic_ns()
+        self.exported = 0
+        self.dropped = 0
+
+    def start_trace(
+        self, name: str, start_ns: Optional[int] = None, **attributes
+    ) -> Optional[Span]:
+        """
+        Decide el muestreo y crea el span raíz de un comando.
+
+        Args:
+            name: Nombre del span (p. ej. el comando)
+            start_ns: Inicio (time.monotonic_ns()); por defecto, ahora
+
+        Returns:
+            El span raíz, o None si el comando no se muestrea
+        """
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        return Span(
+            self, name, _random_id(16), kind=KIND_SERVER,
+            start_ns=start_ns, attributes=attributes,
+        )
+
+    def _record(self, span: Span) -> None:
+        with self._lock:
+            capacity = len(self._ring)
+            if self._count == capacity:
+                self.dropped += 1
+            else:
+                self._count += 1
+            self._ring[self._head] = span
+            self._head = (self._head + 1) % capacity
+            full = self._count >= capacity // 2
+        if full:
+            self._flush_event.set()
+
+    def _take(self) -> list[Span]:
+        """Vacía el ring y retorna los spans en orden de finalización."""
+        with self._lock:
+            capacity = len(self._ring)
+            start = (self._head - self._count) % capacity
+            spans = [
+                span for i in range(self._count)
+                if (span := self._ring[(start + i) % capacity]) is not None
+            ]
+            for i in range(self._count):
+                self._ring[(start + i) % capacity] = None
+            self._count = 0
+        return spans
+
+    def flush(self) -> int:
+        """Exporta los spans acumulados. Retorna la cantidad exportada."""
+        spans = self._take()
+        if not spans:
+            return 0
+        line = json.dumps(self._export_request(spans), separators=(",", ":"))
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        self.exported += len(spans)
+        return len(spans)
+
+    def _export_request(self, spans: list[Span]) -> dict:
+        return {
+            "resourceSpans": [{
+                "resource": {
+                    "attributes": [_attribute("service.name", self.service_name)]
+                },
+                "scopeSpans": [{
+                    "scope": {"name": "scale_telemetry"},
+                    "spans": [self._span_json(s) for s in spans],
+                }],
+            }]
+        }
+
+    def _span_json(self, span: Span) -> dict:
+        data = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start_ns + self._epoch_offset),
+            "endTimeUnixNano": str(span.end_ns + self._epoch_offset),
+            "attributes": [_attribute(k, v) for k, v in span.attributes.items()],
+            "status": (
+                {"code": 2, "message": span.error} if span.error else _STATUS_OK
+            ),
+        }
+        if span.parent_id:
+            data["parentSpanId"] = span.parent_id
+        return data
+
+    def start(self) -> None:
+        """Lanza el hilo exportador."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, daemon=True, name="trace-exporter"
+        )
+        self._thread.start()
+        logger.info(
+            f"Trazas habilitadas ({self.sample_rate:.2%} de los comandos) en {self.path}"
+        )
+
+    def stop(self) -> None:
+        """Detiene el exportador y exporta lo pendiente."""
+        self._running = False
+        self._flush_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval * 2)
+        self._safe_flush()
+
+    def _run(self) -> None:
+        while self._running:
+            self._flush_event.wait(self.flush_interval)
+            self._flush_event.clear()
+            self._safe_flush()
+
+    def _safe_flush(self) -> None:
+        try:
+            self.flush()
+        except OSError as e:
+            logger.error(f"Error al exportar trazas a {self.path}: {e}")
+
+
+def _attribute(key: str, value: Any) -> dict:
+    """Atributo OTLP con el tipo de valor correspondiente."""
+    typed: dict[str, Any]
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def _random_id(n_bytes: int) -> str:
+    return random.getrandbits(n_bytes * 8).to_bytes(n_bytes, "big").hex()
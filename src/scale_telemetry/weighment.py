@@ -0,0 +1,126 @@
+"""Detección de pesajes (carga → estable → descarga) sobre el flujo de muestras."""
+
+import threading
+import time
+from typing import Optional
+
+from .config import WeighmentConfig
+
+EMPTY = "empty"
+LOADING = "loading"
+STABLE = "stable"
+UNLOADING = "unloading"
+
+
+class WeighmentDetector:
+    """
+    Máquina de estados de una báscula: empty → loading → stable → unloading
+    → empty. Al volver a vacío emite un único evento "weighment" con el
+    mayor peso estable de la transacción, su duración y la cantidad de
+    muestras. Una carga que nunca se estabilizó no genera evento.
+
+    La estabilidad se evalúa sobre una ventana circular preasignada de
+    stable_samples muestras: cada muestra cuesta O(stable_samples), sin
+    asignaciones. Es seguro alimentarlo desde varios hilos (lecturas
+    periódicas y comandos).
+    """
+
+    def __init__(self, device_id: str, config: WeighmentConfig):
+        """
+        Inicializa el detector.
+
+        Args:
+            device_id: ID del dispositivo (se incluye en el evento)
+            config: Umbral de carga y criterio de estabilidad
+        """
+        if config.stable_samples < 2:
+            raise ValueError(
+                f"stable_samples debe ser al menos 2: {config.stable_samples}"
+            )
+        self.device_id = device_id
+        self.config = config
+        self.state = EMPTY
+        self._window = [0.0] * config.stable_samples
+        self._filled = 0
+        self._pos = 0
+        self._started: Optional[float] = None
+        self._samples = 0
+        self._peak: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def update(self, weight: float, timestamp: Optional[float] = None) -> Optional[dict]:
+        """
+        Procesa una muestra.
+
+        Args:
+            weight: Peso en kilogramos
+            timestamp: Instante de la muestra (time.time(); por defecto, ahora)
+
+        Returns:
+            El evento de pesaje si la muestra cerró una transacción, o None
+        """
+        now = time.time() if timestamp is None else timestamp
+        with self._lock:
+            return self._update(weight, now)
+
+    def _update(self, weight: float, now: float) -> Optional[dict]:
+        loaded = weight >= self.config.threshold
+
+        if self.state == EMPTY:
+            if not loaded:
+                return None
+            self.state = LOADING
+            self._started = now
+            self._samples = 0
+            self._peak = None
+            self._filled = 0
+
+        if not loaded:
+            return self._finish(now)
+
+        self._samples += 1
+        self._push(weight)
+        stable = self._is_stable()
+        if stable:
+            mean = self._mean()
+            if self._peak is None or mean > self._peak:
+                self._peak = mean
+            self.state = STABLE
+        elif self.state == STABLE and self._peak is not None:
+            # Deja de estar estable: si baja del peso estable, se está descargando
+            self.state = (
+                UNLOADING
+                if weight < self._peak - self.config.stable_range
+                else LOADING
+            )
+        return None
+
+    def _finish(self, now: float) -> Optional[dict]:
+        peak, started, samples = self._peak, self._started, self._samples
+        self.state = EMPTY
+        self._started = None
+        if peak is None or started is None:
+            return None
+        return {
+            "deviceId": self.device_id,
+            "event": "weighment",
+            "weight": round(peak, 1),
+            "duration": round(now - started, 3),
+            "samples": samples,
+            "start": int(started * 1000),
+            "end": int(now * 1000),
+        }
+
+    def _push(self, weight: float) -> None:
+        self._window[self._pos] = weight
+        self._pos = (self._pos + 1) % len(self._window)
+        if self._filled < len(self._window):
+            self._filled += 1
+
+    def _is_stable(self) -> bool:
+        if self._filled < len(self._window):
+            return False
+        return max(self._window) - min(self._window) <= self.config.stable_range
+
+    def _mean(self) -> float:
+        return sum(self._window) / len(self._window)
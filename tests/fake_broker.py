@@ -0,0 +1,422 @@
+"""
+Broker MQTT 3.1.1 mínimo en proceso para tests end-to-end y benchmarks.
+
+Acepta conexiones MQTT sobre TCP o sobre WebSocket (como las que abre
+ScaleMQTTClient con transport="websockets"), y soporta lo que usa el
+servicio: CONNECT/CONNACK, SUBSCRIBE con comodines + y #, PUBLISH QoS 0/1,
+mensajes retenidos, last-will, PINGREQ y DISCONNECT. No persiste sesiones
+ni reintenta entregas QoS 1.
+"""
+
+import base64
+import hashlib
+import socket
+import struct
+import threading
+from typing import Callable, Optional
+
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+CONNECT = 1
+CONNACK = 2
+PUBLISH = 3
+PUBACK = 4
+SUBSCRIBE = 8
+SUBACK = 9
+UNSUBSCRIBE = 10
+UNSUBACK = 11
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    """Indica si un tópico coincide con un filtro MQTT (+ y #)."""
+    filter_parts = topic_filter.split("/")
+    topic_parts = topic.split("/")
+    for i, part in enumerate(filter_parts):
+        if part == "#":
+            return True
+        if i >= len(topic_parts) or (part != "+" and part != topic_parts[i]):
+            return False
+    return len(filter_parts) == len(topic_parts)
+
+
+def _encode_length(length: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte, length = length % 128, length // 128
+        out.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(out)
+
+
+def _encode_str(value: bytes) -> bytes:
+    return struct.pack(">H", len(value)) + value
+
+
+def _packet(packet_type: int, flags: int, body: bytes) -> bytes:
+    return bytes([packet_type << 4 | flags]) + _encode_length(len(body)) + body
+
+
+def _publish_packet(topic: str, payload: bytes, qos: int, retain: bool, packet_id: int) -> bytes:
+    body = _encode_str(topic.encode())
+    if qos:
+        body += struct.pack(">H", packet_id)
+    return _packet(PUBLISH, qos << 1 | int(retain), body + payload)
+
+
+class _Stream:
+    """Flujo de bytes MQTT sobre un socket, desenvolviendo frames WebSocket."""
+
+    def __init__(self, sock: socket.socket, initial: bytes):
+        self.sock = sock
+        self.websocket = False
+        self._buf = bytearray(initial)
+        self._raw = bytearray()
+
+    def _recv(self) -> bytes:
+        data = self.sock.recv(65536)
+        if not data:
+            raise ConnectionError("Conexión cerrada")
+        return data
+
+    def handshake(self) -> None:
+        """Completa el upgrade HTTP -> WebSocket si la conexión lo pide."""
+        if not self._buf.startswith(b"GET"):
+            return
+        while b"\r\n\r\n" not in self._buf:
+            self._buf += self._recv()
+        request, _, rest = bytes(self._buf).partition(b"\r\n\r\n")
+        headers = {}
+        for line in request.split(b"\r\n")[1:]:
+            name, _, value = line.partition(b":")
+            headers[name.strip().lower()] = value.strip()
+        accept = base64.b64encode(
+            hashlib.sha1(headers[b"sec-websocket-key"] + _WS_GUID).digest()
+        )
+        response = (
+            b"HTTP/1.1 101 Switching Protocols\r\n"
+            b"Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept + b"\r\n"
+        )
+        if b"sec-websocket-protocol" in headers:
+            response += b"Sec-WebSocket-Protocol: mqtt\r\n"
+        self.sock.sendall(response + b"\r\n")
+        self.websocket = True
+        self._raw = bytearray(rest)
+        self._buf = bytearray()
+
+    def _fill(self) -> None:
+        if not self.websocket:
+            self._buf += self._recv()
+            return
+        while True:
+            frame = self._ws_frame()
+            if frame is not None:
+                self._buf += frame
+                return
+
+    def _ws_frame(self) -> Optional[bytes]:
+        """Lee un frame WebSocket; retorna su payload de datos o None (control)."""
+        while len(self._raw) < 2:
+            self._raw += self._recv()
+        opcode = self._raw[0] & 0x0F
+        masked = self._raw[1] & 0x80
+        length = self._raw[1] & 0x7F
+        offset = 2
+        if length == 126:
+            offset = 4
+        elif length == 127:
+            offset = 10
+        while len(self._raw) < offset + (4 if masked else 0):
+            self._raw += self._recv()
+        if length == 126:
+            length = struct.unpack(">H", self._raw[2:4])[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self._raw[2:10])[0]
+        mask = self._raw[offset:offset + 4] if masked else None
+        offset += 4 if masked else 0
+        while len(self._raw) < offset + length:
+            self._raw += self._recv()
+        payload = bytearray(self._raw[offset:offset + length])
+        del self._raw[:offset + length]
+        if mask:
+            for i in range(length):
+                payload[i] ^= mask[i % 4]
+        if opcode == 0x8:
+            raise ConnectionError("WebSocket cerrado por el cliente")
+        if opcode == 0x9:
+            self.sock.sendall(self.frame(bytes(payload), opcode=0xA))
+            return None
+        if opcode == 0xA:
+            return None
+        return bytes(payload)
+
+    def frame(self, data: bytes, opcode: int = 0x2) -> bytes:
+        """Envuelve datos salientes en un frame WebSocket (sin máscara)."""
+        if not self.websocket and opcode == 0x2:
+            return data
+        length = len(data)
+        if length < 126:
+            header = bytes([0x80 | opcode, length])
+        elif length < 65536:
+            header = bytes([0x80 | opcode, 126]) + struct.pack(">H", length)
+        else:
+            header = bytes([0x80 | opcode, 127]) + struct.pack(">Q", length)
+        return header + data
+
+    def read(self, size: int) -> bytes:
+        while len(self._buf) < size:
+            self._fill()
+        data = bytes(self._buf[:size])
+        del self._buf[:size]
+        return data
+
+    def read_packet(self) -> tuple[int, int, bytes]:
+        """Lee un paquete MQTT: (tipo, flags, cuerpo)."""
+        first = self.read(1)[0]
+        length, multiplier = 0, 1
+        while True:
+            byte = self.read(1)[0]
+            length += (byte & 0x7F) * multiplier
+            multiplier *= 128
+            if not byte & 0x80:
+                break
+        return first >> 4, first & 0x0F, self.read(length)
+
+
+class _Session:
+    """Conexión de un cliente con el broker."""
+
+    def __init__(self, broker: "FakeBroker", sock: socket.socket):
+        self.broker = broker
+        self.sock = sock
+        self.stream: Optional[_Stream] = None
+        self.client_id = ""
+        self.subscriptions: dict[str, int] = {}
+        self.will: Optional[tuple[str, bytes, int, bool]] = None
+        self._send_lock = threading.Lock()
+        self._packet_id = 0
+
+    def send(self, packet: bytes) -> None:
+        with self._send_lock:
+            self.sock.sendall(self.stream.frame(packet))
+
+    def deliver(self, topic: str, payload: bytes, qos: int, retain: bool) -> None:
+        with self._send_lock:
+            self._packet_id = self._packet_id % 0xFFFF + 1
+            packet = _publish_packet(topic, payload, qos, retain, self._packet_id)
+            self.sock.sendall(self.stream.frame(packet))
+
+    def run(self) -> None:
+        graceful = False
+        try:
+            self.stream = _Stream(self.sock, self.sock.recv(65536))
+            self.stream.handshake()
+            while True:
+                packet_type, flags, body = self.stream.read_packet()
+                if packet_type == DISCONNECT:
+                    graceful = True
+                    return
+                self._handle(packet_type, flags, body)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.broker._remove(self, graceful)
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+
+    def _handle(self, packet_type: int, flags: int, body: bytes) -> None:
+        if packet_type == CONNECT:
+            self._on_connect(body)
+        elif packet_type == PUBLISH:
+            qos = (flags >> 1) & 0x3
+            topic_len = struct.unpack(">H", body[:2])[0]
+            topic = body[2:2 + topic_len].decode()
+            offset = 2 + topic_len
+            if qos:
+                packet_id = body[offset:offset + 2]
+                offset += 2
+                self.send(_packet(PUBACK, 0, packet_id))
+            self.broker.publish(topic, body[offset:], qos, bool(flags & 0x1))
+        elif packet_type == SUBSCRIBE:
+            packet_id, offset, granted = body[:2], 2, bytearray()
+            filters = []
+            while offset < len(body):
+                length = struct.unpack(">H", body[offset:offset + 2])[0]
+                topic_filter = body[offset + 2:offset + 2 + length].decode()
+                qos = min(body[offset + 2 + length], 1)
+                offset += 3 + length
+                filters.append(topic_filter)
+                granted.append(qos)
+                with self.broker._lock:
+                    self.subscriptions[topic_filter] = qos
+                    self.broker._changed.notify_all()
+            self.send(_packet(SUBACK, 0, packet_id + bytes(granted)))
+            for topic_filter in filters:
+                self.broker._send_retained(self, topic_filter)
+        elif packet_type == UNSUBSCRIBE:
+            offset = 2
+            while offset < len(body):
+                length = struct.unpack(">H", body[offset:offset + 2])[0]
+                self.subscriptions.pop(body[offset + 2:offset + 2 + length].decode(), None)
+                offset += 2 + length
+            self.send(_packet(UNSUBACK, 0, body[:2]))
+        elif packet_type == PINGREQ:
+            self.send(_packet(PINGRESP, 0, b""))
+        # PUBACK de los clientes: no hay reintentos que cancelar
+
+    def _on_connect(self, body: bytes) -> None:
+        offset = 2 + struct.unpack(">H", body[:2])[0]  # Nombre del protocolo
+        connect_flags = body[offset + 1]
+        offset += 4  # Nivel, flags y keepalive
+
+        def field() -> bytes:
+            nonlocal offset
+            length = struct.unpack(">H", body[offset:offset + 2])[0]
+            value = body[offset + 2:offset + 2 + length]
+            offset += 2 + length
+            return value
+
+        self.client_id = field().decode()
+        if connect_flags & 0x04:
+            topic = field().decode()
+            message = field()
+            self.will = (
+                topic, message, (connect_flags >> 3) & 0x3, bool(connect_flags & 0x20)
+            )
+        self.send(_packet(CONNACK, 0, b"\x00\x00"))
+        self.broker._add(self)
+
+
+class FakeBroker:
+    """
+    Broker en proceso: un hilo de escucha y un hilo por cliente.
+
+    Además de atender clientes reales (paho), permite publicar y suscribirse
+    desde el mismo proceso sin socket (publish/subscribe), lo que evita un
+    segundo cliente en tests y benchmarks.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = socket.create_server((host, port))
+        self.host, self.port = self._server.getsockname()[:2]
+        self._sessions: list[_Session] = []
+        self._local: list[tuple[str, Callable[[str, bytes, bool], None]]] = []
+        self.retained: dict[str, tuple[bytes, int]] = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "FakeBroker":
+        self._thread = threading.Thread(
+            target=self._accept, daemon=True, name="fake-broker"
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        try:
+            # Despierta el accept() bloqueado antes de cerrar
+            self._server.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._server.close()
+        with self._lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            try:
+                session.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def __enter__(self) -> "FakeBroker":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    @property
+    def clients(self) -> list[str]:
+        with self._lock:
+            return [s.client_id for s in self._sessions]
+
+    def wait_for_client(self, timeout: float = 5.0) -> bool:
+        """Espera a que al menos un cliente complete CONNECT."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self._sessions, timeout)
+
+    def wait_for_subscription(self, topic_filter: str, timeout: float = 5.0) -> bool:
+        """Espera a que algún cliente se suscriba exactamente a topic_filter."""
+        with self._changed:
+            return self._changed.wait_for(
+                lambda: any(topic_filter in s.subscriptions for s in self._sessions),
+                timeout,
+            )
+
+    def subscribe(self, topic_filter: str, callback: Callable[[str, bytes, bool], None]) -> None:
+        """Suscripción local: callback(topic, payload, retain) en el hilo del emisor."""
+        with self._lock:
+            self._local.append((topic_filter, callback))
+            retained = [
+                (t, p) for t, (p, _) in self.retained.items()
+                if topic_matches(topic_filter, t)
+            ]
+        for topic, payload in retained:
+            callback(topic, payload, True)
+
+    def publish(self, topic: str, payload: bytes, qos: int = 0, retain: bool = False) -> None:
+        """Entrega un mensaje a los suscriptores (clientes y locales)."""
+        with self._lock:
+            if retain:
+                if payload:
+                    self.retained[topic] = (payload, qos)
+                else:
+                    self.retained.pop(topic, None)
+            targets = [
+                (s, min(qos, q)) for s in self._sessions
+                for f, q in list(s.subscriptions.items()) if topic_matches(f, topic)
+            ]
+            local = [cb for f, cb in self._local if topic_matches(f, topic)]
+        for session, granted in targets:
+            try:
+                session.deliver(topic, payload, granted, False)
+            except OSError:
+                pass
+        for callback in local:
+            callback(topic, payload, False)
+
+    def _send_retained(self, session: _Session, topic_filter: str) -> None:
+        with self._lock:
+            retained = [
+                (t, p, q) for t, (p, q) in self.retained.items()
+                if topic_matches(topic_filter, t)
+            ]
+        for topic, payload, qos in retained:
+            session.deliver(topic, payload, min(qos, session.subscriptions[topic_filter]), True)
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            session = _Session(self, sock)
+            threading.Thread(target=session.run, daemon=True, name="fake-broker-client").start()
+
+    def _add(self, session: _Session) -> None:
+        with self._lock:
+            self._sessions.append(session)
+            self._changed.notify_all()
+
+    def _remove(self, session: _Session, graceful: bool) -> None:
+        with self._lock:
+            if session not in self._sessions:
+                return
+            self._sessions.remove(session)
+        if session.will and not graceful:
+            self.publish(*session.will)
@@ -0,0 +1,122 @@
+"""Simulador Modbus RTU/TCP en proceso para tests y benchmarks."""
+
+import os
+import pty
+import socket
+import struct
+import threading
+import tty
+
+from scale_telemetry.modbus import WRITE_REGISTER, crc16
+
+
+class ModbusSimulator:
+    """
+    Simula indicadores Modbus: cada unidad tiene un mapa registro -> valor
+    (compartido entre holding e input). Registra las peticiones recibidas
+    para verificar el agrupamiento de lecturas.
+    """
+
+    def __init__(self, units: dict[int, dict[int, int]]):
+        self.units = units
+        self.requests: list[tuple[int, int, int, int]] = []
+        # Unidades que no responden por TCP (ni siquiera con la excepción 11)
+        self.silent: set[int] = set()
+        self.connections = 0
+        self._closers = []
+
+    def set_weight32(self, unit: int, register: int, value: int) -> None:
+        """Escribe un int32 big-endian (palabra alta primero)."""
+        high, low = struct.unpack(">HH", struct.pack(">i", value))
+        self.units[unit][register] = high
+        self.units[unit][register + 1] = low
+
+    def handle_pdu(self, unit: int, pdu: bytes) -> bytes | None:
+        """Retorna el PDU de respuesta, o None si la unidad no existe."""
+        function, address, value = struct.unpack(">BHH", pdu[:5])
+        self.requests.append((unit, function, address, value))
+        registers = self.units.get(unit)
+        if registers is None:
+            return None
+        if function == WRITE_REGISTER:
+            registers[address] = value
+            return pdu[:5]
+        if function not in (0x03, 0x04):
+            return bytes([function | 0x80, 1])
+        if any(a not in registers for a in range(address, address + value)):
+            return bytes([function | 0x80, 2])
+        data = struct.pack(
+            f">{value}H", *(registers[a] for a in range(address, address + value))
+        )
+        return bytes([function, len(data)]) + data
+
+    def serve_tcp(self) -> str:
+        """Lanza un servidor Modbus TCP local y retorna su URL tcp://."""
+        server = socket.create_server(("127.0.0.1", 0))
+        self._closers.append(server.close)
+        threading.Thread(target=self._accept, args=(server,), daemon=True).start()
+        host, port = server.getsockname()
+        return f"tcp://{host}:{port}"
+
+    def _accept(self, server: socket.socket) -> None:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            self._closers.append(conn.close)
+            threading.Thread(target=self._serve_conn, args=(conn,), daemon=True).start()
+
+    def _serve_conn(self, conn: socket.socket) -> None:
+        stream = conn.makefile("rb")
+        while True:
+            try:
+                header = stream.read(7)
+                if len(header) < 7:
+                    return
+                tid, _, length, unit = struct.unpack(">HHHB", header)
+                pdu = stream.read(length - 1)
+                if unit in self.silent:
+                    continue
+                reply = self.handle_pdu(unit, pdu)
+                if reply is None:
+                    # Como un gateway TCP/RTU cuando la unidad no responde
+                    reply = bytes([pdu[0] | 0x80, 11])
+                conn.sendall(struct.pack(">HHHB", tid, 0, len(reply) + 1, unit) + reply)
+            except OSError:
+                return
+
+    def serve_rtu(self) -> str:
+        """Simula un bus RTU sobre un PTY y retorna el puerto."""
+        master_fd, slave_fd = pty.openpty()
+        tty.setraw(slave_fd)
+        for fd in (master_fd, slave_fd):
+            self._closers.append(lambda fd=fd: os.close(fd))
+        threading.Thread(target=self._serve_rtu, args=(master_fd,), daemon=True).start()
+        return os.ttyname(slave_fd)
+
+    def _serve_rtu(self, fd: int) -> None:
+        pending = b""
+        while True:
+            try:
+                pending += os.read(fd, 256)
+            except OSError:
+                return
+            # Todas las peticiones que envía el gateway tienen 8 bytes
+            while len(pending) >= 8:
+                frame, pending = pending[:8], pending[8:]
+                if crc16(frame[:6]) != struct.unpack("<H", frame[6:])[0]:
+                    continue
+                reply = self.handle_pdu(frame[0], frame[1:6])
+                if reply is None:
+                    continue  # Unidad inexistente: no responde
+                reply = bytes([frame[0]]) + reply
+                os.write(fd, reply + struct.pack("<H", crc16(reply)))
+
+    def close(self) -> None:
+        for close in self._closers:
+            try:
+                close()
+            except OSError:
+                pass
@@ -0,0 +1,166 @@
+"""Tests para los timeouts de lectura adaptativos."""
+
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from scale_telemetry.adaptive_timeout import AdaptiveTimeout
+from scale_telemetry.config import SerialConfig
+from scale_telemetry.serial_reader import FrameTimeout, ScaleReader
+
+
+def _learn(adaptive, waits):
+    for wait in waits:
+        adaptive.observe(wait)
+
+
+class TestAdaptiveTimeout:
+    """Tests para AdaptiveTimeout."""
+
+    def test_max_until_warmup(self):
+        """Test que sin suficientes muestras se usa la cota superior."""
+        adaptive = AdaptiveTimeout(0.05, 1.0, warmup=5)
+        _learn(adaptive, [0.05] * 4)
+
+        assert not adaptive.learned
+        assert adaptive.timeout == 1.0
+        assert adaptive.timeout_budget(5) == 5
+
+    def test_no_warmup_without_samples(self):
+        """Test que sin warmup ni muestras se usa la cota superior."""
+        adaptive = AdaptiveTimeout(0.05, 1.0, warmup=0)
+        assert adaptive.timeout == 1.0
+
+    def test_learns_cadence(self):
+        """Test que una báscula a 10 Hz aprende un timeout cercano a su cadencia."""
+        adaptive = AdaptiveTimeout(0.05, 1.0)
+        _learn(adaptive, [0.05, 0.08, 0.03, 0.06, 0.09, 0.02, 0.05, 0.07] * 5)
+
+        assert adaptive.learned
+        assert 0.05 <= adaptive.interval <= 0.07
+        assert 0.1 <= adaptive.timeout <= 0.25
+        assert adaptive.timeout_budget(5) == 1
+
+    def test_bounds(self):
+        """Test que el timeout aprendido respeta las cotas."""
+        fast = AdaptiveTimeout(0.05, 1.0)
+        _learn(fast, [0.001] * 10)
+        slow = AdaptiveTimeout(0.05, 1.0)
+        _learn(slow, [2.0] * 10)
+
+        assert fast.timeout == 0.05
+        assert slow.timeout == 1.0
+
+    def test_backoff_and_recovery(self):
+        """Test que un timeout duplica la espera y una lectura la restablece."""
+        adaptive = AdaptiveTimeout(0.1, 1.0)
+        _learn(adaptive, [0.1] * 10)
+        base = adaptive.timeout
+
+        adaptive.failure()
+        assert adaptive.timeout == pytest.approx(min(1.0, base * 2))
+        for _ in range(5):
+            adaptive.failure()
+        assert adaptive.timeout == 1.0
+        assert adaptive.failures == 6
+
+        adaptive.observe(0.1)
+        assert adaptive.timeout == pytest.approx(base, rel=0.2)
+
+    def test_invalid_bounds(self):
+        """Test que las cotas se validan."""
+        with pytest.raises(ValueError, match="Cotas de timeout"):
+            AdaptiveTimeout(2.0, 1.0)
+        with pytest.raises(ValueError, match="Cotas de timeout"):
+            AdaptiveTimeout(0.0, 1.0)
+
+    def test_snapshot(self):
+        """Test de los valores expuestos para inspección."""
+        adaptive = AdaptiveTimeout(0.05, 1.0, warmup=2)
+        _learn(adaptive, [0.1, 0.1])
+
+        snapshot = adaptive.snapshot()
+        assert snapshot["learned"] is True
+        assert snapshot["interval"] == 0.1
+        assert snapshot["samples"] == 2
+        assert snapshot["failures"] == 0
+        assert snapshot["timeout"] == round(adaptive.timeout, 4)
+
+
+@pytest.fixture
+def mock_serial():
+    with patch("scale_telemetry.serial_reader.serial.Serial") as mock:
+        yield mock
+
+
+class TestScaleReaderAdaptive:
+    """Tests del timeout adaptativo en ScaleReader."""
+
+    def _reader(self, mock_serial, fileno=None, **kwargs):
+        mock_conn = MagicMock()
+        mock_conn.is_open = True
+        mock_conn.fileno.return_value = fileno
+        mock_serial.return_value = mock_conn
+        reader = ScaleReader(SerialConfig(timeout=1.0, min_timeout=0.05, **kwargs))
+        reader.connect()
+        return reader, mock_conn
+
+    def test_disabled_by_default(self, mock_serial):
+        """Test que sin min_timeout el timeout es fijo."""
+        mock_serial.return_value = MagicMock(is_open=True)
+        reader = ScaleReader(SerialConfig())
+        assert reader.read_timeout is None
+
+    def test_applies_learned_timeout(self, mock_serial):
+        """Test que el timeout aprendido se aplica al puerto."""
+        reader, mock_conn = self._reader(mock_serial)
+        mock_conn.readline.return_value = b"45.3 kg\n"
+        for _ in range(6):
+            reader.read_weight()
+
+        assert reader.read_timeout.learned
+        assert mock_conn.timeout == 0.05
+
+    def test_silent_padded_scale_fails_fast(self, mock_serial):
+        """Test que una báscula muda agota un solo timeout, no cinco."""
+        reader, mock_conn = self._reader(mock_serial, weight_format="padded")
+        mock_conn.read_until.return_value = b'"0 000060000000\r'
+        for _ in range(6):
+            reader.read_weight()
+
+        mock_conn.read_until.reset_mock()
+        mock_conn.read_until.return_value = b""
+        with pytest.raises(FrameTimeout, match="después de 1 intentos"):
+            reader.read_weight()
+        assert mock_conn.read_until.call_count == 1
+        assert reader.read_timeout.failures == 1
+
+    def test_garbage_frames_keep_attempts(self, mock_serial):
+        """Test que las tramas inválidas siguen teniendo sus reintentos."""
+        reader, mock_conn = self._reader(mock_serial, weight_format="padded")
+        mock_conn.read_until.return_value = b'"0 000060000000\r'
+        for _ in range(6):
+            reader.read_weight()
+
+        mock_conn.read_until.side_effect = [b"000\r"] * 4 + [b'"0 000070000000\r']
+        assert reader.read_weight() == 70.0
+
+    def test_direct_mode_timeout(self, mock_serial):
+        """Test que en modo directo se usa el timeout aprendido en el poll."""
+        read_fd, write_fd = os.pipe()
+        os.set_blocking(read_fd, False)
+        try:
+            reader, _ = self._reader(mock_serial, fileno=read_fd, read_mode="direct")
+            for _ in range(6):
+                os.write(write_fd, b"45.3 kg\n")
+                reader.read_weight()
+
+            start = time.monotonic()
+            with pytest.raises(FrameTimeout):
+                reader.read_weight()
+            assert time.monotonic() - start < 0.5
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
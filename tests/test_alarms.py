@@ -0,0 +1,121 @@
+"""Tests para las alarmas de umbral y duración."""
+
+import pytest
+
+from scale_telemetry.alarms import ACTIVE, CLEARED, AlarmEngine, AlarmRule
+
+
+def _feed(engine, samples):
+    """Alimenta (peso, instante) y retorna todas las transiciones."""
+    transitions = []
+    for weight, now in samples:
+        transitions.extend(engine.update(weight, now))
+    return transitions
+
+
+class TestAlarmRule:
+    """Tests para AlarmRule."""
+
+    def test_threshold(self):
+        """Test de una alarma sin duración: activa y despeja en el umbral."""
+        rule = AlarmRule("overload", above=1000)
+        assert rule.update(999.0, 0.0) is None
+        active = rule.update(1000.0, 1.0)
+        assert active["state"] == ACTIVE
+        assert rule.update(1500.0, 2.0) is None
+        cleared = rule.update(900.0, 3.0)
+        assert cleared["state"] == CLEARED
+        assert cleared["duration"] == 2.0
+        assert cleared["since"] == 1000
+
+    def test_duration(self):
+        """Test que la condición debe cumplirse durante duration segundos seguidos."""
+        rule = AlarmRule("left_on_platform", above=10, duration=60)
+        assert rule.update(50.0, 0.0) is None
+        assert rule.update(50.0, 59.0) is None
+        # Se interrumpe: el conteo vuelve a empezar
+        assert rule.update(0.0, 59.5) is None
+        assert rule.update(50.0, 100.0) is None
+        assert rule.update(50.0, 159.0) is None
+        active = rule.update(50.0, 160.0)
+        assert active["state"] == ACTIVE
+        assert active["since"] == 100000
+        assert active["duration"] == 60.0
+
+    def test_range(self):
+        """Test de una alarma de llenado insuficiente (rango above-below)."""
+        rule = AlarmRule("underfill", above=10, below=950)
+        assert rule.update(5.0, 0.0) is None
+        assert rule.update(960.0, 1.0) is None
+        assert rule.update(900.0, 2.0)["state"] == ACTIVE
+        assert rule.update(955.0, 3.0)["state"] == CLEARED
+
+    def test_hysteresis(self):
+        """Test que el ruido alrededor del umbral no genera ráfagas."""
+        rule = AlarmRule("overload", above=1000, hysteresis=20)
+        states = [
+            t["state"]
+            for t in (rule.update(w, i) for i, w in enumerate([1001, 995, 1002, 985, 979]))
+            if t is not None
+        ]
+        assert states == [ACTIVE, CLEARED]
+
+    @pytest.mark.parametrize("params", [
+        {},
+        {"above": 100, "below": 50},
+        {"above": 100, "duration": -1},
+        {"above": 100, "hysteresis": -1},
+        {"above": "mucho"},
+        {"above": [100]},
+        {"above": True},
+        {"below": float("nan")},
+        {"above": 100, "duration": "largo"},
+    ])
+    def test_invalid(self, params):
+        """Test de validación de parámetros."""
+        with pytest.raises(ValueError):
+            AlarmRule("x", **params)
+
+    def test_numeric_strings_coerced(self):
+        """Test que los valores numéricos escritos como texto se convierten al crear la regla."""
+        rule = AlarmRule("x", above="100", duration="0", hysteresis="5")
+        assert rule.above == 100.0
+        assert rule.update(150.0, 0.0)["state"] == ACTIVE
+        assert rule.update(97.0, 1.0) is None
+
+
+class TestAlarmEngine:
+    """Tests para AlarmEngine."""
+
+    def test_from_config(self):
+        """Test que el motor evalúa todas las reglas y agrega el deviceId."""
+        engine = AlarmEngine.from_config("scale-1", [
+            {"name": "overload", "above": 1000},
+            {"name": "left_on_platform", "above": 10, "duration": 30},
+        ])
+        transitions = _feed(engine, [(1200.0, 0.0), (1200.0, 30.0), (0.0, 31.0)])
+
+        assert [(t["alarm"], t["state"]) for t in transitions] == [
+            ("overload", ACTIVE),
+            ("left_on_platform", ACTIVE),
+            ("overload", CLEARED),
+            ("left_on_platform", CLEARED),
+        ]
+        assert all(t["deviceId"] == "scale-1" for t in transitions)
+        assert engine.active == []
+
+    def test_active(self):
+        """Test de los nombres de las alarmas activas."""
+        engine = AlarmEngine.from_config("scale-1", [{"name": "overload", "above": 10}])
+        engine.update(20.0, 0.0)
+        assert engine.active == ["overload"]
+
+    @pytest.mark.parametrize("specs", [
+        [{"above": 10}],
+        [{"name": "a", "above": 10, "threshold": 5}],
+        [{"name": "a", "above": 10}, {"name": "a", "below": 5}],
+    ])
+    def test_invalid_config(self, specs):
+        """Test de validación de la configuración."""
+        with pytest.raises(ValueError):
+            AlarmEngine.from_config("scale-1", specs)
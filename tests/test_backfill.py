@@ -0,0 +1,254 @@
+"""Tests para el backfill comprimido del historial sin conexión."""
+
+import json
+import threading
+import time
+import zlib
+
+import pytest
+
+from scale_telemetry.backfill import (
+    RECORD,
+    Backfiller,
+    HistoryStore,
+    decode_chunk,
+    encode_chunk,
+)
+from scale_telemetry.sinks import Reading
+
+
+def _records(n, start=1698765433000, period=500):
+    return [(start + i * period, 15000.0 + (i % 7) * 0.5 - (i % 3) * 1.25) for i in range(n)]
+
+
+def _store(tmp_path, readings, **kwargs):
+    store = HistoryStore(str(tmp_path / "history"), **kwargs)
+    for r in readings:
+        store.write(r)
+    store.flush()
+    return store
+
+
+def _readings(device_id, records):
+    return [Reading(device_id, weight, ts / 1000) for ts, weight in records]
+
+
+class TestChunkCodec:
+    """Tests para encode_chunk y decode_chunk."""
+
+    def test_roundtrip(self):
+        """Test que el chunk decodifica a las mismas lecturas (resolución 1 g)."""
+        records = _records(1000) + [(1698766000000, -3.2), (1698766000001, 0.0)]
+        header, decoded = decode_chunk(encode_chunk("scale-1", 42, records))
+
+        assert header["deviceId"] == "scale-1"
+        assert header["chunk"] == 42
+        assert header["count"] == len(records)
+        assert header["start"] == records[0][0]
+        assert header["end"] == records[-1][0]
+        assert [ts for ts, _ in decoded] == [ts for ts, _ in records]
+        assert [w for _, w in decoded] == pytest.approx([w for _, w in records], abs=5e-4)
+
+    def test_compression(self):
+        """Test que una cadencia regular comprime muy por debajo del registro crudo."""
+        records = _records(5000)
+        payload = encode_chunk("scale-1", 0, records)
+        assert len(payload) < len(records) * RECORD.size / 10
+
+    @pytest.mark.parametrize("payload", [
+        b"sin encabezado",
+        b'{"encoding": "otro"}\n' + zlib.compress(b""),
+        b'{"encoding": "delta-varint-zlib", "scale": 1000, "count": 5}\n'
+        + zlib.compress(b"\x02"),
+    ])
+    def test_invalid(self, payload):
+        """Test que los payloads inválidos o truncados se rechazan."""
+        with pytest.raises(ValueError):
+            decode_chunk(payload)
+
+
+class TestHistoryStore:
+    """Tests para HistoryStore."""
+
+    def test_append_and_read(self, tmp_path):
+        """Test que las lecturas se guardan por dispositivo y se leen por posición."""
+        records = _records(10)
+        store = _store(
+            tmp_path, _readings("scale-1", records) + _readings("tolva/2", records[:3])
+        )
+
+        assert store.devices() == ["scale-1", "tolva/2"]
+        assert store.read("scale-1", 4, 3) == records[4:7]
+        assert len(store.read("tolva/2", 0, 100)) == 3
+
+    def test_ack_persisted_and_cleanup(self, tmp_path):
+        """Test que el avance confirmado sobrevive a un reinicio y al final se borra."""
+        store = _store(tmp_path, _readings("scale-1", _records(10)))
+        store.ack("scale-1", 6)
+
+        reopened = HistoryStore(store.directory)
+        assert reopened.acked("scale-1") == 6
+        reopened.ack("scale-1", 10)
+        assert reopened.devices() == []
+        assert reopened.acked("scale-1") == 10
+
+    def test_positions_continue_across_sessions(self, tmp_path):
+        """Test que tras confirmarse todo, las lecturas nuevas siguen la numeración."""
+        records = _records(4)
+        store = _store(tmp_path, _readings("scale-1", _records(10)))
+        store.ack("scale-1", 10)
+
+        store.write_batch(_readings("scale-1", records))
+
+        assert store.acked("scale-1") == 10
+        assert store.read("scale-1", 10, 100) == records
+        store.ack("scale-1", 12)
+        assert store.read("scale-1", 12, 100) == records[2:]
+
+    def test_max_records(self, tmp_path):
+        """Test que con el historial lleno se descartan las lecturas nuevas."""
+        store = _store(tmp_path, _readings("scale-1", _records(8)), max_records=5)
+        assert len(store.read("scale-1", 0, 100)) == 5
+        assert store.dropped == 3
+
+
+class TestBackfiller:
+    """Tests para Backfiller."""
+
+    def _backfiller(self, store, ack=True, **kwargs):
+        """Backfiller cuyo consumidor confirma (o no) cada chunk publicado."""
+        published = []
+
+        def publish(device_id, payload):
+            published.append((device_id, payload))
+            if ack:
+                header, _ = decode_chunk(payload)
+                backfiller.on_ack(device_id, {"chunk": header["chunk"]})
+
+        backfiller = Backfiller(
+            store, publish, lambda: True, chunk_size=4, ack_timeout=0.05, **kwargs
+        )
+        return backfiller, published
+
+    def test_publishes_chunks_until_empty(self, tmp_path):
+        """Test que el historial sale en chunks confirmados y luego se borra."""
+        records = _records(10)
+        store = _store(tmp_path, _readings("scale-1", records))
+        backfiller, published = self._backfiller(store)
+
+        assert backfiller.run_once()
+
+        decoded = [decode_chunk(payload) for _, payload in published]
+        assert [h["chunk"] for h, _ in decoded] == [0, 4, 8]
+        assert [ts for _, recs in decoded for ts, _ in recs] == [ts for ts, _ in records]
+        assert store.devices() == []
+        assert backfiller.records_sent == 10
+
+    def test_resumes_after_missing_ack(self, tmp_path):
+        """Test que sin confirmación se detiene y retoma desde el último chunk confirmado."""
+        store = _store(tmp_path, _readings("scale-1", _records(10)))
+        backfiller, published = self._backfiller(store)
+        acks = iter([True, False])
+
+        def flaky(device_id, payload):
+            published.append(payload)
+            if next(acks, True):
+                backfiller.on_ack(device_id, {"chunk": decode_chunk(payload)[0]["chunk"]})
+
+        backfiller._publish = flaky
+        assert not backfiller.run_once()
+        assert store.acked("scale-1") == 4
+
+        assert backfiller.run_once()
+        chunks = [decode_chunk(p)[0]["chunk"] for p in published]
+        assert chunks == [0, 4, 4, 8]
+
+    def test_chunk_ids_unique_across_sessions(self, tmp_path):
+        """Test que un segundo período sin conexión no repite ids de chunk."""
+        store = _store(tmp_path, _readings("scale-1", _records(6)))
+        backfiller, published = self._backfiller(store)
+        assert backfiller.run_once()
+
+        store.write_batch(_readings("scale-1", _records(3)))
+        assert backfiller.run_once()
+
+        chunks = [decode_chunk(p)[0]["chunk"] for _, p in published]
+        assert chunks == [0, 4, 6]
+
+    def test_skips_failing_device(self, tmp_path):
+        """Test que un dispositivo que no se puede publicar no frena a los demás."""
+        records = _records(3)
+        store = _store(
+            tmp_path, _readings("old-scale", records) + _readings("scale-1", records)
+        )
+        backfiller, published = self._backfiller(store)
+        publish = backfiller._publish
+
+        def publish_known(device_id, payload):
+            if device_id == "old-scale":
+                raise ValueError(f"Dispositivo no configurado: {device_id}")
+            publish(device_id, payload)
+
+        backfiller._publish = publish_known
+        assert not backfiller.run_once()
+        assert [d for d, _ in published] == ["scale-1"]
+        assert store.devices() == ["old-scale"]
+
+    def test_ignores_unexpected_ack(self, tmp_path):
+        """Test que una confirmación de otro chunk no avanza el backfill."""
+        store = _store(tmp_path, _readings("scale-1", _records(3)))
+        backfiller, _ = self._backfiller(store, ack=False)
+        backfiller._publish = lambda device_id, payload: backfiller.on_ack(
+            device_id, {"chunk": 99}
+        )
+        assert not backfiller.run_once()
+        assert store.acked("scale-1") == 0
+
+    def test_offline_skips(self, tmp_path):
+        """Test que sin conexión no se publica nada."""
+        store = _store(tmp_path, _readings("scale-1", _records(3)))
+        published = []
+        backfiller = Backfiller(store, lambda *a: published.append(a), lambda: False)
+        assert not backfiller.run_once()
+        assert published == []
+
+    def test_trigger_runs_in_background(self, tmp_path):
+        """Test que trigger() lanza el backfill en el hilo propio."""
+        store = _store(tmp_path, _readings("scale-1", _records(5)))
+        backfiller, published = self._backfiller(store)
+        done = threading.Event()
+        publish = backfiller._publish
+
+        def publish_and_signal(device_id, payload):
+            publish(device_id, payload)
+            if len(published) == 2:
+                done.set()
+
+        backfiller._publish = publish_and_signal
+        backfiller.ack_timeout = 5.0
+        backfiller.start()
+        try:
+            backfiller.trigger()
+            assert done.wait(5)
+        finally:
+            backfiller.stop()
+        assert json.loads(published[0][1].split(b"\n", 1)[0])["count"] == 4
+
+    def test_stop_during_chunk_does_not_ack(self, tmp_path):
+        """Test que detener durante la espera de un chunk no lo da por confirmado."""
+        store = _store(tmp_path, _readings("scale-1", _records(10)))
+        backfiller, published = self._backfiller(store, ack=False)
+        backfiller.chunk_size = 5
+        backfiller.ack_timeout = 5.0
+        backfiller.start()
+        try:
+            backfiller.trigger()
+            deadline = time.monotonic() + 5
+            while not published and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            backfiller.stop()
+
+        assert len(published) == 1
+        assert store.acked("scale-1") == 0
+        assert backfiller.chunks_sent == 0
@@ -0,0 +1,76 @@
+"""Tests para las capturas seriales."""
+
+import pytest
+
+from scale_telemetry.capture import (
+    MAGIC,
+    CaptureRecord,
+    CaptureWriter,
+    read_capture,
+    records_from_log,
+)
+
+
+class TestCapture:
+    """Tests para CaptureWriter y read_capture."""
+
+    def test_round_trip(self, tmp_path):
+        """Test que los registros se leen en el orden en que se escribieron."""
+        path = str(tmp_path / "captura.scap")
+        with CaptureWriter(path) as writer:
+            writer.write("scale-1", b'"0 000060000000\r', timestamp=100.0)
+            writer.write("scale-2", b"45.3 kg\n", timestamp=100.5)
+            writer.write("scale-1", b"", timestamp=101.0)
+
+        assert list(read_capture(path)) == [
+            CaptureRecord(100.0, "scale-1", b'"0 000060000000\r'),
+            CaptureRecord(100.5, "scale-2", b"45.3 kg\n"),
+            CaptureRecord(101.0, "scale-1", b""),
+        ]
+
+    def test_append_to_existing(self, tmp_path):
+        """Test que reabrir una captura agrega registros sin repetir el encabezado."""
+        path = str(tmp_path / "captura.scap")
+        for weight in (b"1\n", b"2\n"):
+            with CaptureWriter(path) as writer:
+                writer.write("scale-1", weight, timestamp=1.0)
+
+        assert [r.data for r in read_capture(path)] == [b"1\n", b"2\n"]
+
+    def test_not_a_capture(self, tmp_path):
+        """Test que un archivo sin encabezado se rechaza."""
+        path = tmp_path / "otro.bin"
+        path.write_bytes(b"hola")
+        with pytest.raises(ValueError, match="no es una captura"):
+            list(read_capture(str(path)))
+
+    def test_truncated(self, tmp_path):
+        """Test que un registro incompleto se reporta como captura truncada."""
+        path = str(tmp_path / "captura.scap")
+        with CaptureWriter(path) as writer:
+            writer.write("scale-1", b"45.3 kg\n", timestamp=1.0)
+        with open(path, "r+b") as f:
+            f.truncate(len(MAGIC) + 16)
+        with pytest.raises(ValueError, match="truncada"):
+            list(read_capture(path))
+
+
+class TestRecordsFromLog:
+    """Tests para la importación de bytes crudos desde el log del servicio."""
+
+    def test_extracts_raw_bytes(self):
+        """Test que se extraen las líneas de bytes crudos de ambos formatos."""
+        lines = [
+            "2024-03-01 10:00:00,250 - scale_telemetry.serial_reader - INFO - "
+            "Datos crudos (bytes): b'45.3 kg\\r\\n'\n",
+            "2024-03-01 10:00:00,300 - scale_telemetry.serial_reader - INFO - "
+            "Peso leído: 45.3 kg\n",
+            "2024-03-01 10:00:01,000 - scale_telemetry.serial_reader - INFO - "
+            "Padded intento 1/5 - (16 bytes): b'\\x02\"0 000060000000\\r'\n",
+        ]
+
+        records = list(records_from_log(lines, "scale-1"))
+
+        assert [r.data for r in records] == [b"45.3 kg\r\n", b'\x02"0 000060000000\r']
+        assert {r.device_id for r in records} == {"scale-1"}
+        assert records[1].timestamp - records[0].timestamp == pytest.approx(0.75)
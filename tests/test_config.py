@@ -1,10 +1,19 @@
 """Tests para la configuración de dispositivos."""
 
 import json
+import subprocess
+import sys
 
 import pytest
 
-from scale_telemetry.config import DeviceConfig, SerialConfig, load_devices
+from scale_telemetry.config import (
+    DeviceConfig,
+    MQTTConfig,
+    SerialConfig,
+    ServiceConfig,
+    load_devices,
+    load_sinks,
+)
 
 
 class TestDeviceConfig:
@@ -84,6 +93,182 @@ class TestLoadDevices:
 
         assert devices[0].baudrate == 9600
         assert devices[0].timeout == 1.0
+        assert devices[0].rate_limit == 0.0
+
+    def test_load_rate_limit(self, tmp_path):
+        """Test de carga del límite de comandos por dispositivo."""
+        devices_file = tmp_path / "devices.json"
+        devices_data = [
+            {
+                "device_id": "scale-1",
+                "serial_port": "/dev/ttyUSB0",
+                "rate_limit": 2.5,
+                "rate_burst": 5,
+            }
+        ]
+        devices_file.write_text(json.dumps(devices_data))
+
+        devices = load_devices(str(devices_file))
+
+        assert devices[0].rate_limit == 2.5
+        assert devices[0].rate_burst == 5
+
+    def test_load_commands(self, tmp_path):
+        """Test de carga de comandos de la báscula."""
+        devices_file = tmp_path / "devices.json"
+        devices_data = [
+            {
+                "device_id": "scale-1",
+                "serial_port": "/dev/ttyUSB0",
+                "commands": {"tare": "T\r", "zero": "Z\r"},
+                "command_ack": "OK\r",
+            }
+        ]
+        devices_file.write_text(json.dumps(devices_data))
+
+        serial_config = load_devices(str(devices_file))[0].to_serial_config()
+
+        assert serial_config.commands == {"tare": "T\r", "zero": "Z\r"}
+        assert serial_config.command_ack == "OK\r"
+
+    def test_load_poll_bus(self, tmp_path):
+        """Test de carga de básculas en modo poll con dirección."""
+        devices_file = tmp_path / "devices.json"
+        devices_data = [
+            {
+                "device_id": "scale-1",
+                "serial_port": "/dev/ttyUSB0",
+                "poll_request": "{address}P\r",
+                "poll_timeout": 0.2,
+                "address": 1,
+            }
+        ]
+        devices_file.write_text(json.dumps(devices_data))
+
+        serial_config = load_devices(str(devices_file))[0].to_serial_config()
+
+        assert serial_config.poll_timeout == 0.2
+        assert serial_config.address == "1"
+        assert serial_config.render(serial_config.poll_request) == b"1P\r"
+
+    def test_load_modbus(self, tmp_path):
+        """Test de carga de una báscula Modbus."""
+        devices_file = tmp_path / "devices.json"
+        devices_data = [
+            {
+                "device_id": "scale-1",
+                "serial_port": "tcp://10.0.0.5:502",
+                "source": "modbus",
+                "modbus": {"unit_id": 3, "register": 100, "decimals": 1},
+                "commands": {"tare": "40=1"},
+            }
+        ]
+        devices_file.write_text(json.dumps(devices_data))
+
+        device = load_devices(str(devices_file))[0]
+        modbus_config = device.to_modbus_config()
+
+        assert device.source == "modbus"
+        assert modbus_config.port == "tcp://10.0.0.5:502"
+        assert modbus_config.unit_id == 3
+        assert modbus_config.register == 100
+        assert modbus_config.decimals == 1
+        assert modbus_config.commands == {"tare": "40=1"}
+
+    def test_invalid_modbus_key(self):
+        """Test que un parámetro Modbus desconocido lanza error."""
+        device = DeviceConfig(
+            device_id="scale-1", serial_port="/dev/ttyUSB0",
+            source="modbus", modbus={"unit": 1},
+        )
+        with pytest.raises(ValueError, match="Parámetros Modbus inválidos"):
+            device.to_modbus_config()
+
+    def test_load_sample_stream(self, tmp_path):
+        """Test de carga de filtros, detección de pesajes y lecturas periódicas."""
+        devices_file = tmp_path / "devices.json"
+        devices_data = [
+            {
+                "device_id": "scale-1",
+                "serial_port": "/dev/ttyUSB0",
+                "sample_interval": 0.5,
+                "filters": [{"type": "median", "window": 5}],
+                "weighment": {"threshold": 50, "stable_samples": 4},
+            },
+            {"device_id": "scale-2", "serial_port": "/dev/ttyUSB1"},
+        ]
+        devices_file.write_text(json.dumps(devices_data))
+
+        devices = load_devices(str(devices_file))
+        weighment_config = devices[0].to_weighment_config()
+
+        assert devices[0].sample_interval == 0.5
+        assert devices[0].filters == [{"type": "median", "window": 5}]
+        assert devices[0].events_topic == "pesanet/devices/scale-1/events"
+        assert weighment_config.threshold == 50
+        assert weighment_config.stable_samples == 4
+        assert weighment_config.stable_range == 0.5
+        assert devices[1].sample_interval == 0.0
+        assert devices[1].filters == []
+        assert devices[1].to_weighment_config() is None
+
+    def test_weighment_coerced(self):
+        """Test que los parámetros de pesaje en texto se convierten a números."""
+        device = DeviceConfig(
+            device_id="scale-1", serial_port="/dev/ttyUSB0",
+            weighment={"threshold": "10", "stable_range": "0.2", "stable_samples": "4"},
+        )
+        config = device.to_weighment_config()
+
+        assert config.threshold == 10.0
+        assert config.stable_range == 0.2
+        assert config.stable_samples == 4
+        assert isinstance(config.stable_samples, int)
+
+    @pytest.mark.parametrize("weighment", [
+        {"threshold": "diez"},
+        {"threshold": True},
+        {"threshold": None},
+        {"stable_range": -1},
+        {"stable_samples": 1},
+        {"stable_samples": 2.5},
+        {"unknown": 1},
+    ])
+    def test_weighment_invalid(self, weighment):
+        """Test que un parámetro de pesaje inválido falla al cargar la configuración."""
+        device = DeviceConfig(
+            device_id="scale-1", serial_port="/dev/ttyUSB0", weighment=weighment
+        )
+        with pytest.raises(ValueError, match="pesaje inválidos para scale-1"):
+            device.to_weighment_config()
+
+    def test_load_min_timeout(self, tmp_path):
+        """Test de carga del timeout adaptativo."""
+        devices_file = tmp_path / "devices.json"
+        devices_file.write_text(json.dumps([
+            {"device_id": "scale-1", "serial_port": "/dev/ttyUSB0", "min_timeout": 0.05},
+            {"device_id": "scale-2", "serial_port": "/dev/ttyUSB1"},
+        ]))
+
+        devices = load_devices(str(devices_file))
+
+        assert devices[0].to_serial_config().min_timeout == 0.05
+        assert devices[1].to_serial_config().min_timeout == 0.0
+
+    def test_load_alarms(self, tmp_path):
+        """Test de carga de las reglas de alarma y su tópico."""
+        devices_file = tmp_path / "devices.json"
+        alarms = [{"name": "overload", "above": 30000, "duration": 2}]
+        devices_file.write_text(json.dumps([
+            {"device_id": "scale-1", "serial_port": "/dev/ttyUSB0", "alarms": alarms},
+            {"device_id": "scale-2", "serial_port": "/dev/ttyUSB1"},
+        ]))
+
+        devices = load_devices(str(devices_file))
+
+        assert devices[0].alarms == alarms
+        assert devices[0].alarms_topic == "pesanet/devices/scale-1/alarms"
+        assert devices[1].alarms == []
 
     def test_file_not_found(self, tmp_path):
         """Test que lanza error si no existe el archivo."""
@@ -99,3 +284,57 @@ class TestLoadDevices:
 
         with pytest.raises(ValueError):
             load_devices(str(devices_file))
+
+
+class TestLoadSinks:
+    """Tests para load_sinks."""
+
+    def test_load(self, tmp_path):
+        """Test de carga de las salidas adicionales."""
+        sinks_file = tmp_path / "sinks.json"
+        specs = [{"type": "csv", "path": "logs/readings.csv", "batch_size": 50}]
+        sinks_file.write_text(json.dumps(specs))
+        assert load_sinks(str(sinks_file)) == specs
+
+    def test_invalid(self, tmp_path):
+        """Test que el archivo debe contener una lista de salidas."""
+        sinks_file = tmp_path / "sinks.json"
+        sinks_file.write_text(json.dumps({"type": "csv"}))
+        with pytest.raises(ValueError):
+            load_sinks(str(sinks_file))
+        with pytest.raises(FileNotFoundError):
+            load_sinks(str(tmp_path / "no_existe.json"))
+
+
+class TestEnvironmentConfig:
+    """Tests para la lectura diferida de variables de entorno."""
+
+    def test_env_read_at_instantiation(self, monkeypatch):
+        """Test que el entorno se lee al crear la configuración, no al importar."""
+        monkeypatch.setenv("MQTT_BROKER", "broker.example")
+        monkeypatch.setenv("MQTT_PORT", "8083")
+        monkeypatch.setenv("CONNECT_TIMEOUT", "2.5")
+
+        assert MQTTConfig().broker == "broker.example"
+        assert MQTTConfig().port == 8083
+        assert ServiceConfig().connect_timeout == 2.5
+
+    def test_explicit_values_override_env(self, monkeypatch):
+        """Test que los valores explícitos tienen prioridad sobre el entorno."""
+        monkeypatch.setenv("MQTT_BROKER", "broker.example")
+        assert MQTTConfig(broker="localhost").broker == "localhost"
+
+    def test_import_config_is_light(self):
+        """Test que importar config no carga paho, pyserial ni dotenv."""
+        code = (
+            "import sys, scale_telemetry.config; "
+            "heavy = {'paho', 'serial', 'dotenv'}; "
+            "print(sorted(m for m in sys.modules if m.split('.')[0] in heavy))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert result.stdout.strip() == "[]"
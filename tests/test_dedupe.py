@@ -0,0 +1,83 @@
+"""Tests para la caché de requestId."""
+
+from scale_telemetry.dedupe import PENDING, RequestCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRequestCache:
+    """Tests para RequestCache."""
+
+    def test_new_pending_and_stored(self):
+        """Test del ciclo nuevo → en curso → respondido."""
+        cache = RequestCache()
+        assert cache.lookup("scale-1", "r1") is None
+        assert cache.lookup("scale-1", "r1") is PENDING
+
+        cache.store("scale-1", "r1", {"weight": 10.0})
+        assert cache.lookup("scale-1", "r1") == {"weight": 10.0}
+        assert cache.duplicates == 2
+
+    def test_per_device(self):
+        """Test que el mismo requestId en otro dispositivo es un comando nuevo."""
+        cache = RequestCache()
+        cache.lookup("scale-1", "r1")
+        assert cache.lookup("scale-2", "r1") is None
+
+    def test_per_transport(self):
+        """Test que el mismo requestId por MQTT y por la API local son comandos distintos."""
+        cache = RequestCache()
+        cache.lookup("scale-1", "r1", "mqtt")
+        cache.store("scale-1", "r1", {"weight": 10.0}, "mqtt")
+
+        assert cache.lookup("scale-1", "r1", "local") is None
+
+    def test_waiters_get_response(self):
+        """Test que los duplicados en curso con waiter reciben la respuesta del original."""
+        cache = RequestCache()
+        waiter = []
+        cache.lookup("scale-1", "r1", "local")
+        assert cache.lookup("scale-1", "r1", "local", waiter.append) is PENDING
+
+        waiters = cache.store("scale-1", "r1", {"weight": 10.0}, "local")
+
+        assert waiters == [waiter.append]
+        assert cache.store("scale-1", "r1", {"weight": 10.0}, "local") == []
+
+    def test_size_bound(self):
+        """Test que se descartan los requestId más antiguos."""
+        cache = RequestCache(size=2)
+        for request_id in ("r1", "r2", "r3"):
+            cache.lookup("scale-1", request_id)
+
+        assert cache.lookup("scale-1", "r3") is PENDING
+        assert cache.lookup("scale-1", "r1") is None
+
+    def test_ttl(self):
+        """Test que los requestId vencen tras el ttl."""
+        clock = FakeClock()
+        cache = RequestCache(ttl=10.0, clock=clock)
+        cache.lookup("scale-1", "r1")
+        cache.store("scale-1", "r1", {"weight": 1.0})
+
+        clock.now = 9.0
+        assert cache.lookup("scale-1", "r1") == {"weight": 1.0}
+        clock.now = 10.0
+        assert cache.lookup("scale-1", "r1") is None
+
+    def test_store_after_expiry_ignored(self):
+        """Test que una respuesta de un requestId vencido no se guarda."""
+        clock = FakeClock()
+        cache = RequestCache(ttl=1.0, clock=clock)
+        cache.lookup("scale-1", "r1")
+        clock.now = 5.0
+        cache.lookup("scale-1", "r2")  # purga r1
+        cache.store("scale-1", "r1", {"weight": 1.0})
+
+        assert cache.lookup("scale-1", "r1") is None
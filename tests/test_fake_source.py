@@ -0,0 +1,87 @@
+"""Tests para la báscula simulada en memoria."""
+
+import time
+
+import pytest
+import serial
+
+from scale_telemetry.config import FakeConfig
+from scale_telemetry.fake_source import FakeSource
+from scale_telemetry.sources import WeightSource
+
+
+def _connected(**kwargs) -> FakeSource:
+    source = FakeSource(FakeConfig(**kwargs))
+    source.connect()
+    return source
+
+
+class TestFakeSource:
+    """Tests para FakeSource."""
+
+    def test_implements_weight_source(self):
+        """Test que cumple la interfaz WeightSource."""
+        assert isinstance(FakeSource(FakeConfig()), WeightSource)
+
+    def test_frames_cycle(self):
+        """Test que los pesos del guion se repiten en orden."""
+        source = _connected(frames=[1.0, 2.0, 3.0])
+
+        assert [source.read_weight() for _ in range(5)] == [1.0, 2.0, 3.0, 1.0, 2.0]
+        assert source.reads == 5
+
+    def test_read_without_connect(self):
+        """Test que leer sin conectar lanza SerialException."""
+        with pytest.raises(serial.SerialException):
+            FakeSource(FakeConfig()).read_weight()
+
+    def test_error_rate(self):
+        """Test que error_rate=1 produce siempre tramas inválidas."""
+        source = _connected(error_rate=1.0)
+
+        with pytest.raises(ValueError, match="inválida"):
+            source.read_weight()
+        assert source.connected
+
+    def test_disconnect_rate(self):
+        """Test que una desconexión simulada persiste hasta reconectar."""
+        source = _connected(disconnect_rate=1.0)
+
+        with pytest.raises(serial.SerialException):
+            source.read_weight()
+        assert not source.connected
+
+    def test_seed_is_deterministic(self):
+        """Test que con la misma semilla se repite la secuencia de errores."""
+
+        def outcomes():
+            source = _connected(frames=[1.0], error_rate=0.5, seed=7)
+            result = []
+            for _ in range(20):
+                try:
+                    result.append(source.read_weight())
+                except ValueError:
+                    result.append(None)
+            return result
+
+        first = outcomes()
+        assert first == outcomes()
+        assert None in first and 1.0 in first
+
+    def test_latency(self):
+        """Test que las lecturas respetan la latencia configurada."""
+        source = _connected(latency=0.05)
+
+        start = time.monotonic()
+        source.read_weight()
+
+        assert time.monotonic() - start >= 0.05
+
+    def test_execute_command(self):
+        """Test que los comandos configurados se registran."""
+        source = _connected(frames=[4.0], commands={"tare": "T\r"})
+
+        assert source.execute_command("tare", read_weight=True) == 4.0
+        assert source.commands_executed == ["tare"]
+        with pytest.raises(ValueError, match="Comando no soportado"):
+            source.execute_command("zero")
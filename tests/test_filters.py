@@ -0,0 +1,129 @@
+"""Tests para los filtros del peso."""
+
+import pytest
+
+from scale_telemetry.filters import (
+    EMAFilter,
+    FilterChain,
+    MedianFilter,
+    OutlierFilter,
+)
+
+
+def run(f, values, step=0.5):
+    """Aplica el filtro a una muestra cada step segundos."""
+    return [f.apply(v, i * step) for i, v in enumerate(values)]
+
+
+class TestMedianFilter:
+    """Tests para MedianFilter."""
+
+    def test_removes_isolated_spike(self):
+        """Test que un pico aislado no llega a la salida."""
+        out = run(MedianFilter(window=3), [100, 100, 900, 100, 100])
+        assert out == [100, 100, 100, 100, 100]
+
+    def test_follows_real_step(self):
+        """Test que un escalón sostenido se sigue tras media ventana."""
+        out = run(MedianFilter(window=3), [0, 0, 500, 500, 500])
+        assert out[-2:] == [500, 500]
+
+    def test_partial_window(self):
+        """Test que la mediana se calcula con la ventana parcialmente llena."""
+        out = run(MedianFilter(window=5), [1, 3])
+        assert out == [1, 2]
+
+    def test_reset(self):
+        """Test que reset descarta la historia."""
+        f = MedianFilter(window=3)
+        run(f, [100, 100, 100])
+        f.reset()
+        assert f.apply(7, 0) == 7
+
+
+class TestEMAFilter:
+    """Tests para EMAFilter."""
+
+    def test_smoothing(self):
+        """Test del suavizado exponencial."""
+        out = run(EMAFilter(alpha=0.5), [0, 10, 10])
+        assert out == [0, 5, 7.5]
+
+    def test_invalid_alpha(self):
+        """Test que un alpha fuera de rango se rechaza."""
+        with pytest.raises(ValueError, match="alpha"):
+            EMAFilter(alpha=0)
+
+
+class TestOutlierFilter:
+    """Tests para OutlierFilter."""
+
+    def test_rejects_spike(self):
+        """Test que un salto mayor a la pendiente máxima se reemplaza."""
+        out = run(OutlierFilter(max_slope=100), [50, 2000, 55])
+        assert out == [50, 50, 55]
+
+    def test_accepts_new_level_after_max_rejects(self):
+        """Test que un nivel sostenido se acepta tras max_rejects rechazos."""
+        out = run(OutlierFilter(max_slope=100, max_rejects=2), [0, 1000, 1000, 1000])
+        assert out == [0, 0, 0, 1000]
+
+    def test_slope_scales_with_time(self):
+        """Test que el salto permitido crece con el tiempo entre muestras."""
+        f = OutlierFilter(max_slope=100)
+        f.apply(0, 0.0)
+        assert f.apply(300, 5.0) == 300
+
+
+class TestFilterChain:
+    """Tests para FilterChain."""
+
+    def test_from_config_in_order(self):
+        """Test que la cadena se construye en el orden de devices.json."""
+        chain = FilterChain.from_config([
+            {"type": "outlier", "max_slope": 500},
+            {"type": "median", "window": 3},
+            {"type": "ema", "alpha": 0.5},
+        ])
+        assert [type(f) for f in chain.filters] == [OutlierFilter, MedianFilter, EMAFilter]
+        assert chain.apply(10, 0.0) == 10
+
+    def test_unknown_filter(self):
+        """Test que un filtro desconocido lanza error."""
+        with pytest.raises(ValueError, match="Filtro no soportado"):
+            FilterChain.from_config([{"type": "kalman"}])
+
+    def test_invalid_params(self):
+        """Test que un parámetro desconocido lanza error."""
+        with pytest.raises(ValueError, match="Parámetros inválidos"):
+            FilterChain.from_config([{"type": "median", "size": 3}])
+
+    @pytest.mark.parametrize("spec", [
+        {"type": "outlier", "max_slope": 500, "max_rejects": -1},
+        {"type": "outlier", "max_slope": "rápido"},
+        {"type": "outlier", "max_slope": None},
+        {"type": "ema", "alpha": "x"},
+        {"type": "median", "window": "cinco"},
+    ])
+    def test_invalid_values(self, spec):
+        """Test que un valor no numérico o fuera de rango falla al construir la cadena."""
+        with pytest.raises(ValueError, match="Parámetros inválidos"):
+            FilterChain.from_config([spec])
+
+    def test_numeric_strings_coerced(self):
+        """Test que los parámetros en texto se convierten al construir la cadena."""
+        chain = FilterChain.from_config([
+            {"type": "outlier", "max_slope": "10", "max_rejects": "1"},
+            {"type": "ema", "alpha": "1"},
+            {"type": "median", "window": "1"},
+        ])
+        assert chain.apply(0.0, 0.0) == 0.0
+        assert chain.apply(100.0, 1.0) == 0.0
+        assert chain.apply(100.0, 1.1) == 100.0
+
+    def test_reset(self):
+        """Test que reset limpia todos los filtros de la cadena."""
+        chain = FilterChain.from_config([{"type": "ema", "alpha": 0.1}])
+        chain.apply(100, 0.0)
+        chain.reset()
+        assert chain.apply(0, 1.0) == 0
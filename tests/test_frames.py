@@ -0,0 +1,105 @@
+"""Tests para el decodificador de tramas sin copias."""
+
+import os
+
+import pytest
+
+from scale_telemetry.frames import (
+    FrameDecoder,
+    parse_padded_frame,
+    parse_standard_frame,
+)
+from scale_telemetry.serial_reader import parse_standard
+
+
+def _parse(parser, data: bytes):
+    buf = bytearray(data)
+    return parser(buf, 0, len(buf))
+
+
+class TestFrameParsers:
+    """Tests para los parsers sobre buffer."""
+
+    @pytest.mark.parametrize("line", [
+        "45.3 kg", "Weight: 45.3", "45.3kg", "+45.3", "-2.5", "100",
+        ".5", "-.5", "1.2.3", "12.", "x-3", "0",
+    ])
+    def test_standard_matches_regex_parser(self, line):
+        """Test que el parser sobre buffer coincide con parse_standard."""
+        assert _parse(parse_standard_frame, line.encode()) == parse_standard(line)
+
+    def test_standard_no_number(self):
+        """Test que una trama sin número retorna None."""
+        assert _parse(parse_standard_frame, b"no number") is None
+
+    def test_padded(self):
+        """Test de extracción del peso en formato padded."""
+        assert _parse(parse_padded_frame, b'\x80\x02"0 000060000000') == 60.0
+        assert _parse(parse_padded_frame, b'\x80\x02"0 000000000000') == 0.0
+
+    def test_padded_incomplete(self):
+        """Test que una trama padded incompleta retorna None."""
+        assert _parse(parse_padded_frame, b'\x80\x02"0 0000') is None
+        assert _parse(parse_padded_frame, b'000') is None
+
+
+class TestFrameDecoder:
+    """Tests para FrameDecoder."""
+
+    def test_invalid_format(self):
+        """Test que un formato inválido lanza error."""
+        with pytest.raises(ValueError, match="no soportado"):
+            FrameDecoder("inexistente")
+
+    def test_frames_split_across_feeds(self):
+        """Test que una trama partida en varias lecturas se decodifica."""
+        decoder = FrameDecoder("standard")
+        decoder.feed(b"45.")
+        assert decoder.next_weight() is None
+        decoder.feed(b"3 kg\n12")
+        assert decoder.next_weight() == 45.3
+        assert decoder.next_weight() is None
+        assert decoder.pending == 2
+
+    def test_rejected_frames_are_counted(self):
+        """Test que las tramas sin peso se descartan y se cuentan."""
+        decoder = FrameDecoder("padded")
+        decoder.feed(b'000\r\x80\x02"0 000060000000\r')
+        assert decoder.next_weight() == 60.0
+        assert decoder.frames_rejected == 1
+        assert decoder.frames_decoded == 1
+
+    def test_latest_weight(self):
+        """Test que latest_weight retorna la última trama válida."""
+        decoder = FrameDecoder("padded")
+        decoder.feed(b'"0 000050000000\r"0 000060000000\r')
+        assert decoder.latest_weight() == 60.0
+
+    def test_buffer_compaction(self):
+        """Test que el buffer se reutiliza con muchas tramas."""
+        decoder = FrameDecoder("standard", buffer_size=16)
+        for i in range(100):
+            decoder.feed(f"{i} kg\n".encode())
+            assert decoder.next_weight() == float(i)
+
+    def test_oversized_frame_discarded(self):
+        """Test que una trama más larga que el buffer se descarta."""
+        decoder = FrameDecoder("standard", buffer_size=8)
+        decoder.feed(b"x" * 20 + b"\n5\n")
+        assert decoder.next_weight() == 5.0
+        assert decoder.frames_rejected >= 1
+
+    def test_fill_from_fd(self):
+        """Test de lectura directa desde un descriptor (sin datos, datos y fin de archivo)."""
+        read_fd, write_fd = os.pipe()
+        os.set_blocking(read_fd, False)
+        try:
+            decoder = FrameDecoder("standard")
+            assert decoder.fill_from_fd(read_fd) is None
+            os.write(write_fd, b"12.5 kg\n")
+            assert decoder.fill_from_fd(read_fd) == 8
+            assert decoder.next_weight() == 12.5
+            os.close(write_fd)
+            assert decoder.fill_from_fd(read_fd) == 0
+        finally:
+            os.close(read_fd)
@@ -0,0 +1,130 @@
+"""Tests para los endpoints de salud."""
+
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from scale_telemetry.adaptive_timeout import AdaptiveTimeout
+from scale_telemetry.health import HealthServer, HealthState
+
+
+@pytest.fixture
+def mqtt_status():
+    """Estado MQTT mutable para los tests."""
+    return {"connected": True}
+
+
+@pytest.fixture
+def state(mqtt_status):
+    """Fixture con estado de salud."""
+    return HealthState(lambda: mqtt_status["connected"])
+
+
+@pytest.fixture
+def server(state):
+    """Fixture con servidor de salud en un puerto libre."""
+    server = HealthServer(state, host="127.0.0.1", port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def _get(server, path):
+    host, port = server.server_address[:2]
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}{path}") as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+class TestHealthState:
+    """Tests para HealthState."""
+
+    def test_not_ready_without_devices(self, state):
+        """Test que sin básculas conectadas el servicio no está listo."""
+        state.device("scale-1")
+        assert not state.is_ready()
+
+    def test_ready(self, state):
+        """Test que está listo con MQTT y al menos una báscula."""
+        state.set_connected("scale-1", True)
+        assert state.is_ready()
+
+    def test_not_ready_without_mqtt(self, state, mqtt_status):
+        """Test que sin MQTT no está listo."""
+        state.set_connected("scale-1", True)
+        mqtt_status["connected"] = False
+        assert not state.is_ready()
+
+    def test_reconnect_tracking(self, state):
+        """Test del seguimiento de reconexiones."""
+        state.set_reconnecting("scale-1")
+        state.set_reconnecting("scale-1")
+        assert state.devices["scale-1"].reconnect_attempts == 2
+
+        state.set_connected("scale-1", True)
+        assert not state.devices["scale-1"].reconnecting
+        assert state.devices["scale-1"].reconnect_attempts == 0
+
+    def test_read_clears_error(self, state):
+        """Test que una lectura exitosa limpia el último error."""
+        state.record_error("scale-1", "timeout")
+        state.record_read("scale-1")
+        assert state.devices["scale-1"].last_error is None
+
+
+class TestHealthServer:
+    """Tests para HealthServer."""
+
+    def test_healthz(self, server, state):
+        """Test de /healthz."""
+        state.set_connected("scale-1", True)
+        state.device("scale-2")
+
+        status, body = _get(server, "/healthz")
+
+        assert status == 200
+        assert body["status"] == "ok"
+        assert body["devicesConnected"] == 1
+        assert body["devicesTotal"] == 2
+
+    def test_readyz_ready(self, server, state):
+        """Test de /readyz con el servicio listo."""
+        state.set_connected("scale-1", True)
+        state.record_read("scale-1")
+
+        status, body = _get(server, "/readyz")
+
+        assert status == 200
+        assert body["ready"] is True
+        assert body["devices"]["scale-1"]["lastReadAge"] >= 0
+
+    def test_readyz_read_timeout(self, server, state):
+        """Test que /readyz expone el timeout aprendido del lector."""
+        adaptive = AdaptiveTimeout(0.05, 1.0, warmup=1)
+        adaptive.observe(0.1)
+        state.set_connected("scale-1", True)
+        state.device("scale-1").read_timeout = adaptive
+
+        _, body = _get(server, "/readyz")
+
+        assert body["devices"]["scale-1"]["readTimeout"]["interval"] == 0.1
+        assert body["devices"]["scale-1"]["readTimeout"]["learned"] is True
+
+    def test_readyz_not_ready(self, server, state, mqtt_status):
+        """Test que /readyz retorna 503 si no está listo."""
+        mqtt_status["connected"] = False
+        state.set_connected("scale-1", True)
+
+        status, body = _get(server, "/readyz")
+
+        assert status == 503
+        assert body["ready"] is False
+
+    def test_unknown_path(self, server):
+        """Test que una ruta desconocida retorna 404."""
+        status, _ = _get(server, "/metrics")
+        assert status == 404
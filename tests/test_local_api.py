@@ -0,0 +1,138 @@
+"""Tests para la API local sobre socket Unix."""
+
+import os
+import socket
+import struct
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from scale_telemetry.config import DeviceConfig, MQTTConfig
+from scale_telemetry.local_api import LocalAPIClient, LocalAPIServer
+from scale_telemetry.mqtt_client import ScaleMQTTClient
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return str(tmp_path / "api.sock")
+
+
+@pytest.fixture
+def server(socket_path):
+    """Servidor con un despacho que responde desde otro hilo."""
+    calls = []
+
+    def dispatch(device_id, payload, reply):
+        calls.append((device_id, payload))
+        response = {"deviceId": device_id, "command": payload.get("command")}
+        threading.Thread(target=reply, args=(response,)).start()
+
+    server = LocalAPIServer(socket_path, dispatch)
+    server.calls = calls
+    server.start()
+    yield server
+    server.stop()
+
+
+class TestLocalAPIServer:
+    """Tests para LocalAPIServer y LocalAPIClient."""
+
+    def test_request_response(self, server, socket_path):
+        """Test de una petición y su respuesta."""
+        with LocalAPIClient(socket_path) as client:
+            response = client.request("scale-1", "get_weight")
+
+        assert response == {"deviceId": "scale-1", "command": "get_weight"}
+        assert server.calls == [("scale-1", {"command": "get_weight"})]
+
+    def test_many_concurrent_connections(self, server, socket_path):
+        """Test que el hilo del servidor atiende muchas conexiones a la vez."""
+        clients = [LocalAPIClient(socket_path) for _ in range(50)]
+        results = [None] * len(clients)
+
+        def run(i):
+            results[i] = clients[i].request(f"scale-{i}", "get_weight")["deviceId"]
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(len(clients))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+        for client in clients:
+            client.close()
+
+        assert results == [f"scale-{i}" for i in range(len(clients))]
+
+    def test_pipelined_requests(self, server, socket_path):
+        """Test que varias peticiones en un solo envío se responden con su id."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(5)
+        sock.connect(socket_path)
+        data = b""
+        for request_id in (7, 8):
+            device, body = b"scale-1", b'{"command": "tare"}'
+            header = struct.pack(">IHH", request_id, len(device), len(body))
+            data += header + device + body
+        # Partido en dos envíos: la petición incompleta espera al resto
+        sock.sendall(data[:10])
+        sock.sendall(data[10:])
+
+        ids = set()
+        for _ in range(2):
+            header = sock.recv(8, socket.MSG_WAITALL)
+            request_id, length = struct.unpack(">II", header)
+            sock.recv(length, socket.MSG_WAITALL)
+            ids.add(request_id)
+        sock.close()
+
+        assert ids == {7, 8}
+
+    def test_invalid_payload(self, server, socket_path):
+        """Test que un payload que no es JSON se responde con error."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(5)
+        sock.connect(socket_path)
+        sock.sendall(struct.pack(">IHH", 1, 7, 3) + b"scale-1" + b"{{{")
+        _, length = struct.unpack(">II", sock.recv(8, socket.MSG_WAITALL))
+        body = sock.recv(length, socket.MSG_WAITALL)
+        sock.close()
+
+        assert b"Formato de comando inv" in body
+        assert server.calls == []
+
+    def test_stop_removes_socket(self, socket_path):
+        """Test que stop() elimina el archivo del socket."""
+        server = LocalAPIServer(socket_path, Mock())
+        server.start()
+        assert os.path.exists(socket_path)
+        server.stop()
+        assert not os.path.exists(socket_path)
+
+
+class TestDispatchThroughMQTTClient:
+    """Tests de la API local sobre el despacho del cliente MQTT."""
+
+    def test_get_weight_and_unknown_device(self, socket_path):
+        """Test que get_weight usa el mismo despacho que MQTT, sin publicar."""
+        devices = [DeviceConfig(device_id="scale-1", serial_port="/dev/ttyUSB0")]
+        client = ScaleMQTTClient(
+            MQTTConfig(broker="localhost"), devices, {"scale-1": Mock(return_value=12.5)}
+        )
+        client.client.publish = Mock()
+        server = LocalAPIServer(socket_path, client.dispatch)
+        server.start()
+        try:
+            with LocalAPIClient(socket_path) as api:
+                ok = api.request("scale-1", {"command": "get_weight", "unit": "g"})
+                missing = api.request("scale-9", "get_weight")
+        finally:
+            server.stop()
+            client._executor.shutdown()
+
+        assert ok["status"] == "ok"
+        assert ok["weight"] == 12500.0
+        assert ok["unit"] == "g"
+        assert missing["status"] == "error"
+        assert "no registrado" in missing["message"]
+        client.client.publish.assert_not_called()
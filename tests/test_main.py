@@ -1,31 +1,96 @@
 """Tests para el servicio principal de telemetría."""
 
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock, patch
 
 import pytest
 import serial
 
-from scale_telemetry.config import DeviceConfig, MQTTConfig
+from scale_telemetry.alarms import AlarmEngine
+from scale_telemetry.backfill import HistoryStore
+from scale_telemetry.config import (
+    DeviceConfig,
+    MQTTConfig,
+    ServiceConfig,
+    WeighmentConfig,
+)
+from scale_telemetry.fake_source import FakeSource
+from scale_telemetry.filters import FilterChain
+from scale_telemetry.health import HealthState
 from scale_telemetry.main import ScaleTelemetryService
+from scale_telemetry.modbus import ModbusGateway, ModbusReader
+from scale_telemetry.mqtt_client import ScaleMQTTClient
+from scale_telemetry.poll_bus import BusReader, PollBus
+from scale_telemetry.profiling import Profiler
+from scale_telemetry.registry import DeviceRegistry
+from scale_telemetry.serial_hub import HubReader, SerialHub
 from scale_telemetry.serial_reader import ScaleReader
+from scale_telemetry.shm_table import WeightTable
+from scale_telemetry.sinks import OutputSinks
+from scale_telemetry.state import DeviceStateTracker
+from scale_telemetry.weighment import WeighmentDetector
 
 
 @pytest.fixture
-def service():
+def service(tmp_path):
     """Fixture con servicio configurado manualmente."""
     with patch.object(ScaleTelemetryService, '__init__', lambda self: None):
         svc = ScaleTelemetryService()
         svc.mqtt_config = MQTTConfig(broker="localhost", port=1883)
+        svc.service_config = ServiceConfig()
         svc.devices = [
             DeviceConfig(device_id="scale-1", serial_port="/dev/ttyUSB0"),
         ]
         svc.device_configs = {"scale-1": svc.devices[0]}
-        svc.scale_readers = {}
+        svc.registry = DeviceRegistry()
+        svc._reconnect_locks = {"scale-1": threading.Lock()}
+        svc._shared_lock = threading.Lock()
+        svc.serial_hub = None
+        svc.poll_buses = {}
+        svc.modbus_gateways = {}
         svc.mqtt_client = None
+        svc.health = HealthState(lambda: False)
+        svc.health_server = None
+        svc.capture = None
+        svc.shm_table = None
+        svc.local_api = None
+        svc.tracer = None
+        svc.sinks = None
+        svc.history = None
+        svc.backfiller = None
+        svc.profiler = Profiler(str(tmp_path), stats=svc._load)
+        svc.published_states = []
+        svc.device_state = DeviceStateTracker(
+            lambda device_id, state: svc.published_states.append(state)
+        )
+        svc.filters = {}
+        svc.weighments = {}
+        svc.alarms = {}
         svc.running = False
         return svc
 
 
+def test_import_main_skips_optional_features():
+    """Test que importar main no carga los módulos de funciones deshabilitadas."""
+    optional = (
+        "backfill", "capture", "filters", "health_server", "local_api",
+        "modbus", "poll_bus", "profiling", "serial_hub", "shm_table", "weighment",
+    )
+    code = (
+        "import sys, scale_telemetry.main; "
+        f"optional = {optional!r}; "
+        "print(sorted(m for m in optional if 'scale_telemetry.' + m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
 class TestGetWeightReconnect:
     """Tests para reconexión automática de dispositivos serial."""
 
@@ -33,12 +98,14 @@ class TestGetWeightReconnect:
         """Test de lectura exitosa sin reconexión."""
         mock_reader = MagicMock(spec=ScaleReader)
         mock_reader.read_weight.return_value = 50.0
-        service.scale_readers["scale-1"] = mock_reader
+        service.registry.register(service.device_configs["scale-1"], reader=mock_reader)
 
         weight = service._get_weight("scale-1")
 
         assert weight == 50.0
         mock_reader.read_weight.assert_called_once()
+        assert service.health.devices["scale-1"].last_read is not None
+        assert service.published_states[-1]["weight"] == 50.0
 
     def test_get_weight_no_reader(self, service):
         """Test que lanza error si no hay reader."""
@@ -55,7 +122,7 @@ class TestGetWeightReconnect:
         broken_reader.read_weight.side_effect = serial.SerialException(
             "USB desconectado"
         )
-        service.scale_readers["scale-1"] = broken_reader
+        service.registry.register(service.device_configs["scale-1"], reader=broken_reader)
 
         # Nuevo reader que funciona después de reconectar
         new_reader = MagicMock(spec=ScaleReader)
@@ -71,6 +138,37 @@ class TestGetWeightReconnect:
         new_reader.connect.assert_called_once()
         # Verificar que reemplazó el reader
         assert service.scale_readers["scale-1"] is new_reader
+        health = service.health.devices["scale-1"]
+        assert health.connected
+        assert not health.reconnecting
+
+    @patch('scale_telemetry.main.ScaleReader')
+    def test_concurrent_serial_errors_reconnect_once(
+        self, mock_reader_class, service
+    ):
+        """Test que dos lecturas fallidas a la vez reconectan una sola vez."""
+        both_reading = threading.Barrier(2, timeout=5)
+
+        def fail(*args):
+            both_reading.wait()
+            raise serial.SerialException("USB desconectado")
+
+        broken_reader = MagicMock(spec=ScaleReader)
+        broken_reader.read_weight.side_effect = fail
+        service.registry.register(service.device_configs["scale-1"], reader=broken_reader)
+
+        new_reader = MagicMock(spec=ScaleReader)
+        new_reader.read_weight.return_value = 75.0
+        mock_reader_class.return_value = new_reader
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            weights = list(pool.map(lambda _: service._get_weight("scale-1"), range(2)))
+
+        assert weights == [75.0, 75.0]
+        mock_reader_class.assert_called_once()
+        broken_reader.disconnect.assert_called_once()
+        new_reader.disconnect.assert_not_called()
+        assert service.scale_readers["scale-1"] is new_reader
 
     @patch('scale_telemetry.main.ScaleReader')
     def test_get_weight_reconnect_fails(self, mock_reader_class, service):
@@ -80,7 +178,7 @@ class TestGetWeightReconnect:
         broken_reader.read_weight.side_effect = serial.SerialException(
             "USB desconectado"
         )
-        service.scale_readers["scale-1"] = broken_reader
+        service.registry.register(service.device_configs["scale-1"], reader=broken_reader)
 
         # Reconexión también falla
         new_reader = MagicMock(spec=ScaleReader)
@@ -91,3 +189,526 @@ class TestGetWeightReconnect:
 
         with pytest.raises(RuntimeError, match="No se pudo reconectar"):
             service._get_weight("scale-1")
+
+        health = service.health.devices["scale-1"]
+        assert not health.connected
+        assert health.reconnecting
+        assert health.last_error is not None
+
+
+    @patch('scale_telemetry.main.ScaleReader')
+    def test_failed_reconnect_retries_on_next_read(self, mock_reader_class, service):
+        """Test que tras una reconexión fallida la siguiente lectura vuelve a reconectar."""
+        broken_reader = MagicMock(spec=ScaleReader)
+        broken_reader.read_weight.side_effect = serial.SerialException(
+            "USB desconectado"
+        )
+        service.registry.register(service.device_configs["scale-1"], reader=broken_reader)
+
+        unavailable = MagicMock(spec=ScaleReader)
+        unavailable.connect.side_effect = serial.SerialException("Puerto no disponible")
+        healthy = MagicMock(spec=ScaleReader)
+        healthy.read_weight.return_value = 42.0
+        mock_reader_class.side_effect = [unavailable, healthy]
+
+        with pytest.raises(RuntimeError, match="No se pudo reconectar"):
+            service._get_weight("scale-1")
+        # El dispositivo conserva un lector: las lecturas periódicas lo incluyen
+        assert "scale-1" in service.scale_readers
+
+        assert service._get_weight("scale-1") == 42.0
+        assert service.scale_readers["scale-1"] is healthy
+        assert service.health.devices["scale-1"].connected
+
+class TestExecuteCommand:
+    """Tests para comandos de la báscula en el servicio."""
+
+    def test_execute_command(self, service):
+        """Test que el comando se delega al lector del dispositivo."""
+        reader = MagicMock(spec=ScaleReader)
+        reader.execute_command.return_value = 0.0
+        service.registry.register(service.device_configs["scale-1"], reader=reader)
+
+        assert service._execute_command("scale-1", "tare", True) == 0.0
+        reader.execute_command.assert_called_once_with("tare", True)
+
+    @patch('scale_telemetry.main.ScaleReader')
+    def test_execute_command_does_not_retry(self, mock_reader_class, service):
+        """Test que un error serial no reintenta un comando no idempotente."""
+        reader = MagicMock(spec=ScaleReader)
+        reader.execute_command.side_effect = serial.SerialException("USB")
+        service.registry.register(service.device_configs["scale-1"], reader=reader)
+
+        with pytest.raises(serial.SerialException):
+            service._execute_command("scale-1", "tare")
+
+        reader.execute_command.assert_called_once()
+        mock_reader_class.assert_not_called()
+
+
+class TestFilters:
+    """Tests para el filtrado de las lecturas en el servicio."""
+
+    @pytest.fixture
+    def filtered(self, service):
+        service.filters["scale-1"] = FilterChain.from_config(
+            [{"type": "median", "window": 3}]
+        )
+        return service
+
+    def test_get_weight_returns_filtered_value(self, filtered):
+        """Test que get_weight y el estado usan el peso filtrado."""
+        reader = MagicMock(spec=ScaleReader)
+        reader.read_weight.side_effect = [100.0, 100.0, 900.0]
+        filtered.registry.register(filtered.device_configs["scale-1"], reader=reader)
+
+        weights = [filtered._get_weight("scale-1") for _ in range(3)]
+
+        assert weights == [100.0, 100.0, 100.0]
+        assert filtered.published_states[-1]["weight"] == 100.0
+
+    def test_command_resets_filters(self, filtered):
+        """Test que una tara descarta la historia del filtro."""
+        reader = MagicMock(spec=ScaleReader)
+        reader.read_weight.return_value = 500.0
+        reader.execute_command.return_value = 0.0
+        filtered.registry.register(filtered.device_configs["scale-1"], reader=reader)
+        for _ in range(3):
+            filtered._get_weight("scale-1")
+
+        assert filtered._execute_command("scale-1", "tare", True) == 0.0
+
+
+class TestSharedTable:
+    """Tests para la tabla de pesos en memoria compartida."""
+
+    def test_samples_and_connection_published(self, service):
+        """Test que las lecturas y la conexión se escriben en la tabla."""
+        service.shm_table = MagicMock(spec=WeightTable)
+        reader = MagicMock(spec=ScaleReader)
+        reader.read_weight.return_value = 45.3
+        service.registry.register(service.device_configs["scale-1"], reader=reader)
+
+        service._get_weight("scale-1")
+        service._set_connected("scale-1", False)
+
+        service.shm_table.update.assert_called_once_with("scale-1", 45.3)
+        service.shm_table.set_connected.assert_called_once_with("scale-1", False)
+
+
+class TestWeighmentEvents:
+    """Tests para la detección de pesajes en el servicio."""
+
+    def test_event_published_on_unload(self, service):
+        """Test que las lecturas alimentan el detector y el evento se publica."""
+        service.weighments["scale-1"] = WeighmentDetector(
+            "scale-1", WeighmentConfig(threshold=10.0, stable_samples=2)
+        )
+        service.mqtt_client = MagicMock()
+        reader = MagicMock(spec=ScaleReader)
+        reader.read_weight.side_effect = [500.0, 500.0, 0.0]
+        service.registry.register(service.device_configs["scale-1"], reader=reader)
+
+        for _ in range(3):
+            service._get_weight("scale-1")
+
+        service.mqtt_client.publish_event.assert_called_once()
+        topic, event = service.mqtt_client.publish_event.call_args.args
+        assert topic == "pesanet/devices/scale-1/events"
+        assert event["weight"] == 500.0
+        assert event["samples"] == 2
+
+    def test_sample_loop_reads_periodically(self, service):
+        """Test que sample_interval genera lecturas sin comandos."""
+        device = DeviceConfig(
+            device_id="scale-1", serial_port="/dev/ttyUSB0", sample_interval=0.01
+        )
+        reader = MagicMock(spec=ScaleReader)
+        reader.read_weight.return_value = 12.0
+        service.registry.register(service.device_configs["scale-1"], reader=reader)
+        service.running = True
+
+        def stop_after_reads(*args):
+            if reader.read_weight.call_count >= 3:
+                service.running = False
+            return 12.0
+
+        reader.read_weight.side_effect = stop_after_reads
+        service._sample_loop(device)
+
+        assert reader.read_weight.call_count == 3
+        assert service.published_states[-1]["weight"] == 12.0
+
+
+class TestAlarms:
+    """Tests para las alarmas en el servicio."""
+
+    def test_transitions_published(self, service):
+        """Test que solo se publican las transiciones en el tópico de alarmas."""
+        service.alarms["scale-1"] = AlarmEngine.from_config(
+            "scale-1", [{"name": "overload", "above": 1000}]
+        )
+        service.mqtt_client = MagicMock()
+        reader = MagicMock(spec=ScaleReader)
+        reader.read_weight.side_effect = [500.0, 1200.0, 1300.0, 1250.0, 800.0, 700.0]
+        service.registry.register(service.device_configs["scale-1"], reader=reader)
+
+        for _ in range(6):
+            service._get_weight("scale-1")
+
+        calls = service.mqtt_client.publish_event.call_args_list
+        assert [c.args[0] for c in calls] == ["pesanet/devices/scale-1/alarms"] * 2
+        assert [c.args[1]["state"] for c in calls] == ["active", "cleared"]
+        assert calls[0].args[1]["weight"] == 1200.0
+
+
+class TestSideEffectIsolation:
+    """Tests del aislamiento de las etapas posteriores a una lectura válida."""
+
+    def test_failing_stages_do_not_fail_read(self, service):
+        """Test que un error en salidas, tabla, pesajes o alarmas no falla la lectura."""
+        service.sinks = MagicMock(spec=OutputSinks)
+        service.sinks.write.side_effect = RuntimeError("salida rota")
+        service.shm_table = MagicMock(spec=WeightTable)
+        service.shm_table.update.side_effect = OSError("segmento cerrado")
+        service.weighments["scale-1"] = MagicMock(spec=WeighmentDetector)
+        service.weighments["scale-1"].update.side_effect = TypeError("umbral inválido")
+        service.alarms["scale-1"] = MagicMock(spec=AlarmEngine)
+        service.alarms["scale-1"].update.side_effect = ValueError("regla inválida")
+        reader = MagicMock(spec=ScaleReader)
+        reader.read_weight.return_value = 50.0
+        service.registry.register(service.device_configs["scale-1"], reader=reader)
+
+        assert service._get_weight("scale-1") == 50.0
+        service.alarms["scale-1"].update.assert_called_once_with(50.0)
+        assert service.published_states[-1]["weight"] == 50.0
+
+class TestOutputSinks:
+    """Tests para las salidas adicionales en el servicio."""
+
+    def test_processed_samples_written(self, service):
+        """Test que las lecturas filtradas llegan a las salidas."""
+        service.sinks = MagicMock(spec=OutputSinks)
+        service.filters["scale-1"] = FilterChain.from_config([{"type": "ema", "alpha": 0.5}])
+        reader = MagicMock(spec=ScaleReader)
+        reader.read_weight.side_effect = [10.0, 20.0]
+        service.registry.register(service.device_configs["scale-1"], reader=reader)
+
+        service._get_weight("scale-1")
+        service._get_weight("scale-1")
+
+        assert [c.args for c in service.sinks.write.call_args_list] == [
+            ("scale-1", 10.0),
+            ("scale-1", 15.0),
+        ]
+
+    def test_load_includes_sinks(self, service):
+        """Test que la carga del servicio incluye los contadores de las salidas."""
+        service.sinks = MagicMock(spec=OutputSinks)
+        service.sinks.stats.return_value = {"csv": {"pending": 3}}
+        assert service._load() == {"sinks": {"csv": {"pending": 3}}}
+
+
+class TestBackfillHistory:
+    """Tests para el historial sin conexión en el servicio."""
+
+    def test_history_only_while_offline(self, service):
+        """Test que las lecturas se guardan en el historial solo sin broker."""
+        service.history = MagicMock(spec=HistoryStore)
+        service.mqtt_client = MagicMock()
+        reader = MagicMock(spec=ScaleReader)
+        reader.read_weight.side_effect = [10.0, 20.0]
+        service.registry.register(service.device_configs["scale-1"], reader=reader)
+
+        service.mqtt_client.connected = True
+        service._get_weight("scale-1")
+        service.mqtt_client.connected = False
+        service._get_weight("scale-1")
+
+        reading = service.history.write.call_args.args[0]
+        service.history.write.assert_called_once()
+        assert (reading.device_id, reading.weight) == ("scale-1", 20.0)
+
+    def test_reconnect_triggers_backfill(self, service):
+        """Test que al reconectar se republica el estado y se lanza el backfill."""
+        service.backfiller = MagicMock()
+        service.device_state = MagicMock()
+        service._on_mqtt_connected()
+        service.device_state.republish.assert_called_once()
+        service.backfiller.trigger.assert_called_once()
+
+    def test_chunk_published_on_device_topic(self, service):
+        """Test que cada chunk se publica en el tópico de backfill del dispositivo."""
+        service.mqtt_client = MagicMock()
+        service._publish_backfill("scale-1", b"chunk")
+        service.mqtt_client.publish_backfill.assert_called_once_with(
+            "pesanet/devices/scale-1/backfill", b"chunk"
+        )
+
+
+class TestCreateReader:
+    """Tests para la creación de lectores según el modo del servicio."""
+
+    def test_blocking_reader_by_default(self, service):
+        """Test que sin hub se crea un ScaleReader."""
+        reader = service._create_reader(service.devices[0])
+        assert isinstance(reader, ScaleReader)
+
+    def test_hub_reader_when_hub_enabled(self, service):
+        """Test que con hub se crea un lector atendido por el hub."""
+        service.serial_hub = SerialHub()
+        try:
+            reader = service._create_reader(service.devices[0])
+            assert isinstance(reader, HubReader)
+            assert reader.config.port == "/dev/ttyUSB0"
+        finally:
+            service.serial_hub.stop()
+
+    def test_addressed_devices_share_bus(self, service):
+        """Test que las básculas direccionadas en un puerto comparten el bus."""
+        devices = [
+            DeviceConfig(
+                device_id=f"scale-{a}",
+                serial_port="/dev/ttyRS485",
+                poll_request="{address}P\r",
+                address=a,
+            )
+            for a in ("01", "02")
+        ]
+
+        with patch("scale_telemetry.poll_bus.PollBus", wraps=PollBus) as bus_class:
+            readers = [service._create_reader(d) for d in devices]
+
+        assert all(isinstance(r, BusReader) for r in readers)
+        assert list(service.poll_buses) == ["/dev/ttyRS485"]
+        bus_class.assert_called_once()
+
+    def test_modbus_devices_share_gateway(self, service):
+        """Test que las básculas Modbus de un host comparten el gateway."""
+        devices = [
+            DeviceConfig(
+                device_id=f"scale-{unit}",
+                serial_port="tcp://10.0.0.5:502",
+                source="modbus",
+                modbus={"unit_id": unit, "register": 10},
+            )
+            for unit in (1, 2)
+        ]
+
+        with patch(
+            "scale_telemetry.modbus.ModbusGateway", wraps=ModbusGateway
+        ) as gateway_class:
+            readers = [service._create_reader(d) for d in devices]
+
+        assert all(isinstance(r, ModbusReader) for r in readers)
+        gateway_class.assert_called_once()
+        assert [r.config.unit_id for r in readers] == [1, 2]
+        assert list(service.modbus_gateways) == ["tcp://10.0.0.5:502"]
+
+    @pytest.mark.parametrize("first,second", [
+        ({"source": "modbus", "modbus": {"unit_id": 1}},
+         {"source": "modbus", "modbus": {"unit_id": 2}}),
+        ({"address": "01", "poll_request": "P{address}\r"},
+         {"address": "02", "poll_request": "P{address}\r"}),
+    ])
+    def test_mismatched_shared_link_fails_startup(self, service, first, second):
+        """Test que dispositivos incompatibles en un bus compartido fallan antes de abrir puertos."""
+        service.devices = [
+            DeviceConfig(device_id="scale-1", serial_port="/dev/ttyUSB0", **first),
+            DeviceConfig(
+                device_id="scale-2", serial_port="/dev/ttyUSB0", baudrate=19200, **second
+            ),
+        ]
+        with pytest.raises(ValueError, match="no coincide"):
+            service._check_shared_links()
+
+    def test_fake_source(self, service):
+        """Test que las básculas "fake" usan la simulación en memoria."""
+        device = DeviceConfig(
+            device_id="scale-f", serial_port="", source="fake",
+            fake={"frames": [1.5]},
+        )
+
+        reader = service._create_reader(device)
+
+        assert isinstance(reader, FakeSource)
+        assert reader.config.frames == [1.5]
+
+    def test_unknown_source(self, service):
+        """Test que un origen desconocido lanza error."""
+        device = DeviceConfig(
+            device_id="scale-x", serial_port="/dev/ttyUSB0", source="opcua"
+        )
+        with pytest.raises(ValueError, match="Origen de peso no soportado"):
+            service._create_reader(device)
+
+
+class TestParallelConnect:
+    """Tests para la apertura paralela de puertos al iniciar."""
+
+    @staticmethod
+    def _slow_reader(delay: float, fail: bool = False):
+        reader = MagicMock(spec=ScaleReader)
+
+        def connect():
+            time.sleep(delay)
+            if fail:
+                raise serial.SerialException("Puerto no disponible")
+
+        reader.connect.side_effect = connect
+        return reader
+
+    @pytest.fixture
+    def many_devices(self, service):
+        service.devices = [
+            DeviceConfig(device_id=f"scale-{i}", serial_port=f"/dev/ttyUSB{i}")
+            for i in range(10)
+        ]
+        service.device_configs = {d.device_id: d for d in service.devices}
+        return service
+
+    def test_ports_open_concurrently(self, many_devices):
+        """Test que diez aperturas lentas no se ejecutan en serie."""
+        many_devices._create_reader = lambda device: self._slow_reader(0.1)
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            start = time.monotonic()
+            connected, failed = many_devices._connect_devices(pool)
+            elapsed = time.monotonic() - start
+
+        assert len(connected) == 10
+        assert failed == []
+        assert elapsed < 0.5
+
+    def test_deadline_moves_slow_ports_to_retry(self, many_devices):
+        """Test que los puertos que exceden el plazo se marcan como fallidos."""
+        many_devices.service_config = ServiceConfig(connect_timeout=0.1)
+        readers = {}
+
+        def create(device):
+            slow = device.device_id == "scale-0"
+            readers[device.device_id] = self._slow_reader(1.0 if slow else 0.0)
+            return readers[device.device_id]
+
+        many_devices._create_reader = create
+        pool = ThreadPoolExecutor(max_workers=10)
+        connected, failed = many_devices._connect_devices(pool)
+        pool.shutdown(wait=True)
+
+        assert [d.device_id for d in failed] == ["scale-0"]
+        assert len(connected) == 9
+        # La apertura tardía se cierra al terminar
+        readers["scale-0"].disconnect.assert_called_once()
+
+    def test_mqtt_loop_starts_before_ports_open(self, many_devices):
+        """Test que el loop MQTT (la suscripción) no espera la apertura de los puertos."""
+        many_devices._create_reader = lambda device: self._slow_reader(0.5)
+        loop_started = threading.Event()
+        with patch.object(ScaleMQTTClient, "connect"), \
+                patch.object(ScaleMQTTClient, "start", lambda c: loop_started.set()), \
+                patch("scale_telemetry.main.signal.signal"):
+            thread = threading.Thread(target=many_devices.start, daemon=True)
+            thread.start()
+            try:
+                assert loop_started.wait(0.4)
+                assert not many_devices.running
+                deadline = time.monotonic() + 5
+                while not many_devices.running and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                assert len(many_devices.scale_readers) == 10
+            finally:
+                many_devices.stop()
+                thread.join(5)
+        assert not thread.is_alive()
+
+    def test_connect_errors_reported_as_failed(self, many_devices):
+        """Test que los errores de apertura se reportan como fallidos."""
+        many_devices._create_reader = lambda device: self._slow_reader(0, fail=True)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            connected, failed = many_devices._connect_devices(pool)
+
+        assert connected == []
+        assert len(failed) == 10
+
+
+class TestAdmin:
+    """Tests para los comandos de administración del servicio."""
+
+    def test_profile_command(self, service):
+        """Test que profile lanza el perfil y responde al iniciar y al terminar."""
+        replies = []
+        service._handle_admin({"command": "profile", "duration": 0.1}, replies.append)
+        service.profiler._thread.join(5)
+
+        assert replies[0]["status"] == "started"
+        assert replies[1]["status"] == "ok"
+        assert replies[1]["profile"].endswith(".folded")
+
+    def test_profile_already_running(self, service):
+        """Test que un segundo perfil responde error."""
+        replies = []
+        service._handle_admin({"command": "profile", "duration": 5}, replies.append)
+        service._handle_admin({"command": "profile"}, replies.append)
+        service.profiler.stop()
+
+        assert replies[1]["status"] == "error"
+        assert "en curso" in replies[1]["message"]
+
+    def test_profile_invalid_duration(self, service):
+        """Test que una duración inválida responde error."""
+        replies = []
+        service._handle_admin({"command": "profile", "duration": "x"}, replies.append)
+        assert replies[0]["status"] == "error"
+
+    def test_profile_signal_error_is_logged(self, service):
+        """Test que un error del perfil no sale del manejador de SIGUSR1."""
+        service.profiler = MagicMock()
+        service.profiler.trigger.side_effect = ValueError("Duración de perfil inválida")
+
+        service._profile_signal_handler(10, None)
+
+        service.profiler.trigger.assert_called_once_with()
+
+    def test_stacks_command_off_caller_thread(self, service):
+        """Test que stacks responde desde el perfilador, no desde el hilo de MQTT."""
+        done = threading.Event()
+        replies = []
+
+        def reply(report):
+            replies.append((threading.current_thread().name, report))
+            done.set()
+
+        service._handle_admin({"command": "stacks"}, reply)
+        assert done.wait(5)
+
+        name, report = replies[0]
+        assert name == "profiler-stacks"
+        assert report["status"] == "ok"
+        assert report["stacks"].endswith(".txt")
+
+    def test_load_command(self, service):
+        """Test del comando load con el cliente MQTT."""
+        service.mqtt_client = MagicMock()
+        service.mqtt_client.load.return_value = {"executorQueue": 3}
+        replies = []
+        service._handle_admin({"command": "load"}, replies.append)
+        assert replies[0]["load"] == {"executorQueue": 3}
+
+    def test_unknown_command(self, service):
+        """Test de un comando de administración desconocido."""
+        replies = []
+        service._handle_admin({"command": "reboot"}, replies.append)
+        assert replies[0]["status"] == "error"
+
+
+class TestReadTimeoutHealth:
+    """Tests de la exposición del timeout adaptativo en la salud."""
+
+    def test_set_connected_exposes_read_timeout(self, service):
+        """Test que al conectar se expone el timeout del lector actual."""
+        reader = MagicMock(spec=ScaleReader)
+        reader.read_timeout = MagicMock()
+        service.registry.register(service.device_configs["scale-1"], reader=reader)
+
+        service._set_connected("scale-1", True)
+
+        assert service.health.device("scale-1").read_timeout is reader.read_timeout
@@ -0,0 +1,203 @@
+"""Tests para el origen de peso Modbus RTU/TCP."""
+
+import pytest
+import serial
+
+from scale_telemetry.config import ModbusConfig
+from scale_telemetry.modbus import ModbusGateway, _Job, crc16, decode_registers
+
+from .modbus_simulator import ModbusSimulator
+
+
+@pytest.fixture
+def simulator():
+    """Fixture con tres indicadores: unidades 1 y 2 (peso en 0-1), 3 (en 100)."""
+    sim = ModbusSimulator({1: {}, 2: {}, 3: {}})
+    sim.set_weight32(1, 0, 12345)
+    sim.set_weight32(2, 0, -250)
+    sim.set_weight32(3, 100, 7)
+    sim.units[1][2] = 1  # Estado (estable)
+    sim.units[1][40] = 0  # Registro de comandos
+    yield sim
+    sim.close()
+
+
+def _attach(gateway: ModbusGateway, configs: list[ModbusConfig]):
+    readers = [gateway.reader(c) for c in configs]
+    for reader in readers:
+        reader.connect()
+    return readers
+
+
+class TestEncoding:
+    """Tests de codificación del protocolo."""
+
+    def test_crc16(self):
+        """Test del CRC con una trama de referencia (01 03 00 00 00 0A)."""
+        assert crc16(bytes.fromhex("01030000000A")) == 0xCDC5
+
+    def test_decode_int32_word_order(self):
+        """Test que el orden de palabras se respeta en tipos de 32 bits."""
+        assert decode_registers([0x0001, 0x0002], "int32") == 0x00010002
+        assert decode_registers([0x0002, 0x0001], "int32", "little") == 0x00010002
+
+    def test_decode_signed_and_float(self):
+        """Test de tipos con signo y float32."""
+        assert decode_registers([0xFFFF], "int16") == -1
+        assert decode_registers([0x4148, 0x0000], "float32") == 12.5
+
+
+class TestModbusTCP:
+    """Tests contra el simulador Modbus TCP."""
+
+    def test_read_weight(self, simulator):
+        """Test de lectura con decimales implícitos."""
+        url = simulator.serve_tcp()
+        config = ModbusConfig(port=url, unit_id=1, decimals=1)
+        gateway = ModbusGateway(config)
+        (reader,) = _attach(gateway, [config])
+        try:
+            assert reader.read_weight() == 1234.5
+        finally:
+            reader.disconnect()
+
+    def test_cycle_batches_units_and_registers(self, simulator):
+        """Test que un ciclo une registros cercanos y agrupa varias unidades."""
+        url = simulator.serve_tcp()
+        configs = [
+            ModbusConfig(port=url, unit_id=1, register=0),
+            ModbusConfig(port=url, unit_id=1, register=2, data_type="uint16"),
+            ModbusConfig(port=url, unit_id=2, register=0),
+            ModbusConfig(port=url, unit_id=3, register=100),
+        ]
+        gateway = ModbusGateway(configs[0])
+        readers = _attach(gateway, configs)
+        try:
+            # Encolar con el hilo del gateway ocupado para forzar un solo ciclo
+            with gateway._cond:
+                jobs = [gateway.submit(_Job(c)) for c in configs]
+            results = [job.wait() for job in jobs]
+        finally:
+            for reader in readers:
+                reader.disconnect()
+
+        assert results == [12345, 1, -250, 7]
+        assert gateway.cycles == 1
+        # Unidad 1: una sola lectura de los registros 0-2
+        assert sorted(simulator.requests) == [
+            (1, 3, 0, 3), (2, 3, 0, 2), (3, 3, 100, 2),
+        ]
+
+    def test_missing_unit_is_device_error(self, simulator):
+        """Test que una unidad sin respuesta no afecta a las demás."""
+        url = simulator.serve_tcp()
+        config = ModbusConfig(port=url, unit_id=9)
+        gateway = ModbusGateway(config)
+        missing, ok = _attach(gateway, [config, ModbusConfig(port=url, unit_id=2)])
+        try:
+            with pytest.raises(ValueError, match="Excepción Modbus 11"):
+                missing.read_weight()
+            assert ok.read_weight() == -250
+        finally:
+            missing.disconnect()
+            ok.disconnect()
+
+    def test_silent_unit_keeps_link(self, simulator):
+        """Test que una unidad callada falla sola sin reconectar el enlace TCP."""
+        simulator.silent.add(9)
+        url = simulator.serve_tcp()
+        config = ModbusConfig(port=url, unit_id=9, timeout=0.2)
+        gateway = ModbusGateway(config)
+        silent, ok = _attach(gateway, [config, ModbusConfig(port=url, unit_id=2, timeout=0.2)])
+        try:
+            with pytest.raises(ValueError, match="no respondió"):
+                silent.read_weight()
+            assert ok.read_weight() == -250
+            assert not gateway._broken
+            assert simulator.connections == 1
+        finally:
+            silent.disconnect()
+            ok.disconnect()
+
+    def test_command_writes_register(self, simulator):
+        """Test que un comando escribe el registro configurado."""
+        url = simulator.serve_tcp()
+        config = ModbusConfig(port=url, unit_id=1, commands={"tare": "40=1"})
+        gateway = ModbusGateway(config)
+        (reader,) = _attach(gateway, [config])
+        try:
+            weight = reader.execute_command("tare", read_weight=True)
+        finally:
+            reader.disconnect()
+
+        assert simulator.units[1][40] == 1
+        assert weight == 12345
+
+    def test_connection_refused(self):
+        """Test que un gateway inaccesible lanza SerialException."""
+        config = ModbusConfig(port="tcp://127.0.0.1:1", timeout=0.5)
+        reader = ModbusGateway(config).reader(config)
+        with pytest.raises(serial.SerialException):
+            reader.connect()
+
+    def test_read_after_disconnect(self, simulator):
+        """Test que sin lectores vinculados el gateway no acepta lecturas."""
+        config = ModbusConfig(port=simulator.serve_tcp(), unit_id=1)
+        (reader,) = _attach(ModbusGateway(config), [config])
+        reader.disconnect()
+
+        with pytest.raises(serial.SerialException):
+            reader.read_weight()
+
+    @pytest.mark.parametrize("port,params", [
+        ("/dev/ttyUSB0", {"baudrate": 19200}),
+        ("/dev/ttyUSB0", {"timeout": 0.5}),
+        ("tcp://127.0.0.1:502", {"timeout": 0.5}),
+    ])
+    def test_mismatched_link_settings(self, port, params):
+        """Test que una báscula con otros parámetros del enlace falla al crearse."""
+        gateway = ModbusGateway(ModbusConfig(port=port, unit_id=1))
+        with pytest.raises(ValueError, match="no coincide con el enlace"):
+            gateway.reader(ModbusConfig(port=port, unit_id=2, **params))
+
+    def test_tcp_ignores_baudrate(self):
+        """Test que en TCP el baudrate no se compara."""
+        gateway = ModbusGateway(ModbusConfig(port="tcp://127.0.0.1:502", unit_id=1))
+        gateway.reader(ModbusConfig(port="tcp://127.0.0.1:502", unit_id=2, baudrate=19200))
+
+    def test_invalid_data_type(self, simulator):
+        """Test que un tipo de dato desconocido lanza error."""
+        config = ModbusConfig(data_type="int64")
+        with pytest.raises(ValueError, match="Tipo de dato no soportado"):
+            ModbusGateway(config).reader(config)
+
+
+class TestModbusRTU:
+    """Tests contra el simulador Modbus RTU (PTY)."""
+
+    def test_read_units_on_bus(self, simulator):
+        """Test de lectura de varias unidades en el mismo puerto RTU."""
+        port = simulator.serve_rtu()
+        configs = [
+            ModbusConfig(port=port, unit_id=1, timeout=0.2),
+            ModbusConfig(port=port, unit_id=2, timeout=0.2),
+        ]
+        gateway = ModbusGateway(configs[0])
+        readers = _attach(gateway, configs)
+        try:
+            assert [r.read_weight() for r in readers] == [12345, -250]
+        finally:
+            for reader in readers:
+                reader.disconnect()
+
+    def test_silent_unit_times_out(self, simulator):
+        """Test que una unidad que no responde falla solo esa lectura."""
+        port = simulator.serve_rtu()
+        config = ModbusConfig(port=port, unit_id=9, timeout=0.1)
+        (reader,) = _attach(ModbusGateway(config), [config])
+        try:
+            with pytest.raises(ValueError, match="no respondió"):
+                reader.read_weight()
+        finally:
+            reader.disconnect()
+
@@ -77,6 +77,41 @@ class TestScaleMQTTClient:
 
         # Verificar que se suscribe al tópico wildcard
         mock_client.subscribe.assert_called_once_with(WILDCARD_COMMAND_TOPIC)
+        assert mqtt_client.connected
+
+    def test_on_disconnect_updates_state(self, mqtt_client):
+        """Test que on_disconnect marca el cliente como desconectado."""
+        mqtt_client._on_connect(MagicMock(), None, None, 0)
+        mqtt_client._on_disconnect(None, None, 1)
+        assert not mqtt_client.connected
+
+    def test_stop_flushes_offline_before_disconnect(self, mqtt_client):
+        """Test que stop espera el estado offline y desconecta antes de detener el loop."""
+        mqtt_client.connected = True
+        mqtt_client.client = MagicMock()
+
+        mqtt_client.stop()
+
+        calls = [c[0] for c in mqtt_client.client.mock_calls]
+        assert calls == [
+            "publish", "publish().wait_for_publish", "disconnect", "loop_stop",
+        ]
+        topic, payload = mqtt_client.client.publish.call_args[0]
+        assert topic == mqtt_client.status_topic
+        assert json.loads(payload)["status"] == "offline"
+
+    def test_stop_when_offline_not_confirmed(self, mqtt_client):
+        """Test que un estado offline no confirmado no impide desconectar."""
+        mqtt_client.connected = True
+        mqtt_client.client = MagicMock()
+        mqtt_client.client.publish.return_value.wait_for_publish.side_effect = (
+            RuntimeError("Message publish failed")
+        )
+
+        mqtt_client.stop()
+
+        mqtt_client.client.disconnect.assert_called_once()
+        mqtt_client.client.loop_stop.assert_called_once()
 
     def test_handle_get_weight_command(self, mqtt_client, weight_callbacks):
         """Test de manejo del comando get_weight."""
@@ -142,6 +177,14 @@ class TestScaleMQTTClient:
         weight_callbacks["scale-2"].assert_not_called()
         mqtt_client.client.publish.assert_not_called()
 
+    def test_device_removed_before_reply(self, mqtt_client):
+        """Test que un dispositivo dado de baja con el comando encolado no rompe el handler."""
+        mqtt_client.client.publish = MagicMock()
+
+        mqtt_client._handle_get_weight("removed-device")
+
+        mqtt_client.client.publish.assert_not_called()
+
     def test_handle_unknown_command(self, mqtt_client):
         """Test de manejo de comando desconocido."""
         mqtt_client.client.publish = MagicMock()
@@ -202,3 +245,380 @@ class TestScaleMQTTClient:
         payload = json.loads(call_args[0][1])
         assert payload["deviceId"] == "scale-3"
         assert payload["weight"] == 99.9
+
+
+class TestAdmin:
+    """Tests para el tópico de administración y la carga del cliente."""
+
+    @pytest.fixture(autouse=True)
+    def enable_admin(self, mqtt_config):
+        mqtt_config.admin = True
+
+    def test_admin_disabled_by_default(self, monkeypatch):
+        """Test que el tópico de administración requiere MQTT_ADMIN=true."""
+        monkeypatch.delenv("MQTT_ADMIN", raising=False)
+        assert MQTTConfig().admin is False
+        monkeypatch.setenv("MQTT_ADMIN", "true")
+        assert MQTTConfig().admin is True
+
+    def _admin_msg(self, mqtt_client, payload):
+        msg = MagicMock()
+        msg.topic = mqtt_client.admin_topic
+        msg.payload = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        return msg
+
+    def test_subscribes_admin_topic(self, mqtt_client):
+        """Test que con admin_callback se suscribe al tópico de administración."""
+        mqtt_client.admin_callback = Mock()
+        mock_client = MagicMock()
+        mqtt_client._on_connect(mock_client, None, None, 0)
+        mock_client.subscribe.assert_any_call(
+            "pesanet/gateways/scale-telemetry-service/admin", qos=1
+        )
+
+    def test_admin_disabled(self, mqtt_config, devices, weight_callbacks):
+        """Test que con MQTT_ADMIN=false no se atienden comandos de administración."""
+        mqtt_config.admin = False
+        client = ScaleMQTTClient(mqtt_config, devices, weight_callbacks)
+        client.admin_callback = Mock()
+        mock_client = MagicMock()
+        client._on_connect(mock_client, None, None, 0)
+        mock_client.subscribe.assert_called_once_with(WILDCARD_COMMAND_TOPIC)
+        client._on_message(None, None, self._admin_msg(client, {"command": "load"}))
+        client.admin_callback.assert_not_called()
+
+    def test_admin_command_routed(self, mqtt_client):
+        """Test que el comando llega a admin_callback y la respuesta se publica."""
+        mqtt_client.client.publish = MagicMock()
+        mqtt_client.admin_callback = lambda payload, reply: reply({"echo": payload})
+
+        mqtt_client._on_message(None, None, self._admin_msg(
+            mqtt_client, {"command": "load"}
+        ))
+
+        topic, payload = mqtt_client.client.publish.call_args[0][:2]
+        assert topic == "pesanet/gateways/scale-telemetry-service/admin/response"
+        assert json.loads(payload) == {"echo": {"command": "load"}}
+
+    def test_admin_invalid_payload(self, mqtt_client):
+        """Test que un payload inválido responde error sin llamar al callback."""
+        mqtt_client.client.publish = MagicMock()
+        mqtt_client.admin_callback = Mock()
+
+        mqtt_client._on_message(None, None, self._admin_msg(mqtt_client, b"no-json"))
+
+        mqtt_client.admin_callback.assert_not_called()
+        payload = json.loads(mqtt_client.client.publish.call_args[0][1])
+        assert payload["status"] == "error"
+
+    def test_load_counts_in_flight(self, mqtt_config, devices, weight_callbacks):
+        """Test de las lecturas en curso por dispositivo."""
+        client = ScaleMQTTClient(mqtt_config, devices, weight_callbacks)
+        client.client.publish = MagicMock()
+        pending = []
+        client._executor.submit = lambda fn, *args: pending.append((fn, args))
+
+        client.dispatch("scale-test", {"command": "get_weight"})
+        client.dispatch("scale-test", {"command": "get_weight"})
+        client.dispatch("scale-2", {"command": "get_weight"})
+        assert client.load()["inFlight"] == {"scale-test": 2, "scale-2": 1}
+
+        for fn, args in pending:
+            fn(*args)
+        load = client.load()
+        assert load["inFlight"] == {}
+        assert load["executorQueue"] == 0
+
+
+class TestBackfillAck:
+    """Tests para las confirmaciones de backfill."""
+
+    def _ack_msg(self, device_id, payload):
+        msg = MagicMock()
+        msg.topic = f"pesanet/devices/{device_id}/backfill/ack"
+        msg.payload = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        return msg
+
+    def test_subscribes_ack_topic(self, mqtt_client):
+        """Test que con backfill_callback se suscribe a las confirmaciones."""
+        mqtt_client.backfill_callback = Mock()
+        mock_client = MagicMock()
+        mqtt_client._on_connect(mock_client, None, None, 0)
+        mock_client.subscribe.assert_any_call("pesanet/devices/+/backfill/ack", qos=1)
+
+    def test_ack_routed(self, mqtt_client, weight_callbacks):
+        """Test que la confirmación llega al callback y no se trata como comando."""
+        mqtt_client.backfill_callback = Mock()
+        mqtt_client._on_message(None, None, self._ack_msg("scale-test", {"chunk": 8}))
+        mqtt_client._on_message(None, None, self._ack_msg("scale-test", b"no json"))
+
+        mqtt_client.backfill_callback.assert_called_once_with("scale-test", {"chunk": 8})
+        weight_callbacks["scale-test"].assert_not_called()
+
+
+class TestDuplicateCommands:
+    """Tests para la supresión de comandos duplicados por requestId."""
+
+    def _msg(self, payload):
+        msg = MagicMock()
+        msg.topic = "pesanet/devices/scale-test/command"
+        msg.payload = json.dumps(payload).encode("utf-8")
+        return msg
+
+    def test_redelivery_answered_from_cache(self, mqtt_client, weight_callbacks):
+        """Test que una reentrega se responde sin volver a leer la báscula."""
+        mqtt_client.client.publish = MagicMock()
+        msg = self._msg({"command": "get_weight", "requestId": "abc-1"})
+
+        mqtt_client._on_message(None, None, msg)
+        mqtt_client._on_message(None, None, msg)
+
+        weight_callbacks["scale-test"].assert_called_once()
+        first, second = [
+            json.loads(c[0][1]) for c in mqtt_client.client.publish.call_args_list
+        ]
+        assert first == second
+        assert first["requestId"] == "abc-1"
+        assert first["weight"] == 42.5
+
+    def test_duplicate_in_flight_dropped(self, mqtt_config, devices, weight_callbacks):
+        """Test que un duplicado de un comando en curso no se ejecuta ni responde."""
+        client = ScaleMQTTClient(mqtt_config, devices, weight_callbacks)
+        client.client.publish = MagicMock()
+        pending = []
+        client._executor.submit = lambda fn, *args: pending.append((fn, args))
+        msg = self._msg({"command": "get_weight", "requestId": 7})
+
+        client._on_message(None, None, msg)
+        client._on_message(None, None, msg)
+        assert len(pending) == 1
+
+        fn, args = pending[0]
+        fn(*args)
+        assert client.client.publish.call_count == 1
+        assert json.loads(client.client.publish.call_args[0][1])["requestId"] == 7
+
+    def test_local_duplicate_in_flight_gets_response(
+        self, mqtt_config, devices, weight_callbacks
+    ):
+        """Test que un duplicado local en curso recibe la respuesta del original."""
+        client = ScaleMQTTClient(mqtt_config, devices, weight_callbacks)
+        pending = []
+        client._executor.submit = lambda fn, *args: pending.append((fn, args))
+        first, second = [], []
+        payload = {"command": "get_weight", "requestId": "r1"}
+
+        client.dispatch("scale-test", payload, first.append)
+        client.dispatch("scale-test", payload, second.append)
+        assert len(pending) == 1
+
+        fn, args = pending[0]
+        fn(*args)
+        assert first == second
+        assert second[0]["requestId"] == "r1"
+        weight_callbacks["scale-test"].assert_called_once()
+
+    def test_request_ids_per_transport(self, mqtt_client, weight_callbacks):
+        """Test que un requestId local no responde a uno MQTT igual (ni al revés)."""
+        mqtt_client.client.publish = MagicMock()
+        local = []
+        mqtt_client._on_message(None, None, self._msg(
+            {"command": "get_weight", "requestId": "r1"}
+        ))
+        mqtt_client.dispatch("scale-test", {"command": "get_weight", "requestId": "r1"}, local.append)
+
+        assert weight_callbacks["scale-test"].call_count == 2
+        assert local[0]["requestId"] == "r1"
+
+    def test_different_request_ids_executed(self, mqtt_client, weight_callbacks):
+        """Test que requestId distintos y comandos sin requestId se ejecutan."""
+        mqtt_client.client.publish = MagicMock()
+        mqtt_client._on_message(None, None, self._msg(
+            {"command": "get_weight", "requestId": "a"}
+        ))
+        mqtt_client._on_message(None, None, self._msg(
+            {"command": "get_weight", "requestId": "b"}
+        ))
+        mqtt_client._on_message(None, None, self._msg({"command": "get_weight"}))
+        mqtt_client._on_message(None, None, self._msg({"command": "get_weight"}))
+
+        assert weight_callbacks["scale-test"].call_count == 4
+        payload = json.loads(mqtt_client.client.publish.call_args[0][1])
+        assert "requestId" not in payload
+
+    def test_disabled(self, mqtt_config, devices, weight_callbacks):
+        """Test que con MQTT_DEDUPE_SIZE=0 las reentregas se ejecutan."""
+        mqtt_config.dedupe_size = 0
+        client = ScaleMQTTClient(mqtt_config, devices, weight_callbacks)
+        client._executor.submit = _sync_submit
+        client.client.publish = MagicMock()
+        msg = self._msg({"command": "get_weight", "requestId": "abc-1"})
+
+        client._on_message(None, None, msg)
+        client._on_message(None, None, msg)
+
+        assert weight_callbacks["scale-test"].call_count == 2
+
+
+class TestRateLimiting:
+    """Tests para la limitación de comandos en ScaleMQTTClient."""
+
+    @pytest.fixture
+    def limited_client(self, mqtt_config, weight_callbacks):
+        """Cliente con límite de 1 comando para scale-test."""
+        devices = [
+            DeviceConfig(
+                device_id="scale-test",
+                serial_port="/dev/ttyUSB0",
+                rate_limit=0.01,
+                rate_burst=1,
+            ),
+        ]
+        client = ScaleMQTTClient(mqtt_config, devices, weight_callbacks)
+        client._executor.submit = _sync_submit
+        client.client.publish = MagicMock()
+        return client
+
+    @staticmethod
+    def _get_weight_msg():
+        msg = MagicMock()
+        msg.topic = "pesanet/devices/scale-test/command"
+        msg.payload = json.dumps({"command": "get_weight"}).encode('utf-8')
+        return msg
+
+    def test_excess_answered_from_cache(self, limited_client, weight_callbacks):
+        """Test que el comando excedente se responde con el valor en caché."""
+        limited_client._on_message(None, None, self._get_weight_msg())
+        limited_client._on_message(None, None, self._get_weight_msg())
+
+        # Solo una lectura real
+        weight_callbacks["scale-test"].assert_called_once()
+        payload = json.loads(limited_client.client.publish.call_args[0][1])
+        assert payload["status"] == "ok"
+        assert payload["weight"] == 42.5
+        assert payload["cached"] is True
+
+    def test_excess_without_cache_rejected(self, limited_client, weight_callbacks):
+        """Test que sin valor en caché el excedente recibe un error."""
+        limited_client._rate_limiter.allow("scale-test")
+
+        limited_client._on_message(None, None, self._get_weight_msg())
+
+        weight_callbacks["scale-test"].assert_not_called()
+        payload = json.loads(limited_client.client.publish.call_args[0][1])
+        assert payload["status"] == "error"
+        assert "límite" in payload["message"].lower()
+
+    def test_saturated_publisher_answered_from_cache(self, mqtt_client, weight_callbacks):
+        """Test que con la cola de publicación saturada no se leen básculas."""
+        mqtt_client.client.publish = MagicMock()
+        mqtt_client._last_weights["scale-test"] = (40.0, 1)
+        mqtt_client.publisher.max_queued = 0
+
+        mqtt_client._on_message(None, None, self._get_weight_msg())
+
+        weight_callbacks["scale-test"].assert_not_called()
+        payload = json.loads(mqtt_client.client.publish.call_args[0][1])
+        assert payload["weight"] == 40.0
+        assert payload["cached"] is True
+
+
+class TestDeviceCommands:
+    """Tests para comandos de la báscula y conversión de unidades."""
+
+    @pytest.fixture
+    def command_client(self, mqtt_config, weight_callbacks):
+        """Cliente con un dispositivo que acepta tara y cero."""
+        devices = [
+            DeviceConfig(
+                device_id="scale-test",
+                serial_port="/dev/ttyUSB0",
+                commands={"tare": "T\r", "zero": "Z\r"},
+            ),
+        ]
+        command_callback = Mock(return_value=0.0)
+        client = ScaleMQTTClient(
+            mqtt_config, devices, weight_callbacks,
+            command_callback=command_callback,
+        )
+        client._executor.submit = _sync_submit
+        client.client.publish = MagicMock()
+        return client
+
+    @staticmethod
+    def _msg(payload: dict):
+        msg = MagicMock()
+        msg.topic = "pesanet/devices/scale-test/command"
+        msg.payload = json.dumps(payload).encode('utf-8')
+        return msg
+
+    def _last_payload(self, client):
+        return json.loads(client.client.publish.call_args[0][1])
+
+    def test_tare_then_read(self, command_client):
+        """Test que tare con read=true responde el peso leído."""
+        command_client._on_message(None, None, self._msg(
+            {"command": "tare", "read": True}
+        ))
+
+        command_client.command_callback.assert_called_once_with(
+            "scale-test", "tare", True
+        )
+        payload = self._last_payload(command_client)
+        assert payload["status"] == "ok"
+        assert payload["command"] == "tare"
+        assert payload["weight"] == 0.0
+
+    def test_zero_without_read(self, command_client):
+        """Test de comando zero sin lectura."""
+        command_client.command_callback.return_value = None
+        command_client._on_message(None, None, self._msg({"command": "zero"}))
+
+        command_client.command_callback.assert_called_once_with(
+            "scale-test", "zero", False
+        )
+        payload = self._last_payload(command_client)
+        assert payload["status"] == "ok"
+        assert payload["weight"] is None
+
+    def test_command_error(self, command_client):
+        """Test que un error del comando genera respuesta de error."""
+        command_client.command_callback.side_effect = ValueError("sin confirmación")
+        command_client._on_message(None, None, self._msg({"command": "tare"}))
+
+        payload = self._last_payload(command_client)
+        assert payload["status"] == "error"
+        assert "tare" in payload["message"]
+
+    def test_unconfigured_command_unknown(self, mqtt_client):
+        """Test que un comando no configurado se trata como desconocido."""
+        mqtt_client.client.publish = MagicMock()
+        msg = MagicMock()
+        msg.topic = "pesanet/devices/scale-test/command"
+        msg.payload = json.dumps({"command": "tare"}).encode('utf-8')
+
+        mqtt_client._on_message(None, None, msg)
+
+        payload = json.loads(mqtt_client.client.publish.call_args[0][1])
+        assert payload["status"] == "error"
+        assert "desconocido" in payload["message"].lower()
+
+    def test_unit_conversion(self, command_client):
+        """Test de conversión de unidades en get_weight."""
+        command_client._on_message(None, None, self._msg(
+            {"command": "get_weight", "unit": "g"}
+        ))
+
+        payload = self._last_payload(command_client)
+        assert payload["weight"] == 42500.0
+        assert payload["unit"] == "g"
+
+    def test_invalid_unit(self, command_client, weight_callbacks):
+        """Test que una unidad no soportada responde error sin leer."""
+        command_client._on_message(None, None, self._msg(
+            {"command": "get_weight", "unit": "oz"}
+        ))
+
+        weight_callbacks["scale-test"].assert_not_called()
+        payload = self._last_payload(command_client)
+        assert payload["status"] == "error"
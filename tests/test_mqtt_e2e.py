@@ -0,0 +1,132 @@
+"""Tests end-to-end del cliente MQTT contra el broker en proceso."""
+
+import json
+import queue
+import time
+
+import pytest
+
+from scale_telemetry.config import DeviceConfig, MQTTConfig
+from scale_telemetry.mqtt_client import WILDCARD_COMMAND_TOPIC, ScaleMQTTClient
+
+from .fake_broker import FakeBroker, topic_matches
+
+
+@pytest.fixture
+def broker():
+    """Fixture con un broker en proceso."""
+    with FakeBroker() as broker:
+        yield broker
+
+
+@pytest.fixture
+def client(broker):
+    """Fixture con un ScaleMQTTClient real conectado por WebSocket al broker."""
+    devices = [
+        DeviceConfig(device_id="scale-1", serial_port="/dev/ttyUSB0"),
+        DeviceConfig(device_id="scale-2", serial_port="/dev/ttyUSB1"),
+    ]
+    client = ScaleMQTTClient(
+        MQTTConfig(broker=broker.host, port=broker.port),
+        devices,
+        {"scale-1": lambda: 42.5, "scale-2": lambda: 78.0},
+    )
+    client.connect()
+    client.client.loop_start()
+    # on_connect marca el cliente como conectado y luego se suscribe
+    assert broker.wait_for_subscription(WILDCARD_COMMAND_TOPIC)
+    yield client
+    client.stop()
+
+
+def _responses(broker) -> queue.Queue:
+    responses = queue.Queue()
+    broker.subscribe(
+        "pesanet/devices/+/response",
+        lambda topic, payload, retain: responses.put((topic, json.loads(payload))),
+    )
+    return responses
+
+
+class TestTopicMatches:
+    """Tests del filtrado de tópicos del broker."""
+
+    @pytest.mark.parametrize("topic_filter,topic,expected", [
+        ("pesanet/devices/+/command", "pesanet/devices/scale-1/command", True),
+        ("pesanet/devices/+/command", "pesanet/devices/scale-1/response", False),
+        ("pesanet/#", "pesanet/devices/scale-1/state", True),
+        ("pesanet/devices/+", "pesanet/devices/scale-1/command", False),
+    ])
+    def test_topic_matches(self, topic_filter, topic, expected):
+        assert topic_matches(topic_filter, topic) is expected
+
+
+class TestEndToEnd:
+    """El cliente real (paho sobre WebSocket) contra el broker en proceso."""
+
+    def test_get_weight_round_trip(self, broker, client):
+        """Test que un get_weight publicado en el broker recibe respuesta."""
+        responses = _responses(broker)
+
+        broker.publish(
+            "pesanet/devices/scale-2/command",
+            json.dumps({"command": "get_weight"}).encode(),
+            qos=1,
+        )
+
+        topic, response = responses.get(timeout=5)
+        assert topic == "pesanet/devices/scale-2/response"
+        assert response["weight"] == 78.0
+        assert response["status"] == "ok"
+
+    def test_connected_flag(self, client):
+        """Test que on_connect marca el cliente como conectado."""
+        assert client.connected
+
+    def test_state_is_retained(self, broker, client):
+        """Test que un suscriptor nuevo recibe el estado retenido."""
+        topic = "pesanet/devices/scale-1/state"
+        client.publish_state(topic, {"deviceId": "scale-1", "weight": 42.5})
+        _wait_until(lambda: topic in broker.retained)
+
+        # Suscribirse después de la publicación: llega por estar retenido
+        states = queue.Queue()
+        broker.subscribe(
+            "pesanet/devices/+/state",
+            lambda topic, payload, retain: states.put((json.loads(payload), retain)),
+        )
+
+        state, retain = states.get(timeout=5)
+        assert state["weight"] == 42.5
+        assert retain is True
+
+    def test_gateway_status_and_last_will(self, broker, client):
+        """Test que el gateway publica online y el broker publica el last-will."""
+        status = json.loads(broker.retained[client.status_topic][0])
+        assert status["status"] == "online"
+
+        # Caída abrupta: se cierra el socket sin DISCONNECT
+        client.client.loop_stop()
+        client.client.socket().close()
+
+        _wait_until(lambda: b"offline" in broker.retained[client.status_topic][0])
+        status = json.loads(broker.retained[client.status_topic][0])
+        assert status == {"gatewayId": "scale-telemetry-service", "status": "offline"}
+
+
+    def test_clean_stop_publishes_offline(self, broker, client):
+        """Test que al detenerse el estado offline retenido llega al broker."""
+        assert b"online" in broker.retained[client.status_topic][0]
+
+        client.stop()
+
+        status = json.loads(broker.retained[client.status_topic][0])
+        assert status["status"] == "offline"
+
+def _wait_until(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timeout esperando la condición")
+        time.sleep(0.01)
+
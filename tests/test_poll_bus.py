@@ -0,0 +1,146 @@
+"""Tests para el bus multidrop en modo poll."""
+
+import os
+import pty
+import threading
+import tty
+from dataclasses import replace
+
+import pytest
+import serial
+
+from scale_telemetry.config import SerialConfig
+from scale_telemetry.poll_bus import PollBus
+
+
+class _MultidropSimulator:
+    """Simula varias básculas direccionadas que responden a "{address}P\\r"."""
+
+    def __init__(self, weights: dict[str, float]):
+        self.weights = weights
+        self.requests: list[bytes] = []
+        self.master_fd, slave_fd = pty.openpty()
+        tty.setraw(slave_fd)
+        self.slave_fd = slave_fd
+        self.port = os.ttyname(slave_fd)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        pending = b""
+        while True:
+            try:
+                data = os.read(self.master_fd, 256)
+            except OSError:
+                return
+            pending += data
+            while b"\r" in pending:
+                request, pending = pending.split(b"\r", 1)
+                self.requests.append(request)
+                address = request[:-1].decode()
+                if address in self.weights:
+                    os.write(self.master_fd, f"{self.weights[address]} kg\n".encode())
+
+    def close(self):
+        for fd in (self.master_fd, self.slave_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+@pytest.fixture
+def simulator():
+    """Fixture con un bus simulado de tres básculas."""
+    sim = _MultidropSimulator({"01": 10.0, "02": 20.0, "03": 30.0})
+    yield sim
+    sim.close()
+
+
+def _config(port: str, address: str) -> SerialConfig:
+    return SerialConfig(
+        port=port,
+        timeout=1.0,
+        poll_request="{address}P\r",
+        poll_timeout=0.2,
+        address=address,
+    )
+
+
+class TestPollBus:
+    """Tests para PollBus y BusReader."""
+
+    def test_poll_each_address(self, simulator):
+        """Test que cada lector obtiene la respuesta de su dirección."""
+        bus = PollBus(_config(simulator.port, ""))
+        readers = [bus.reader(_config(simulator.port, a)) for a in ("01", "02", "03")]
+        for reader in readers:
+            reader.connect()
+        try:
+            assert [r.read_weight() for r in readers] == [10.0, 20.0, 30.0]
+            assert simulator.requests == [b"01P", b"02P", b"03P"]
+        finally:
+            for reader in readers:
+                reader.disconnect()
+
+    def test_concurrent_polls_share_the_link(self, simulator):
+        """Test que lecturas concurrentes se serializan en el bus sin mezclarse."""
+        bus = PollBus(_config(simulator.port, ""))
+        readers = {a: bus.reader(_config(simulator.port, a)) for a in ("01", "02", "03")}
+        for reader in readers.values():
+            reader.connect()
+        results = {}
+
+        def read(address):
+            results[address] = [readers[address].read_weight() for _ in range(5)]
+
+        threads = [threading.Thread(target=read, args=(a,)) for a in readers]
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(timeout=10)
+        finally:
+            for reader in readers.values():
+                reader.disconnect()
+
+        assert results == {"01": [10.0] * 5, "02": [20.0] * 5, "03": [30.0] * 5}
+
+    def test_silent_address_times_out(self, simulator):
+        """Test que una dirección sin respuesta falla con el timeout del poll."""
+        bus = PollBus(_config(simulator.port, ""))
+        reader = bus.reader(_config(simulator.port, "09"))
+        reader.connect()
+        try:
+            with pytest.raises(ValueError):
+                reader.read_weight()
+        finally:
+            reader.disconnect()
+
+    def test_read_after_last_detach(self, simulator):
+        """Test que sin lectores vinculados el bus no acepta lecturas."""
+        bus = PollBus(_config(simulator.port, ""))
+        reader = bus.reader(_config(simulator.port, "01"))
+        reader.connect()
+        reader.disconnect()
+
+        with pytest.raises(serial.SerialException):
+            reader.read_weight()
+
+    @pytest.mark.parametrize("override", [
+        {"weight_format": "padded"},
+        {"poll_timeout": 0.5},
+        {"baudrate": 19200},
+    ])
+    def test_rejects_mismatched_address(self, simulator, override):
+        """Test que una dirección con parámetros distintos a los del bus se rechaza."""
+        bus = PollBus(_config(simulator.port, ""))
+        config = replace(_config(simulator.port, "01"), **override)
+        with pytest.raises(ValueError, match="no coincide con el bus"):
+            bus.reader(config)
+
+    def test_requires_poll_request(self, simulator):
+        """Test que una báscula de bus sin poll_request lanza error."""
+        bus = PollBus(_config(simulator.port, ""))
+        with pytest.raises(ValueError, match="poll_request"):
+            bus.reader(SerialConfig(port=simulator.port, address="01"))
@@ -0,0 +1,144 @@
+"""Tests para el perfilado bajo demanda."""
+
+import os
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from scale_telemetry.profiling import (
+    Profiler,
+    dump_stacks,
+    sample_stacks,
+    write_collapsed,
+)
+
+
+def _busy_worker(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def busy_thread():
+    """Hilo con nombre conocido que consume CPU hasta el final del test."""
+    stop = threading.Event()
+    thread = threading.Thread(target=_busy_worker, args=(stop,), name="busy-worker")
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+class TestSampling:
+    """Tests para dump_stacks y sample_stacks."""
+
+    def test_dump_stacks(self, busy_thread):
+        """Test que el dump incluye todos los hilos con su nombre."""
+        dump = dump_stacks()
+        assert "--- Hilo busy-worker" in dump
+        assert "_busy_worker" in dump
+        assert "--- Hilo MainThread" in dump
+
+    def test_sample_stacks_collapsed(self, busy_thread):
+        """Test que las muestras se agrupan por stack, de la raíz a la hoja."""
+        counts = sample_stacks(0.2, rate=200)
+
+        busy = {s: n for s, n in counts.items() if s.startswith("busy-worker;")}
+        assert busy
+        assert all("_busy_worker (test_profiling.py:" in s for s in busy)
+        assert sum(busy.values()) > 10
+        # El hilo que muestrea no se incluye
+        assert not any("sample_stacks" in s for s in counts)
+
+    def test_stop_event(self):
+        """Test que el evento de stop termina el muestreo antes de tiempo."""
+        stop = threading.Event()
+        stop.set()
+        start = time.monotonic()
+        sample_stacks(5.0, stop=stop)
+        assert time.monotonic() - start < 1.0
+
+    def test_write_collapsed(self, tmp_path):
+        """Test del formato de salida (stack y muestras por línea)."""
+        path = tmp_path / "profile.folded"
+        write_collapsed(Counter({"main;a (x.py:1)": 3, "main;b (x.py:5)": 7}), str(path))
+        assert path.read_text().splitlines() == [
+            "main;b (x.py:5) 7",
+            "main;a (x.py:1) 3",
+        ]
+
+
+class TestProfiler:
+    """Tests para Profiler."""
+
+    def test_trigger_writes_files(self, tmp_path, busy_thread):
+        """Test de un perfil completo en background."""
+        profiler = Profiler(str(tmp_path), stats=lambda: {"executorQueue": 2})
+        done = threading.Event()
+        reports = []
+
+        def on_done(report):
+            reports.append(report)
+            done.set()
+
+        assert profiler.trigger(duration=0.2, rate=100, done=on_done)
+        assert done.wait(5)
+
+        report = reports[0]
+        assert report["status"] == "ok"
+        assert report["load"] == {"executorQueue": 2}
+        assert report["samples"] > 0
+        assert os.path.exists(report["stacks"])
+        with open(report["profile"]) as f:
+            lines = f.read().splitlines()
+        assert any(line.startswith("busy-worker;") for line in lines)
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+    def test_one_profile_at_a_time(self, tmp_path):
+        """Test que no se lanza un segundo perfil mientras hay uno en curso."""
+        profiler = Profiler(str(tmp_path))
+        assert profiler.trigger(duration=5)
+        assert not profiler.trigger(duration=5)
+        profiler.stop()
+        assert not profiler.running
+
+    @pytest.mark.parametrize("duration,rate", [(0, 100), (1000, 100), (1, 0), (1, 1e6)])
+    def test_invalid_parameters(self, tmp_path, duration, rate):
+        """Test que la duración y la frecuencia se validan."""
+        with pytest.raises(ValueError):
+            Profiler(str(tmp_path)).trigger(duration, rate)
+
+    @pytest.mark.parametrize("duration,rate", [(0, 100), (1, 1e6), ("x", 100)])
+    def test_invalid_defaults(self, tmp_path, duration, rate):
+        """Test que la configuración por defecto se valida al crear el perfilador."""
+        with pytest.raises(ValueError):
+            Profiler(str(tmp_path), duration, rate)
+
+    def test_dump(self, tmp_path):
+        """Test del dump de stacks sin perfil."""
+        report = Profiler(str(tmp_path)).dump()
+        with open(report["stacks"]) as f:
+            assert "test_dump" in f.read()
+
+    def test_dumps_in_same_second_do_not_collide(self, tmp_path):
+        """Test que dos dumps seguidos escriben archivos distintos."""
+        profiler = Profiler(str(tmp_path))
+        first, second = profiler.dump(), profiler.dump()
+        assert first["stacks"] != second["stacks"]
+        assert len(os.listdir(tmp_path)) == 2
+
+    def test_trigger_dump_runs_in_background(self, tmp_path):
+        """Test que el dump pedido por comando se escribe fuera del hilo que lo pide."""
+        profiler = Profiler(str(tmp_path))
+        done = threading.Event()
+        threads = []
+
+        def on_done(report):
+            threads.append(threading.current_thread().name)
+            done.set()
+
+        profiler.trigger_dump(on_done)
+        assert done.wait(5)
+        assert threads == ["profiler-stacks"]
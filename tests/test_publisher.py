@@ -0,0 +1,127 @@
+"""Tests para la etapa de publicación con control de flujo."""
+
+from itertools import count
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import paho.mqtt.client as mqtt
+import pytest
+
+from scale_telemetry.publisher import Publisher
+
+
+@pytest.fixture
+def paho_client():
+    """Cliente paho simulado: publish retorna un mid nuevo en cada llamada."""
+    client = MagicMock()
+    mids = count(1)
+    client.publish.side_effect = lambda *a, **kw: SimpleNamespace(
+        rc=mqtt.MQTT_ERR_SUCCESS, mid=next(mids)
+    )
+    return client
+
+
+def _topics(client) -> list[str]:
+    return [c.args[0] for c in client.publish.call_args_list]
+
+
+def _payloads(client) -> list[str]:
+    return [c.args[1] for c in client.publish.call_args_list]
+
+
+class TestPublisher:
+    """Tests para Publisher."""
+
+    def test_publishes_directly_below_limit(self, paho_client):
+        """Test que sin mensajes en vuelo se publica de inmediato."""
+        publisher = Publisher(paho_client, max_inflight=2)
+
+        publisher.publish("a", "1")
+
+        paho_client.publish.assert_called_once_with("a", "1", qos=1, retain=False)
+        assert publisher.inflight == 1
+
+    def test_queues_at_inflight_limit_and_drains_on_ack(self, paho_client):
+        """Test que al llegar al límite se encola y el PUBACK libera la cola."""
+        publisher = Publisher(paho_client, max_inflight=2)
+        for i in range(4):
+            publisher.publish(f"t{i}", str(i))
+
+        assert _topics(paho_client) == ["t0", "t1"]
+        assert publisher.queued == 2
+
+        publisher._on_publish(paho_client, None, 1)
+
+        assert _topics(paho_client) == ["t0", "t1", "t2"]
+        assert publisher.queued == 1
+
+    def test_coalesces_superseded_values(self, paho_client):
+        """Test que en cola solo sobrevive el último valor de un tópico."""
+        publisher = Publisher(paho_client, max_inflight=1)
+        publisher.publish("busy", "x")
+        publisher.publish("state/a", "1", coalesce=True)
+        publisher.publish("state/b", "1", coalesce=True)
+        publisher.publish("state/a", "2", coalesce=True)
+
+        assert publisher.queued == 2
+        assert publisher.coalesced == 1
+
+        publisher._on_publish(paho_client, None, 1)
+        publisher._on_publish(paho_client, None, 2)
+
+        assert _payloads(paho_client) == ["x", "2", "1"]
+
+    def test_qos_per_message_class(self, paho_client):
+        """Test que el QoS depende de la clase de mensaje."""
+        publisher = Publisher(paho_client, qos={"response": 1, "telemetry": 0})
+
+        publisher.publish("r", "1", "response")
+        publisher.publish("t", "1", "telemetry", retain=True)
+
+        assert paho_client.publish.call_args_list[1].kwargs == {
+            "qos": 0, "retain": True,
+        }
+        # Los mensajes QoS 0 no ocupan lugar en vuelo
+        assert publisher.inflight == 1
+
+    def test_drops_when_queue_full(self, paho_client):
+        """Test que con la cola llena los mensajes se descartan."""
+        publisher = Publisher(paho_client, max_inflight=1, max_queued=2)
+        results = [publisher.publish(f"t{i}", "x") for i in range(4)]
+
+        assert results == [True, True, True, False]
+        assert publisher.dropped == 1
+
+    def test_saturated_signal(self, paho_client):
+        """Test de la señal de backpressure."""
+        publisher = Publisher(paho_client, max_inflight=1, max_queued=5)
+        publisher.publish("busy", "x")
+        for i in range(3):
+            publisher.publish(f"t{i}", "x")
+        assert not publisher.saturated
+
+        publisher.publish("t3", "x")
+        assert publisher.saturated
+
+    def test_ack_before_publish_returns(self, paho_client):
+        """Test que un PUBACK recibido antes de conocer el mid no deja slots ocupados."""
+        publisher = Publisher(paho_client, max_inflight=1)
+
+        def publish_and_ack(*args, **kwargs):
+            publisher._on_publish(paho_client, None, 7)
+            return SimpleNamespace(rc=mqtt.MQTT_ERR_SUCCESS, mid=7)
+
+        paho_client.publish.side_effect = publish_and_ack
+        publisher.publish("a", "1")
+
+        assert publisher.inflight == 0
+
+    def test_reset_on_reconnect(self, paho_client):
+        """Test que al reconectar se liberan los slots y se vacía la cola."""
+        publisher = Publisher(paho_client, max_inflight=1)
+        publisher.publish("a", "1")
+        publisher.publish("b", "2")
+
+        publisher.reset()
+
+        assert _topics(paho_client) == ["a", "b"]
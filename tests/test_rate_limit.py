@@ -0,0 +1,100 @@
+"""Tests para la limitación de tasa de comandos."""
+
+from unittest.mock import patch
+
+import pytest
+
+from scale_telemetry.rate_limit import CommandRateLimiter, TokenBucket
+
+
+class TestTokenBucket:
+    """Tests para TokenBucket."""
+
+    def test_burst_then_reject(self):
+        """Test que permite la ráfaga configurada y luego rechaza."""
+        with patch('scale_telemetry.rate_limit.time.monotonic', return_value=100.0):
+            bucket = TokenBucket(rate=2.0, burst=3)
+            results = [bucket.try_acquire() for _ in range(4)]
+
+        assert results == [True, True, True, False]
+
+    def test_refill(self):
+        """Test que los tokens se recargan con el tiempo."""
+        with patch('scale_telemetry.rate_limit.time.monotonic') as mock_time:
+            mock_time.return_value = 100.0
+            bucket = TokenBucket(rate=2.0, burst=1)
+            assert bucket.try_acquire()
+            assert not bucket.try_acquire()
+
+            # Medio segundo a 2 tokens/seg recarga un token
+            mock_time.return_value = 100.5
+            assert bucket.try_acquire()
+
+    def test_default_burst(self):
+        """Test que la ráfaga por defecto es la tasa redondeada (mínimo 1)."""
+        assert TokenBucket(rate=5.0).burst == 5
+        assert TokenBucket(rate=0.2).burst == 1
+
+    def test_invalid_rate(self):
+        """Test que una tasa no positiva lanza error."""
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestCommandRateLimiter:
+    """Tests para CommandRateLimiter."""
+
+    def test_unlimited_by_default(self):
+        """Test que sin configuración no se limita."""
+        limiter = CommandRateLimiter()
+        assert all(limiter.allow("scale-1") for _ in range(1000))
+
+    def test_device_limit_is_independent(self):
+        """Test que el límite de un dispositivo no afecta a otro."""
+        limiter = CommandRateLimiter()
+        limiter.configure_device("scale-1", rate=1.0, burst=1)
+
+        assert limiter.allow("scale-1")
+        assert not limiter.allow("scale-1")
+        assert limiter.allow("scale-2")
+
+    def test_global_limit(self):
+        """Test que el límite global aplica a todos los dispositivos."""
+        limiter = CommandRateLimiter(global_rate=1.0, global_burst=2)
+
+        assert limiter.allow("scale-1")
+        assert limiter.allow("scale-2")
+        assert not limiter.allow("scale-3")
+
+    def test_device_rejection_does_not_consume_global(self):
+        """Test que un dispositivo limitado no consume tokens globales."""
+        limiter = CommandRateLimiter(global_rate=1.0, global_burst=2)
+        limiter.configure_device("scale-1", rate=1.0, burst=1)
+
+        assert limiter.allow("scale-1")
+        assert not limiter.allow("scale-1")
+        assert not limiter.allow("scale-1")
+        assert limiter.allow("scale-2")
+
+    def test_global_rejection_does_not_consume_device(self):
+        """Test que un comando rechazado por el límite global no consume tokens del dispositivo."""
+        with patch('scale_telemetry.rate_limit.time.monotonic', return_value=100.0):
+            limiter = CommandRateLimiter(global_rate=1.0, global_burst=1)
+            limiter.configure_device("scale-1", rate=1.0, burst=1)
+
+            assert limiter.allow("scale-2")
+            assert not limiter.allow("scale-1")
+            assert limiter._devices["scale-1"]._tokens == 1.0
+
+    def test_reconfigure_keeps_bucket(self):
+        """Test que reconfigurar con los mismos límites no recarga los tokens."""
+        with patch('scale_telemetry.rate_limit.time.monotonic', return_value=100.0):
+            limiter = CommandRateLimiter()
+            limiter.configure_device("scale-1", rate=1.0, burst=1)
+            assert limiter.allow("scale-1")
+
+            limiter.configure_device("scale-1", rate=1.0, burst=1)
+            assert not limiter.allow("scale-1")
+
+            limiter.configure_device("scale-1", rate=2.0, burst=2)
+            assert limiter.allow("scale-1")
@@ -0,0 +1,182 @@
+"""Tests para el registro de dispositivos copy-on-write."""
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from scale_telemetry.config import DeviceConfig
+from scale_telemetry.registry import DeviceRegistry
+from scale_telemetry.serial_reader import ScaleReader
+
+
+@pytest.fixture
+def device():
+    return DeviceConfig(device_id="scale-1", serial_port="/dev/ttyUSB0")
+
+
+def make_reader():
+    return MagicMock(spec=ScaleReader)
+
+
+class TestSnapshot:
+    """Tests de las instantáneas."""
+
+    def test_initial_devices(self, device):
+        """Test que los dispositivos iniciales quedan registrados sin lector."""
+        callback = MagicMock()
+        registry = DeviceRegistry([device], {"scale-1": callback})
+
+        entry = registry.get("scale-1")
+        assert entry.device is device
+        assert entry.weight_callback is callback
+        assert entry.reader is None
+        assert entry.command_topic == device.command_topic
+        assert entry.response_topic == device.response_topic
+        assert registry.snapshot.version == 0
+
+    def test_changes_publish_new_snapshot(self, device):
+        """Test que cada cambio publica una instantánea nueva sin tocar la anterior."""
+        registry = DeviceRegistry()
+        before = registry.snapshot
+
+        registry.register(device, reader=make_reader())
+
+        assert registry.snapshot is not before
+        assert registry.snapshot.version == before.version + 1
+        assert "scale-1" not in before.entries
+        assert "scale-1" in registry.snapshot.readers
+
+    def test_snapshot_is_read_only(self, device):
+        """Test que las vistas de una instantánea no se pueden modificar."""
+        registry = DeviceRegistry([device])
+        with pytest.raises(TypeError):
+            registry.snapshot.devices["scale-2"] = device
+
+    def test_register_keeps_reader(self, device):
+        """Test que registrar sin lector conserva el lector actual."""
+        registry = DeviceRegistry()
+        reader = make_reader()
+        registry.register(device, reader=reader)
+
+        callback = MagicMock()
+        registry.register(device, callback)
+
+        assert registry.snapshot.readers["scale-1"] is reader
+        assert registry.snapshot.weight_callbacks["scale-1"] is callback
+        reader.disconnect.assert_not_called()
+
+
+class TestReaderRetirement:
+    """Tests del retiro con conteo de referencias."""
+
+    def test_swap_disconnects_idle_reader(self, device):
+        """Test que un lector reemplazado sin lecturas en curso se cierra enseguida."""
+        registry = DeviceRegistry()
+        old, new = make_reader(), make_reader()
+        registry.register(device, reader=old)
+
+        registry.swap_reader("scale-1", new)
+
+        old.disconnect.assert_called_once()
+        assert registry.snapshot.readers["scale-1"] is new
+
+    def test_swap_waits_for_lease(self, device):
+        """Test que un lector en uso se cierra recién al terminar la lectura."""
+        registry = DeviceRegistry()
+        old, new = make_reader(), make_reader()
+        registry.register(device, reader=old)
+
+        with registry.lease("scale-1") as reader:
+            registry.swap_reader("scale-1", new)
+            assert reader is old
+            old.disconnect.assert_not_called()
+        old.disconnect.assert_called_once()
+
+        with registry.lease("scale-1") as reader:
+            assert reader is new
+
+    def test_swap_same_reader_is_noop(self, device):
+        """Test que volver a registrar el mismo lector no lo cierra."""
+        registry = DeviceRegistry()
+        reader = make_reader()
+        registry.register(device, reader=reader)
+
+        registry.swap_reader("scale-1", reader)
+
+        reader.disconnect.assert_not_called()
+
+    def test_swap_unknown_device(self):
+        """Test que no se puede cambiar el lector de un dispositivo no registrado."""
+        with pytest.raises(KeyError):
+            DeviceRegistry().swap_reader("scale-1", make_reader())
+
+    def test_lease_without_reader(self, device):
+        """Test que pedir un lector inexistente falla."""
+        registry = DeviceRegistry([device])
+        with pytest.raises(RuntimeError, match="no encontrado"):
+            with registry.lease("scale-1"):
+                pass
+
+    def test_retire_all(self, device):
+        """Test que retire_all quita y cierra todos los lectores."""
+        other = DeviceConfig(device_id="scale-2", serial_port="/dev/ttyUSB1")
+        registry = DeviceRegistry([other])
+        reader = make_reader()
+        registry.register(device, reader=reader)
+
+        assert registry.retire_all() == ["scale-1"]
+        reader.disconnect.assert_called_once()
+        assert registry.snapshot.readers == {}
+        assert registry.get("scale-1") is not None
+
+    def test_disconnect_error_is_logged(self, device):
+        """Test que un error al cerrar el lector retirado no se propaga."""
+        registry = DeviceRegistry()
+        reader = make_reader()
+        reader.disconnect.side_effect = OSError("puerto ya cerrado")
+        registry.register(device, reader=reader)
+
+        registry.swap_reader("scale-1", None)
+
+        reader.disconnect.assert_called_once()
+
+    def test_concurrent_reads_and_swaps(self, device):
+        """Test que ninguna lectura usa un lector ya cerrado mientras se reemplaza."""
+        registry = DeviceRegistry()
+        closed = set()
+        errors = []
+
+        def reader_factory():
+            reader = make_reader()
+            reader.disconnect.side_effect = lambda r=reader: closed.add(id(r))
+            reader.read_weight.side_effect = lambda r=reader: (
+                errors.append("lectura sobre puerto cerrado") if id(r) in closed else 1.0
+            )
+            return reader
+
+        registry.register(device, reader=reader_factory())
+        readers = []
+
+        def read_loop():
+            for _ in range(500):
+                with registry.lease("scale-1") as reader:
+                    reader.read_weight()
+
+        def swap_loop():
+            for _ in range(200):
+                reader = reader_factory()
+                readers.append(reader)
+                registry.swap_reader("scale-1", reader)
+
+        threads = [threading.Thread(target=read_loop) for _ in range(4)]
+        threads.append(threading.Thread(target=swap_loop))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        # Todos los lectores reemplazados terminaron cerrados, una sola vez
+        for reader in readers[:-1]:
+            reader.disconnect.assert_called_once()
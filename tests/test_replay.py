@@ -0,0 +1,110 @@
+"""Tests para el replay de capturas seriales."""
+
+import csv
+
+import pytest
+
+from scale_telemetry import replay as replay_module
+from scale_telemetry.capture import CaptureRecord, CaptureWriter
+from scale_telemetry.replay import decode_python, main, replay
+
+PADDED = [
+    b'\x02"0 000060000000\r',
+    b"000\r",                       # trama parcial (inválida)
+    b'\x02"0 001250000000\r',
+    b'"0 00xx00000000"0 000070000000\r',  # último patrón válido de la trama
+    b'"0 0001\r',                   # dígitos incompletos
+]
+
+
+def padded_records():
+    return [CaptureRecord(100.0 + i, "scale-1", frame) for i, frame in enumerate(PADDED)]
+
+
+class TestReplay:
+    """Tests para replay con el motor Python."""
+
+    def test_padded_series_and_failures(self):
+        """Test de la serie de pesos y la tasa de tramas inválidas."""
+        result = replay(padded_records(), "padded", engine="python")["scale-1"]
+
+        assert result.weights == [60.0, None, 1250.0, 70.0, None]
+        assert result.frames == 5
+        assert result.failures == 2
+        assert result.failure_rate == pytest.approx(0.4)
+        assert result.timestamps == [100.0, 101.0, 102.0, 103.0, 104.0]
+
+    def test_frame_split_across_records(self):
+        """Test que una trama partida entre lecturas toma el timestamp de su final."""
+        records = [
+            CaptureRecord(1.0, "scale-1", b"45."),
+            CaptureRecord(2.0, "scale-1", b"3 kg\n-2"),
+            CaptureRecord(3.0, "scale-1", b".5\n12"),  # "12" sin terminador
+        ]
+
+        result = replay(records, "standard", engine="python")["scale-1"]
+
+        assert result.weights == [45.3, -2.5]
+        assert result.timestamps == [2.0, 3.0]
+
+    def test_devices_replayed_separately(self):
+        """Test que los bytes de cada dispositivo no se mezclan."""
+        records = [
+            CaptureRecord(1.0, "scale-1", b"1"),
+            CaptureRecord(1.0, "scale-2", b"2\n"),
+            CaptureRecord(2.0, "scale-1", b"0\n"),
+        ]
+
+        results = replay(records, "standard", engine="python")
+
+        assert results["scale-1"].weights == [10.0]
+        assert results["scale-2"].weights == [2.0]
+
+    def test_numpy_engine_rejects_standard(self):
+        """Test que el motor numpy solo acepta formatos de ancho fijo."""
+        with pytest.raises(ValueError, match="numpy"):
+            replay([], "standard", engine="numpy")
+
+    def test_auto_without_numpy(self, monkeypatch):
+        """Test que sin numpy el motor auto usa el parser Python."""
+        monkeypatch.setattr(replay_module, "np", None)
+        result = replay(padded_records(), "padded")["scale-1"]
+        assert result.engine == "python"
+
+
+class TestNumpyEngine:
+    """Tests para la decodificación vectorizada del formato padded."""
+
+    def test_matches_python(self):
+        """Test que numpy y Python decodifican igual (incluida basura)."""
+        pytest.importorskip("numpy")
+        data = b"".join(PADDED) * 50 + b'\r\r"0 000123000000\r"0 0009'
+
+        python_ends, python_weights = decode_python(data, "padded")
+        numpy_ends, numpy_weights = replay_module.decode_padded_numpy(data)
+
+        assert numpy_ends.tolist() == python_ends
+        assert [
+            None if w != w else w for w in numpy_weights.tolist()
+        ] == python_weights
+
+
+class TestReplayCLI:
+    """Tests para la línea de comandos."""
+
+    def test_report_and_series(self, tmp_path, capsys):
+        """Test que el CLI reporta las tramas y escribe la serie en CSV."""
+        path = str(tmp_path / "captura.scap")
+        series = str(tmp_path / "serie.csv")
+        with CaptureWriter(path) as writer:
+            for record in padded_records():
+                writer.write(record.device_id, record.data, record.timestamp)
+
+        main([path, "--format", "padded", "--engine", "python", "--series", series])
+
+        out = capsys.readouterr().out
+        assert "scale-1: 5 tramas" in out
+        assert "2 inválidas (40.00%)" in out
+        with open(series) as f:
+            rows = list(csv.DictReader(f))
+        assert [row["weight"] for row in rows] == ["60.0", "", "1250.0", "70.0", ""]
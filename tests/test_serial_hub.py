@@ -0,0 +1,135 @@
+"""Tests para el multiplexor de puertos seriales."""
+
+import os
+import pty
+import threading
+import tty
+from unittest.mock import MagicMock
+
+import pytest
+import serial
+
+from scale_telemetry.config import SerialConfig
+from scale_telemetry.serial_hub import SerialHub
+
+
+@pytest.fixture
+def hub():
+    """Fixture con un hub en ejecución."""
+    hub = SerialHub()
+    hub.start()
+    yield hub
+    hub.stop()
+
+
+@pytest.fixture
+def scale_pty():
+    """Fixture que crea PTYs que simulan básculas: retorna (master_fd, puerto)."""
+    opened = []
+
+    def make():
+        master_fd, slave_fd = pty.openpty()
+        tty.setraw(slave_fd)
+        opened.extend([master_fd, slave_fd])
+        return master_fd, os.ttyname(slave_fd)
+
+    yield make
+    for fd in opened:
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+
+def _write_later(fd: int, data: bytes, delay: float = 0.05):
+    timer = threading.Timer(delay, os.write, args=(fd, data))
+    timer.start()
+    return timer
+
+
+class TestSerialHub:
+    """Tests para SerialHub y HubReader."""
+
+    def test_read_weight_waits_for_next_frame(self, hub, scale_pty):
+        """Test que read_weight retorna la siguiente trama decodificada."""
+        master_fd, port = scale_pty()
+        reader = hub.reader(SerialConfig(port=port, timeout=1.0))
+        reader.connect()
+
+        _write_later(master_fd, b"45.3 kg\n")
+        assert reader.read_weight() == 45.3
+        reader.disconnect()
+
+    def test_many_ports_one_thread(self, hub, scale_pty):
+        """Test que un único hub atiende varios puertos."""
+        readers = []
+        for i in range(5):
+            master_fd, port = scale_pty()
+            reader = hub.reader(SerialConfig(port=port, weight_format="padded"))
+            reader.connect()
+            readers.append((master_fd, reader, float(10 * (i + 1))))
+
+        for master_fd, reader, weight in readers:
+            frame = f'\x80\x02"0 {int(weight):06d}000000\r'.encode("latin-1")
+            _write_later(master_fd, b"000\r" + frame)
+            assert reader.read_weight() == weight
+            assert reader.last_weight == weight
+
+        hub_threads = [t for t in threading.enumerate() if t.name == "serial-hub"]
+        assert len(hub_threads) == 1
+
+    def test_read_weight_timeout(self, hub, scale_pty):
+        """Test que sin tramas se lanza ValueError tras el timeout."""
+        _, port = scale_pty()
+        reader = hub.reader(SerialConfig(port=port, timeout=0.05))
+        reader.connect()
+
+        with pytest.raises(ValueError, match="No se recibió trama"):
+            reader.read_weight()
+
+    def test_spurious_readiness_keeps_port(self, hub):
+        """Test que un aviso de lectura sin datos (EAGAIN) no da de baja el puerto."""
+        read_fd, write_fd = os.pipe()
+        os.set_blocking(read_fd, False)
+        try:
+            reader = hub.reader(SerialConfig(port="/dev/null"))
+            reader.connection = MagicMock(is_open=True)
+            reader.connection.fileno.return_value = read_fd
+
+            reader._on_readable()
+            assert reader._error is None
+
+            os.write(write_fd, b"45.3 kg\n")
+            reader._on_readable()
+            assert reader.last_weight == 45.3
+
+            os.close(write_fd)
+            reader._on_readable()
+            assert "no retornó datos" in reader._error
+        finally:
+            os.close(read_fd)
+            try:
+                os.close(write_fd)
+            except OSError:
+                pass
+
+    def test_read_weight_not_connected(self, hub):
+        """Test de lectura sin conexión."""
+        reader = hub.reader(SerialConfig(port="/dev/null"))
+        with pytest.raises(serial.SerialException):
+            reader.read_weight()
+
+    def test_disconnect_wakes_waiters(self, hub, scale_pty):
+        """Test que desconectar despierta con error a los lectores en espera."""
+        _, port = scale_pty()
+        reader = hub.reader(SerialConfig(port=port, timeout=5.0))
+        reader.connect()
+        threading.Timer(0.05, reader.disconnect).start()
+
+        with pytest.raises(serial.SerialException):
+            reader.read_weight()
+
+    def test_invalid_format(self, hub):
+        """Test que formato inválido lanza error."""
+        with pytest.raises(ValueError, match="no soportado"):
+            hub.reader(SerialConfig(weight_format="inexistente"))
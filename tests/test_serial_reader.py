@@ -1,5 +1,6 @@
 """Tests para el lector serial."""
 
+import os
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
@@ -96,6 +97,20 @@ class TestScaleReader:
         assert weight == 45.3
         mock_conn.reset_input_buffer.assert_called_once()
 
+    def test_read_weight_captures_raw_bytes(self, serial_config, mock_serial):
+        """Test que los bytes crudos leídos se entregan a la captura."""
+        mock_conn = MagicMock()
+        mock_conn.is_open = True
+        mock_conn.readline.return_value = b"45.3 kg\n"
+        mock_serial.return_value = mock_conn
+        captured = []
+
+        reader = ScaleReader(serial_config, capture=captured.append)
+        reader.connect()
+        reader.read_weight()
+
+        assert captured == [b"45.3 kg\n"]
+
     def test_read_weight_various_formats(self, serial_config, mock_serial):
         """Test de lectura con diferentes formatos de respuesta."""
         test_cases = [
@@ -244,6 +259,255 @@ class TestPaddedFormat:
         assert mock_conn.read_until.call_count == 2
 
 
+class TestDirectReadMode:
+    """Tests para el modo de lectura directa (sin copias)."""
+
+    @pytest.fixture
+    def pipe(self):
+        """Par de descriptores que simula el puerto serial."""
+        read_fd, write_fd = os.pipe()
+        os.set_blocking(read_fd, False)
+        yield read_fd, write_fd
+        for fd in (read_fd, write_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _connect(self, mock_serial, read_fd, capture=None, **kwargs):
+        mock_conn = MagicMock()
+        mock_conn.is_open = True
+        mock_conn.fileno.return_value = read_fd
+        mock_serial.return_value = mock_conn
+        config = SerialConfig(timeout=0.05, read_mode="direct", **kwargs)
+        reader = ScaleReader(config, capture=capture)
+        reader.connect()
+        return reader, mock_conn
+
+    def test_invalid_read_mode(self):
+        """Test que un modo de lectura inválido lanza error."""
+        with pytest.raises(ValueError, match="Modo de lectura"):
+            ScaleReader(SerialConfig(read_mode="inexistente"))
+
+    def test_read_standard(self, mock_serial, pipe):
+        """Test de lectura standard directa desde el descriptor."""
+        read_fd, write_fd = pipe
+        reader, mock_conn = self._connect(mock_serial, read_fd)
+        os.write(write_fd, b"Weight: 45.3 kg\n")
+
+        assert reader.read_weight() == 45.3
+        mock_conn.reset_input_buffer.assert_called_once()
+        mock_conn.readline.assert_not_called()
+
+    def test_read_padded_skips_garbage(self, mock_serial, pipe):
+        """Test que en formato padded se descartan tramas parciales."""
+        read_fd, write_fd = pipe
+        reader, _ = self._connect(mock_serial, read_fd, weight_format="padded")
+        os.write(write_fd, b'000\r\x80\x02"0 000060000000\r')
+
+        assert reader.read_weight() == 60.0
+
+    def test_read_captures_raw_bytes(self, mock_serial, pipe):
+        """Test que la lectura directa entrega los bytes leídos a la captura."""
+        read_fd, write_fd = pipe
+        captured = []
+        reader, _ = self._connect(mock_serial, read_fd, capture=captured.append)
+        os.write(write_fd, b"Weight: 45.3 kg\n")
+
+        reader.read_weight()
+
+        assert b"".join(captured) == b"Weight: 45.3 kg\n"
+
+    def test_read_padded_no_pattern(self, mock_serial, pipe):
+        """Test que sin trama válida se lanza error tras los reintentos."""
+        read_fd, write_fd = pipe
+        reader, _ = self._connect(mock_serial, read_fd, weight_format="padded")
+        os.write(write_fd, b'\x80\x02\r' * 5)
+
+        with pytest.raises(ValueError, match="No se encontró trama válida"):
+            reader.read_weight()
+
+    def test_read_timeout(self, mock_serial, pipe):
+        """Test que un timeout sin datos lanza ValueError."""
+        read_fd, _ = pipe
+        reader, _ = self._connect(mock_serial, read_fd)
+
+        with pytest.raises(ValueError):
+            reader.read_weight()
+
+    def test_read_disconnected(self, mock_serial, pipe):
+        """Test que un puerto cerrado lanza SerialException."""
+        read_fd, write_fd = pipe
+        reader, _ = self._connect(mock_serial, read_fd)
+        os.close(write_fd)
+
+        with pytest.raises(serial.SerialException):
+            reader.read_weight()
+
+
+class TestDeviceCommands:
+    """Tests para comandos de la báscula (tara, cero)."""
+
+    @pytest.fixture
+    def command_config(self):
+        """Configuración con comandos y confirmación."""
+        return SerialConfig(
+            commands={"tare": "T\r", "zero": "Z\r"},
+            command_ack="OK\r",
+        )
+
+    def test_tare_then_read(self, command_config, mock_serial):
+        """Test que limpia el buffer antes del comando y tara y lee en una secuencia."""
+        mock_conn = MagicMock()
+        mock_conn.is_open = True
+        mock_conn.read_until.return_value = b"12.0 kg\nOK\r"
+        mock_conn.readline.return_value = b"0.0 kg\n"
+        mock_serial.return_value = mock_conn
+
+        reader = ScaleReader(command_config)
+        reader.connect()
+        weight = reader.execute_command("tare", read_weight=True)
+
+        assert weight == 0.0
+        mock_conn.write.assert_called_once_with(b"T\r")
+        mock_conn.read_until.assert_called_once_with(b"OK\r")
+        calls = [name for name, _, _ in mock_conn.method_calls]
+        assert calls.index("reset_input_buffer") < calls.index("write")
+        assert calls.count("reset_input_buffer") == 1
+
+    def test_command_without_read(self, command_config, mock_serial):
+        """Test de comando sin lectura posterior."""
+        mock_conn = MagicMock()
+        mock_conn.is_open = True
+        mock_conn.read_until.return_value = b"OK\r"
+        mock_serial.return_value = mock_conn
+
+        reader = ScaleReader(command_config)
+        reader.connect()
+
+        assert reader.execute_command("zero") is None
+        mock_conn.readline.assert_not_called()
+
+    def test_command_not_acknowledged(self, command_config, mock_serial):
+        """Test que una confirmación ausente lanza error."""
+        mock_conn = MagicMock()
+        mock_conn.is_open = True
+        mock_conn.read_until.return_value = b"ERR"
+        mock_serial.return_value = mock_conn
+
+        reader = ScaleReader(command_config)
+        reader.connect()
+
+        with pytest.raises(ValueError, match="no confirmó"):
+            reader.execute_command("tare")
+
+    def test_tare_then_read_ignores_stale_frames(self, mock_serial):
+        """Test que con una báscula continua no se lee una trama previa a la tara."""
+        pending = [b"12.0 kg\n", b"12.0 kg\n", b"12.0 kg\n"]
+        mock_conn = MagicMock()
+        mock_conn.is_open = True
+        mock_conn.reset_input_buffer.side_effect = pending.clear
+        mock_conn.write.side_effect = lambda data: pending.append(b"0.0 kg\n")
+        mock_conn.readline.side_effect = lambda: pending.pop(0)
+        mock_serial.return_value = mock_conn
+
+        reader = ScaleReader(SerialConfig(commands={"tare": "T\r"}))
+        reader.connect()
+
+        assert reader.execute_command("tare", read_weight=True) == 0.0
+
+    def test_unknown_command(self, command_config, mock_serial):
+        """Test que un comando no configurado lanza error."""
+        reader = ScaleReader(command_config)
+        reader.connect()
+
+        with pytest.raises(ValueError, match="no soportado"):
+            reader.execute_command("print")
+
+    def test_tare_then_read_direct(self, mock_serial):
+        """Test de tara y lectura en modo directo sobre el descriptor."""
+        read_fd, write_fd = os.pipe()
+        os.set_blocking(read_fd, False)
+        try:
+            mock_conn = MagicMock()
+            mock_conn.is_open = True
+            mock_conn.fileno.return_value = read_fd
+            mock_serial.return_value = mock_conn
+            config = SerialConfig(
+                timeout=0.1,
+                read_mode="direct",
+                commands={"tare": "T\r"},
+                command_ack="OK\r",
+            )
+            reader = ScaleReader(config)
+            reader.connect()
+
+            def flush():
+                # reset_input_buffer descarta lo pendiente en el kernel
+                while True:
+                    try:
+                        if not os.read(read_fd, 4096):
+                            break
+                    except BlockingIOError:
+                        break
+
+            mock_conn.reset_input_buffer.side_effect = flush
+            mock_conn.write.side_effect = lambda data: os.write(
+                write_fd, b"OK\r0.0 kg\n"
+            )
+            # Tramas enviadas por la báscula antes de la tara
+            os.write(write_fd, b"12.0 kg\n12.0 kg\n")
+
+            assert reader.execute_command("tare", read_weight=True) == 0.0
+            mock_conn.reset_input_buffer.assert_called_once()
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
+
+
+class TestPollMode:
+    """Tests para básculas en modo poll (petición/respuesta)."""
+
+    def test_poll_writes_request_before_reading(self, mock_serial):
+        """Test que en modo poll se escribe la petición y se lee la respuesta."""
+        mock_conn = MagicMock()
+        mock_conn.is_open = True
+        mock_conn.readline.return_value = b"45.3 kg\n"
+        mock_serial.return_value = mock_conn
+
+        reader = ScaleReader(SerialConfig(poll_request="\x05"))
+        reader.connect()
+        weight = reader.read_weight()
+
+        assert weight == 45.3
+        mock_conn.write.assert_called_once_with(b"\x05")
+        assert mock_conn.method_calls.index(
+            ("write", (b"\x05",), {})
+        ) < mock_conn.method_calls.index(("readline", (), {}))
+
+    def test_poll_timeout(self, mock_serial):
+        """Test que el puerto usa el timeout de poll."""
+        reader = ScaleReader(
+            SerialConfig(poll_request="P\r", poll_timeout=0.2, timeout=1.0)
+        )
+        reader.connect()
+
+        assert mock_serial.call_args.kwargs["timeout"] == 0.2
+
+    def test_address_in_request(self, mock_serial):
+        """Test que {address} se sustituye en la petición."""
+        mock_conn = MagicMock()
+        mock_conn.is_open = True
+        mock_conn.readline.return_value = b"1.0\n"
+        mock_serial.return_value = mock_conn
+
+        reader = ScaleReader(SerialConfig(poll_request="{address}P\r", address="07"))
+        reader.connect()
+        reader.read_weight()
+
+        mock_conn.write.assert_called_once_with(b"07P\r")
+
+
 class TestParseFunctions:
     """Tests para las funciones de parseo independientes."""
 
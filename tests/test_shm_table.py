@@ -0,0 +1,112 @@
+"""Tests para la tabla de pesos en memoria compartida."""
+
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from scale_telemetry.shm_table import WeightTable, WeightTableReader
+
+
+@pytest.fixture
+def table():
+    """Tabla con dos dispositivos (nombre único por test)."""
+    table = WeightTable(f"scale-test-{os.getpid()}", ["scale-1", "scale-2"])
+    yield table
+    table.close()
+
+
+class TestWeightTable:
+    """Tests para WeightTable y WeightTableReader."""
+
+    def test_initial_slots_empty(self, table):
+        """Test que un dispositivo sin lecturas no tiene peso."""
+        with WeightTableReader(table.name) as reader:
+            assert reader.devices() == ["scale-1", "scale-2"]
+            sample = reader.read("scale-1")
+        assert sample.weight is None
+        assert sample.connected is False
+
+    def test_update_and_read(self, table):
+        """Test que el lector ve la última lectura publicada."""
+        table.update("scale-1", 45.3, timestamp=1000.0)
+        table.update("scale-1", 46.0, timestamp=1001.0)
+        with WeightTableReader(table.name) as reader:
+            sample = reader.read("scale-1")
+            other = reader.read("scale-2")
+
+        assert sample.weight == 46.0
+        assert sample.timestamp == 1001.0
+        assert sample.connected is True
+        assert sample.seq == 4
+        assert other.weight is None
+
+    def test_disconnect_keeps_last_weight(self, table):
+        """Test que la desconexión conserva el último peso."""
+        table.update("scale-1", 45.3, timestamp=1000.0)
+        table.set_connected("scale-1", False)
+        with WeightTableReader(table.name) as reader:
+            sample = reader.read("scale-1")
+
+        assert sample.weight == 45.3
+        assert sample.connected is False
+
+    def test_unknown_device_ignored(self, table):
+        """Test que un dispositivo fuera de la tabla se ignora al escribir."""
+        table.update("scale-9", 1.0)
+        with WeightTableReader(table.name) as reader:
+            with pytest.raises(KeyError):
+                reader.read("scale-9")
+
+    def test_device_id_too_long(self):
+        """Test que un device_id que no entra en el slot se rechaza."""
+        with pytest.raises(ValueError, match="demasiado largo"):
+            WeightTable(f"scale-test-long-{os.getpid()}", ["x" * 33])
+
+    def test_missing_table(self):
+        """Test que abrir una tabla inexistente lanza FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            WeightTableReader(f"scale-test-missing-{os.getpid()}")
+
+    def test_reads_consistent_during_writes(self, table):
+        """Test que el lector nunca ve un slot a medio escribir."""
+        stop = threading.Event()
+
+        def writer():
+            k = 0
+            while not stop.is_set():
+                k += 1
+                table.update("scale-1", float(k), timestamp=float(k))
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            with WeightTableReader(table.name) as reader:
+                for _ in range(20000):
+                    sample = reader.read("scale-1")
+                    if sample.weight is not None:
+                        assert sample.weight == sample.timestamp
+        finally:
+            stop.set()
+            thread.join()
+
+    def test_read_from_other_process(self, table):
+        """Test que otro proceso lee la tabla sin eliminarla al terminar."""
+        table.update("scale-2", 12.5)
+        code = (
+            "from scale_telemetry.shm_table import WeightTableReader\n"
+            f"r = WeightTableReader({table.name!r})\n"
+            "print(r.read('scale-2').weight)\n"
+            "r.close()\n"
+        )
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True,
+            env=env, timeout=30,
+        )
+
+        assert result.stdout.strip() == "12.5", result.stderr
+        with WeightTableReader(table.name) as reader:
+            assert reader.read("scale-2").weight == 12.5
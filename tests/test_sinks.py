@@ -0,0 +1,372 @@
+"""Tests para las salidas adicionales de las lecturas."""
+
+import csv
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from scale_telemetry.sinks import (
+    CSVSink,
+    InfluxSink,
+    MQTTSink,
+    OutputSinks,
+    Reading,
+    Sink,
+)
+
+
+def _readings(n, device_id="scale-1", start=1698765433.0):
+    return [Reading(device_id, 10.0 + i, start + i) for i in range(n)]
+
+
+class RecordingSink(Sink):
+    """Salida en memoria; falla mientras fail sea True."""
+
+    type = "recording"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []
+        self.fail = False
+
+    def write_batch(self, readings):
+        if self.fail:
+            raise OSError("destino caído")
+        self.batches.append(readings)
+
+
+class BlockedSink(Sink):
+    """Salida que no termina de escribir hasta que se libera."""
+
+    type = "blocked"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.release = threading.Event()
+
+        self.calls = 0
+
+    def write_batch(self, readings):
+        self.calls += 1
+        self.release.wait(5)
+
+
+class InfluxStandIn(BaseHTTPRequestHandler):
+    """Servidor local que imita /api/v2/write de InfluxDB."""
+
+    requests = []
+    status = 204
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        InfluxStandIn.requests.append((self.path, dict(self.headers), body.decode()))
+        self.send_response(InfluxStandIn.status)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def influx_server():
+    InfluxStandIn.requests = []
+    InfluxStandIn.status = 204
+    server = HTTPServer(("127.0.0.1", 0), InfluxStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestSinkBuffer:
+    """Tests del buffer, los lotes y el desborde."""
+
+    def test_flush_in_batches(self):
+        """Test que lo pendiente se escribe en lotes de batch_size."""
+        sink = RecordingSink(batch_size=3)
+        for reading in _readings(7):
+            sink.write(reading)
+
+        assert sink.flush() == 7
+        assert [len(b) for b in sink.batches] == [3, 3, 1]
+        assert sink.written == 7
+        assert sink.pending == 0
+
+    @pytest.mark.parametrize("overflow,kept", [
+        ("drop_oldest", [12.0, 13.0, 14.0]),
+        ("drop_newest", [10.0, 11.0, 12.0]),
+    ])
+    def test_overflow(self, overflow, kept):
+        """Test de las políticas de desborde con el buffer lleno."""
+        sink = RecordingSink(batch_size=3, buffer=3, overflow=overflow)
+        for reading in _readings(5):
+            sink.write(reading)
+        sink.flush()
+
+        assert [r.weight for r in sink.batches[0]] == kept
+        assert sink.dropped == 2
+
+    def test_failed_batch_retried(self):
+        """Test que un lote fallido queda pendiente y se reintenta en orden."""
+        sink = RecordingSink(batch_size=2)
+        for reading in _readings(3):
+            sink.write(reading)
+        sink.fail = True
+        with pytest.raises(OSError):
+            sink.flush()
+        assert sink.pending == 3
+
+        sink.fail = False
+        sink.write(_readings(1, start=2e9)[0])
+        sink.flush()
+        weights = [r.weight for b in sink.batches for r in b]
+        assert weights == [10.0, 11.0, 12.0, 10.0]
+
+    def test_slow_sink_never_blocks(self):
+        """Test que write() no espera a una salida bloqueada."""
+        sink = BlockedSink(batch_size=1, buffer=10, flush_interval=0.05)
+        sink.start()
+        try:
+            start = time.monotonic()
+            for reading in _readings(100):
+                sink.write(reading)
+            assert time.monotonic() - start < 0.1
+            assert sink.dropped >= 89
+        finally:
+            sink.release.set()
+            sink.stop()
+
+    def test_stop_skips_flush_while_writing(self):
+        """Test que stop() no escribe en paralelo con el hilo todavía ocupado."""
+        sink = BlockedSink(batch_size=1, buffer=10, flush_interval=0.05)
+        sink.start()
+        try:
+            for reading in _readings(3):
+                sink.write(reading)
+            deadline = time.monotonic() + 2
+            while not sink.calls and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            sink.stop()
+
+            assert sink.calls == 1
+            assert sink.pending == 2
+        finally:
+            sink.release.set()
+
+    def test_background_flush(self):
+        """Test que el hilo escribe al llenarse un lote sin esperar el intervalo."""
+        sink = RecordingSink(batch_size=2, flush_interval=10.0)
+        sink.start()
+        try:
+            for reading in _readings(2):
+                sink.write(reading)
+            deadline = time.monotonic() + 2
+            while not sink.batches and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert len(sink.batches) == 1
+        finally:
+            sink.stop()
+
+    @pytest.mark.parametrize("params", [
+        {"batch_size": 0},
+        {"batch_size": 10, "buffer": 5},
+        {"flush_interval": 0},
+        {"overflow": "block"},
+    ])
+    def test_invalid(self, params):
+        """Test de validación de los parámetros del buffer."""
+        with pytest.raises(ValueError):
+            RecordingSink(**params)
+
+
+class TestInfluxSink:
+    """Tests para InfluxSink."""
+
+    def test_line_protocol(self):
+        """Test del formato line protocol con escape de tags."""
+        sink = InfluxSink(path="unused")
+        lines = sink.format([Reading("tolva 1,a", 45.3, 1698765433.0), Reading("s", 7, 1.5)])
+        assert lines == (
+            "weight,device=tolva\\ 1\\,a value=45.3 1698765433000\n"
+            "weight,device=s value=7.0 1500\n"
+        )
+
+    def test_file(self, tmp_path):
+        """Test de escritura en archivo local."""
+        path = tmp_path / "influx" / "weights.lp"
+        sink = InfluxSink(path=str(path))
+        for reading in _readings(2):
+            sink.write(reading)
+        sink.flush()
+        assert path.read_text().splitlines() == [
+            "weight,device=scale-1 value=10.0 1698765433000",
+            "weight,device=scale-1 value=11.0 1698765434000",
+        ]
+
+    def test_http(self, influx_server):
+        """Test de escritura HTTP contra un servidor local."""
+        sink = InfluxSink(url=influx_server, bucket="pesanet", org="planta", token="secreto")
+        for reading in _readings(3):
+            sink.write(reading)
+        sink.flush()
+
+        path, headers, body = InfluxStandIn.requests[0]
+        assert path == "/api/v2/write?bucket=pesanet&org=planta&precision=ms"
+        assert headers["Authorization"] == "Token secreto"
+        assert len(body.splitlines()) == 3
+
+    def test_http_error_keeps_readings(self, influx_server):
+        """Test que un error HTTP deja el lote pendiente."""
+        InfluxStandIn.status = 503
+        sink = InfluxSink(url=influx_server)
+        sink.write(_readings(1)[0])
+        with pytest.raises(OSError):
+            sink.flush()
+        assert sink.pending == 1
+
+    @pytest.mark.parametrize("status", [400, 401])
+    def test_http_rejected_batch_dropped(self, influx_server, status):
+        """Test que un lote rechazado (4xx) se descarta y no bloquea a los siguientes."""
+        InfluxStandIn.status = status
+        sink = InfluxSink(url=influx_server, batch_size=2)
+        for reading in _readings(3):
+            sink.write(reading)
+
+        assert sink.flush() == 0
+        assert sink.pending == 0
+        assert sink.dropped == 3
+        assert sink.failures == 2
+        assert len(InfluxStandIn.requests) == 2
+
+    def test_http_throttled_keeps_readings(self, influx_server):
+        """Test que un 429 se trata como transitorio."""
+        InfluxStandIn.status = 429
+        sink = InfluxSink(url=influx_server)
+        sink.write(_readings(1)[0])
+        with pytest.raises(OSError):
+            sink.flush()
+        assert sink.pending == 1
+
+    def test_url_or_path(self):
+        """Test que se requiere exactamente un destino."""
+        with pytest.raises(ValueError):
+            InfluxSink()
+        with pytest.raises(ValueError):
+            InfluxSink(url="http://x", path="y")
+
+
+class TestCSVSink:
+    """Tests para CSVSink."""
+
+    def test_append_with_header(self, tmp_path):
+        """Test que el encabezado se escribe una sola vez."""
+        path = tmp_path / "readings.csv"
+        sink = CSVSink(str(path))
+        for batch in (_readings(2), _readings(1, "scale-2")):
+            for reading in batch:
+                sink.write(reading)
+            sink.flush()
+
+        with open(path) as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == ["timestamp", "device_id", "weight"]
+        assert rows[1:] == [
+            ["1698765433000", "scale-1", "10.0"],
+            ["1698765434000", "scale-1", "11.0"],
+            ["1698765433000", "scale-2", "10.0"],
+        ]
+
+    def test_rotation(self, tmp_path):
+        """Test de rotación por tamaño conservando backups archivos."""
+        path = tmp_path / "readings.csv"
+        sink = CSVSink(str(path), max_bytes=100, backups=2, batch_size=3)
+        for _ in range(4):
+            for reading in _readings(3):
+                sink.write(reading)
+            sink.flush()
+
+        assert path.exists()
+        assert (tmp_path / "readings.csv.1").exists()
+        assert (tmp_path / "readings.csv.2").exists()
+        assert not (tmp_path / "readings.csv.3").exists()
+        for p in (path, tmp_path / "readings.csv.1"):
+            assert p.read_text().startswith("timestamp,device_id,weight\n")
+
+
+class TestMQTTSink:
+    """Tests para MQTTSink."""
+
+    def test_batch_payload(self):
+        """Test que cada lote se publica como un único mensaje."""
+        published = []
+        sink = MQTTSink(lambda topic, payload: published.append((topic, payload)) or True,
+                        topic="planta/lecturas", batch_size=10)
+        for reading in _readings(3):
+            sink.write(reading)
+        sink.flush()
+
+        assert len(published) == 1
+        topic, payload = published[0]
+        assert topic == "planta/lecturas"
+        assert json.loads(payload)["readings"][1] == {
+            "deviceId": "scale-1", "weight": 11.0, "timestamp": 1698765434000,
+        }
+
+    def test_rejected_publish_kept_pending(self):
+        """Test que un lote que la cola de publicación no acepta no cuenta como escrito."""
+        accept = [False]
+        sink = MQTTSink(lambda topic, payload: accept[0], batch_size=10)
+        for reading in _readings(3):
+            sink.write(reading)
+
+        assert not sink._safe_flush()
+        assert sink.written == 0
+        assert sink.failures == 1
+        assert sink.pending == 3
+
+        accept[0] = True
+        assert sink.flush() == 3
+
+    def test_abstract(self):
+        """Test que una salida sin write_batch no se puede instanciar."""
+        class Incomplete(Sink):
+            type = "incomplete"
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+
+class TestOutputSinks:
+    """Tests para OutputSinks."""
+
+    def test_from_config_fan_out(self, tmp_path):
+        """Test que cada lectura llega a todas las salidas configuradas."""
+        published = []
+        sinks = OutputSinks.from_config(
+            [
+                {"type": "csv", "path": str(tmp_path / "r.csv"), "batch_size": 5},
+                {"type": "mqtt"},
+            ],
+            mqtt_publish=lambda topic, payload: published.append(payload) or True,
+        )
+        sinks.write("scale-1", 45.3, timestamp=1.0)
+        sinks.stop()
+
+        assert (tmp_path / "r.csv").read_text().endswith("1000,scale-1,45.3\n")
+        assert len(published) == 1
+        assert sinks.stats()["csv"]["written"] == 1
+
+    @pytest.mark.parametrize("specs", [
+        [{"type": "parquet"}],
+        [{"type": "csv", "rotate": True}],
+        [{"type": "mqtt"}],
+    ])
+    def test_invalid_config(self, specs):
+        """Test de validación de la configuración."""
+        with pytest.raises(ValueError):
+            OutputSinks.from_config(specs)
@@ -0,0 +1,69 @@
+"""Tests para el estado retenido por dispositivo."""
+
+import pytest
+
+from scale_telemetry.state import DeviceStateTracker
+
+
+@pytest.fixture
+def published():
+    return []
+
+
+@pytest.fixture
+def tracker(published):
+    """Tracker que acumula los estados publicados."""
+    tracker = DeviceStateTracker(lambda device_id, state: published.append(state))
+    tracker.configure_device("scale-1", deadband=0.5)
+    return tracker
+
+
+class TestDeviceStateTracker:
+    """Tests para DeviceStateTracker."""
+
+    def test_first_reading_published(self, tracker, published):
+        """Test que la primera lectura siempre se publica."""
+        tracker.update_weight("scale-1", 10.04)
+
+        assert len(published) == 1
+        assert published[0]["deviceId"] == "scale-1"
+        assert published[0]["connected"] is True
+        assert published[0]["weight"] == 10.0
+        assert published[0]["timestamp"] is not None
+
+    def test_changes_within_deadband_suppressed(self, tracker, published):
+        """Test que variaciones dentro del deadband no se publican."""
+        tracker.update_weight("scale-1", 10.0)
+        tracker.update_weight("scale-1", 10.3)
+        tracker.update_weight("scale-1", 10.5)
+        tracker.update_weight("scale-1", 10.6)
+
+        assert [s["weight"] for s in published] == [10.0, 10.6]
+
+    def test_zero_deadband_reports_any_change(self, tracker, published):
+        """Test que sin deadband se publica cualquier cambio, pero no repetidos."""
+        tracker.update_weight("scale-2", 1.0)
+        tracker.update_weight("scale-2", 1.0)
+        tracker.update_weight("scale-2", 1.1)
+
+        assert [s["weight"] for s in published] == [1.0, 1.1]
+
+    def test_connection_change_published(self, tracker, published):
+        """Test que la desconexión se publica conservando el último peso."""
+        tracker.update_weight("scale-1", 10.0)
+        tracker.update_connection("scale-1", False)
+        tracker.update_connection("scale-1", False)
+
+        assert len(published) == 2
+        assert published[1]["connected"] is False
+        assert published[1]["weight"] == 10.0
+
+    def test_republish(self, tracker, published):
+        """Test que republish envía el estado de todos los dispositivos."""
+        tracker.update_weight("scale-1", 10.0)
+        tracker.update_connection("scale-2", False)
+        published.clear()
+
+        tracker.republish()
+
+        assert sorted(s["deviceId"] for s in published) == ["scale-1", "scale-2"]
@@ -0,0 +1,214 @@
+"""Tests para las trazas de comandos."""
+
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+from scale_telemetry import tracing
+from scale_telemetry.config import DeviceConfig, MQTTConfig, SerialConfig
+from scale_telemetry.mqtt_client import ScaleMQTTClient
+from scale_telemetry.serial_reader import ScaleReader
+from scale_telemetry.tracing import Tracer
+
+
+def _sync_submit(fn, *args, **kwargs):
+    fn(*args, **kwargs)
+
+
+def _spans(path):
+    """Spans exportados, por nombre."""
+    spans = {}
+    with open(path) as f:
+        for line in f:
+            request = json.loads(line)
+            for resource in request["resourceSpans"]:
+                for scope in resource["scopeSpans"]:
+                    for span in scope["spans"]:
+                        spans.setdefault(span["name"], []).append(span)
+    return spans
+
+
+def _attributes(span):
+    return {
+        a["key"]: next(iter(a["value"].values())) for a in span["attributes"]
+    }
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    return Tracer(str(tmp_path / "traces.jsonl"), sample_rate=1.0)
+
+
+class TestTracer:
+    """Tests para Tracer y los spans."""
+
+    def test_sampling(self, tracer):
+        """Test que sample_rate 0 no traza y 1 traza todo."""
+        assert tracer.start_trace("get_weight") is not None
+        tracer.sample_rate = 0.0
+        assert tracer.start_trace("get_weight") is None
+
+    def test_noop_without_active_span(self, tracer):
+        """Test que sin span activo span() no registra nada."""
+        with tracing.span("read_attempt") as span:
+            span.set_error("timeout")
+        assert tracer.flush() == 0
+
+    def test_export_otlp_json(self, tracer):
+        """Test del formato OTLP/JSON exportado."""
+        root = tracer.start_trace("get_weight", **{"device.id": "scale-1"})
+        with tracing.activate(root):
+            with tracing.span("read_weight"):
+                with tracing.span("read_attempt", attempt=2) as attempt:
+                    attempt.set_error("timeout")
+        root.end()
+
+        assert tracer.flush() == 3
+        with open(tracer.path) as f:
+            request = json.loads(f.readline())
+        resource = request["resourceSpans"][0]
+        assert resource["resource"]["attributes"] == [
+            {"key": "service.name", "value": {"stringValue": "scale-telemetry"}}
+        ]
+        spans = {s["name"]: s for s in resource["scopeSpans"][0]["spans"]}
+
+        root_json = spans["get_weight"]
+        assert len(root_json["traceId"]) == 32
+        assert len(root_json["spanId"]) == 16
+        assert "parentSpanId" not in root_json
+        assert _attributes(root_json) == {"device.id": "scale-1"}
+        assert spans["read_weight"]["parentSpanId"] == root_json["spanId"]
+        assert spans["read_attempt"]["parentSpanId"] == spans["read_weight"]["spanId"]
+        assert {s["traceId"] for s in spans.values()} == {root_json["traceId"]}
+        assert _attributes(spans["read_attempt"]) == {"attempt": "2"}
+        assert spans["read_attempt"]["status"] == {"code": 2, "message": "timeout"}
+        assert root_json["status"] == {"code": 1}
+        start = int(root_json["startTimeUnixNano"])
+        end = int(root_json["endTimeUnixNano"])
+        assert start <= int(spans["read_weight"]["startTimeUnixNano"]) <= end
+
+    def test_exception_marks_error(self, tracer):
+        """Test que una excepción dentro del span lo marca con error."""
+        root = tracer.start_trace("get_weight")
+        with tracing.activate(root):
+            with pytest.raises(ValueError):
+                with tracing.span("read_weight"):
+                    raise ValueError("sin trama")
+        assert tracing.current_span() is None
+        root.end()
+        tracer.flush()
+        span = _spans(tracer.path)["read_weight"][0]
+        assert span["status"]["message"] == "sin trama"
+
+    def test_ring_drops_oldest(self, tmp_path):
+        """Test que con el ring lleno se descartan los spans más viejos."""
+        tracer = Tracer(str(tmp_path / "t.jsonl"), sample_rate=1.0, capacity=4)
+        for i in range(6):
+            tracer.start_trace(f"span-{i}").end()
+
+        assert tracer.dropped == 2
+        assert tracer.flush() == 4
+        assert sorted(_spans(tracer.path)) == [f"span-{i}" for i in range(2, 6)]
+
+    def test_span_ends_once(self, tracer):
+        """Test que terminar un span dos veces lo registra una sola vez."""
+        span = tracer.start_trace("get_weight")
+        span.end()
+        span.end()
+        assert tracer.flush() == 1
+
+    def test_exporter_thread(self, tracer):
+        """Test que stop() exporta lo pendiente."""
+        tracer.start()
+        tracer.start_trace("get_weight").end()
+        tracer.stop()
+        assert tracer.exported == 1
+        assert "get_weight" in _spans(tracer.path)
+
+
+class TestCommandTracing:
+    """Tests de las trazas de los comandos en ScaleMQTTClient."""
+
+    @pytest.fixture
+    def client(self, tracer):
+        device = DeviceConfig(device_id="scale-1", serial_port="/dev/ttyUSB0")
+        client = ScaleMQTTClient(
+            MQTTConfig(broker="localhost"), [device], {"scale-1": Mock(return_value=12.5)}
+        )
+        client._executor.submit = _sync_submit
+        client.publisher.publish = Mock()
+        client.tracer = tracer
+        return client
+
+    def test_get_weight_spans(self, client, tracer):
+        """Test de los spans de recepción, cola, lectura y publicación."""
+        msg = Mock(topic="pesanet/devices/scale-1/command",
+                   payload=b'{"command": "get_weight"}')
+        client._on_message(None, None, msg)
+        tracer.flush()
+
+        spans = _spans(tracer.path)
+        root = spans["get_weight"][0]
+        assert _attributes(root) == {
+            "device.id": "scale-1", "command": "get_weight", "transport": "mqtt",
+        }
+        for name in ("queue", "read_weight", "publish"):
+            assert spans[name][0]["parentSpanId"] == root["spanId"]
+        assert tracing.current_span() is None
+
+    def test_read_error_traced(self, client, tracer):
+        """Test que un error de lectura queda en el span raíz."""
+        client.weight_callbacks["scale-1"].side_effect = ValueError("sin trama")
+        client.dispatch("scale-1", {"command": "get_weight"}, reply=Mock())
+        tracer.flush()
+
+        spans = _spans(tracer.path)
+        assert spans["get_weight"][0]["status"]["code"] == 2
+        assert _attributes(spans["get_weight"][0])["transport"] == "local"
+        assert spans["read_weight"][0]["status"]["message"] == "sin trama"
+
+    def test_not_sampled(self, client, tracer):
+        """Test que un comando no muestreado no genera spans."""
+        tracer.sample_rate = 0.0
+        client.dispatch("scale-1", {"command": "get_weight"})
+        assert tracer.flush() == 0
+
+
+class TestReaderSpans:
+    """Tests de los spans por intento de lectura de ScaleReader."""
+
+    @patch("scale_telemetry.serial_reader.serial.Serial")
+    def test_padded_attempts(self, mock_serial_class, tracer):
+        """Test de un span por intento en formato padded."""
+        mock_serial = Mock(is_open=True)
+        mock_serial.read_until.side_effect = [b"000\r", b'"0 000125000000\r']
+        mock_serial_class.return_value = mock_serial
+        reader = ScaleReader(SerialConfig(weight_format="padded"))
+        reader.connect()
+
+        root = tracer.start_trace("get_weight")
+        with tracing.activate(root):
+            assert reader.read_weight() == 125.0
+        root.end()
+        tracer.flush()
+
+        spans = _spans(tracer.path)
+        attempts = spans["read_attempt"]
+        assert [_attributes(s)["attempt"] for s in attempts] == ["1", "2"]
+        assert spans["reset_input"][0]["parentSpanId"] == root.span_id
+
+    @patch("scale_telemetry.serial_reader.serial.Serial")
+    def test_command_reset_span(self, mock_serial_class, tracer):
+        """Test que la limpieza del buffer antes de un comando tiene su span."""
+        mock_serial_class.return_value = Mock(is_open=True)
+        reader = ScaleReader(SerialConfig(commands={"tare": "T\r\n"}))
+        reader.connect()
+
+        root = tracer.start_trace("tare")
+        with tracing.activate(root):
+            reader.execute_command("tare")
+        root.end()
+        tracer.flush()
+
+        assert [s["name"] for s in _spans(tracer.path)["reset_input"]] == ["reset_input"]
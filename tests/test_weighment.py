@@ -0,0 +1,86 @@
+"""Tests para la detección de pesajes."""
+
+import pytest
+
+from scale_telemetry.config import WeighmentConfig
+from scale_telemetry.weighment import (
+    EMPTY,
+    LOADING,
+    STABLE,
+    UNLOADING,
+    WeighmentDetector,
+)
+
+
+@pytest.fixture
+def detector():
+    return WeighmentDetector(
+        "scale-1", WeighmentConfig(threshold=10.0, stable_range=0.5, stable_samples=3)
+    )
+
+
+def feed(detector, weights, start=1000.0, step=0.5):
+    """Alimenta el detector con una muestra cada step segundos; retorna los eventos."""
+    events = []
+    for i, weight in enumerate(weights):
+        event = detector.update(weight, start + i * step)
+        if event is not None:
+            events.append(event)
+    return events
+
+
+class TestWeighmentDetector:
+    """Tests para WeighmentDetector."""
+
+    def test_empty_scale_emits_nothing(self, detector):
+        """Test que una báscula vacía no genera eventos."""
+        assert feed(detector, [0.0, 2.0, 9.9, 0.0]) == []
+        assert detector.state == EMPTY
+
+    def test_single_event_per_transaction(self, detector):
+        """Test que una carga completa genera un único evento al descargar."""
+        weights = [0, 300, 900, 1000, 1000.2, 999.9, 1000.1, 600, 200, 0, 0]
+        events = feed(detector, weights)
+
+        assert len(events) == 1
+        event = events[0]
+        assert event["deviceId"] == "scale-1"
+        assert event["event"] == "weighment"
+        assert event["weight"] == pytest.approx(1000.1, abs=0.1)
+        assert event["samples"] == 8
+        assert event["duration"] == pytest.approx(4.0)
+        assert event["start"] == 1000500
+        assert event["end"] == 1004500
+
+    def test_state_transitions(self, detector):
+        """Test de la secuencia empty → loading → stable → unloading → empty."""
+        states = []
+        for weight in [0, 500, 1000, 1000, 1000, 400, 0]:
+            detector.update(weight)
+            states.append(detector.state)
+
+        assert states == [EMPTY, LOADING, LOADING, LOADING, STABLE, UNLOADING, EMPTY]
+
+    def test_peak_stable_weight(self, detector):
+        """Test que se reporta el mayor peso estable (carga en dos etapas)."""
+        weights = [500, 500, 500, 1200, 1200, 1200, 0]
+        events = feed(detector, weights)
+
+        assert events[0]["weight"] == 1200.0
+
+    def test_unstable_load_emits_nothing(self, detector):
+        """Test que una carga que nunca se estabiliza no genera evento."""
+        assert feed(detector, [100, 400, 800, 300, 0]) == []
+
+    def test_consecutive_transactions(self, detector):
+        """Test que cada transacción genera su propio evento."""
+        weights = [800, 800, 800, 0, 1500, 1500, 1500, 0]
+        events = feed(detector, weights)
+
+        assert [e["weight"] for e in events] == [800.0, 1500.0]
+        assert [e["samples"] for e in events] == [3, 3]
+
+    def test_invalid_window_rejected(self):
+        """Test que una ventana de menos de dos muestras se rechaza."""
+        with pytest.raises(ValueError, match="stable_samples"):
+            WeighmentDetector("scale-1", WeighmentConfig(stable_samples=1))